@@ -1,5 +1,6 @@
 from .orchestrator import OrchestratorAgent
 from .expert import SportExpertAgent
 from .table_generator import TableGeneratorAgent
+from .program_editor import ProgramEditorAgent
 
-__all__ = ["OrchestratorAgent", "SportExpertAgent", "TableGeneratorAgent"] 
\ No newline at end of file
+__all__ = ["OrchestratorAgent", "SportExpertAgent", "TableGeneratorAgent", "ProgramEditorAgent"] 
\ No newline at end of file
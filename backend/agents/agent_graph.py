@@ -6,8 +6,12 @@ from langgraph.graph import END, START, StateGraph
 from langgraph.prebuilt import ToolNode
 from langgraph.graph.message import add_messages
 import json
+import time
 import traceback
 
+from monitoring.instruments import ERRORS, GRAPH_STEP_SECONDS, TOOL_CALL_SECONDS
+from monitoring.tracing import span
+
 logger = logging.getLogger(__name__)
 
 class AgentState(TypedDict):
@@ -73,32 +77,43 @@ class AgentGraph:
         wrapped_tools = []
         
         for tool in tools:
-            original_func = tool.func
-            
-            def wrapped_func(*args, **kwargs):
-                tool_name = original_func.__name__
-                self.logger.info(f"EXÉCUTION OUTIL: {tool_name} - Arguments: {json.dumps(args)} {json.dumps(kwargs)}")
+            # Copier l'outil avec la nouvelle fonction
+            new_tool = tool.copy()
+            new_tool.func = self._wrap_tool_func(tool.func)
+            wrapped_tools.append(new_tool)
+        
+        return wrapped_tools
+    
+    def _wrap_tool_func(self, original_func):
+        """Enveloppe la fonction d'un outil (une fermeture par outil) avec logs et mesure de durée."""
+        tool_name = original_func.__name__
+        
+        def wrapped_func(*args, **kwargs):
+            arguments = f"{json.dumps(args)} {json.dumps(kwargs)}"
+            self.logger.info(f"EXÉCUTION OUTIL: {tool_name} ({len(arguments)} caractères d'arguments)")
+            self.logger.debug("ARGUMENTS OUTIL %s: %s", tool_name, arguments)
+            with span(f"tool.{tool_name}", tool=tool_name, argument_chars=len(arguments)) as tool_span:
+                start = time.perf_counter()
                 try:
                     result = original_func(*args, **kwargs)
-                    self.logger.info(f"RÉSULTAT OUTIL {tool_name}: {result[:100]}..." if isinstance(result, str) else f"RÉSULTAT OUTIL {tool_name}: {result}")
-                    return result
                 except Exception as e:
+                    TOOL_CALL_SECONDS.labels(tool=tool_name, outcome="error").observe(time.perf_counter() - start)
+                    ERRORS.labels(component=f"tool_{tool_name}").inc()
                     self.logger.error(f"ERREUR OUTIL {tool_name}: {str(e)}")
                     raise
-            
-            # Copier l'outil avec la nouvelle fonction
-            new_tool = tool.copy()
-            new_tool.func = wrapped_func
-            wrapped_tools.append(new_tool)
+                TOOL_CALL_SECONDS.labels(tool=tool_name, outcome="ok").observe(time.perf_counter() - start)
+                tool_span.set_attribute("result_chars", len(str(result)))
+            self.logger.info(f"RÉSULTAT OUTIL {tool_name}: {result[:100]}..." if isinstance(result, str) else f"RÉSULTAT OUTIL {tool_name}: {result}")
+            return result
         
-        return wrapped_tools
+        return wrapped_func
     
     def _should_continue(self, state: AgentState) -> Literal["tools", END]:
         """Détermine si l'exécution doit continuer avec les outils ou se terminer."""
         messages = state['messages']
         last_message = messages[-1]
         
-        self.logger.debug(f"DÉCISION CONTINUITÉ: Message: {last_message}")
+        self.logger.debug("DÉCISION CONTINUITÉ: Message: %s", last_message)
         
         # Si l'agent fait un appel d'outil, router vers "tools"
         if hasattr(last_message, 'tool_calls') and last_message.tool_calls:
@@ -115,13 +130,17 @@ class AgentGraph:
         context = state.get('context', {})
         
         self.logger.info(f"APPEL MODEL: Nombre de messages: {len(messages)}")
-        self.logger.debug(f"CONTEXTE: {json.dumps(context)}")
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("CONTEXTE: %s", json.dumps(context))
         
         try:
-            response = self.llm.invoke(messages)
+            with span("graph.agent", messages=len(messages)), GRAPH_STEP_SECONDS.labels(node="agent").time():
+                # Modèle de chat (LLMRouter): les messages et l'AIMessage rendu gardent rôles, appels d'outils et métadonnées
+                response = self.llm.invoke(messages)
             self.logger.info(f"RÉPONSE MODEL: {response.content[:100]}...")
             return {"messages": [response]}
         except Exception as e:
+            ERRORS.labels(component="agent_graph").inc()
             self.logger.error(f"ERREUR APPEL MODEL: {str(e)}")
             error_message = AIMessage(content=f"Désolé, j'ai rencontré une erreur. Veuillez réessayer.")
             return {"messages": [error_message]}
@@ -148,7 +167,9 @@ class AgentGraph:
         # Exécuter le graphe
         self.logger.info("DÉMARRAGE EXÉCUTION AGENT")
         try:
-            result = self.graph.invoke(initial_state)
+            with span("graph.run", message_chars=len(user_message)) as run_span:
+                result = self.graph.invoke(initial_state)
+                run_span.set_attribute("messages", len(result["messages"]))
             messages = result["messages"]
             
             # Récupérer la réponse finale
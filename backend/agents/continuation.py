@@ -0,0 +1,189 @@
+import logging
+import re
+import time
+from typing import Any, Optional
+
+from models.llm_response import complete, finish_reason, response_text
+from monitoring.instruments import RETRIES
+
+logger = logging.getLogger("athly.continuation")
+
+# Raisons de fin indiquant que la limite de tokens a été atteinte
+LENGTH_FINISH_REASONS = {"length", "max_tokens", "model_length"}
+
+# Raisons de fin indiquant que le modèle a terminé de lui-même sa réponse
+STOP_FINISH_REASONS = {"stop", "end_turn", "stop_sequence", "eos", "eos_token"}
+
+_WEEK_NUMBERS = re.compile(r"Semaines?\s+(\d+)(?:\s*(?:-|à|et)\s*(\d+))?", re.IGNORECASE)
+
+
+def _json_is_open(text: str) -> bool:
+    """Indique si un objet JSON est resté ouvert (accolades ou chaîne non fermées)."""
+    depth = 0
+    in_string = False
+    escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+    return in_string or depth > 0
+
+
+def last_week_number(text: str) -> int:
+    """Retourne le plus grand numéro de semaine mentionné dans le texte."""
+    numbers = [0]
+    for match in _WEEK_NUMBERS.finditer(text):
+        numbers.extend(int(group) for group in match.groups() if group)
+    return max(numbers)
+
+
+def is_truncated(text: str, finish_reason: Optional[str] = None, expected_weeks: Optional[int] = None) -> bool:
+    """
+    Détermine si une génération s'est arrêtée avant la fin.
+
+    Args:
+        text: Le texte généré
+        finish_reason: La raison de fin renvoyée par le fournisseur, si connue
+        expected_weeks: Le nombre de semaines attendu dans le programme
+
+    Returns:
+        True si la génération doit être poursuivie
+    """
+    if finish_reason in LENGTH_FINISH_REASONS:
+        return True
+    # Fin signalée par le fournisseur: les heuristiques ne servent que si la raison est inconnue
+    if finish_reason in STOP_FINISH_REASONS:
+        return False
+
+    stripped = text.rstrip()
+    if not stripped:
+        return False
+
+    # Programme structuré: objet JSON non fermé
+    if stripped.lstrip("`json \n").startswith("{"):
+        return _json_is_open(stripped)
+
+    # Bloc de code non fermé
+    if stripped.count("```") % 2 == 1:
+        return True
+
+    # Ligne de tableau interrompue
+    last_line = stripped.rsplit("\n", 1)[-1].strip()
+    if last_line.startswith("|") and not last_line.endswith("|"):
+        return True
+
+    # Semaines manquantes
+    if expected_weeks and last_week_number(stripped) < expected_weeks:
+        return True
+
+    return False
+
+
+def build_continuation_prompt(tail: str, expected_weeks: Optional[int] = None) -> str:
+    """
+    Construit le prompt de continuation à partir de la fin du texte déjà généré.
+
+    Args:
+        tail: Les derniers caractères générés
+        expected_weeks: Le nombre de semaines attendu
+
+    Returns:
+        Le prompt de continuation
+    """
+    scope = f"Le programme complet doit couvrir {expected_weeks} semaines.\n" if expected_weeks else ""
+    return f"""Tu es Athly, un coach sportif IA. Le texte ci-dessous a été interrompu par la limite de longueur.
+{scope}Continue EXACTEMENT là où il s'arrête, dans le même format (mêmes colonnes de tableau, même style).
+Si la dernière ligne est incomplète, recommence cette ligne en entier.
+Ne répète pas ce qui précède et n'ajoute ni introduction ni commentaire.
+
+FIN DU TEXTE:
+{tail}"""
+
+
+def splice_continuation(text: str, continuation: str, max_overlap: int = 500) -> str:
+    """
+    Raccorde une continuation au texte existant.
+
+    Les passages répétés par le modèle (chevauchement en fin de texte, ligne
+    incomplète recommencée) sont retirés.
+
+    Args:
+        text: Le texte déjà généré
+        continuation: Le texte de continuation
+        max_overlap: Taille maximale du chevauchement recherché
+
+    Returns:
+        Le texte raccordé
+    """
+    continuation = re.sub(r"^\s*```(?:markdown|json)?\s*\n", "", continuation)
+    if not continuation.strip():
+        return text
+
+    # Ligne incomplète recommencée par le modèle
+    cut = text.rfind("\n") + 1
+    partial_line = text[cut:].strip()
+    if partial_line and continuation.lstrip().startswith(partial_line):
+        return text[:cut] + continuation.lstrip()
+
+    # Chevauchement exact entre la fin du texte et le début de la continuation
+    for size in range(min(len(text), len(continuation), max_overlap), 10, -1):
+        if text.endswith(continuation[:size]):
+            return text + continuation[size:]
+
+    # Aucun chevauchement: préserver la séparation entre lignes
+    if text.endswith("\n") or continuation.startswith("\n") or not partial_line:
+        return text + continuation
+    return text + continuation if continuation[0] in " |" else text + " " + continuation
+
+
+def generate_with_continuation(llm: Any, prompt: str, expected_weeks: Optional[int] = None,
+                               max_continuations: int = 4, tail_chars: int = 1500) -> str:
+    """
+    Génère un texte long en poursuivant automatiquement les générations tronquées.
+
+    Chaque continuation ne transporte que la fin du texte comme contexte, de sorte
+    qu'un programme complet coûte une génération plus quelques courtes continuations.
+
+    Args:
+        llm: Le modèle de langage
+        prompt: Le prompt initial
+        expected_weeks: Le nombre de semaines attendu
+        max_continuations: Nombre maximum de continuations
+        tail_chars: Nombre de caractères de fin transmis à chaque continuation
+
+    Returns:
+        Le texte complet
+    """
+    response = complete(llm, prompt)
+    text = response_text(response)
+    reason = finish_reason(response)
+
+    for attempt in range(1, max_continuations + 1):
+        if not is_truncated(text, reason, expected_weeks):
+            break
+
+        logger.info(f"Génération tronquée (raison: {reason}), continuation {attempt}/{max_continuations}")
+        RETRIES.labels(component="continuation", reason=str(reason or "truncated")).inc()
+        start_time = time.time()
+        response = complete(llm, build_continuation_prompt(text[-tail_chars:], expected_weeks))
+        continuation = response_text(response)
+        reason = finish_reason(response)
+
+        spliced = splice_continuation(text, continuation)
+        logger.info(f"Continuation {attempt} reçue en {time.time() - start_time:.2f} secondes: {len(spliced) - len(text)} caractères ajoutés")
+        if len(spliced) <= len(text):
+            # Le modèle n'ajoute plus rien: inutile d'insister
+            break
+        text = spliced
+
+    return text
@@ -3,6 +3,8 @@ import logging
 import traceback
 import time
 
+from models.llm_response import response_text
+
 # Configuration du logger
 logger = logging.getLogger("athly.expert")
 
@@ -133,7 +135,7 @@ class SportExpertAgent:
             
             # Génération de la réponse
             logger.info("Invocation du LLM pour générer des conseils")
-            response = self.llm.invoke(prompt)
+            response = response_text(self.llm.invoke(prompt))
             
             logger.info(f"Conseils générés en {time.time() - start_time:.2f} secondes")
             return response
@@ -183,7 +185,7 @@ class SportExpertAgent:
             
             # Génération de la structure
             logger.info("Invocation du LLM pour générer la structure du programme")
-            response = self.llm.invoke(prompt)
+            response = response_text(self.llm.invoke(prompt))
             
             logger.info(f"Structure du programme générée en {time.time() - start_time:.2f} secondes")
             return response
@@ -222,7 +224,7 @@ class SportExpertAgent:
             
             # Génération des détails du programme
             logger.info("Invocation du LLM pour générer les détails du programme")
-            response = self.llm.invoke(prompt)
+            response = response_text(self.llm.invoke(prompt))
             
             logger.info(f"Détails du programme générés en {time.time() - start_time:.2f} secondes")
             return response
@@ -6,12 +6,20 @@ import logging
 import traceback
 import time
 import json
-import os
 from typing import List, Dict, Any, Optional
 import re
 
 from .expert import SportExpertAgent
 from .table_generator import TableGeneratorAgent
+from .continuation import generate_with_continuation
+from .program_editor import ProgramEditorAgent
+from .router import IntentRouter, ROUTE_KNOWLEDGE, ROUTE_SINGLE_LLM, ROUTE_AGENT_GRAPH, ROUTE_PROGRAM
+from models.program_schema import parse_training_program, program_json_instructions, repair_json_text
+from models.periodization import PeriodizationEngine
+from models.program_index import get_program_index
+from models.markdown_normalizer import normalize_markdown
+from monitoring.instruments import ERRORS, FORMAT_SECONDS, PIPELINE_STAGE_SECONDS
+from monitoring.tracing import span
 
 # Imports LangChain
 from langchain_core.prompts import MessagesPlaceholder
@@ -28,12 +36,19 @@ except ImportError:
 # Obtention du logger
 logger = logging.getLogger("athly.orchestrator")
 
+# Seuils de similarité pour réutiliser tel quel ou adapter un programme existant
+SIMILAR_PROGRAM_REUSE_SCORE = 0.95
+SIMILAR_PROGRAM_ADAPT_SCORE = 0.75
+
+# Score de pertinence minimal pour répondre directement depuis la base de connaissances
+KNOWLEDGE_DIRECT_SCORE = 0.6
+
 class OrchestratorAgent:
     """
     Agent Orchestrateur qui coordonne le flux de travail entre les différents agents spécialisés.
     """
     
-    def __init__(self, llm, sport_expert=None, table_generator=None):
+    def __init__(self, llm, sport_expert=None, table_generator=None, program_editor=None, program_manager=None):
         """
         Initialise l'agent orchestrateur.
         
@@ -41,6 +56,8 @@ class OrchestratorAgent:
             llm: Le modèle de langage à utiliser
             sport_expert: L'agent expert en sport
             table_generator: L'agent générateur de tableaux
+            program_editor: L'agent d'édition de programmes (créé par défaut)
+            program_manager: Le gestionnaire de programmes partagé du processus (créé par défaut)
         """
         self.logger = logging.getLogger("athly.orchestrator")
         self.logger.info("Initialisation de l'agent orchestrateur")
@@ -48,16 +65,28 @@ class OrchestratorAgent:
         self.llm = llm
         self.sport_expert = sport_expert
         self.table_generator = table_generator
+        self.program_editor = program_editor or ProgramEditorAgent(llm)
+        self.periodization_engine = PeriodizationEngine()
         self.chat_history = []
         
-        # Initialisation du gestionnaire de programmes
-        try:
-            from models.program_data import ProgramDataManager
-            self.program_manager = ProgramDataManager()
-            print("Gestionnaire de programmes initialisé avec succès")
-        except Exception as e:
-            print(f"Erreur lors de l'initialisation du gestionnaire de programmes: {str(e)}")
-            self.program_manager = None
+        # Gestionnaire de programmes: celui du processus s'il est fourni, pour conserver ses caches entre les requêtes
+        self.program_manager = program_manager
+        if self.program_manager is None:
+            try:
+                from models.program_data import ProgramDataManager
+                self.program_manager = ProgramDataManager()
+                self.logger.info("Gestionnaire de programmes initialisé avec succès")
+            except Exception as e:
+                self.logger.error(f"Erreur lors de l'initialisation du gestionnaire de programmes: {str(e)}")
+        
+        # Index partagé des programmes existants, avec les embeddings de la base de connaissances si disponibles
+        embedding_model = getattr(getattr(sport_expert, "knowledge_base", None), "embedding_model", None)
+        self.program_index = None
+        if self.program_manager:
+            self.program_index = get_program_index(self.program_manager, embedding_model)
+        
+        # Routeur d'intention: évite la boucle d'outils pour les questions simples
+        self.router = IntentRouter(embedding_model)
         
         # Initialisation de la mémoire de conversation
         self.logger.debug("Initialisation de la mémoire de conversation")
@@ -170,7 +199,9 @@ Utilise un formatage simple et efficace pour tes réponses:
         try:
             result = self.sport_expert.generate_advice(query)
             logger.debug(f"Réponse de l'expert sport: {result[:100]}...")
-            logger.info(f"Expert sport consulté en {time.time() - start_time:.2f} secondes")
+            elapsed = time.time() - start_time
+            PIPELINE_STAGE_SECONDS.labels(stage="sport_expert").observe(elapsed)
+            logger.info(f"Expert sport consulté en {elapsed:.2f} secondes")
             return result
         except Exception as e:
             logger.error(f"Erreur lors de la consultation de l'expert sport: {str(e)}")
@@ -197,38 +228,6 @@ Utilise un formatage simple et efficace pour tes réponses:
             logger.error(traceback.format_exc())
             raise
     
-    def _can_use_direct_mode(self, message: str) -> bool:
-        """
-        Détermine si le message peut être traité en mode direct.
-        
-        Args:
-            message: Le message de l'utilisateur
-            
-        Returns:
-            True si le message peut être traité en mode direct, False sinon
-        """
-        # Analyse simple pour déterminer si on peut utiliser le mode direct
-        # Nous privilégions le mode direct pour la plupart des requêtes
-        
-        # Mots clés indiquant une demande complexe nécessitant les agents
-        complex_keywords = [
-            "compare",
-            "analyse",
-            "planifie",
-            "explique en détail",
-            "développe un plan",
-            "crée un programme personnalisé"
-        ]
-        
-        # Si le message contient des mots clés complexes, utiliser les agents
-        if any(keyword in message.lower() for keyword in complex_keywords):
-            self.logger.debug(f"Mode normal détecté pour le message: {message[:50]}...")
-            return False
-        
-        # Par défaut, utiliser le mode direct pour plus de rapidité
-        self.logger.debug(f"Mode direct détecté pour le message: {message[:50]}...")
-        return True
-    
     def _format_response(self, text):
         """
         Améliore le formatage du texte de réponse pour une meilleure lisibilité.
@@ -239,87 +238,100 @@ Utilise un formatage simple et efficace pour tes réponses:
         Returns:
             Le texte formaté
         """
-        # Si le texte est vide, retourner tel quel
-        if not text:
-            return text
-            
-        # Détecter si nous utilisons USE_QWEN ou non
-        using_qwen = os.getenv("USE_QWEN", "false").lower() == "true"
-        
-        # Formatage de base pour tous les modèles
-        
-        # Ajouter des sauts de ligne avant les éléments de liste numérotée
-        text = re.sub(r'(\d+\.\s+)', r'\n\n\1', text)
-        
-        # Ajouter des sauts de ligne avant les puces
-        text = re.sub(r'(-\s+)', r'\n\n\1', text)
-        
-        # Ajouter des sauts de ligne avant les titres
-        text = re.sub(r'(#+\s+)', r'\n\n\1', text)
+        with span("format.markdown", chars=len(text)), FORMAT_SECONDS.labels(stage="markdown").time():
+            return normalize_markdown(text)
+    
+    def process_chat(self, message: str) -> str:
+        """
+        Traite un message de chat et génère une réponse.
         
-        # Assurer que les tableaux sont bien formatés
-        text = re.sub(r'\n\|\s*', r'\n| ', text)
+        Le message est d'abord classé par le routeur d'intention: les questions factuelles sont
+        servies par la base de connaissances, les questions simples par un unique appel au LLM,
+        les demandes de programme par le générateur de programmes, et seules les demandes
+        complexes passent par le graph d'agent.
         
-        # Espacer après les points
-        text = re.sub(r'\.(\S)', r'. \1', text)
+        Args:
+            message: Message de l'utilisateur
+            
+        Returns:
+            Réponse générée
+        """
+        with span("orchestrator.process_chat", message_chars=len(message)) as chat_span:
+            self.logger.debug("DÉBUT TRAITEMENT MESSAGE: %s", message)
         
-        # Espacer après les virgules
-        text = re.sub(r',(\S)', r', \1', text)
+            decision = self.router.route(message)
+            self.logger.info(f"Route choisie: {decision.route} (similarité {decision.score:.2f})")
+            chat_span.set_attributes(route=decision.route, route_score=round(float(decision.score), 3))
+            start_time = time.time()
         
-        # Formatage simple pour les listes à puces
-        text = re.sub(r'(\n\s*-\s*\*\*)', r'\n- **', text)
+            # Routes rapides: en cas d'échec ou de réponse insuffisante, repli sur le graph d'agent
+            response = None
+            served_route = decision.route
+            try:
+                if decision.route == ROUTE_KNOWLEDGE:
+                    response = self._answer_from_knowledge_base(message)
+                elif decision.route == ROUTE_SINGLE_LLM:
+                    response = self._answer_directly(message)
+                elif decision.route == ROUTE_PROGRAM:
+                    response = self._answer_program_request(message)
+            except Exception as e:
+                self.logger.error(f"Erreur sur la route {decision.route}: {str(e)}")
+                self.logger.error(traceback.format_exc())
+                response = None
         
-        # S'assurer que les titres sont bien séparés
-        text = re.sub(r'(\n#+.*?\n)(\S)', r'\1\n\2', text)
+            try:
+                if response is None:
+                    served_route = ROUTE_AGENT_GRAPH
+                    response = self._run_agent(message)
+            except Exception as e:
+                ERRORS.labels(component="orchestrator").inc()
+                chat_span.record_exception(e)
+                self.logger.error(f"Erreur lors du traitement du message: {str(e)}")
+                error_message = f"Désolé, j'ai rencontré une erreur. Pouvez-vous réessayer?"
+                return error_message
         
-        return text
+            elapsed = time.time() - start_time
+            chat_span.set_attribute("served_route", served_route)
+            self.router.metrics.record(served_route, elapsed)
+            PIPELINE_STAGE_SECONDS.labels(stage=f"chat_{served_route}").observe(elapsed)
+            self.logger.info(f"TEMPS D'EXÉCUTION ({served_route}): {elapsed:.2f} secondes")
+            self.logger.debug("RÉPONSE OBTENUE (%s): %.50s...", served_route, response)
+            return self._format_response(response)
     
-    def process_chat(self, message: str) -> str:
+    def _run_agent(self, message):
         """
-        Traite un message de chat et génère une réponse.
+        Traite un message avec le graph d'agent, ou l'agent executor classique à défaut.
         
         Args:
             message: Message de l'utilisateur
             
         Returns:
-            Réponse générée
+            Réponse de l'agent
+        """
+        if self.has_graph:
+            self.logger.info(f"UTILISATION DU GRAPH D'AGENT - Message: {message[:50]}...")
+            context = {
+                "timestamp": time.time(),
+                "direct_mode": False
+            }
+            return self.agent_graph.process_message(message, context)
+        
+        self.logger.info("Exécution de l'agent executor classique")
+        return self.agent_executor.run(input=message)
+    
+    def _answer_directly(self, message, context=""):
         """
-        print(f"DÉBUT TRAITEMENT MESSAGE: {message}")
+        Répond à un message avec un unique appel au LLM, sans outils.
         
-        # Vérifier si on peut utiliser le mode direct (contournement des agents)
-        if self._can_use_direct_mode(message):
-            print("APPEL DIRECT AU LLM (contournement des agents)")
+        Args:
+            message: Message de l'utilisateur
+            context: Extraits de la base de connaissances à inclure dans le prompt
             
-            try:
-                # Recherche de programmes existants
-                print("Recherche de programmes existants...")
-                if "programme" in message.lower() and any(keyword in message.lower() for keyword in ["course", "running", "courir", "jogging"]):
-                    print("Détection de demande de programme de course")
-                    
-                    # TODO: Implémenter la logique de recherche de programmes existants
-                    # Pour l'instant, on utilise les agents normaux
-                    
-                # Si aucun programme trouvé, utiliser le LLM directement
-                if self.has_graph:
-                    start_time = time.time()
-                    self.logger.info(f"UTILISATION DU GRAPH D'AGENT - Message: {message[:50]}...")
-                    
-                    # Ajouter des informations contextuelles
-                    context = {
-                        "timestamp": time.time(),
-                        "direct_mode": True
-                    }
-                    
-                    response = self.agent_graph.process_message(message, context)
-                    
-                    elapsed = time.time() - start_time
-                    self.logger.info(f"TEMPS D'EXÉCUTION GRAPH: {elapsed:.2f} secondes")
-                    
-                    print(f"RÉPONSE OBTENUE (graph): {response[:50]}...")
-                    return self._format_response(response)
-                else:
-                    # Utiliser directement le LLM avec un prompt simple
-                    prompt = f"""Tu es Athly, un coach sportif virtuel spécialisé en sciences du sport.
+        Returns:
+            La réponse du LLM
+        """
+        context_section = f"\nInformations utiles issues de la base de connaissances :\n{context}\n" if context else ""
+        prompt = f"""Tu es Athly, un coach sportif virtuel spécialisé en sciences du sport.
 
 Réponds à la question suivante de façon claire et concise, en utilisant un formatage simple et efficace :
 - Utilise des listes à puces (- item) pour présenter les points clés 
@@ -328,66 +340,70 @@ Réponds à la question suivante de façon claire et concise, en utilisant un fo
 - Utilise des titres avec ### pour les sections principales
 - Évite les formatages trop complexes
 - Préfère les bullet points aux listes numérotées quand c'est possible
-
+{context_section}
 Question : {message}
 """
-                    
-                    start_time = time.time()
-                    try:
-                        response = self.llm.invoke(prompt)
-                        elapsed = time.time() - start_time
-                        self.logger.info(f"TEMPS D'EXÉCUTION LLM DIRECT: {elapsed:.2f} secondes")
-                        
-                        print(f"RÉPONSE OBTENUE (format alternatif): {str(response)[:50]}...")
-                        return self._format_response(str(response))
-                    except Exception as e:
-                        self.logger.error(f"ERREUR RENCONTRÉE: {str(e)}")
-                        self.logger.error(f"TYPE D'ERREUR: {type(e).__name__}")
-                        import traceback
-                        self.logger.error(f"TRACEBACK:\n{traceback.format_exc()}")
-                        
-                        # Fallback vers le processus normal si erreur
-                        print("ERREUR AVEC LE MODE DIRECT, UTILISATION DU MODE NORMAL")
-            
-            except Exception as e:
-                self.logger.error(f"Erreur dans le mode direct: {str(e)}")
-                print(f"ERREUR DANS LE MODE DIRECT: {str(e)}")
+        response = self.llm.invoke(prompt)
+        return response.content if hasattr(response, "content") else str(response)
+    
+    def _answer_from_knowledge_base(self, message):
+        """
+        Répond à une question factuelle à partir de la base de connaissances.
         
-        # Si on est arrivé ici, utiliser le processus normal
-        try:
-            # Pour le mode normal, essayer d'abord avec le graph si disponible
-            if self.has_graph:
-                start_time = time.time()
-                self.logger.info(f"UTILISATION DU GRAPH D'AGENT - Message: {message[:50]}...")
-                
-                # Ajouter des informations contextuelles
-                context = {
-                    "timestamp": time.time(),
-                    "direct_mode": False
-                }
-                
-                response = self.agent_graph.process_message(message, context)
-                
-                elapsed = time.time() - start_time
-                self.logger.info(f"TEMPS D'EXÉCUTION GRAPH: {elapsed:.2f} secondes")
-                
-                print(f"RÉPONSE OBTENUE (graph): {response[:50]}...")
-                return self._format_response(response)
-            
-            # Si le graph n'est pas disponible, utiliser l'agent executor classique
-            start_time = time.time()
-            self.logger.info("Exécution de l'agent executor classique")
-            response = self.agent_executor.run(input=message)
-            elapsed = time.time() - start_time
-            self.logger.info(f"TEMPS D'EXÉCUTION AGENT: {elapsed:.2f} secondes")
+        Si un document est suffisamment pertinent, il est retourné sans appel au LLM;
+        sinon les meilleurs extraits servent de contexte à un unique appel au LLM.
+        
+        Args:
+            message: Message de l'utilisateur
             
-            print(f"RÉPONSE OBTENUE: {response[:50]}...")
-            return self._format_response(response)
+        Returns:
+            La réponse, ou None si la base de connaissances n'est pas disponible
+        """
+        knowledge_base = getattr(self.sport_expert, "knowledge_base", None)
+        if knowledge_base is None:
+            return None
+        
+        results = knowledge_base.query_with_scores(message, n_results=3)
+        if not results:
+            return self._answer_directly(message)
+        
+        document, score = results[0]
+        if score >= KNOWLEDGE_DIRECT_SCORE:
+            self.logger.info(f"Réponse directe depuis la base de connaissances (score {score:.2f})")
+            return f"### Ce que dit notre base de connaissances\n\n{document.page_content.strip()}"
+        
+        context = "\n\n".join(doc.page_content.strip() for doc, _ in results)
+        return self._answer_directly(message, context)
+    
+    def _answer_program_request(self, message):
+        """
+        Transmet une demande de programme formulée en chat au générateur de programmes.
+        
+        Un programme existant très proche est retourné tel quel; sinon un programme est
+        construit par le moteur de périodisation (mode hybride, un seul appel LLM).
+        
+        Args:
+            message: Message de l'utilisateur
             
-        except Exception as e:
-            self.logger.error(f"Erreur lors du traitement du message: {str(e)}")
-            error_message = f"Désolé, j'ai rencontré une erreur. Pouvez-vous réessayer?"
-            return error_message
+        Returns:
+            Le programme en markdown, ou None si la demande ne précise aucune discipline
+        """
+        existing_program = self._find_program_for_message(message)
+        if existing_program:
+            return existing_program
+        
+        criteria = self._parse_program_request(message)
+        if not criteria["disciplines"]:
+            return None
+        
+        program = self.generate_periodized_program(
+            criteria["disciplines"],
+            criteria["duration"] or 8,
+            criteria["level"] or "débutant",
+            message,
+            frequency=criteria["frequency"] or 3
+        )
+        return program.to_markdown()
     
     def generate_training_program(self, disciplines, duration, level, goals, constraints="", equipment="", frequency=3, time_per_session=60):
         """
@@ -406,16 +422,86 @@ Question : {message}
         Returns:
             Le programme d'entraînement complet formaté
         """
-        logger.info(f"Génération d'un programme pour disciplines: {disciplines}, niveau: {level}, durée: {duration} semaines")
-        print(f"GÉNÉRATION PROGRAMME: disciplines={disciplines}, durée={duration}, niveau={level}")
+        logger.info("GÉNÉRATION PROGRAMME: disciplines=%s, durée=%s, niveau=%s", disciplines, duration, level)
         start_time = time.time()
         
-        try:
-            # Contournement des agents: appel direct au LLM avec un prompt bien formaté
-            disciplines_str = ", ".join(disciplines)
+        with span("orchestrator.generate_program", disciplines=",".join(disciplines), weeks=duration, level=level) as program_span:
+            try:
+                # Programme existant très proche: réutilisation directe ou courte adaptation
+                seed = self._find_similar_program(disciplines, level, duration, goals)
+                if seed and seed["score"] >= SIMILAR_PROGRAM_REUSE_SCORE and seed["duration"] == duration:
+                    logger.info(f"Programme existant réutilisé: {seed['filename']} (score {seed['score']:.2f})")
+                    return self.program_manager.get_program_summary(seed["filename"])
             
-            # Création d'un prompt détaillé pour générer directement un programme de qualité
-            prompt = f"""Tu es Athly, un coach sportif IA expert en sciences du sport et en programmation d'entraînement.
+                if seed and seed["score"] >= SIMILAR_PROGRAM_ADAPT_SCORE:
+                    logger.info(f"Adaptation du programme existant: {seed['filename']} (score {seed['score']:.2f})")
+                    prompt = self._build_adaptation_prompt(
+                        self.program_manager.get_program_summary(seed["filename"]),
+                        disciplines, duration, level, goals, constraints, equipment, frequency, time_per_session
+                    )
+                else:
+                    # Contournement des agents: appel direct au LLM avec un prompt bien formaté
+                    prompt = self._build_program_prompt(
+                        disciplines, duration, level, goals, constraints, equipment, frequency, time_per_session
+                    )
+            
+                logger.debug("APPEL DIRECT AU LLM POUR LE PROGRAMME")
+                program_span.set_attribute("prompt_chars", len(prompt))
+            
+                # Appel direct au LLM, poursuivi automatiquement si la génération est tronquée
+                formatted_program = generate_with_continuation(self.llm, prompt, expected_weeks=duration)
+                logger.info("PROGRAMME GÉNÉRÉ: %d caractères", len(formatted_program))
+                program_span.set_attribute("program_chars", len(formatted_program))
+            
+                elapsed = time.time() - start_time
+                PIPELINE_STAGE_SECONDS.labels(stage="generate_program").observe(elapsed)
+                logger.info(f"Programme généré en {elapsed:.2f} secondes")
+                return formatted_program
+            except Exception as e:
+                logger.error(f"Erreur lors de la génération du programme: {str(e)}")
+                logger.error(traceback.format_exc())
+                raise
+
+    def _build_program_prompt(self, disciplines, duration, level, goals, constraints="", equipment="",
+                              frequency=3, time_per_session=60, structured=False):
+        """
+        Construit le prompt de génération de programme.
+        
+        Args:
+            disciplines: Liste des disciplines choisies
+            duration: Durée du programme en semaines
+            level: Niveau de l'utilisateur
+            goals: Objectifs principaux
+            constraints: Contraintes physiques ou médicales
+            equipment: Équipement disponible
+            frequency: Fréquence d'entraînement par semaine
+            time_per_session: Temps disponible par séance en minutes
+            structured: Si True, demande une réponse JSON au lieu du markdown
+            
+        Returns:
+            Le prompt à envoyer au LLM
+        """
+        disciplines_str = ", ".join(disciplines)
+        
+        if structured:
+            response_format = f"""FORMAT DE RÉPONSE:
+            Le programme doit contenir exactement {duration} semaines, avec {frequency} séances par semaine.
+            Chaque exercice précise les séries/répétitions ou la durée, l'intensité, la récupération et des notes techniques.
+            {program_json_instructions()}"""
+        else:
+            response_format = """FORMAT DE RÉPONSE:
+            1. Présente d'abord une introduction avec les objectifs du programme
+            2. Organise le programme semaine par semaine
+            3. Pour chaque semaine, détaille les séances jour par jour
+            4. Pour chaque séance, utilise un format tabulaire markdown pour présenter:
+               - Exercice/activité
+               - Séries/répétitions/durée
+               - Intensité/charge
+               - Récupération
+               - Notes techniques
+            5. Conclus avec des conseils de progression et d'adaptation"""
+        
+        return f"""Tu es Athly, un coach sportif IA expert en sciences du sport et en programmation d'entraînement.
             
             Génère un programme d'entraînement complet basé sur ces paramètres:
             
@@ -429,39 +515,270 @@ Question : {message}
             - Fréquence: {frequency} jours/semaine
             - Temps par séance: {time_per_session} minutes
             
-            FORMAT DE RÉPONSE:
-            1. Présente d'abord une introduction avec les objectifs du programme
-            2. Organise le programme semaine par semaine
-            3. Pour chaque semaine, détaille les séances jour par jour
-            4. Pour chaque séance, utilise un format tabulaire markdown pour présenter:
-               - Exercice/activité
-               - Séries/répétitions/durée
-               - Intensité/charge
-               - Récupération
-               - Notes techniques
-            5. Conclus avec des conseils de progression et d'adaptation
+            {response_format}
             
             Assure-toi que la progression est logique et que les exercices sont adaptés au niveau indiqué.
             """
+    
+    def generate_structured_program(self, disciplines, duration, level, goals, constraints="", equipment="", frequency=3, time_per_session=60):
+        """
+        Génère un programme d'entraînement structuré (JSON validé par le schéma).
+        
+        Les erreurs de JSON mineures sont réparées localement sans nouvel appel; seul
+        un JSON tronqué donne lieu à une courte continuation.
+        
+        Args:
+            disciplines: Liste des disciplines choisies
+            duration: Durée du programme en semaines
+            level: Niveau de l'utilisateur
+            goals: Objectifs principaux
+            constraints: Contraintes physiques ou médicales
+            equipment: Équipement disponible
+            frequency: Fréquence d'entraînement par semaine
+            time_per_session: Temps disponible par séance en minutes
             
-            print(f"APPEL DIRECT AU LLM POUR LE PROGRAMME")
+        Returns:
+            Le programme sous forme de TrainingProgram
+        """
+        logger.info(f"Génération d'un programme structuré pour disciplines: {disciplines}, niveau: {level}, durée: {duration} semaines")
+        start_time = time.time()
+        
+        with span("orchestrator.structured_program", disciplines=",".join(disciplines), weeks=duration, level=level):
+            try:
+                prompt = self._build_program_prompt(
+                    disciplines, duration, level, goals, constraints, equipment, frequency, time_per_session,
+                    structured=True
+                )
+                raw = generate_with_continuation(self.llm, prompt, expected_weeks=duration)
             
-            # Appel direct au LLM
-            response = self.llm.invoke(prompt)
+                program = parse_training_program(raw, expected_weeks=duration)
+                elapsed = time.time() - start_time
+                PIPELINE_STAGE_SECONDS.labels(stage="structured_program").observe(elapsed)
+                logger.info(f"Programme structuré généré en {elapsed:.2f} secondes: {len(program.weeks)} semaines")
+                return program
+            except Exception as e:
+                logger.error(f"Erreur lors de la génération du programme structuré: {str(e)}")
+                logger.error(traceback.format_exc())
+                raise
+    
+    def edit_program(self, instruction, start_week, end_week=None, content=None, program=None):
+        """
+        Modifie uniquement les semaines ciblées d'un programme existant.
+        
+        Args:
+            instruction: La modification demandée
+            start_week: Première semaine à régénérer
+            end_week: Dernière semaine à régénérer (par défaut, la première)
+            content: Le programme au format markdown
+            program: Le programme structuré (TrainingProgram), prioritaire sur le markdown
             
-            # Extraire le contenu de la réponse (format LangChain)
-            if hasattr(response, 'content'):
-                print(f"PROGRAMME GÉNÉRÉ (via attribut content): {len(response.content)} caractères")
-                formatted_program = response.content
-            else:
-                print(f"PROGRAMME GÉNÉRÉ (format alternatif): {len(str(response))} caractères")
-                formatted_program = str(response)
+        Returns:
+            Le programme modifié, dans le même format que celui fourni
+        """
+        end_week = end_week or start_week
+        if start_week < 1 or end_week < start_week:
+            raise ValueError(f"Plage de semaines invalide: {start_week}-{end_week}")
+        
+        if program is not None:
+            return self.program_editor.edit_structured(program, instruction, start_week, end_week)
+        if not content:
+            raise ValueError("Aucun programme à modifier")
+        return self.program_editor.edit_markdown(content, instruction, start_week, end_week)
+    
+    def generate_periodized_program(self, disciplines, duration, level, goals, constraints="", equipment="",
+                                    frequency=3, time_per_session=60, enrich=True):
+        """
+        Génère un programme à partir du moteur de périodisation, sans génération LLM complète.
+        
+        Le squelette (semaines, séances, séries, intensités) est calculé instantanément.
+        Si `enrich` est vrai, un unique appel LLM court ajoute l'introduction, les conseils
+        et les notes techniques; en mode rapide (`enrich=False`), aucun appel LLM n'est fait.
+        
+        Args:
+            disciplines: Liste des disciplines choisies
+            duration: Durée du programme en semaines
+            level: Niveau de l'utilisateur
+            goals: Objectifs principaux
+            constraints: Contraintes physiques ou médicales
+            equipment: Équipement disponible
+            frequency: Fréquence d'entraînement par semaine
+            time_per_session: Temps disponible par séance en minutes
+            enrich: Ajouter la prose et les notes techniques avec le LLM
             
-            logger.info(f"Programme généré en {time.time() - start_time:.2f} secondes")
-            return formatted_program
+        Returns:
+            Le programme sous forme de TrainingProgram
+        """
+        with span("orchestrator.periodized_program", disciplines=",".join(disciplines), weeks=duration, enrich=enrich):
+            start_time = time.time()
+            program = self.periodization_engine.build_program(
+                disciplines, duration, level, goals, frequency, time_per_session
+            )
+            elapsed = time.time() - start_time
+            PIPELINE_STAGE_SECONDS.labels(stage="program_skeleton").observe(elapsed)
+            logger.info(f"Squelette de programme calculé en {elapsed:.3f} secondes")
+        
+            if enrich:
+                try:
+                    self._enrich_program(program, level, goals, constraints, equipment)
+                except Exception as e:
+                    # Le squelette reste utilisable sans la prose
+                    logger.warning(f"Enrichissement du programme impossible, squelette conservé: {str(e)}")
+        
+            elapsed = time.time() - start_time
+            PIPELINE_STAGE_SECONDS.labels(stage="periodized_program").observe(elapsed)
+            logger.info(f"Programme périodisé généré en {elapsed:.2f} secondes")
+            return program
+    
+    def _enrich_program(self, program, level, goals, constraints="", equipment=""):
+        """
+        Ajoute au programme une introduction, des conseils et des notes techniques par exercice.
+        
+        Args:
+            program: Le programme structuré à compléter (modifié sur place)
+            level: Niveau de l'utilisateur
+            goals: Objectifs principaux
+            constraints: Contraintes physiques ou médicales
+            equipment: Équipement disponible
+        """
+        phases = list(dict.fromkeys(week.theme for week in program.weeks))
+        exercises = list(dict.fromkeys(
+            exercise.name for week in program.weeks for session in week.sessions for exercise in session.exercises
+        ))
+        
+        prompt = f"""Tu es Athly, un coach sportif IA expert en sciences du sport.
+        
+        Le programme suivant a déjà été planifié: {program.title}
+        - Niveau: {level}
+        - Objectifs: {goals}
+        - Contraintes physiques/médicales: {constraints}
+        - Équipement disponible: {equipment}
+        - Phases: {", ".join(phases)}
+        - Exercices: {", ".join(exercises)}
+        
+        Rédige uniquement un objet JSON de la forme:
+        {{"introduction": "...", "advice": "...", "technique_notes": {{"<exercice>": "<conseil technique court>"}}}}
+        """
+        response = self.llm.invoke(prompt)
+        raw = response.content if hasattr(response, 'content') else str(response)
+        data = json.loads(repair_json_text(raw))
+        
+        if data.get("introduction"):
+            program.introduction = f"{program.introduction}\n\n{data['introduction']}"
+        if data.get("advice"):
+            program.advice = str(data["advice"])
+        
+        notes = data.get("technique_notes") or {}
+        for week in program.weeks:
+            for session in week.sessions:
+                for exercise in session.exercises:
+                    if not exercise.notes and notes.get(exercise.name):
+                        exercise.notes = str(notes[exercise.name])
+    
+    def _find_similar_program(self, disciplines, level=None, duration=None, goals=""):
+        """
+        Cherche le programme existant le plus proche des critères.
+        
+        Args:
+            disciplines: Liste des disciplines choisies
+            level: Niveau de l'utilisateur
+            duration: Durée du programme en semaines
+            goals: Objectifs principaux
+            
+        Returns:
+            La description du meilleur programme (avec son score) ou None
+        """
+        if not self.program_index:
+            return None
+        try:
+            matches = self.program_index.search(disciplines, level, duration, goals, k=1)
         except Exception as e:
-            logger.error(f"Erreur lors de la génération du programme: {str(e)}")
-            logger.error(traceback.format_exc())
-            print(f"ERREUR GÉNÉRATION PROGRAMME: {str(e)}")
-            print(traceback.format_exc())
-            raise 
\ No newline at end of file
+            logger.warning(f"Recherche de programmes existants impossible: {str(e)}")
+            return None
+        return matches[0] if matches else None
+    
+    def _find_program_for_message(self, message):
+        """
+        Cherche un programme existant correspondant à une demande de programme formulée en chat.
+        
+        Args:
+            message: Le message de l'utilisateur
+            
+        Returns:
+            Le résumé du programme trouvé, ou None
+        """
+        if "programme" not in message.lower():
+            return None
+        
+        criteria = self._parse_program_request(message)
+        if not criteria["disciplines"]:
+            return None
+        
+        seed = self._find_similar_program(criteria["disciplines"], criteria["level"], criteria["duration"], message)
+        if not seed or seed["score"] < SIMILAR_PROGRAM_REUSE_SCORE:
+            return None
+        
+        self.logger.info(f"Programme existant trouvé pour le message: {seed['filename']} (score {seed['score']:.2f})")
+        summary = self.program_manager.get_program_summary(seed["filename"])
+        return f"### Voici un programme existant adapté à votre demande\n\n{summary}"
+    
+    def _parse_program_request(self, message):
+        """
+        Extrait les critères d'un programme (disciplines, niveau, durée, fréquence) d'un message.
+        
+        Args:
+            message: Le message de l'utilisateur
+            
+        Returns:
+            Dictionnaire des critères (None pour les critères absents)
+        """
+        from models.program_data import DISCIPLINE_KEYWORDS, LEVEL_KEYWORDS
+        
+        lowered = message.lower()
+        disciplines = [d for d, keywords in DISCIPLINE_KEYWORDS.items() if any(k in lowered for k in keywords)]
+        level = next((l for l, keywords in LEVEL_KEYWORDS.items() if any(k in lowered for k in keywords)), None)
+        duration_match = re.search(r"(\d+)\s*semaines?", lowered)
+        frequency_match = re.search(r"(\d+)\s*(?:séances?|fois|jours?)\s*(?:par|/)\s*semaine", lowered)
+        return {
+            "disciplines": disciplines,
+            "level": level,
+            "duration": int(duration_match.group(1)) if duration_match else None,
+            "frequency": int(frequency_match.group(1)) if frequency_match else None,
+        }
+    
+    def _build_adaptation_prompt(self, existing_program, disciplines, duration, level, goals, constraints="",
+                                 equipment="", frequency=3, time_per_session=60):
+        """
+        Construit le prompt d'adaptation d'un programme existant aux paramètres demandés.
+        
+        Args:
+            existing_program: Le programme existant (markdown)
+            disciplines: Liste des disciplines choisies
+            duration: Durée du programme en semaines
+            level: Niveau de l'utilisateur
+            goals: Objectifs principaux
+            constraints: Contraintes physiques ou médicales
+            equipment: Équipement disponible
+            frequency: Fréquence d'entraînement par semaine
+            time_per_session: Temps disponible par séance en minutes
+            
+        Returns:
+            Le prompt à envoyer au LLM
+        """
+        return f"""Tu es Athly, un coach sportif IA expert en programmation d'entraînement.
+        
+        Voici un programme existant, validé par nos coachs:
+        {existing_program}
+        
+        Adapte ce programme aux paramètres suivants en conservant sa structure et ses tableaux,
+        et en ne modifiant que ce qui est nécessaire:
+        - Disciplines: {", ".join(disciplines)}
+        - Durée: {duration} semaines
+        - Niveau: {level}
+        - Objectifs: {goals}
+        - Contraintes physiques/médicales: {constraints}
+        - Équipement disponible: {equipment}
+        - Fréquence: {frequency} jours/semaine
+        - Temps par séance: {time_per_session} minutes
+        
+        Réponds uniquement avec le programme adapté, semaine par semaine.
+        """
@@ -0,0 +1,224 @@
+import json
+import logging
+import re
+import time
+import traceback
+from typing import List, Optional, Tuple
+
+from .continuation import generate_with_continuation
+from models.program_schema import TrainingProgram, parse_training_program, program_json_instructions
+
+# Configuration du logger
+logger = logging.getLogger("athly.program_editor")
+
+# Titre de semaine: "### Semaine 3", "**Semaine 3 - Force**", "Semaines 5 à 8"
+_WEEK_HEADING = re.compile(
+    r"^\s*(?:#{1,6}\s*|\*{1,2}\s*)?Semaines?\s+(\d+)(?:\s*(?:-|à|–)\s*(\d+))?",
+    re.IGNORECASE
+)
+
+# Contexte maximal transmis pour chaque semaine voisine (en caractères)
+NEIGHBOUR_CONTEXT_CHARS = 1500
+
+Section = Tuple[Optional[Tuple[int, int]], str]
+
+
+def split_week_sections(content: str) -> List[Section]:
+    """
+    Découpe un programme markdown en sections.
+
+    Chaque section est un tuple (plage de semaines, texte). Les sections hors
+    semaine (introduction, titres de phase, conseils) ont une plage à None.
+
+    Args:
+        content: Le programme au format markdown
+
+    Returns:
+        La liste ordonnée des sections; leur concaténation redonne le texte d'origine
+    """
+    sections: List[Section] = []
+    current_range: Optional[Tuple[int, int]] = None
+    current_lines: List[str] = []
+
+    for line in content.splitlines(keepends=True):
+        match = _WEEK_HEADING.match(line)
+        is_other_heading = line.lstrip().startswith("#") and not match
+        if match or is_other_heading:
+            if current_lines:
+                sections.append((current_range, "".join(current_lines)))
+            current_lines = []
+            if match:
+                first = int(match.group(1))
+                current_range = (first, int(match.group(2) or first))
+            else:
+                current_range = None
+        current_lines.append(line)
+
+    if current_lines:
+        sections.append((current_range, "".join(current_lines)))
+    return sections
+
+
+def _overlaps(week_range: Optional[Tuple[int, int]], start_week: int, end_week: int) -> bool:
+    return week_range is not None and week_range[0] <= end_week and week_range[1] >= start_week
+
+
+class ProgramEditorAgent:
+    """
+    Agent d'édition qui régénère uniquement les semaines ciblées d'un programme existant.
+
+    Seules les semaines ciblées et leurs voisines immédiates sont transmises au LLM,
+    de sorte que le coût d'une modification dépend de sa taille et non de la durée du programme.
+    """
+
+    def __init__(self, llm):
+        """
+        Initialise l'agent d'édition de programmes.
+
+        Args:
+            llm: Le modèle de langage à utiliser
+        """
+        logger.info("Initialisation de l'agent d'édition de programmes")
+        self.llm = llm
+
+    def _build_edit_prompt(self, instruction, start_week, end_week, target, before, after, response_format):
+        """Construit le prompt d'édition à partir des semaines ciblées et de leurs voisines."""
+        context = ""
+        if before:
+            context += f"SEMAINE PRÉCÉDENTE (contexte, ne pas modifier):\n{before}\n\n"
+        if after:
+            context += f"SEMAINE SUIVANTE (contexte, ne pas modifier):\n{after}\n\n"
+
+        return f"""Tu es Athly, un coach sportif IA expert en programmation d'entraînement.
+
+Modifie uniquement les semaines {start_week} à {end_week} du programme d'entraînement selon la demande suivante:
+DEMANDE: {instruction}
+
+{context}VERSION ACTUELLE DES SEMAINES {start_week} À {end_week}:
+{target}
+
+Conserve une progression cohérente avec les semaines voisines.
+{response_format}"""
+
+    def edit_markdown(self, content: str, instruction: str, start_week: int, end_week: int) -> str:
+        """
+        Régénère les semaines ciblées d'un programme markdown et les remplace dans le texte.
+
+        Args:
+            content: Le programme au format markdown
+            instruction: La modification demandée
+            start_week: Première semaine à régénérer
+            end_week: Dernière semaine à régénérer
+
+        Returns:
+            Le programme markdown modifié
+
+        Raises:
+            ValueError: Si les semaines ciblées ne sont pas trouvées
+        """
+        logger.info(f"Édition des semaines {start_week}-{end_week} d'un programme markdown")
+        start_time = time.time()
+
+        sections = split_week_sections(content)
+        target_indexes = [i for i, (week_range, _) in enumerate(sections) if _overlaps(week_range, start_week, end_week)]
+        if not target_indexes:
+            raise ValueError(f"Semaines {start_week} à {end_week} introuvables dans le programme")
+
+        first, last = target_indexes[0], target_indexes[-1]
+        target = "".join(text for _, text in sections[first:last + 1])
+        before = next((text for week_range, text in reversed(sections[:first]) if week_range), "")
+        after = next((text for week_range, text in sections[last + 1:] if week_range), "")
+
+        response_format = (
+            f"Réponds uniquement avec le markdown des semaines {start_week} à {end_week}, dans le même format "
+            "(mêmes titres de semaine, mêmes colonnes de tableau), sans introduction ni conclusion."
+        )
+        prompt = self._build_edit_prompt(
+            instruction, start_week, end_week, target,
+            before[-NEIGHBOUR_CONTEXT_CHARS:], after[:NEIGHBOUR_CONTEXT_CHARS], response_format
+        )
+
+        try:
+            generated = generate_with_continuation(self.llm, prompt, expected_weeks=end_week)
+        except Exception as e:
+            logger.error(f"Erreur lors de l'édition du programme: {str(e)}")
+            logger.error(traceback.format_exc())
+            raise
+
+        # Ne garder que les semaines demandées si le modèle en a réécrit d'autres
+        new_sections = split_week_sections(generated.strip("\n") + "\n")
+        kept = [i for i, (week_range, _) in enumerate(new_sections) if _overlaps(week_range, start_week, end_week)]
+        if kept:
+            replacement = "".join(text for _, text in new_sections[kept[0]:kept[-1] + 1])
+        else:
+            replacement = generated.strip("\n") + "\n"
+        if not replacement.endswith("\n\n") and last + 1 < len(sections):
+            replacement += "\n"
+
+        prefix = "".join(text for _, text in sections[:first])
+        suffix = "".join(text for _, text in sections[last + 1:])
+        logger.info(f"Semaines {start_week}-{end_week} régénérées en {time.time() - start_time:.2f} secondes")
+        return prefix + replacement + suffix
+
+    def edit_structured(self, program: TrainingProgram, instruction: str, start_week: int, end_week: int) -> TrainingProgram:
+        """
+        Régénère les semaines ciblées d'un programme structuré.
+
+        Args:
+            program: Le programme structuré
+            instruction: La modification demandée
+            start_week: Première semaine à régénérer
+            end_week: Dernière semaine à régénérer
+
+        Returns:
+            Une copie du programme avec les semaines ciblées remplacées
+
+        Raises:
+            ValueError: Si les semaines ciblées ne sont pas trouvées ou si la réponse est invalide
+        """
+        logger.info(f"Édition des semaines {start_week}-{end_week} d'un programme structuré")
+        start_time = time.time()
+
+        weeks = {week.number: week for week in program.weeks}
+        targets = [weeks[n] for n in range(start_week, end_week + 1) if n in weeks]
+        if not targets:
+            raise ValueError(f"Semaines {start_week} à {end_week} introuvables dans le programme")
+
+        def dump(week):
+            return json.dumps(week.model_dump(), ensure_ascii=False) if week else ""
+
+        response_format = (
+            f"Réponds uniquement avec les semaines {start_week} à {end_week} sous la forme "
+            '{"weeks": [...]}, chaque semaine ayant la même structure que ci-dessus.\n'
+            + program_json_instructions()
+        )
+        prompt = self._build_edit_prompt(
+            instruction, start_week, end_week,
+            json.dumps([week.model_dump() for week in targets], ensure_ascii=False),
+            dump(weeks.get(start_week - 1)), dump(weeks.get(end_week + 1)), response_format
+        )
+
+        try:
+            raw = generate_with_continuation(self.llm, prompt)
+            edited = parse_training_program(raw, first_week=start_week)
+        except Exception as e:
+            logger.error(f"Erreur lors de l'édition du programme structuré: {str(e)}")
+            logger.error(traceback.format_exc())
+            raise
+
+        # Les semaines rendues sans numéro ont été numérotées à partir de la première semaine ciblée;
+        # une semaine hors de la plage demandée ne doit pas écraser une semaine valide
+        replacements = {}
+        for week in edited.weeks:
+            if not start_week <= week.number <= end_week:
+                logger.warning(f"Semaine {week.number} hors de la plage {start_week}-{end_week} ignorée")
+                continue
+            replacements.setdefault(week.number, week)
+
+        patched = program.model_copy(deep=True)
+        patched.weeks = [replacements.pop(week.number, week) for week in patched.weeks]
+        patched.weeks.extend(replacements.values())
+        patched.weeks.sort(key=lambda week: week.number)
+
+        logger.info(f"Semaines {start_week}-{end_week} régénérées en {time.time() - start_time:.2f} secondes")
+        return patched
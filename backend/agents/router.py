@@ -0,0 +1,199 @@
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional
+
+import numpy as np
+
+from monitoring.instruments import cache_lookup
+
+# Configuration du logger
+logger = logging.getLogger("athly.router")
+
+ROUTE_KNOWLEDGE = "knowledge_base"
+ROUTE_SINGLE_LLM = "single_llm"
+ROUTE_AGENT_GRAPH = "agent_graph"
+ROUTE_PROGRAM = "program"
+
+# Exemples de messages par route: leurs embeddings moyens forment les centroïdes du routeur
+ROUTE_EXAMPLES: Dict[str, List[str]] = {
+    ROUTE_KNOWLEDGE: [
+        "Qu'est-ce que le fartlek ?",
+        "Comment faire un squat correctement ?",
+        "Quels muscles travaillent les pompes ?",
+        "C'est quoi la FCMax ?",
+        "Quelle est la bonne technique de foulée en course à pied ?",
+        "Combien de répétitions pour travailler la force ?",
+    ],
+    ROUTE_SINGLE_LLM: [
+        "Bonjour !",
+        "Merci beaucoup pour ton aide",
+        "Salut, qui es-tu ?",
+        "Combien de temps dois-je m'échauffer ?",
+        "Que manger avant une séance ?",
+        "Est-ce grave d'avoir des courbatures ?",
+    ],
+    ROUTE_AGENT_GRAPH: [
+        "Compare la course à pied et la musculation pour perdre du poids",
+        "Analyse ma semaine d'entraînement et dis-moi quoi améliorer",
+        "Explique en détail les principes de la périodisation",
+        "Développe un plan pour préparer un marathon en gérant ma blessure au genou",
+        "Planifie ma saison avec deux objectifs de course et de la musculation",
+    ],
+    ROUTE_PROGRAM: [
+        "Crée-moi un programme de course de 12 semaines",
+        "Je veux un programme de musculation pour débutant",
+        "Génère un plan d'entraînement au poids de corps de 8 semaines",
+        "Peux-tu me faire un programme personnalisé de 3 séances par semaine ?",
+        "Crée un programme personnalisé pour courir un 10 km",
+    ],
+}
+
+# Mots-clés utilisés lorsque aucun modèle d'embedding n'est disponible
+COMPLEX_KEYWORDS = ["compare", "analyse", "planifie", "explique en détail", "développe un plan"]
+PROGRAM_KEYWORDS = ["crée un programme", "crée-moi un programme", "programme personnalisé", "génère un programme", "plan d'entraînement"]
+GREETING_KEYWORDS = ["bonjour", "salut", "merci", "hello", "coucou"]
+
+
+@dataclass
+class RouteDecision:
+    """Route choisie pour un message et sa similarité avec le centroïde."""
+
+    route: str
+    score: float
+
+
+class RouteMetrics:
+    """Latences par route (fenêtre glissante), partagées par toutes les instances du routeur."""
+
+    def __init__(self, window: int = 500):
+        self._lock = threading.Lock()
+        self._window = window
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._counts: Dict[str, int] = {}
+
+    def record(self, route: str, seconds: float) -> None:
+        """Enregistre la latence d'un message servi par une route."""
+        with self._lock:
+            self._latencies.setdefault(route, deque(maxlen=self._window)).append(seconds)
+            self._counts[route] = self._counts.get(route, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """
+        Retourne les statistiques par route.
+
+        Returns:
+            Pour chaque route: nombre de messages, latence moyenne, p50 et p95 (secondes)
+        """
+        with self._lock:
+            stats = {}
+            for route, latencies in self._latencies.items():
+                values = np.fromiter(latencies, dtype=float)
+                stats[route] = {
+                    "count": self._counts[route],
+                    "mean": float(values.mean()),
+                    "p50": float(np.percentile(values, 50)),
+                    "p95": float(np.percentile(values, 95)),
+                }
+            return stats
+
+
+route_metrics = RouteMetrics()
+
+_centroid_cache: Dict[str, np.ndarray] = {}
+_centroid_lock = threading.Lock()
+
+
+class IntentRouter:
+    """
+    Routeur d'intention léger par centroïde le plus proche.
+
+    Les messages sont comparés aux centroïdes des exemples de chaque route, calculés avec
+    le modèle d'embedding de la base de connaissances (MiniLM), afin que les questions simples
+    évitent la boucle d'outils de l'agent.
+    """
+
+    def __init__(self, embedding_model=None, examples: Optional[Dict[str, List[str]]] = None,
+                 min_similarity: float = 0.35, metrics: Optional[RouteMetrics] = None):
+        """
+        Initialise le routeur.
+
+        Args:
+            embedding_model: Modèle d'embedding LangChain (embed_documents / embed_query)
+            examples: Exemples de messages par route
+            min_similarity: Similarité minimale en dessous de laquelle le graph d'agent est utilisé
+            metrics: Collecteur de latences (partagé par défaut)
+        """
+        self.embedding_model = embedding_model
+        self.examples = examples or ROUTE_EXAMPLES
+        self.min_similarity = min_similarity
+        self.metrics = metrics or route_metrics
+        self._routes: List[str] = list(self.examples)
+        self._centroids: Optional[np.ndarray] = None
+
+    def _cache_key(self) -> str:
+        name = getattr(self.embedding_model, "model_name", None) or type(self.embedding_model).__name__
+        return f"{name}:{hash(tuple((r, tuple(e)) for r, e in self.examples.items()))}"
+
+    def _get_centroids(self) -> np.ndarray:
+        """Calcule (une seule fois par processus et par modèle) les centroïdes normalisés des routes."""
+        if self._centroids is not None:
+            return self._centroids
+
+        key = self._cache_key()
+        with _centroid_lock:
+            centroids = _centroid_cache.get(key)
+            cache_lookup("route_centroids", centroids is not None)
+            if centroids is None:
+                texts = [text for route in self._routes for text in self.examples[route]]
+                vectors = np.asarray(self.embedding_model.embed_documents(texts), dtype=float)
+                vectors /= np.linalg.norm(vectors, axis=1, keepdims=True).clip(min=1e-12)
+
+                sizes = [len(self.examples[route]) for route in self._routes]
+                bounds = np.cumsum([0] + sizes)
+                centroids = np.vstack([vectors[bounds[i]:bounds[i + 1]].mean(axis=0) for i in range(len(sizes))])
+                centroids /= np.linalg.norm(centroids, axis=1, keepdims=True).clip(min=1e-12)
+                _centroid_cache[key] = centroids
+
+        self._centroids = centroids
+        return centroids
+
+    def _route_by_keywords(self, message: str) -> RouteDecision:
+        """Routage de secours par mots-clés (sans modèle d'embedding)."""
+        lowered = message.lower()
+        if any(keyword in lowered for keyword in PROGRAM_KEYWORDS):
+            return RouteDecision(ROUTE_PROGRAM, 1.0)
+        if any(keyword in lowered for keyword in COMPLEX_KEYWORDS):
+            return RouteDecision(ROUTE_AGENT_GRAPH, 1.0)
+        if len(lowered.split()) <= 6 and any(keyword in lowered for keyword in GREETING_KEYWORDS):
+            return RouteDecision(ROUTE_SINGLE_LLM, 1.0)
+        return RouteDecision(ROUTE_AGENT_GRAPH, 0.0)
+
+    def route(self, message: str) -> RouteDecision:
+        """
+        Détermine la route d'un message.
+
+        Args:
+            message: Le message de l'utilisateur
+
+        Returns:
+            La route choisie et sa similarité
+        """
+        if self.embedding_model is None:
+            return self._route_by_keywords(message)
+
+        try:
+            centroids = self._get_centroids()
+            vector = np.asarray(self.embedding_model.embed_query(message), dtype=float)
+            vector /= max(np.linalg.norm(vector), 1e-12)
+        except Exception as e:
+            logger.warning(f"Routage par embeddings impossible, utilisation des mots-clés: {str(e)}")
+            return self._route_by_keywords(message)
+
+        similarities = centroids @ vector
+        best = int(np.argmax(similarities))
+        score = float(similarities[best])
+        if score < self.min_similarity:
+            return RouteDecision(ROUTE_AGENT_GRAPH, score)
+        return RouteDecision(self._routes[best], score)
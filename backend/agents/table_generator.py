@@ -3,6 +3,8 @@ import logging
 import traceback
 import time
 
+from models.llm_response import response_text
+
 # Configuration du logger
 logger = logging.getLogger("athly.table_generator")
 
@@ -139,7 +141,7 @@ class TableGeneratorAgent:
             
             # Génération du tableau
             logger.info("Invocation du LLM pour générer le tableau")
-            response = self.llm.invoke(prompt)
+            response = response_text(self.llm.invoke(prompt))
             
             logger.info(f"Tableau généré en {time.time() - start_time:.2f} secondes")
             return response
@@ -173,7 +175,7 @@ class TableGeneratorAgent:
             Format le tableau en Markdown.
             """
             
-            response = self.llm.invoke(prompt)
+            response = response_text(self.llm.invoke(prompt))
             
             logger.info(f"Emploi du temps hebdomadaire généré en {time.time() - start_time:.2f} secondes")
             return response
@@ -211,7 +213,7 @@ class TableGeneratorAgent:
             Format le tableau en Markdown.
             """
             
-            response = self.llm.invoke(prompt)
+            response = response_text(self.llm.invoke(prompt))
             
             logger.info(f"Tableau détaillé d'exercices généré en {time.time() - start_time:.2f} secondes")
             return response
@@ -245,7 +247,7 @@ class TableGeneratorAgent:
             Format le tableau en Markdown.
             """
             
-            response = self.llm.invoke(prompt)
+            response = response_text(self.llm.invoke(prompt))
             
             logger.info(f"Tableau récapitulatif généré en {time.time() - start_time:.2f} secondes")
             return response
@@ -0,0 +1,74 @@
+"""
+Benchmark de l'export Excel: temps et pic mémoire (tracemalloc) de l'écriture d'un
+programme de 4 à 52 semaines, comparés à l'ancienne écriture via pandas (to_excel puis
+réécriture de chaque cellule avec iterrows, classeur en mémoire).
+
+Usage (depuis backend/): python -m benchmarks.bench_excel_export
+"""
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from exports.excel import write_program_workbook
+
+WEEKS = [4, 16, 52]
+HEADERS = ["Jour", "Exercice", "Séries/Répétitions", "Intensité", "Récupération", "Notes"]
+ROW = ["Lundi", "Squat barre haute", "4 x 8", "70-75% 1RM", "2 min", "Contrôler la descente, gainage"]
+ROWS_PER_WEEK = 30
+
+
+def make_tables(weeks):
+    return [(f"Semaine {week}", HEADERS, [list(ROW) for _ in range(ROWS_PER_WEEK)]) for week in range(1, weeks + 1)]
+
+
+def legacy_export(introduction, tables):
+    """Ancienne implémentation de /api/convert-to-excel."""
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+        pd.DataFrame({"Introduction": [introduction]}).to_excel(writer, sheet_name="Introduction", index=False)
+        workbook = writer.book
+        for i, (_, headers, rows) in enumerate(tables):
+            df = pd.DataFrame(rows, columns=headers)
+            sheet_name = f"Semaine {i+1}"
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+            worksheet = writer.sheets[sheet_name]
+            for idx, col in enumerate(df.columns):
+                worksheet.set_column(idx, idx, max(df[col].astype(str).map(len).max(), len(col)) + 2)
+            cell_format = workbook.add_format({'text_wrap': True, 'valign': 'top', 'border': 1})
+            for row_num, (_, row) in enumerate(df.iterrows()):
+                for col_num, _ in enumerate(row):
+                    worksheet.write(row_num + 1, col_num, df.iloc[row_num, col_num], cell_format)
+    return output.getvalue()
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024
+
+
+def main() -> int:
+    print(f"{'Semaines':>8} | {'export (ms)':>11} | {'pic (Mo)':>8} | {'ancien (ms)':>11} | {'ancien pic (Mo)':>15}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "programme.xlsx")
+        for weeks in WEEKS:
+            tables = make_tables(weeks)
+            elapsed, peak = measure(lambda: write_program_workbook(path, "Introduction", tables))
+            legacy_elapsed, legacy_peak = measure(lambda: legacy_export("Introduction", tables))
+            print(f"{weeks:>8} | {elapsed * 1000:>11.1f} | {peak:>8.2f} | {legacy_elapsed * 1000:>11.1f} | {legacy_peak:>15.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+Micro-benchmark du post-traitement markdown des réponses: compare le normaliseur en une
+passe à l'ancienne chaîne de re.sub de OrchestratorAgent._format_response sur des
+programmes de taille croissante, et vérifie que le temps par Ko reste stable.
+
+Usage (depuis backend/): python -m benchmarks.bench_markdown_normalizer
+"""
+import os
+import re
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.markdown_normalizer import MarkdownNormalizer, normalize_markdown
+
+WEEKS = [4, 16, 64, 256]
+CHUNK_SIZE = 32
+MAX_SLOPE_RATIO = 2.0
+
+
+def legacy_format(text: str) -> str:
+    """Ancienne implémentation (8 passes re.sub non compilées)."""
+    text = re.sub(r'(\d+\.\s+)', r'\n\n\1', text)
+    text = re.sub(r'(-\s+)', r'\n\n\1', text)
+    text = re.sub(r'(#+\s+)', r'\n\n\1', text)
+    text = re.sub(r'\n\|\s*', r'\n| ', text)
+    text = re.sub(r'\.(\S)', r'. \1', text)
+    text = re.sub(r',(\S)', r', \1', text)
+    text = re.sub(r'(\n\s*-\s*\*\*)', r'\n- **', text)
+    text = re.sub(r'(\n#+.*?\n)(\S)', r'\1\n\2', text)
+    return text
+
+
+def make_program(weeks: int) -> str:
+    """Programme markdown type: une section et un tableau par semaine."""
+    parts = ["### Programme de course à pied\n\nIntroduction.Objectif 10 km en mi-temps.\n"]
+    for week in range(1, weeks + 1):
+        parts.append(f"\n**Semaine {week} - Développement**\n\n- **Volume**: 2.5 km de plus\n"
+                     "| Jour | Exercice | Séries/Répétitions | Intensité | Récupération | Notes |\n"
+                     "|---|---|---|---|---|---|\n")
+        for day in ("Lundi", "Mercredi", "Vendredi"):
+            parts.append(f"| {day} | Fractionné | 6 x 400 m | 90-95% FCMax | 1:30 | Retour au calme 10 min |\n")
+    return "".join(parts)
+
+
+def run_streaming(text: str) -> str:
+    normalizer = MarkdownNormalizer()
+    out = [normalizer.feed(text[i:i + CHUNK_SIZE]) for i in range(0, len(text), CHUNK_SIZE)]
+    out.append(normalizer.flush())
+    return "".join(out)
+
+
+def measure(func, text: str, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    print(f"{'Semaines':>8} | {'Taille':>9} | {'une passe (ms)':>14} | {'flux (ms)':>9} | {'re.sub (ms)':>11} | {'µs/Ko':>6}")
+    slopes = []
+    for weeks in WEEKS:
+        text = make_program(weeks)
+        size_kb = len(text.encode()) / 1024
+        single = measure(normalize_markdown, text)
+        streaming = measure(run_streaming, text)
+        legacy = measure(legacy_format, text)
+        slopes.append(single / size_kb)
+        print(f"{weeks:>8} | {size_kb:>6.1f} Ko | {single * 1000:>14.2f} | {streaming * 1000:>9.2f} | "
+              f"{legacy * 1000:>11.2f} | {slopes[-1] * 1e6:>6.1f}")
+
+    ratio = max(slopes) / min(slopes)
+    stable = ratio <= MAX_SLOPE_RATIO
+    print(f"Rapport des temps par Ko: {ratio:.2f} -> {'stable' if stable else 'NON stable'}")
+    return 0 if stable else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
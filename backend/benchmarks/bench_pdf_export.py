@@ -0,0 +1,54 @@
+"""
+Benchmark de l'export PDF: temps, nombre de pages, taille et pic mémoire (tracemalloc)
+de l'analyse et du rendu d'un programme de 4 à 52 semaines. Les pages étant écrites une à une, le pic
+mémoire doit rester à peu près constant quand la durée du programme augmente.
+
+Usage (depuis backend/): python -m benchmarks.bench_pdf_export
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exports.pdf import write_program_pdf
+from models.program_parser import parse_program
+
+WEEKS = [4, 16, 52]
+HEADERS = ["Jour", "Exercice", "Séries/Répétitions", "Intensité", "Récupération", "Notes"]
+ROW = ["Lundi", "Squat barre haute", "4 x 8", "70-75% 1RM", "2 min", "Contrôler la descente, gainage"]
+ROWS_PER_WEEK = 30
+
+
+def make_program(weeks):
+    parts = ["### Programme de force", "", "Introduction du programme. " * 10, ""]
+    for week in range(1, weeks + 1):
+        parts.extend([f"**Semaine {week} - Développement**", "", "| " + " | ".join(HEADERS) + " |",
+                      "|" + "---|" * len(HEADERS)])
+        parts.extend("| " + " | ".join(ROW) + " |" for _ in range(ROWS_PER_WEEK))
+        parts.append("")
+    return "\n".join(parts)
+
+
+def main() -> int:
+    print(f"{'Semaines':>8} | {'pages':>5} | {'taille (Ko)':>11} | {'rendu (ms)':>10} | {'pages/s':>7} | {'pic (Mo)':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "programme.pdf")
+        for weeks in WEEKS:
+            content = make_program(weeks)
+            tracemalloc.start()
+            start = time.perf_counter()
+            with open(path, "wb") as output:
+                pages = write_program_pdf(output, parse_program(content))
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            size = os.path.getsize(path) / 1024
+            print(f"{weeks:>8} | {pages:>5} | {size:>11.1f} | {elapsed * 1000:>10.1f} | {pages / elapsed:>7.0f} | {peak / 1024 / 1024:>8.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,304 @@
+"""
+Benchmark de bout en bout des routes de l'API (/api/chat, /api/generate-program,
+/api/convert-to-excel, /api/programs/list, /api/programs/{program_name}), hors ligne:
+l'application tourne en processus (transport ASGI), le LLM et le modèle d'embedding sont
+simulés (benchmarks/fakes.py) avec des latences et des débits de tokens configurables,
+ou les réponses du LLM sont rejouées depuis une cassette enregistrée (--cassette).
+
+Pour chaque scénario et chaque niveau de concurrence: débit (requêtes/s), latences
+p50/p95/p99 et erreurs. Les résultats peuvent être écrits en JSON (--output) et comparés
+à une exécution précédente (--baseline): code de sortie 1 en cas de régression.
+
+Les appels LLM bloquants des routes de chat et de génération s'exécutent dans le pool de threads
+par défaut d'asyncio (asyncio.to_thread): au-delà de min(32, CPU + 4) requêtes simultanées, les
+niveaux de concurrence mesurent aussi l'attente d'un thread libre.
+
+Usage (depuis backend/):
+    python -m benchmarks.bench_pipeline --concurrency 1,4,16 --requests 40 --output results.json
+    python -m benchmarks.bench_pipeline --baseline results.json --tolerance 0.15
+    python -m benchmarks.bench_pipeline --cassette data/cassettes/llm.jsonl --cassette-speed 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+import httpx
+import numpy as np
+
+from benchmarks.fakes import FakeEmbeddings, FakeLLM, LatencyModel, fake_program
+from tests import write_program
+
+CHAT_MESSAGES = [
+    "Bonjour !",
+    "Qu'est-ce que le fartlek ?",
+    "Comment faire un squat correctement ?",
+    "Que manger avant une séance ?",
+    "Compare la course à pied et la musculation pour perdre du poids",
+    "Crée-moi un programme de course de 12 semaines",
+]
+PROGRAM_REQUEST = {
+    "disciplines": ["running", "strength"],
+    "duration": 8,
+    "level": "intermédiaire",
+    "goals": "Courir un 10 km en moins de 50 minutes",
+    "constraints": "",
+    "equipment": "Haltères",
+    "frequency": 3,
+    "time_per_session": 60,
+}
+PROGRAM_FILES = 40
+ROWS = {"Jour": ["Lundi", "Mercredi", "Vendredi"], "Exercice": ["Footing", "Fractionné", "Squat"]}
+
+# Scénario: (méthode, chemin de la requête i, corps de la requête i)
+Scenario = Tuple[str, Callable[[int], str], Optional[Callable[[int], Dict[str, Any]]]]
+
+
+def build_scenarios(program_names: List[str]) -> Dict[str, Scenario]:
+    program_content = fake_program(PROGRAM_REQUEST["duration"])
+    return {
+        "chat": ("POST", lambda i: "/api/chat", lambda i: {"message": CHAT_MESSAGES[i % len(CHAT_MESSAGES)]}),
+        "generate_program": ("POST", lambda i: "/api/generate-program", lambda i: dict(PROGRAM_REQUEST, mode="llm")),
+        "generate_program_fast": ("POST", lambda i: "/api/generate-program", lambda i: dict(PROGRAM_REQUEST, mode="fast")),
+        "convert_to_excel": ("POST", lambda i: "/api/convert-to-excel", lambda i: {"content": program_content}),
+        "programs_list": ("POST", lambda i: "/api/programs/list", lambda i: {"limit": 20, "fields": ["duration"]}),
+        "program_detail": ("GET", lambda i: f"/api/programs/{program_names[i % len(program_names)]}", None),
+    }
+
+
+def percentile(values: List[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def prepare_workspace(directory: str) -> List[str]:
+    """Crée le répertoire de travail de l'application: programmes XLSX dans data/programs."""
+    programs_dir = os.path.join(directory, "data", "programs")
+    os.makedirs(programs_dir, exist_ok=True)
+    names = []
+    for index in range(PROGRAM_FILES):
+        name = f"programme_{index:03d}.xlsx"
+        introduction = ["Programme course à pied débutant", "Programme musculation avancé"][index % 2]
+        write_program(programs_dir, name, introduction, 8 + index % 9, ROWS)
+        names.append(name)
+    return names
+
+
+def load_app(llm, embeddings: FakeEmbeddings):
+    """Importe l'application et remplace le LLM et la base de connaissances par les versions simulées."""
+    os.environ["WATCH_DIRECTORIES"] = "false"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    import main
+    from models.knowledge_base import KnowledgeBase
+    from models.llm_router import LLMRouter
+    from monitoring.logging_pipeline import configure_logging
+
+    configure_logging(level=os.environ["LOG_LEVEL"], log_file="logs/app.log", console=False)
+    main.llm_router = LLMRouter([("fake", llm)])
+    main.knowledge_base = KnowledgeBase(embedding_model=embeddings)
+    return main
+
+
+async def run_level(client: httpx.AsyncClient, scenario: Scenario, concurrency: int, requests: int) -> Dict[str, Any]:
+    """Envoie `requests` requêtes avec au plus `concurrency` requêtes en cours."""
+    method, path, body = scenario
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    next_index = iter(range(requests))
+
+    async def worker():
+        for i in next_index:
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path(i), json=body(i) if body else None)
+                status = str(response.status_code)
+            except Exception as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = [latency * 1000 for latency in latencies]
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": sum(count for status, count in statuses.items() if not status.startswith(("2", "3"))),
+        "statuses": statuses,
+        "throughput_rps": requests / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "mean": float(np.mean(latencies_ms)) if latencies_ms else 0.0,
+            "p50": percentile(latencies_ms, 50),
+            "p95": percentile(latencies_ms, 95),
+            "p99": percentile(latencies_ms, 99),
+            "max": max(latencies_ms, default=0.0),
+        },
+    }
+
+
+async def run_suite(app, args, program_names: List[str]) -> List[Dict[str, Any]]:
+    scenarios = build_scenarios(program_names)
+    selected = args.scenarios.split(",") if args.scenarios else list(scenarios)
+    unknown = [name for name in selected if name not in scenarios]
+    if unknown:
+        raise SystemExit(f"Scénarios inconnus: {', '.join(unknown)} (disponibles: {', '.join(scenarios)})")
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        for name in selected:
+            # Préchauffage: initialisations paresseuses (orchestrateur, catalogue, caches) hors mesure
+            await run_level(client, scenarios[name], 1, args.warmup)
+            for concurrency in args.concurrency:
+                result = await run_level(client, scenarios[name], concurrency, args.requests)
+                result["scenario"] = name
+                results.append(result)
+                latency = result["latency_ms"]
+                print(f"{name:>22} | c={concurrency:<3} | {result['throughput_rps']:>8.1f} req/s | "
+                      f"p50 {latency['p50']:>8.1f} ms | p95 {latency['p95']:>8.1f} ms | "
+                      f"p99 {latency['p99']:>8.1f} ms | erreurs {result['errors']}")
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Compare les résultats à une exécution précédente.
+
+    Args:
+        results: Résultats de l'exécution courante
+        baseline: Contenu JSON de l'exécution de référence
+        tolerance: Dégradation relative tolérée (0.15: 15%)
+
+    Returns:
+        La description des régressions (p95 plus élevée ou débit plus faible au-delà de la tolérance)
+    """
+    reference = {(r["scenario"], r["concurrency"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        previous = reference.get((result["scenario"], result["concurrency"]))
+        if previous is None:
+            continue
+        label = f"{result['scenario']} (c={result['concurrency']})"
+        p95, previous_p95 = result["latency_ms"]["p95"], previous["latency_ms"]["p95"]
+        if previous_p95 and p95 > previous_p95 * (1 + tolerance):
+            regressions.append(f"{label}: p95 {previous_p95:.1f} -> {p95:.1f} ms")
+        rps, previous_rps = result["throughput_rps"], previous["throughput_rps"]
+        if previous_rps and rps < previous_rps * (1 - tolerance):
+            regressions.append(f"{label}: débit {previous_rps:.1f} -> {rps:.1f} req/s")
+        if result["errors"] > previous["errors"]:
+            regressions.append(f"{label}: erreurs {previous['errors']} -> {result['errors']}")
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark hors ligne des routes de l'API Athly")
+    parser.add_argument("--scenarios", default="", help="Scénarios séparés par des virgules (tous par défaut)")
+    parser.add_argument("--concurrency", default="1,4,16",
+                        type=lambda value: [int(level) for level in value.split(",")])
+    parser.add_argument("--requests", type=int, default=40, help="Requêtes par scénario et niveau de concurrence")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ttft-ms", type=float, default=50.0, help="Délai médian avant le premier token (ms)")
+    parser.add_argument("--ttft-sigma", type=float, default=0.5, help="Dispersion log-normale du délai avant le premier token")
+    parser.add_argument("--tokens-per-second", type=float, default=2000.0)
+    parser.add_argument("--tokens-jitter", type=float, default=0.2, help="Écart-type relatif du débit de tokens")
+    parser.add_argument("--cassette", help="Cassette LLM à rejouer à la place du LLM simulé")
+    parser.add_argument("--cassette-speed", type=float, default=1.0, help="Accélération du rejeu (0: sans attente)")
+    parser.add_argument("--embedding-ms", type=float, default=0.0, help="Latence simulée par texte embarqué (ms)")
+    parser.add_argument("--output", help="Fichier JSON des résultats")
+    parser.add_argument("--baseline", help="Résultats JSON d'une exécution précédente à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    latency = LatencyModel(args.ttft_ms / 1000, args.ttft_sigma, args.tokens_per_second, args.tokens_jitter)
+    if args.cassette:
+        from models.llm_cassette import REPLAY, CassetteLLM
+        llm = CassetteLLM(path=os.path.abspath(args.cassette), mode=REPLAY, speed=args.cassette_speed)
+    else:
+        llm = FakeLLM(latency, seed=args.seed)
+    embeddings = FakeEmbeddings(delay=args.embedding_ms / 1000)
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    workdir = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        # L'application lit et écrit data/, logs/, static/ dans le répertoire courant
+        program_names = prepare_workspace(directory)
+        os.chdir(directory)
+        try:
+            app = load_app(llm, embeddings).app
+            start = time.perf_counter()
+            results = asyncio.run(run_suite(app, args, program_names))
+            elapsed = time.perf_counter() - start
+        finally:
+            from exports.pool import get_export_pool
+            from monitoring.logging_pipeline import shutdown_logging
+
+            get_export_pool().shutdown()
+            shutdown_logging()
+            os.chdir(workdir)
+
+    if isinstance(llm, FakeLLM):
+        print(f"Durée totale {elapsed:.1f} s, {llm.calls} appels LLM simulés ({llm.simulated_seconds:.1f} s de latence)")
+    else:
+        print(f"Durée totale {elapsed:.1f} s, rejeu de {len(llm.cassette)} enregistrements ({args.cassette})")
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": args.seed,
+            "cassette": args.cassette,
+            "cassette_speed": args.cassette_speed if args.cassette else None,
+            "llm": {"ttft_ms": args.ttft_ms, "ttft_sigma": args.ttft_sigma,
+                    "tokens_per_second": args.tokens_per_second, "tokens_jitter": args.tokens_jitter},
+            "embedding_ms": args.embedding_ms,
+            "warmup": args.warmup,
+        },
+        "results": results,
+    }
+    if output:
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Résultats écrits dans {output}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"RÉGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"Aucune régression au-delà de {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
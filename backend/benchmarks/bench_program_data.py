@@ -0,0 +1,74 @@
+"""
+Benchmark de l'extraction d'un programme XLSX (ProgramDataManager.extract_program_data):
+ancienne lecture (classeur rouvert pour chaque feuille, lignes construites avec iterrows),
+lecture en une ouverture, puis lectures servies par le cache disque et le cache mémoire.
+
+Usage (depuis backend/): python -m benchmarks.bench_program_data
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from models.program_data import ProgramDataManager
+from tests import write_program
+
+WEEKS = 16
+ROWS_PER_WEEK = 30
+ROW = {"Jour": "Lundi", "Exercice": "Squat barre haute", "Séries/Répétitions": "4 x 8",
+       "Intensité": "70-75% 1RM", "Récupération": "2 min", "Notes": "Contrôler la descente"}
+REPEAT = 5
+
+
+def legacy_extract(file_path):
+    """Ancienne implémentation de extract_program_data."""
+    xls = pd.ExcelFile(file_path)
+    program_data = {"title": "programme", "weeks": {}}
+    intro_df = pd.read_excel(file_path, sheet_name="Introduction")
+    program_data["introduction"] = intro_df["Introduction"].iloc[0]
+    for sheet in xls.sheet_names:
+        if sheet != "Introduction" and "Semaine" in sheet:
+            week_df = pd.read_excel(file_path, sheet_name=sheet)
+            program_data["weeks"][sheet] = [dict(row) for _, row in week_df.iterrows()]
+    return program_data
+
+
+def timed(func):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        func()
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+def main() -> int:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "programme.xlsx")
+        write_program(directory, "programme.xlsx", "Programme de force", WEEKS, [ROW] * ROWS_PER_WEEK)
+        cache_dir = os.path.join(directory, ".cache")
+
+        def cold():
+            for name in os.listdir(cache_dir) if os.path.isdir(cache_dir) else []:
+                os.remove(os.path.join(cache_dir, name))
+            ProgramDataManager(directory).extract_program_data("programme.xlsx")
+
+        warm_manager = ProgramDataManager(directory)
+        warm_manager.extract_program_data("programme.xlsx")
+
+        results = [
+            ("ancienne lecture", timed(lambda: legacy_extract(path))),
+            ("une ouverture (sans cache)", timed(cold)),
+            ("cache disque", timed(lambda: ProgramDataManager(directory).extract_program_data("programme.xlsx"))),
+            ("cache mémoire", timed(lambda: warm_manager.extract_program_data("programme.xlsx"))),
+        ]
+    print(f"Programme de {WEEKS} semaines, {ROWS_PER_WEEK} lignes par semaine")
+    for label, elapsed in results:
+        print(f"{label:>28} | {elapsed:>9.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
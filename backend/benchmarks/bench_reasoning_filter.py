@@ -0,0 +1,81 @@
+"""
+Benchmark du filtre de raisonnement: vérifie que le temps de filtrage croît linéairement
+avec la taille de la réponse (jusqu'à 100 Ko), en flux et sur la réponse complète, et le
+compare aux expressions régulières de l'ancien QwenLLM._filter_thinking.
+
+Usage (depuis backend/): python -m benchmarks.bench_reasoning_filter
+"""
+import os
+import re
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.reasoning_filter import ReasoningFilter, strip_reasoning
+
+SIZES_KB = [12.5, 25, 50, 100]
+CHUNK_SIZE = 16
+# Un temps par Ko au plus deux fois supérieur entre la plus petite et la plus grande taille est considéré linéaire
+MAX_SLOPE_RATIO = 2.0
+
+LEGACY_PATTERNS = [
+    r"^(.*?Wait,.*?)(So,\s*)(.*?)$",
+    r"^(.*?Let me.*?)(Here's\s*)(.*?)$",
+    r"^(.*?Hmm,.*?)(To summarize,\s*)(.*?)$",
+    r"^(.*?I need to.*?)(In conclusion,\s*)(.*?)$",
+]
+
+
+def make_response(size_kb: float) -> str:
+    """Réponse type: préambule de raisonnement, bloc <think>, puis programme en markdown."""
+    reasoning = "Wait, the user wants a plan. Let me check the level. Hmm, maybe three sessions.\n"
+    think = "<think>Je dois vérifier la progression des charges semaine par semaine.</think>\n"
+    body = "| Lundi | Squat | 4x8 | 70% 1RM | 2 min | Wait, gainage |\n"
+    target = int(size_kb * 1024)
+    parts = [reasoning * 5, think]
+    while sum(len(p) for p in parts) < target:
+        parts.append(body)
+    return "".join(parts)[:target]
+
+
+def run_streaming(text: str) -> str:
+    reasoning_filter = ReasoningFilter()
+    out = [reasoning_filter.feed(text[i:i + CHUNK_SIZE]) for i in range(0, len(text), CHUNK_SIZE)]
+    out.append(reasoning_filter.flush())
+    return "".join(out)
+
+
+def run_legacy(text: str) -> None:
+    for pattern in LEGACY_PATTERNS:
+        re.search(pattern, text, re.DOTALL)
+
+
+def measure(func, text: str, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    print(f"{'Taille':>8} | {'flux (ms)':>10} | {'complet (ms)':>12} | {'regex (ms)':>10} | {'flux µs/Ko':>10}")
+    slopes = []
+    for size_kb in SIZES_KB:
+        text = make_response(size_kb)
+        streaming = measure(run_streaming, text)
+        complete = measure(strip_reasoning, text)
+        legacy = measure(run_legacy, text, repeat=1)
+        slopes.append(streaming / size_kb)
+        print(f"{size_kb:>6} Ko | {streaming * 1000:>10.2f} | {complete * 1000:>12.2f} | {legacy * 1000:>10.2f} | {slopes[-1] * 1e6:>10.1f}")
+
+    ratio = max(slopes) / min(slopes)
+    linear = ratio <= MAX_SLOPE_RATIO
+    print(f"Rapport des temps par Ko: {ratio:.2f} -> {'linéaire' if linear else 'NON linéaire'}")
+    return 0 if linear else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
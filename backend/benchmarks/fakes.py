@@ -0,0 +1,210 @@
+"""
+LLM et modèle d'embedding simulés pour les benchmarks hors ligne: réponses et latences
+déterministes (graine, prompt et rang de l'appel), sans réseau ni modèle téléchargé.
+"""
+import hashlib
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import AIMessage
+
+_PROGRAM_WEEKS = re.compile(r"Durée:\s*(\d+)\s*semaines", re.IGNORECASE)
+_WORDS = re.compile(r"\w+", re.UNICODE)
+
+SESSION_ROWS = [
+    ("Échauffement articulaire", "10 min", "Faible", "-", "Mobilité hanches et chevilles"),
+    ("Squat goblet", "4 x 10", "RPE 7", "90 s", "Garder le dos neutre"),
+    ("Footing en endurance", "35 min", "65-75% FCMax", "-", "Aisance respiratoire"),
+    ("Pompes inclinées", "3 x 12", "RPE 6", "60 s", "Gainage actif"),
+    ("Fractionné 8 x 400 m", "8 x 400 m", "VMA 95%", "1 min 30", "Récupération trottinée"),
+    ("Retour au calme", "10 min", "Faible", "-", "Étirements légers"),
+]
+
+
+def _seed(*parts) -> int:
+    digest = hashlib.blake2b("\x1f".join(str(part) for part in parts).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+@dataclass
+class LatencyModel:
+    """
+    Latence d'un appel LLM: délai avant le premier token (log-normal) puis génération
+    au débit `tokens_per_second` (loi normale tronquée).
+    """
+
+    ttft_median: float = 0.05
+    ttft_sigma: float = 0.5
+    tokens_per_second: float = 2000.0
+    tokens_per_second_jitter: float = 0.2
+
+    def sample(self, rng: random.Random, output_tokens: int) -> float:
+        """
+        Tire la durée d'un appel.
+
+        Args:
+            rng: Générateur aléatoire de l'appel
+            output_tokens: Nombre de tokens générés
+
+        Returns:
+            La durée simulée (s)
+        """
+        ttft = self.ttft_median * math.exp(rng.gauss(0.0, self.ttft_sigma))
+        if self.tokens_per_second <= 0:
+            return ttft
+        rate = self.tokens_per_second * max(0.1, rng.gauss(1.0, self.tokens_per_second_jitter))
+        return ttft + output_tokens / rate
+
+
+def count_tokens(text: str) -> int:
+    """Estimation du nombre de tokens (4 caractères par token)."""
+    return max(1, len(text) // 4)
+
+
+def fake_program(weeks: int, sessions: int = 3) -> str:
+    """
+    Programme markdown au format produit par le LLM (une section et des tableaux par semaine).
+
+    Args:
+        weeks: Nombre de semaines
+        sessions: Nombre de séances par semaine
+
+    Returns:
+        Le programme en markdown
+    """
+    days = ["Lundi", "Mardi", "Mercredi", "Jeudi", "Vendredi", "Samedi", "Dimanche"]
+    lines = ["# Programme d'entraînement", "", "## Introduction", "",
+             "Programme progressif orienté endurance et renforcement musculaire.", ""]
+    for week in range(1, weeks + 1):
+        lines += [f"## Semaine {week}", ""]
+        for session in range(sessions):
+            lines += [f"### {days[(session * 2) % 7]}", "",
+                      "| Exercice | Séries/Répétitions | Intensité | Récupération | Notes |",
+                      "|---|---|---|---|---|"]
+            lines += [f"| {' | '.join(row)} |" for row in SESSION_ROWS]
+            lines.append("")
+    lines += ["## Conseils de progression", "", "Augmenter le volume de 10% au plus par semaine.", ""]
+    return "\n".join(lines)
+
+
+class FakeLLM:
+    """
+    LLM simulé, utilisable comme fournisseur du LLMRouter.
+
+    Les prompts de programme (« Durée: N semaines ») reçoivent un programme markdown de N semaines,
+    les autres une réponse courte. La réponse et la latence ne dépendent que de la graine, du prompt
+    et du nombre d'appels déjà reçus pour ce prompt: deux exécutions produisent les mêmes tirages.
+    """
+
+    model_name = "fake-llm"
+
+    def __init__(self, latency: Optional[LatencyModel] = None, seed: int = 0,
+                 chat_tokens: tuple = (60, 240), sleep: bool = True):
+        """
+        Initialise le LLM simulé.
+
+        Args:
+            latency: Modèle de latence (par défaut: LatencyModel())
+            seed: Graine des tirages
+            chat_tokens: Bornes du nombre de tokens des réponses courtes
+            sleep: Attendre la latence simulée (False: latence seulement comptabilisée)
+        """
+        self.latency = latency or LatencyModel()
+        self.seed = seed
+        self.chat_tokens = chat_tokens
+        self.sleep = sleep
+        self.calls = 0
+        self.simulated_seconds = 0.0
+        self._occurrences: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def _response(self, rng: random.Random, prompt: str) -> str:
+        match = _PROGRAM_WEEKS.search(prompt)
+        if match:
+            return fake_program(int(match.group(1)))
+        words = rng.randint(*self.chat_tokens) * 3 // 4
+        vocabulary = ["entraînement", "récupération", "séance", "progression", "endurance", "force",
+                      "technique", "hydratation", "sommeil", "intensité", "volume", "échauffement"]
+        return " ".join(rng.choice(vocabulary) for _ in range(words)).capitalize() + "."
+
+    def generate(self, prompt: str) -> Tuple[str, float, random.Random]:
+        """
+        Tire la réponse et la latence d'un appel, sans attendre.
+
+        Args:
+            prompt: Le prompt
+
+        Returns:
+            (texte, latence simulée en secondes, générateur aléatoire de l'appel)
+        """
+        with self._lock:
+            occurrence = self._occurrences[prompt]
+            self._occurrences[prompt] += 1
+            self.calls += 1
+        rng = random.Random(_seed(self.seed, prompt, occurrence))
+
+        text = self._response(rng, prompt)
+        delay = self.latency.sample(rng, count_tokens(text))
+        with self._lock:
+            self.simulated_seconds += delay
+        return text, delay, rng
+
+    def invoke(self, prompt, stop=None, **kwargs) -> AIMessage:
+        prompt = prompt if isinstance(prompt, str) else str(prompt)
+        text, delay, _ = self.generate(prompt)
+        if self.sleep:
+            time.sleep(delay)
+        input_tokens, output_tokens = count_tokens(prompt), count_tokens(text)
+        # Réponse au format des modèles de chat: raison de fin et usage portés par le message
+        return AIMessage(
+            content=text,
+            response_metadata={"finish_reason": "stop"},
+            usage_metadata={"input_tokens": input_tokens, "output_tokens": output_tokens,
+                            "total_tokens": input_tokens + output_tokens}
+        )
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Modèle d'embedding simulé: sac de mots haché dans un vecteur normalisé. Deux textes
+    partageant des mots restent proches, ce qui garde le routage et la recherche réalistes.
+    """
+
+    model_name = "fake-embeddings"
+
+    def __init__(self, dimension: int = 384, delay: float = 0.0):
+        """
+        Initialise le modèle.
+
+        Args:
+            dimension: Dimension des vecteurs
+            delay: Latence simulée par texte (s)
+        """
+        self.dimension = dimension
+        self.delay = delay
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimension)
+        for word in _WORDS.findall(text.lower()):
+            value = _seed(word)
+            vector[value % self.dimension] += 1.0 if (value >> 32) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.delay:
+            time.sleep(self.delay * len(texts))
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.delay:
+            time.sleep(self.delay)
+        return self._embed(text)
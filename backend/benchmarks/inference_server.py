@@ -0,0 +1,224 @@
+"""
+Serveur d'inférence local imitant l'API chat completions de Mistral (POST /v1/chat/completions)
+et celle de Hugging Face (POST /{model}/v1/chat/completions), avec et sans streaming, pour les
+tests de charge sans service externe.
+
+Latence (délai avant le premier token, débit de tokens), taux d'erreurs 5xx, taux de réponses 429
+et nombre maximal de requêtes simultanées sont configurables au lancement, puis modifiables
+à chaud (PATCH /config). GET /stats donne les compteurs par code de réponse et le pic de concurrence.
+
+Usage (depuis backend/):
+    python -m benchmarks.inference_server --port 8090 --tokens-per-second 80 --error-rate 0.02 --rate-limit-rate 0.05
+
+puis, pour le backend:
+    MISTRAL_BASE_URL=http://localhost:8090/v1 MISTRAL_API_KEY=local \\
+    HUGGINGFACE_BASE_URL=http://localhost:8090 HUGGINGFACE_API_KEY=local uvicorn main:app
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+from benchmarks.fakes import FakeLLM, count_tokens
+
+# Caractères par morceau du flux (un token)
+CHUNK_CHARS = 4
+
+
+class ServerConfig(BaseModel):
+    ttft_ms: float = 300.0
+    ttft_sigma: float = 0.5
+    tokens_per_second: float = 60.0
+    tokens_jitter: float = 0.2
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after: float = 1.0
+    max_concurrency: int = 0
+    seed: int = 0
+
+
+class ConfigUpdate(BaseModel):
+    ttft_ms: Optional[float] = None
+    ttft_sigma: Optional[float] = None
+    tokens_per_second: Optional[float] = None
+    tokens_jitter: Optional[float] = None
+    error_rate: Optional[float] = None
+    rate_limit_rate: Optional[float] = None
+    retry_after: Optional[float] = None
+    max_concurrency: Optional[int] = None
+
+
+def _prompt(messages: List[Dict[str, Any]]) -> str:
+    parts = []
+    for message in messages:
+        content = message.get("content") or ""
+        if isinstance(content, list):
+            content = "".join(part.get("text", "") for part in content if isinstance(part, dict))
+        parts.append(content)
+    return "\n".join(parts)
+
+
+def create_app(config: Optional[ServerConfig] = None) -> FastAPI:
+    """
+    Crée l'application du serveur d'inférence.
+
+    Args:
+        config: Configuration initiale
+
+    Returns:
+        L'application FastAPI
+    """
+    app = FastAPI(title="Athly - serveur d'inférence local")
+    app.state.config = config or ServerConfig()
+    app.state.llm = None
+    app.state.responses = Counter()
+    app.state.in_flight = 0
+    app.state.peak_in_flight = 0
+    app.state.rng = random.Random(app.state.config.seed)
+
+    def reset_llm() -> None:
+        # Seuls les textes sont tirés par FakeLLM: la latence est rendue ici, par morceaux
+        app.state.llm = FakeLLM(seed=app.state.config.seed, sleep=False)
+
+    reset_llm()
+
+    def error(status: int, message: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+        app.state.responses[str(status)] += 1
+        return JSONResponse(status_code=status, content={"object": "error", "message": message, "type": "stand_in"},
+                            headers=headers)
+
+    @app.get("/stats")
+    def stats():
+        return {
+            "responses": dict(app.state.responses),
+            "in_flight": app.state.in_flight,
+            "peak_in_flight": app.state.peak_in_flight,
+            "config": app.state.config.model_dump(),
+        }
+
+    @app.patch("/config")
+    def update_config(update: ConfigUpdate):
+        values = {key: value for key, value in update.model_dump().items() if value is not None}
+        app.state.config = app.state.config.model_copy(update=values)
+        reset_llm()
+        return app.state.config.model_dump()
+
+    @app.post("/v1/chat/completions")
+    async def mistral_chat_completions(request: Request):
+        return await chat_completions(request, None)
+
+    @app.post("/{model:path}/v1/chat/completions")
+    async def hf_chat_completions(model: str, request: Request):
+        return await chat_completions(request, model)
+
+    async def chat_completions(request: Request, model: Optional[str]):
+        cfg = app.state.config
+        body = await request.json()
+        model = body.get("model") or model or "stand-in"
+
+        # Limite de concurrence et erreurs injectées avant toute génération, comme un fournisseur surchargé
+        if cfg.max_concurrency and app.state.in_flight >= cfg.max_concurrency:
+            return error(429, "Too many concurrent requests", {"Retry-After": f"{cfg.retry_after:g}"})
+        draw = app.state.rng.random()
+        if draw < cfg.rate_limit_rate:
+            return error(429, "Rate limit exceeded", {"Retry-After": f"{cfg.retry_after:g}"})
+        if draw < cfg.rate_limit_rate + cfg.error_rate:
+            return error(app.state.rng.choice([500, 502, 503]), "Internal server error")
+
+        prompt = _prompt(body.get("messages") or [])
+        text, _, rng = app.state.llm.generate(prompt)
+        finish_reason = "stop"
+        max_tokens = body.get("max_tokens")
+        if max_tokens and count_tokens(text) > max_tokens:
+            text, finish_reason = text[:max_tokens * CHUNK_CHARS], "length"
+
+        ttft = cfg.ttft_ms / 1000 * rng.lognormvariate(0.0, cfg.ttft_sigma)
+        rate = cfg.tokens_per_second * max(0.1, rng.gauss(1.0, cfg.tokens_jitter)) if cfg.tokens_per_second > 0 else 0.0
+        usage = {"prompt_tokens": count_tokens(prompt), "completion_tokens": count_tokens(text)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        completion_id = f"cmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+
+        app.state.in_flight += 1
+        app.state.peak_in_flight = max(app.state.peak_in_flight, app.state.in_flight)
+        app.state.responses["200"] += 1
+
+        if body.get("stream"):
+            async def events():
+                try:
+                    await asyncio.sleep(ttft)
+                    start = time.monotonic()
+                    for index in range(0, len(text), CHUNK_CHARS):
+                        if rate:
+                            # Morceaux cadencés sur le débit moyen, sans dérive des attentes successives
+                            await asyncio.sleep(max(0.0, start + (index // CHUNK_CHARS) / rate - time.monotonic()))
+                        chunk = {
+                            "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                            "choices": [{"index": 0, "delta": {"role": "assistant", "content": text[index:index + CHUNK_CHARS]},
+                                         "finish_reason": None}],
+                        }
+                        yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                    final = {
+                        "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                        "choices": [{"index": 0, "delta": {"content": ""}, "finish_reason": finish_reason}],
+                        "usage": usage,
+                    }
+                    yield f"data: {json.dumps(final)}\n\n"
+                    yield "data: [DONE]\n\n"
+                finally:
+                    app.state.in_flight -= 1
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        try:
+            await asyncio.sleep(ttft + (usage["completion_tokens"] / rate if rate else 0.0))
+        finally:
+            app.state.in_flight -= 1
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": finish_reason}],
+            "usage": usage,
+        }
+
+    return app
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serveur d'inférence local compatible Mistral / Hugging Face")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--ttft-ms", type=float, default=300.0, help="Délai médian avant le premier token (ms)")
+    parser.add_argument("--ttft-sigma", type=float, default=0.5)
+    parser.add_argument("--tokens-per-second", type=float, default=60.0)
+    parser.add_argument("--tokens-jitter", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Proportion de réponses 500/502/503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Proportion de réponses 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="En-tête Retry-After des réponses 429 (s)")
+    parser.add_argument("--max-concurrency", type=int, default=0, help="Requêtes simultanées avant 429 (0: illimité)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    config = ServerConfig(**{key: value for key, value in vars(args).items() if key not in ("host", "port")})
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
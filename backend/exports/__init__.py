@@ -0,0 +1,7 @@
+from .excel import EXCEL_MEDIA_TYPE, export_program_workbook, write_program_workbook
+from .pdf import PDF_MEDIA_TYPE, PdfRenderer, write_program_pdf
+
+__all__ = [
+    "EXCEL_MEDIA_TYPE", "export_program_workbook", "write_program_workbook",
+    "PDF_MEDIA_TYPE", "PdfRenderer", "write_program_pdf",
+]
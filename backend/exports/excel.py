@@ -0,0 +1,146 @@
+import logging
+import os
+import tempfile
+from typing import Optional, Sequence
+
+import xlsxwriter
+
+from models.program_parser import ProgramDocument, WeekTable, parse_program
+
+logger = logging.getLogger("athly.exports.excel")
+
+EXCEL_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Largeurs de colonnes (en caractères)
+INTRODUCTION_WIDTH = 80
+MAX_COLUMN_WIDTH = 60
+
+HEADER_FORMAT = {
+    'bold': True,
+    'text_wrap': True,
+    'valign': 'top',
+    'fg_color': '#4F46E5',
+    'font_color': 'white',
+    'border': 1
+}
+CELL_FORMAT = {
+    'text_wrap': True,
+    'valign': 'top',
+    'border': 1
+}
+
+
+def _sheet_name(index: int) -> str:
+    """Nom de la feuille d'une semaine (max 31 caractères pour Excel)."""
+    sheet_name = f"Semaine {index + 1}"
+    if len(sheet_name) > 31:
+        sheet_name = sheet_name[:28] + "..."
+    return sheet_name
+
+
+def write_program_workbook(path: str, introduction: str, tables: Sequence[WeekTable]) -> None:
+    """
+    Écrit un programme d'entraînement dans un classeur Excel.
+
+    Le classeur est écrit en mode `constant_memory` de xlsxwriter: chaque ligne est
+    envoyée sur disque dès qu'elle est écrite, la mémoire reste donc constante quelle que
+    soit la durée du programme. Les formats sont créés une seule fois et la largeur des
+    colonnes est calculée pendant l'écriture des cellules.
+
+    Args:
+        path: Chemin du fichier .xlsx à créer
+        introduction: Texte de la feuille d'introduction
+        tables: Liste de tuples (titre de la semaine, en-têtes, lignes)
+    """
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+    try:
+        header_format = workbook.add_format(HEADER_FORMAT)
+        cell_format = workbook.add_format(CELL_FORMAT)
+        text_format = workbook.add_format({'text_wrap': True})
+
+        # Feuille d'introduction
+        worksheet = workbook.add_worksheet("Introduction")
+        worksheet.set_column(0, 0, INTRODUCTION_WIDTH, text_format)
+        worksheet.write_string(0, 0, "Introduction", header_format)
+        worksheet.write_string(1, 0, introduction or "")
+
+        # Une feuille par semaine
+        for index, (week_title, headers, rows) in enumerate(tables):
+            worksheet = workbook.add_worksheet(_sheet_name(index))
+            widths = [len(header) for header in headers]
+
+            for col_num, header in enumerate(headers):
+                worksheet.write_string(0, col_num, header, header_format)
+
+            for row_num, row in enumerate(rows, start=1):
+                for col_num, value in enumerate(row):
+                    value = "" if value is None else str(value)
+                    worksheet.write_string(row_num, col_num, value, cell_format)
+                    if col_num < len(widths):
+                        if len(value) > widths[col_num]:
+                            widths[col_num] = len(value)
+                    else:
+                        widths.append(len(value))
+
+            for col_num, width in enumerate(widths):
+                worksheet.set_column(col_num, col_num, min(width + 2, MAX_COLUMN_WIDTH))
+
+            # Figer la première ligne
+            worksheet.freeze_panes(1, 0)
+    finally:
+        workbook.close()
+
+
+def export_program_workbook(introduction: str, tables: Sequence[WeekTable], directory: str = None) -> str:
+    """
+    Écrit le classeur dans un fichier temporaire, à supprimer après envoi.
+
+    Args:
+        introduction: Texte de la feuille d'introduction
+        tables: Liste de tuples (titre de la semaine, en-têtes, lignes)
+        directory: Répertoire des fichiers temporaires (celui du système par défaut)
+
+    Returns:
+        Le chemin du fichier .xlsx créé
+    """
+    fd, path = tempfile.mkstemp(suffix=".xlsx", prefix="athly_", dir=directory)
+    os.close(fd)
+    try:
+        write_program_workbook(path, introduction, tables)
+    except Exception:
+        os.remove(path)
+        raise
+    logger.debug(f"Classeur Excel écrit: {path} ({len(tables)} semaines)")
+    return path
+
+
+def program_introduction(document: ProgramDocument) -> str:
+    """
+    Texte de la feuille d'introduction: titre et introduction du programme.
+
+    Args:
+        document: Le programme analysé
+
+    Returns:
+        Le texte d'introduction
+    """
+    return "\n\n".join(part for part in (document.title, document.introduction) if part)
+
+
+def excel_export_job(content: str = "", document: Optional[ProgramDocument] = None, directory: str = None) -> str:
+    """
+    Tâche d'export Excel exécutée dans un processus du pool d'export.
+
+    Args:
+        content: Programme textuel (markdown), analysé si `document` n'est pas fourni
+        document: Programme déjà analysé (programme structuré)
+        directory: Répertoire des fichiers temporaires
+
+    Returns:
+        Le chemin du fichier .xlsx créé
+    """
+    if document is None:
+        document = parse_program(content)
+    tables = document.week_tables()
+    logger.debug(f"Nombre de tables trouvées: {len(tables)}")
+    return export_program_workbook(program_introduction(document), tables, directory)
@@ -0,0 +1,411 @@
+import logging
+import os
+import tempfile
+import zlib
+from datetime import datetime
+from typing import BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from models.program_parser import CODE, HEADING, LIST, STRONG, TABLE, Block, ProgramDocument, parse_program
+
+logger = logging.getLogger("athly.exports.pdf")
+
+PDF_MEDIA_TYPE = "application/pdf"
+DEFAULT_TITLE = "Programme d'entraînement"
+
+# Format A4 en points
+PAGE_WIDTH = 595.28
+PAGE_HEIGHT = 841.89
+MARGIN = 50.0
+FOOTER_HEIGHT = 20.0
+CELL_PADDING = 3.0
+BULLET_INDENT = 12.0
+
+HEADER_COLOR = (0.31, 0.275, 0.898)  # #4F46E5, comme l'export Excel
+TEXT_COLOR = (0.13, 0.13, 0.13)
+BORDER_COLOR = (0.75, 0.75, 0.78)
+
+
+class Style(NamedTuple):
+    font: str
+    size: float
+    leading: float
+    space_before: float
+    space_after: float
+
+
+# Styles chargés une seule fois (F1: Helvetica, F2: Helvetica-Bold)
+STYLES: Dict[str, Style] = {
+    "heading1": Style("F2", 18, 22, 6, 8),
+    "heading2": Style("F2", 15, 19, 10, 6),
+    "heading3": Style("F2", 13, 17, 10, 4),
+    "strong": Style("F2", 11, 14, 8, 4),
+    "paragraph": Style("F1", 10, 13, 0, 4),
+    "list": Style("F1", 10, 13, 0, 2),
+    "table": Style("F1", 8, 10, 4, 8),
+    "table_header": Style("F2", 8, 10, 0, 0),
+    "footer": Style("F1", 8, 10, 0, 0),
+}
+
+FONTS = {"F1": "Helvetica", "F2": "Helvetica-Bold"}
+
+
+def _load_metrics() -> Dict[str, Dict[str, int]]:
+    """Largeurs des glyphes (AFM Adobe, millièmes d'em) des polices standard, encodage WinAnsi."""
+    ascii_chars = "".join(chr(code) for code in range(32, 127))
+    regular = [
+        278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+        556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+        1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+        667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+        333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+        556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+    ]
+    bold = [
+        278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+        556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+        975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+        667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+        333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+        611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+    ]
+    metrics = {"F1": dict(zip(ascii_chars, regular)), "F2": dict(zip(ascii_chars, bold))}
+
+    # Lettres accentuées: même largeur que la lettre de base
+    accented = {
+        "A": "ÀÁÂÃÄÅ", "C": "Ç", "E": "ÈÉÊË", "I": "ÌÍÎÏ", "N": "Ñ", "O": "ÒÓÔÕÖØ", "U": "ÙÚÛÜ", "Y": "ÝŸ",
+        "a": "àáâãäå", "c": "ç", "e": "èéêë", "i": "ìíîï", "n": "ñ", "o": "òóôõöø", "u": "ùúûü", "y": "ýÿ",
+    }
+    extra = {"Æ": 1000, "æ": 889, "Œ": 1000, "œ": 944, "ß": 611, "’": 222, "‘": 222, "“": 333, "”": 333,
+             "–": 556, "—": 1000, "…": 1000, "€": 556, "«": 556, "»": 556, "°": 400, "•": 350, "×": 584, " ": 278}
+    for widths in metrics.values():
+        for base, variants in accented.items():
+            for char in variants:
+                widths[char] = widths[base]
+        for char, width in extra.items():
+            widths.setdefault(char, width)
+    return metrics
+
+
+METRICS = _load_metrics()
+DEFAULT_WIDTH = 556
+
+
+def text_width(text: str, font: str, size: float) -> float:
+    """Largeur d'un texte en points."""
+    widths = METRICS[font]
+    return sum(widths.get(char, DEFAULT_WIDTH) for char in text) * size / 1000
+
+
+def wrap_text(text: str, font: str, size: float, max_width: float) -> List[str]:
+    """
+    Découpe un texte en lignes ne dépassant pas la largeur donnée.
+
+    Args:
+        text: Le texte
+        font: La police (F1 ou F2)
+        size: Taille de police
+        max_width: Largeur maximale en points
+
+    Returns:
+        Les lignes
+    """
+    widths = METRICS[font]
+    space = widths[" "] * size / 1000
+    lines: List[str] = []
+    current: List[str] = []
+    current_width = 0.0
+
+    for word in text.split():
+        word_width = sum(widths.get(char, DEFAULT_WIDTH) for char in word) * size / 1000
+        if word_width > max_width:
+            # Mot plus long que la ligne: coupure caractère par caractère
+            if current:
+                lines.append(" ".join(current))
+                current, current_width = [], 0.0
+            piece, piece_width = "", 0.0
+            for char in word:
+                char_width = widths.get(char, DEFAULT_WIDTH) * size / 1000
+                if piece and piece_width + char_width > max_width:
+                    lines.append(piece)
+                    piece, piece_width = "", 0.0
+                piece += char
+                piece_width += char_width
+            current, current_width = [piece], piece_width
+            continue
+        if current and current_width + space + word_width > max_width:
+            lines.append(" ".join(current))
+            current, current_width = [word], word_width
+        else:
+            current_width += (space if current else 0.0) + word_width
+            current.append(word)
+
+    if current:
+        lines.append(" ".join(current))
+    return lines or [""]
+
+
+def _pdf_string(text: str) -> bytes:
+    """Chaîne PDF littérale encodée en WinAnsi (cp1252)."""
+    data = text.encode("cp1252", errors="replace")
+    return b"(" + data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def _color(rgb: Sequence[float], stroke: bool = False) -> bytes:
+    return ("%.3f %.3f %.3f %s" % (*rgb, "RG" if stroke else "rg")).encode()
+
+
+class PdfRenderer:
+    """
+    Rendu PDF en pur Python des programmes d'entraînement.
+
+    Les polices standard (Helvetica) ne sont pas embarquées: leurs métriques et les styles
+    sont chargés une seule fois à l'import du module. Les pages sont mises en page au fil
+    des blocs et chaque page terminée est immédiatement émise (compressée), de sorte que la
+    mémoire reste bornée quelle que soit la longueur du programme.
+    """
+
+    def __init__(self, title: str = DEFAULT_TITLE):
+        """
+        Initialise le rendu.
+
+        Args:
+            title: Titre du document (métadonnées)
+        """
+        self.title = title
+        self.content_width = PAGE_WIDTH - 2 * MARGIN
+        self._offset = 0
+        self._offsets: Dict[int, int] = {}
+        self._next_object = 5  # 1: catalogue, 2: arbre des pages, 3-4: polices
+        self._page_objects: List[int] = []
+        self._ops: List[bytes] = []
+        self._finished: List[List[bytes]] = []
+        self._y = 0.0
+        self._page_number = 0
+
+    # Écriture des objets PDF
+
+    def _object(self, number: int, body: bytes) -> bytes:
+        self._offsets[number] = self._offset
+        data = b"%d 0 obj\n" % number + body + b"\nendobj\n"
+        self._offset += len(data)
+        return data
+
+    def _emit(self, data: bytes) -> bytes:
+        self._offset += len(data)
+        return data
+
+    def _page_bytes(self, ops: List[bytes]) -> bytes:
+        content = zlib.compress(b"\n".join(ops))
+        content_number, page_number = self._next_object, self._next_object + 1
+        self._next_object += 2
+        self._page_objects.append(page_number)
+        return (
+            self._object(content_number, b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(content)
+                         + content + b"\nendstream")
+            + self._object(page_number, (
+                "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] "
+                "/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>"
+                % (PAGE_WIDTH, PAGE_HEIGHT, content_number)
+            ).encode())
+        )
+
+    # Mise en page
+
+    def _new_page(self) -> None:
+        if self._page_number:
+            self._finish_page()
+        self._page_number += 1
+        self._ops = [_color(TEXT_COLOR)]
+        self._y = PAGE_HEIGHT - MARGIN
+
+    def _finish_page(self) -> None:
+        footer = STYLES["footer"]
+        label = f"Page {self._page_number}"
+        x = (PAGE_WIDTH - text_width(label, footer.font, footer.size)) / 2
+        self._text(x, MARGIN / 2, footer, label)
+        self._finished.append(self._ops)
+        self._ops = []
+
+    def _ensure(self, height: float) -> bool:
+        """Passe à la page suivante si la hauteur demandée ne tient pas; indique si une page a été ouverte."""
+        if self._y - height < MARGIN + FOOTER_HEIGHT:
+            self._new_page()
+            return True
+        return False
+
+    def _text(self, x: float, baseline: float, style: Style, text: str) -> None:
+        self._ops.append(b"BT /%s %.1f Tf %.2f %.2f Td %s Tj ET"
+                         % (style.font.encode(), style.size, x, baseline, _pdf_string(text)))
+
+    def _lines(self, style: Style, text: str, x: float, width: float, prefix: Optional[str] = None) -> None:
+        self._y -= style.space_before
+        for index, line in enumerate(wrap_text(text, style.font, style.size, width)):
+            self._ensure(style.leading)
+            baseline = self._y - style.size
+            if prefix and index == 0:
+                self._text(x - BULLET_INDENT, baseline, style, prefix)
+            self._text(x, baseline, style, line)
+            self._y -= style.leading
+        self._y -= style.space_after
+
+    def _column_widths(self, headers: List[str], rows: List[List[str]], count: int) -> List[float]:
+        """Largeurs de colonnes proportionnelles au contenu, bornées par la largeur de page."""
+        style = STYLES["table"]
+        natural = [0.0] * count
+        for row in [headers] + rows:
+            for index, cell in enumerate(row[:count]):
+                natural[index] = max(natural[index], text_width(cell, style.font, style.size) + 2 * CELL_PADDING)
+        minimum = 40.0
+        natural = [max(width, minimum) for width in natural]
+        total = sum(natural)
+        if total <= self.content_width:
+            return natural
+        # Réduire les colonnes larges en priorité
+        flexible = sum(width - minimum for width in natural)
+        excess = total - self.content_width
+        return [width - (width - minimum) * excess / flexible if flexible else self.content_width / count
+                for width in natural]
+
+    def _wrap_row(self, cells: List[str], widths: List[float], style: Style) -> Tuple[List[List[str]], float]:
+        """Découpe les cellules d'une ligne et calcule sa hauteur."""
+        wrapped = [wrap_text(cells[i] if i < len(cells) else "", style.font, style.size, width - 2 * CELL_PADDING)
+                   for i, width in enumerate(widths)]
+        return wrapped, max(len(lines) for lines in wrapped) * style.leading + 2 * CELL_PADDING
+
+    def _table_row(self, wrapped: List[List[str]], height: float, widths: List[float], style: Style,
+                   header: bool) -> None:
+        top = self._y
+        x = MARGIN
+        if header:
+            self._ops.append(_color(HEADER_COLOR) + b" %.2f %.2f %.2f %.2f re f"
+                             % (MARGIN, top - height, sum(widths), height))
+            self._ops.append(_color((1, 1, 1)))
+        self._ops.append(_color(BORDER_COLOR, stroke=True) + b" 0.5 w")
+        for width, lines in zip(widths, wrapped):
+            self._ops.append(b"%.2f %.2f %.2f %.2f re S" % (x, top - height, width, height))
+            for index, line in enumerate(lines):
+                self._text(x + CELL_PADDING, top - CELL_PADDING - style.size - index * style.leading, style, line)
+            x += width
+        if header:
+            self._ops.append(_color(TEXT_COLOR))
+        self._y -= height
+
+    def _table(self, headers: List[str], rows: List[List[str]]) -> None:
+        style, header_style = STYLES["table"], STYLES["table_header"]
+        count = max([len(headers)] + [len(row) for row in rows])
+        widths = self._column_widths(headers, rows, count)
+        header_cells, header_height = self._wrap_row(headers, widths, header_style)
+
+        self._y -= style.space_before
+        self._ensure(header_height + style.leading + 2 * CELL_PADDING)
+        self._table_row(header_cells, header_height, widths, header_style, header=True)
+        for row in rows:
+            cells, height = self._wrap_row(row, widths, style)
+            if self._ensure(height):
+                # En-tête répété en haut de chaque nouvelle page
+                self._table_row(header_cells, header_height, widths, header_style, header=True)
+            self._table_row(cells, height, widths, style, header=False)
+        self._y -= style.space_after
+
+    def _layout(self, block: Block) -> None:
+        if block.kind == HEADING:
+            self._lines(STYLES[f"heading{min(block.level, 3)}"], block.text, MARGIN, self.content_width)
+        elif block.kind == STRONG:
+            self._lines(STYLES["strong"], block.text, MARGIN, self.content_width)
+        elif block.kind == LIST:
+            self._lines(STYLES["list"], block.text, MARGIN + BULLET_INDENT, self.content_width - BULLET_INDENT, "•")
+        elif block.kind == TABLE:
+            if block.table.headers:
+                self._table(block.table.headers, block.table.rows)
+        elif block.kind == CODE:
+            for line in block.text.split("\n"):
+                self._lines(STYLES["paragraph"], line, MARGIN, self.content_width)
+        else:
+            self._lines(STYLES["paragraph"], block.text, MARGIN, self.content_width)
+
+    def render(self, blocks: Iterable[Block]) -> Iterator[bytes]:
+        """
+        Génère le document PDF par morceaux.
+
+        Args:
+            blocks: Les blocs du programme analysé (voir models.program_parser)
+
+        Returns:
+            Itérateur sur les octets du document, une page après l'autre
+        """
+        yield self._emit(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        for number, font in ((3, "F1"), (4, "F2")):
+            yield self._object(number, b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>"
+                               % FONTS[font].encode())
+
+        self._new_page()
+        for block in blocks:
+            self._layout(block)
+            while self._finished:
+                yield self._page_bytes(self._finished.pop(0))
+        self._finish_page()
+        while self._finished:
+            yield self._page_bytes(self._finished.pop(0))
+
+        kids = b" ".join(b"%d 0 R" % number for number in self._page_objects)
+        yield self._object(2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self._page_objects)))
+        yield self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        info_number = self._next_object
+        yield self._object(info_number, b"<< /Title %s /Producer (Athly) /CreationDate (D:%s) >>"
+                           % (_pdf_string(self.title), datetime.now().strftime("%Y%m%d%H%M%S").encode()))
+
+        xref_offset = self._offset
+        size = info_number + 1
+        xref = [b"xref\n0 %d\n" % size, b"0000000000 65535 f \n"]
+        xref.extend(b"%010d 00000 n \n" % self._offsets[number] for number in range(1, size))
+        yield b"".join(xref)
+        yield b"trailer\n<< /Size %d /Root 1 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, info_number, xref_offset)
+
+    @property
+    def page_count(self) -> int:
+        return len(self._page_objects)
+
+
+def write_program_pdf(output: BinaryIO, document: ProgramDocument, title: Optional[str] = None) -> int:
+    """
+    Écrit un programme analysé en PDF, page par page.
+
+    Args:
+        output: Fichier binaire de sortie
+        document: Le programme analysé
+        title: Titre du document (celui du programme par défaut)
+
+    Returns:
+        Le nombre de pages
+    """
+    renderer = PdfRenderer(title or document.title or DEFAULT_TITLE)
+    for chunk in renderer.render(document.blocks):
+        output.write(chunk)
+    return renderer.page_count
+
+
+def pdf_export_job(content: str = "", document: Optional[ProgramDocument] = None, title: Optional[str] = None,
+                   directory: str = None) -> str:
+    """
+    Tâche d'export PDF exécutée dans un processus du pool d'export.
+
+    Args:
+        content: Programme textuel (markdown), analysé si `document` n'est pas fourni
+        document: Programme déjà analysé (programme structuré)
+        title: Titre du document
+        directory: Répertoire des fichiers temporaires
+
+    Returns:
+        Le chemin du fichier .pdf créé
+    """
+    if document is None:
+        document = parse_program(content)
+    fd, path = tempfile.mkstemp(suffix=".pdf", prefix="athly_", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as output:
+            pages = write_program_pdf(output, document, title)
+    except Exception:
+        os.remove(path)
+        raise
+    logger.debug(f"PDF écrit: {path} ({pages} pages)")
+    return path
@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, Tuple
+
+from monitoring.instruments import ERRORS, EXPORT_JOBS, EXPORT_SECONDS
+
+logger = logging.getLogger("athly.exports.pool")
+
+
+class ExportQueueFull(Exception):
+    """Levée lorsque la file d'attente des exports est pleine."""
+
+
+class ExportTimeout(Exception):
+    """Levée lorsqu'un export dépasse son délai."""
+
+
+def _discard_output(future) -> None:
+    """Supprime le fichier produit par une tâche dont le résultat ne sera jamais lu (délai dépassé)."""
+    if future.cancelled() or future.exception() is not None:
+        return
+    path = future.result()
+    if isinstance(path, str) and os.path.isfile(path):
+        try:
+            os.remove(path)
+            logger.info(f"Fichier d'export abandonné supprimé: {path}")
+        except OSError as e:
+            logger.warning(f"Impossible de supprimer le fichier d'export abandonné {path}: {str(e)}")
+
+
+class _ExportJob:
+    """
+    Tâche soumise au pool d'export.
+
+    Son résultat (`result`) ne dépend pas du pool qui l'exécute: si ce pool est recyclé à cause
+    d'une autre tâche bloquée, la tâche est resoumise au pool suivant au lieu d'échouer.
+    """
+
+    def __init__(self, pool: "ExportWorkerPool", func: Callable[..., Any], args: Tuple[Any, ...]):
+        self.pool = pool
+        self.func = func
+        self.args = args
+        self.result: Future = Future()
+        # Résultat marqué en cours: l'annulation de l'attente côté asyncio ne le termine pas avant la tâche
+        self.result.set_running_or_notify_cancel()
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.future: Optional[Future] = None
+        # Tâche dont le résultat ne sera plus lu (délai dépassé, client parti): jamais resoumise
+        self.abandoned = False
+
+    def submit(self) -> None:
+        self.executor = self.pool._get_executor()
+        self.future = self.executor.submit(self.func, *self.args)
+        self.future.add_done_callback(self._done)
+
+    def _done(self, future: Future) -> None:
+        if future.cancelled():
+            error: Optional[BaseException] = CancelledError()
+        else:
+            error = future.exception()
+        if (
+            isinstance(error, (CancelledError, BrokenProcessPool))
+            and not self.abandoned
+            and self.pool._was_recycled(self.executor)
+        ):
+            logger.info(f"Export {getattr(self.func, '__name__', 'export')} resoumis après le recyclage du pool")
+            try:
+                self.submit()
+                return
+            except Exception as e:
+                error = e
+        if error is not None:
+            self.result.set_exception(error)
+        else:
+            self.result.set_result(future.result())
+
+
+class ExportWorkerPool:
+    """
+    Pool de processus pour les exports de documents (Excel, PDF).
+
+    Le rendu, coûteux en CPU, est exécuté hors de la boucle d'événements: les requêtes de
+    chat restent servies pendant les rafales d'exports. Le nombre de tâches en cours ou en
+    attente est borné (au-delà, ExportQueueFull) et chaque tâche a un délai maximal: une tâche
+    qui le dépasse fait recycler le pool (ses processus sont arrêtés), sans quoi elle garderait
+    sa place jusqu'à sa fin réelle. ProcessPoolExecutor ne sait pas arrêter un seul processus
+    sans se déclarer cassé: les autres tâches du pool recyclé sont resoumises au pool suivant.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_pending: int = 8, timeout: float = 60.0):
+        """
+        Initialise le pool (les processus sont démarrés au premier export).
+
+        Args:
+            max_workers: Nombre de processus (par défaut: min(2, nombre de CPU))
+            max_pending: Nombre maximal de tâches en attente en plus des tâches en cours
+            timeout: Délai maximal d'une tâche en secondes
+        """
+        self.max_workers = max_workers or min(2, os.cpu_count() or 1)
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.max_workers + max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Pools arrêtés volontairement (tâche bloquée): leurs autres tâches sont resoumises
+        self._recycled: "weakref.WeakSet[ProcessPoolExecutor]" = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # "spawn": les processus n'héritent pas des threads ni des verrous du serveur
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+                logger.info(f"Pool d'export démarré: {self.max_workers} processus")
+            return self._executor
+
+    def _reset_executor(self, executor: ProcessPoolExecutor, terminate: bool = False) -> None:
+        """
+        Remplace un pool cassé (processus tué) ou bloqué au prochain export.
+
+        Args:
+            executor: Le pool à remplacer
+            terminate: Arrêter ses processus (tâche bloquée): les tâches encore en cours
+                ou en attente sur ce pool sont resoumises au pool suivant
+        """
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+            if terminate:
+                self._recycled.add(executor)
+        # Processus relevés avant shutdown(), qui vide la table du pool
+        processes = list((executor._processes or {}).values()) if terminate else []
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+    def _was_recycled(self, executor: ProcessPoolExecutor) -> bool:
+        with self._lock:
+            return executor in self._recycled
+
+    async def run(self, func: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Exécute une tâche d'export dans un processus du pool.
+
+        Args:
+            func: Fonction de niveau module (sérialisable) à exécuter
+            *args: Arguments de la fonction
+            timeout: Délai maximal (celui du pool par défaut)
+
+        Returns:
+            Le résultat de la fonction
+
+        Raises:
+            ExportQueueFull: Si trop de tâches sont déjà en cours ou en attente
+            ExportTimeout: Si la tâche dépasse son délai
+        """
+        job = getattr(func, "__name__", "export")
+        if not self._slots.acquire(blocking=False):
+            ERRORS.labels(component="export_queue_full").inc()
+            raise ExportQueueFull("Trop d'exports en cours, réessayez dans quelques instants")
+
+        start = time.perf_counter()
+        export_job = _ExportJob(self, func, args)
+        try:
+            export_job.submit()
+        except BrokenProcessPool:
+            self._slots.release()
+            self._reset_executor(export_job.executor)
+            raise
+        except Exception:
+            self._slots.release()
+            raise
+
+        # La place n'est libérée qu'à la fin réelle de la tâche, même si le client a abandonné
+        EXPORT_JOBS.inc()
+        export_job.result.add_done_callback(lambda _: (self._slots.release(), EXPORT_JOBS.dec()))
+
+        outcome = "error"
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(export_job.result), timeout or self.timeout)
+            outcome = "ok"
+            return result
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            export_job.abandoned = True
+            if not export_job.future.cancel():
+                # cancel() est sans effet sur une tâche déjà démarrée: son processus est arrêté pour libérer
+                # la place, et un fichier qu'elle aurait tout de même produit est supprimé
+                export_job.result.add_done_callback(_discard_output)
+                self._reset_executor(export_job.executor, terminate=True)
+            logger.error(f"Export {job} interrompu après {timeout or self.timeout}s")
+            raise ExportTimeout("L'export a dépassé le délai maximal")
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            export_job.abandoned = True
+            raise
+        except BrokenProcessPool:
+            self._reset_executor(export_job.executor)
+            raise
+        finally:
+            EXPORT_SECONDS.labels(job=job, outcome=outcome).observe(time.perf_counter() - start)
+            if outcome in ("error", "timeout"):
+                ERRORS.labels(component="export").inc()
+
+    def shutdown(self) -> None:
+        """Arrête les processus du pool."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool: Optional[ExportWorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_export_pool() -> ExportWorkerPool:
+    """
+    Retourne le pool d'export partagé, configuré par EXPORT_WORKERS, EXPORT_QUEUE_SIZE et EXPORT_TIMEOUT.
+
+    Returns:
+        Le pool d'export
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ExportWorkerPool(
+                max_workers=int(os.getenv("EXPORT_WORKERS", "0")) or None,
+                max_pending=int(os.getenv("EXPORT_QUEUE_SIZE", "8")),
+                timeout=float(os.getenv("EXPORT_TIMEOUT", "60"))
+            )
+        return _pool
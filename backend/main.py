@@ -1,38 +1,41 @@
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional, Dict, Any
 import uvicorn
+import asyncio
 import os
+import time
 import logging
 import traceback
 import json
 from fastapi import Request
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
 from dotenv import load_dotenv
 
 from agents.orchestrator import OrchestratorAgent
 from agents.expert import SportExpertAgent
 from agents.table_generator import TableGeneratorAgent
+from agents.router import route_metrics
 from models.knowledge_base import KnowledgeBase
+from models.directory_watcher import get_directory_watcher
+from exports.pool import ExportQueueFull, ExportTimeout, get_export_pool
+from monitoring import CONTENT_TYPE_LATEST, generate_latest
+from monitoring.instruments import HTTP_REQUEST_SECONDS
+from monitoring.logging_pipeline import configure_logging_from_env, shutdown_logging
+from monitoring.tracing import configure_tracing_from_env, get_tracer, span
 
-# Création du répertoire de logs s'il n'existe pas
-os.makedirs("logs", exist_ok=True)
-
-# Configuration des logs
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("logs/app.log"),
-        logging.StreamHandler()
-    ]
-)
+# Chargement des variables d'environnement (dont la configuration des logs et des traces)
+load_dotenv()
+
+# Configuration des logs: écriture JSON-lines dans logs/app.log depuis un thread dédié
+# (niveaux, échantillonnage DEBUG et troncature réglés par LOG_LEVEL, LOG_LEVELS, ...)
+configure_logging_from_env()
 logger = logging.getLogger("athly")
 
-# Chargement des variables d'environnement
-load_dotenv()
 logger.info("Variables d'environnement chargées")
 
 # Initialisation de l'application FastAPI
@@ -52,6 +55,27 @@ app.add_middleware(
 )
 logger.info("Configuration CORS appliquée")
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    # Latence par route déclarée (/api/programs/{program_name}) plutôt que par chemin: nombre de séries borné
+    # Span racine de la requête: les spans de l'orchestrateur, du graph et des LLM s'y rattachent
+    start = time.perf_counter()
+    status = 500
+    with span("http.request", traceparent=request.headers.get("traceparent"), method=request.method) as request_span:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            response.headers["X-Trace-Id"] = request_span.trace_id
+            return response
+        finally:
+            route = getattr(request.scope.get("route"), "path", "unmatched")
+            request_span.set_attributes(route=route, status=status)
+            HTTP_REQUEST_SECONDS.labels(
+                method=request.method,
+                route=route,
+                status=str(status)
+            ).observe(time.perf_counter() - start)
+
 # Monter le répertoire static pour servir les fichiers statiques (comme test.html)
 os.makedirs("static", exist_ok=True)  # Crée le répertoire s'il n'existe pas
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -72,17 +96,35 @@ class ProgramRequest(BaseModel):
     equipment: Optional[str] = ""
     frequency: int
     time_per_session: int
+    structured: Optional[bool] = False
+    # "llm": génération complète, "hybrid": moteur de périodisation + prose LLM, "fast": sans LLM
+    mode: Literal["llm", "hybrid", "fast"] = "llm"
 
 class ProgramResponse(BaseModel):
     program: str
+    structured: Optional[Dict[str, Any]] = None
+
+class ProgramEditRequest(BaseModel):
+    instruction: str
+    start_week: int
+    end_week: Optional[int] = None
+    content: Optional[str] = ""
+    program: Optional[Dict[str, Any]] = None
 
 class ProgramQuery(BaseModel):
     discipline: Optional[str] = None
     level: Optional[str] = None
     duration: Optional[int] = None
+    limit: int = Field(default=50, ge=1, le=500)
+    cursor: Optional[str] = None
+    sort: Literal["name", "duration", "mtime"] = "name"
+    order: Literal["asc", "desc"] = "asc"
+    fields: Optional[List[str]] = None
 
 class ProgramListResponse(BaseModel):
     programs: List[str]
+    items: Optional[List[Dict[str, Any]]] = None
+    next_cursor: Optional[str] = None
 
 class ProgramDetailResponse(BaseModel):
     title: str
@@ -99,39 +141,88 @@ def get_program_manager():
         program_data_manager = ProgramDataManager()
     return program_data_manager
 
+# Surveillance des répertoires de données: programmes et connaissances indexés en arrière-plan
+WATCH_DIRECTORIES = os.getenv("WATCH_DIRECTORIES", "true").lower() == "true"
+
+# Base de connaissances partagée par toutes les requêtes
+knowledge_base = None
+
+def get_knowledge_base():
+    global knowledge_base
+    if knowledge_base is None:
+        logger.info("Initialisation de la base de connaissances")
+        knowledge_base = KnowledgeBase()
+        if WATCH_DIRECTORIES:
+            knowledge_base.attach_watcher(get_directory_watcher())
+    return knowledge_base
+
+# Vérifier quel modèle privilégier
+USE_QWEN = os.getenv("USE_QWEN", "false").lower() == "true"
+logger.info(f"Utilisation du modèle Qwen en priorité: {USE_QWEN}")
+
+# Routeur LLM partagé par toutes les requêtes (latences, erreurs et disjoncteurs par fournisseur)
+llm_router = None
+
+def get_llm_router():
+    global llm_router
+    if llm_router is None:
+        from models.llm_router import LLMRouter
+        
+        providers = []
+        mistral_api_key = os.getenv("MISTRAL_API_KEY")
+        if mistral_api_key:
+            from langchain_mistralai import ChatMistralAI
+            logger.debug(f"Initialisation de ChatMistralAI avec la clé API: {mistral_api_key[:5]}...")
+            providers.append(("mistral", ChatMistralAI(
+                temperature=0.3,  # Température réduite pour moins d'hallucinations
+                model_name="mistral-large-latest",
+                mistral_api_key=mistral_api_key,
+                endpoint=os.getenv("MISTRAL_BASE_URL", "https://api.mistral.ai/v1"),
+                max_tokens=1024,
+                timeout=300       # 5 minutes de timeout pour l'API
+            )))
+        
+        huggingface_api_key = os.getenv("HUGGINGFACE_API_KEY")
+        if huggingface_api_key:
+            from models.qwen_model import QwenLLM
+            logger.debug(f"Initialisation de QwenLLM avec la clé API HF: {huggingface_api_key[:5]}...")
+            # HUGGINGFACE_BASE_URL: autre serveur compatible (par exemple benchmarks/inference_server.py)
+            qwen_options = {"base_url": os.environ["HUGGINGFACE_BASE_URL"]} if os.getenv("HUGGINGFACE_BASE_URL") else {}
+            providers.append(("qwen", QwenLLM(
+                model_name="Qwen/QwQ-32B",
+                api_key=huggingface_api_key,
+                temperature=0.3,
+                max_tokens=1500,
+                timeout=120,
+                **qwen_options
+            )))
+        
+        # Cassette d'enregistrement/rejeu des appels (LLM_CASSETTE): chaque fournisseur est enveloppé,
+        # et en mode replay la cassette suffit, sans clé d'API
+        from models.llm_cassette import REPLAY, cassette_from_env
+        providers = [(name, cassette_from_env(llm)) for name, llm in providers]
+        if not providers and os.getenv("LLM_CASSETTE") and os.getenv("LLM_CASSETTE_MODE", "").lower() == REPLAY:
+            providers.append(("cassette", cassette_from_env()))
+        
+        if not providers:
+            logger.error("Ni MISTRAL_API_KEY ni HUGGINGFACE_API_KEY ne sont définies dans les variables d'environnement")
+            raise ValueError("Aucune clé API de LLM définie (MISTRAL_API_KEY ou HUGGINGFACE_API_KEY)")
+        
+        if USE_QWEN:
+            providers.sort(key=lambda provider: provider[0] != "qwen")
+        
+        logger.info(f"Initialisation du routeur LLM: {[name for name, _ in providers]}")
+        llm_router = LLMRouter(providers)
+    return llm_router
+
 # Dépendances pour l'injection
 def get_orchestrator():
-    # Initialisation du LLM
-    from langchain_mistralai import ChatMistralAI
-    
     try:
-        print("INITIALISATION DE L'ORCHESTRATEUR")
-        api_key = os.getenv("MISTRAL_API_KEY")
-        if not api_key:
-            logger.error("MISTRAL_API_KEY non définie dans les variables d'environnement")
-            raise ValueError("MISTRAL_API_KEY non définie dans les variables d'environnement")
-        
-        logger.debug(f"Initialisation de ChatMistralAI avec la clé API: {api_key[:5]}...")
-        
-        llm = ChatMistralAI(
-            temperature=0.3,  # Température réduite pour moins d'hallucinations
-            model_name="mistral-large-latest", 
-            mistral_api_key=api_key,
-            max_tokens=1024,
-            timeout=300       # 5 minutes de timeout pour l'API
-        )
-        
-        # Testez directement le LLM avant de l'utiliser dans les agents
-        try:
-            test_response = llm.invoke("Ceci est un test. Réponds simplement par 'OK'.")
-            print(f"TEST LLM: {test_response}")
-        except Exception as e:
-            logger.error(f"Test du LLM échoué: {str(e)}")
-            # Continuer même si le test échoue
+        logger.info("INITIALISATION DE L'ORCHESTRATEUR")
+        llm = get_llm_router()
 
-        # Initialisation des composants avec cache pour la base de connaissances
-        logger.info("Initialisation de la base de connaissances")
-        knowledge_base = KnowledgeBase()
+        # Base de connaissances partagée, tenue à jour par le watcher
+        knowledge_base = get_knowledge_base()
         
         logger.info("Initialisation de l'agent expert sportif")
         sport_expert = SportExpertAgent(llm, knowledge_base)
@@ -144,8 +235,11 @@ def get_orchestrator():
         orchestrator = OrchestratorAgent(
             llm=llm, 
             sport_expert=sport_expert, 
-            table_generator=table_generator
+            table_generator=table_generator,
+            program_manager=get_program_manager()
         )
+        if WATCH_DIRECTORIES and orchestrator.program_index is not None:
+            orchestrator.program_index.attach_watcher(get_directory_watcher())
         
         return orchestrator
     except Exception as e:
@@ -153,64 +247,47 @@ def get_orchestrator():
         logger.error(traceback.format_exc())
         raise
 
-# Dépendances pour l'injection avec Hugging Face
-def get_qwen_orchestrator():
-    # Initialisation du LLM avec Hugging Face Inference
-    from models.qwen_model import QwenLLM
+@app.on_event("startup")
+def start_tracing():
+    # Export des spans selon TRACING_EXPORTER (aucun par défaut)
+    configure_tracing_from_env()
+
+@app.on_event("shutdown")
+def stop_tracing():
+    get_tracer().shutdown()
+
+@app.on_event("shutdown")
+def stop_logging():
+    shutdown_logging()
+
+@app.on_event("startup")
+def start_directory_watcher():
+    # Catalogue et liste des programmes mis à jour en arrière-plan: les requêtes ne lisent plus le répertoire
+    if not WATCH_DIRECTORIES:
+        return
+    from models.program_catalog import get_program_catalog
     
-    try:
-        print("INITIALISATION DE L'ORCHESTRATEUR AVEC QWEN")
-        api_key = os.getenv("HUGGINGFACE_API_KEY")
-        if not api_key:
-            logger.error("HUGGINGFACE_API_KEY non définie dans les variables d'environnement")
-            raise ValueError("HUGGINGFACE_API_KEY non définie dans les variables d'environnement")
-        
-        logger.debug(f"Initialisation de QwenLLM avec la clé API HF: {api_key[:5]}...")
-        
-        # Initialiser QwenLLM avec les paramètres appropriés
-        llm = QwenLLM(
-            model_name="Qwen/QwQ-32B",
-            api_key=api_key,
-            temperature=0.3,
-            max_tokens=1500,
-            timeout=120
-        )
-        
-        # Test du modèle
-        try:
-            test_response = llm.invoke("Ceci est un test. Réponds simplement par 'OK'.")
-            print(f"TEST QWEN LLM: {test_response}")
-        except Exception as e:
-            logger.error(f"Test du modèle Qwen échoué: {str(e)}")
-            # Continuer même si le test échoue
+    watcher = get_directory_watcher()
+    manager = get_program_manager()
+    manager.attach_watcher(watcher)
+    get_program_catalog(manager).attach_watcher(watcher)
+    watcher.start()
+    logger.info(f"Surveillance des répertoires de données démarrée ({watcher.backend})")
 
-        # Initialisation des composants avec cache pour la base de connaissances
-        logger.info("Initialisation de la base de connaissances")
-        knowledge_base = KnowledgeBase()
-        
-        logger.info("Initialisation de l'agent expert sportif")
-        sport_expert = SportExpertAgent(llm, knowledge_base)
-        
-        logger.info("Initialisation du générateur de tableaux")
-        table_generator = TableGeneratorAgent(llm)
-        
-        # Création de l'orchestrateur
-        logger.info("Création de l'agent orchestrateur")
-        orchestrator = OrchestratorAgent(
-            llm=llm, 
-            sport_expert=sport_expert, 
-            table_generator=table_generator
-        )
-        
-        return orchestrator
-    except Exception as e:
-        logger.error(f"Erreur lors de l'initialisation de l'orchestrateur Qwen: {str(e)}")
-        logger.error(traceback.format_exc())
-        raise
+@app.on_event("shutdown")
+def stop_directory_watcher():
+    get_directory_watcher().stop()
 
-# Vérifier quel modèle utiliser
-USE_QWEN = os.getenv("USE_QWEN", "false").lower() == "true"
-logger.info(f"Utilisation du modèle Qwen: {USE_QWEN}")
+@app.on_event("shutdown")
+async def close_llm_clients():
+    # Fermeture des connexions HTTP partagées du client Qwen
+    from models.qwen_model import close_http_clients
+    await close_http_clients()
+
+@app.on_event("shutdown")
+def stop_export_pool():
+    # Arrêt des processus du pool d'export
+    get_export_pool().shutdown()
 
 # Routes API
 @app.get("/")
@@ -218,20 +295,40 @@ def read_root():
     logger.info("Accès à la route racine")
     return {"message": "Bienvenue sur l'API Athly - Votre coach sportif IA personnel"}
 
+@app.get("/metrics")
+def metrics():
+    """
+    Métriques au format d'exposition texte de Prometheus: latences par étape du pipeline,
+    caches, relances, erreurs, appels LLM en cours et file d'export.
+    """
+    from fastapi.responses import Response
+    
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/api/llm-stats")
+def llm_stats():
+    """
+    Statistiques par fournisseur de LLM (latences p50/p95, erreurs et état du disjoncteur)
+    et par route du routeur d'intention (nombre de messages, latence moyenne, p50 et p95).
+    """
+    providers = llm_router.stats() if llm_router is not None else {}
+    return {"providers": providers, "routes": route_metrics.snapshot()}
+
 @app.post("/api/chat", response_model=ChatResponse)
-async def chat(message: ChatMessage, orchestrator: OrchestratorAgent = Depends(get_qwen_orchestrator if USE_QWEN else get_orchestrator)):
+async def chat(message: ChatMessage, orchestrator: OrchestratorAgent = Depends(get_orchestrator)):
     try:
         logger.info(f"Requête de chat reçue: {message.message[:50]}...")
         
         # Log du message complet en debug
-        logger.debug(f"Message complet: {message.message}")
+        logger.debug("Message complet: %s", message.message)
         
         # Traitement du message par l'orchestrateur
         logger.info("Transmission du message à l'orchestrateur")
-        response = orchestrator.process_chat(message.message)
+        # Appels LLM bloquants exécutés hors de la boucle d'événements: les requêtes concurrentes avancent en parallèle
+        response = await asyncio.to_thread(orchestrator.process_chat, message.message)
         
         logger.info(f"Réponse générée: {response[:50]}...")
-        logger.debug(f"Réponse complète: {response}")
+        logger.debug("Réponse complète: %s", response)
         
         return ChatResponse(message=response)
     except Exception as e:
@@ -254,11 +351,12 @@ async def generate_program(request: ProgramRequest, orchestrator: OrchestratorAg
         
         # Log des données de la requête
         logger.info(f"Demande de génération de programme: {request.disciplines}, niveau {request.level}, {request.duration} semaines")
-        logger.debug(f"Données complètes de la requête: {json.dumps(request.dict(), ensure_ascii=False)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Données complètes de la requête: %s", json.dumps(request.dict(), ensure_ascii=False))
         
         # Génération du programme d'entraînement
         logger.info("Transmission de la demande à l'orchestrateur")
-        program = orchestrator.generate_training_program(
+        params = dict(
             disciplines=request.disciplines,
             duration=request.duration,
             level=request.level,
@@ -269,8 +367,26 @@ async def generate_program(request: ProgramRequest, orchestrator: OrchestratorAg
             time_per_session=request.time_per_session
         )
         
+        if request.mode in ("fast", "hybrid"):
+            # Squelette calculé par le moteur de périodisation, LLM limité à la prose (ou absent)
+            structured_program = await asyncio.to_thread(
+                orchestrator.generate_periodized_program, **params, enrich=request.mode == "hybrid"
+            )
+            logger.info(f"Programme périodisé ({request.mode}): {len(structured_program.weeks)} semaines")
+            return ProgramResponse(program=structured_program.to_markdown(), structured=structured_program.model_dump())
+        
+        if request.structured:
+            # Mode structuré: le markdown est rendu à partir du programme validé
+            structured_program = await asyncio.to_thread(orchestrator.generate_structured_program, **params)
+            program = structured_program.to_markdown()
+            logger.info(f"Programme structuré généré: {len(structured_program.weeks)} semaines")
+            return ProgramResponse(program=program, structured=structured_program.model_dump())
+        
+        # Génération (appels LLM bloquants) hors de la boucle d'événements
+        program = await asyncio.to_thread(orchestrator.generate_training_program, **params)
+        
         logger.info(f"Programme généré: {len(program)} caractères")
-        logger.debug(f"Début du programme généré: {program[:200]}...")
+        logger.debug("Début du programme généré: %s...", program[:200])
         
         return ProgramResponse(program=program)
     except HTTPException as he:
@@ -283,19 +399,55 @@ async def generate_program(request: ProgramRequest, orchestrator: OrchestratorAg
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=error_msg)
 
+@app.post("/api/edit-program", response_model=ProgramResponse)
+async def edit_program(request: ProgramEditRequest, orchestrator: OrchestratorAgent = Depends(get_orchestrator)):
+    """
+    Régénère uniquement les semaines ciblées d'un programme existant (markdown ou structuré).
+    """
+    try:
+        if not request.instruction.strip():
+            raise HTTPException(status_code=400, detail="La modification demandée est vide")
+        if not request.content and not request.program:
+            raise HTTPException(status_code=400, detail="Aucun programme à modifier")
+        
+        end_week = request.end_week or request.start_week
+        logger.info(f"Demande de modification des semaines {request.start_week}-{end_week}: {request.instruction[:50]}...")
+        
+        if request.program:
+            from models.program_schema import TrainingProgram
+            program = TrainingProgram.model_validate(request.program)
+            edited = await asyncio.to_thread(
+                orchestrator.edit_program, request.instruction, request.start_week, end_week, program=program
+            )
+            return ProgramResponse(program=edited.to_markdown(), structured=edited.model_dump())
+        
+        edited = await asyncio.to_thread(
+            orchestrator.edit_program, request.instruction, request.start_week, end_week, content=request.content
+        )
+        return ProgramResponse(program=edited)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        logger.warning(f"Modification de programme invalide: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        error_msg = f"Erreur de modification du programme: {str(e)}"
+        logger.error(error_msg)
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=error_msg)
+
 @app.post("/api/test-chat")
 async def test_chat(message: ChatMessage):
     """
     Route de test qui utilise directement l'API Mistral sans passer par les agents.
     """
     try:
-        # Log avec print pour s'assurer que c'est visible
-        print(f"TEST-CHAT: Message reçu: {message.message}")
+        logger.info("TEST-CHAT: Message reçu: %s", message.message)
         
         # Charger la clé API
         api_key = os.getenv("MISTRAL_API_KEY")
         if not api_key:
-            print("TEST-CHAT: ERREUR - Clé API Mistral non trouvée")
+            logger.error("TEST-CHAT: ERREUR - Clé API Mistral non trouvée")
             return {"message": "Erreur: Clé API Mistral non configurée"}
         
         # Initialiser directement le modèle
@@ -308,173 +460,75 @@ async def test_chat(message: ChatMessage):
         )
         
         # Appel simple au LLM
-        print("TEST-CHAT: Appel à l'API Mistral...")
-        response = llm.invoke(f"Réponds très brièvement à cette question: {message.message}")
-        print(f"TEST-CHAT: Réponse reçue: {response}")
+        logger.info("TEST-CHAT: Appel à l'API Mistral...")
+        response = await asyncio.to_thread(llm.invoke, f"Réponds très brièvement à cette question: {message.message}")
+        logger.debug("TEST-CHAT: Réponse reçue: %s", response)
         
         return {"message": str(response)}
     except Exception as e:
-        print(f"TEST-CHAT: ERREUR - {type(e).__name__}: {str(e)}")
-        import traceback
-        print(f"TEST-CHAT: Traceback:\n{traceback.format_exc()}")
+        logger.exception(f"TEST-CHAT: ERREUR - {type(e).__name__}: {str(e)}")
         return {"message": f"Erreur de test: {str(e)}"}
 
 @app.post("/api/convert-to-excel")
 async def convert_to_excel(request: Request):
-    """Convertit un programme d'entraînement textuel en fichier Excel."""
-    from fastapi.responses import Response
+    """
+    Convertit un programme d'entraînement en fichier Excel.
+    
+    Accepte soit le programme textuel (`content`), soit le programme structuré (`program`).
+    """
     from fastapi.responses import JSONResponse
     
     try:
         data = await request.json()
         content = data.get("content", "")
+        structured = data.get("program")
         
-        if not content:
+        if not content and not structured:
             return JSONResponse(
                 status_code=400, 
                 content={"error": "Contenu vide"}
             )
         
-        # Import nécessaire
-        import pandas as pd
-        import io
-        import re
         from datetime import datetime
+        from fastapi.responses import FileResponse
+        from starlette.background import BackgroundTask
+        from exports.excel import EXCEL_MEDIA_TYPE, excel_export_job
         
         logger.info("Demande de conversion Excel reçue")
         
-        # Extraction des données du programme
-        lines = content.split("\n")
-        
-        # Extraire le titre
-        title = "Programme d'entraînement"
-        for line in lines:
-            if "Programme Personnalisé" in line:
-                title = line.strip()
-                break
-        
-        # Chercher les tables dans le contenu
-        tables = []
-        current_table = []
-        in_table = False
-        week_title = ""
-        
-        for line in lines:
-            # Détecter le début d'une semaine
-            if line.strip().startswith("**Semaine"):
-                week_title = line.strip().replace("*", "")
-                in_table = False
-                if current_table:
-                    tables.append((week_title, current_table))
-                    current_table = []
-            
-            # Détecter les lignes de tableau (contenant des |)
-            if "|" in line and "----|" not in line:
-                if not in_table:
-                    in_table = True
-                current_table.append(line)
-            elif in_table and not line.strip():
-                in_table = False
-                if current_table:
-                    tables.append((week_title, current_table))
-                    current_table = []
-        
-        # Ajouter la dernière table si elle existe
-        if current_table:
-            tables.append((week_title, current_table))
-        
-        logger.debug(f"Nombre de tables trouvées: {len(tables)}")
-        
-        # Créer un fichier Excel en mémoire
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            # Feuille d'introduction
-            introduction = "".join([line for line in lines if "###" in line or "Introduction" in line])
-            intro_df = pd.DataFrame({"Introduction": [introduction]})
-            intro_df.to_excel(writer, sheet_name="Introduction", index=False)
-            
-            # Formater la feuille d'introduction
-            workbook = writer.book
-            worksheet = writer.sheets["Introduction"]
-            text_format = workbook.add_format({'text_wrap': True})
-            worksheet.set_column('A:A', 80, text_format)
-            
-            # Ajouter chaque semaine dans une feuille séparée
-            for i, (week_title, table_lines) in enumerate(tables):
-                # Nettoyer les données du tableau
-                headers = table_lines[0].strip().split("|")
-                headers = [h.strip() for h in headers if h.strip()]
-                
-                rows = []
-                for line in table_lines[1:]:
-                    cols = line.strip().split("|")
-                    cols = [c.strip() for c in cols if c.strip()]
-                    if cols:
-                        rows.append(cols)
-                
-                # Créer un DataFrame
-                df = pd.DataFrame(rows, columns=headers)
-                
-                # Nommer la feuille (max 31 caractères pour Excel)
-                sheet_name = f"Semaine {i+1}"
-                if len(sheet_name) > 31:
-                    sheet_name = sheet_name[:28] + "..."
-                
-                # Écrire dans la feuille
-                df.to_excel(writer, sheet_name=sheet_name, index=False)
-                
-                # Formater la feuille
-                worksheet = writer.sheets[sheet_name]
-                
-                # Ajuster largeur des colonnes
-                for idx, col in enumerate(df.columns):
-                    max_len = max(
-                        df[col].astype(str).map(len).max(),
-                        len(col)
-                    )
-                    worksheet.set_column(idx, idx, max_len + 2)
-                
-                # Ajouter un format pour les cellules
-                header_format = workbook.add_format({
-                    'bold': True,
-                    'text_wrap': True,
-                    'valign': 'top',
-                    'fg_color': '#4F46E5',
-                    'font_color': 'white',
-                    'border': 1
-                })
-                
-                cell_format = workbook.add_format({
-                    'text_wrap': True,
-                    'valign': 'top',
-                    'border': 1
-                })
-                
-                for row_num, (_, row) in enumerate(df.iterrows()):
-                    for col_num, _ in enumerate(row):
-                        worksheet.write(row_num + 1, col_num, df.iloc[row_num, col_num], cell_format)
-                
-                # Appliquer le format d'en-tête
-                for col_num, col in enumerate(df.columns):
-                    worksheet.write(0, col_num, col, header_format)
-                
-                # Figer la première ligne
-                worksheet.freeze_panes(1, 0)
-        
-        # Renvoyer le fichier Excel
-        output.seek(0)
+        if structured:
+            # Programme structuré: document construit directement depuis le schéma, sans reparsing
+            from models.program_schema import TrainingProgram
+            program = TrainingProgram.model_validate(structured)
+            job_args = ("", program.to_document())
+        else:
+            # Programme textuel: analysé une seule fois, dans le processus d'export
+            job_args = (content,)
+        
+        # Classeur écrit sur disque ligne par ligne dans le pool d'export, hors de la boucle d'événements,
+        # puis envoyé par morceaux et supprimé après l'envoi
+        path = await get_export_pool().run(excel_export_job, *job_args)
         
         filename = f"programme_entrainement_{datetime.now().strftime('%Y%m%d')}.xlsx"
         logger.info(f"Fichier Excel généré: {filename}")
         
-        return Response(
-            content=output.getvalue(),
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={
-                "Content-Disposition": f'attachment; filename="{filename}"'
-            }
+        return FileResponse(
+            path,
+            media_type=EXCEL_MEDIA_TYPE,
+            filename=filename,
+            background=BackgroundTask(os.remove, path)
         )
     
+    except ExportQueueFull as e:
+        logger.warning(f"File d'export pleine: {str(e)}")
+        return JSONResponse(status_code=503, content={"error": str(e)}, headers={"Retry-After": "5"})
+    except ExportTimeout as e:
+        logger.error(f"Export Excel trop long: {str(e)}")
+        return JSONResponse(status_code=504, content={"error": str(e)})
+    except BrokenProcessPool as e:
+        # Processus d'export arrêté brutalement: le pool est recréé à l'export suivant
+        logger.error(f"Pool d'export cassé pendant l'export Excel: {str(e)}")
+        return JSONResponse(status_code=503, content={"error": "Service d'export indisponible, réessayez"}, headers={"Retry-After": "5"})
     except Exception as e:
         logger.error(f"Erreur lors de la conversion en Excel: {str(e)}")
         logger.error(traceback.format_exc())
@@ -483,51 +537,172 @@ async def convert_to_excel(request: Request):
             content={"error": f"Erreur lors de la conversion: {str(e)}"}
         )
 
+@app.post("/api/export-pdf")
+async def export_pdf(request: Request):
+    """
+    Exporte un programme d'entraînement en PDF.
+    
+    Accepte soit le programme textuel (`content`), soit le programme structuré (`program`),
+    et un nom de fichier optionnel (`filename`).
+    """
+    from fastapi.responses import JSONResponse
+    
+    try:
+        data = await request.json()
+        content = data.get("content", "")
+        structured = data.get("program")
+        
+        if not content and not structured:
+            return JSONResponse(
+                status_code=400, 
+                content={"error": "Contenu vide"}
+            )
+        
+        from fastapi.responses import FileResponse
+        from starlette.background import BackgroundTask
+        from exports.pdf import PDF_MEDIA_TYPE, pdf_export_job
+        
+        logger.info("Demande d'export PDF reçue")
+        
+        if structured:
+            from models.program_schema import TrainingProgram
+            program = TrainingProgram.model_validate(structured)
+            job_args = ("", program.to_document())
+        else:
+            job_args = (content,)
+        
+        # Pages rendues et écrites une à une dans le pool d'export, puis envoyées par morceaux
+        path = await get_export_pool().run(pdf_export_job, *job_args)
+        
+        filename = os.path.basename(data.get("filename") or "") or f"programme_entrainement_{datetime.now().strftime('%Y%m%d')}.pdf"
+        if not filename.lower().endswith(".pdf"):
+            filename += ".pdf"
+        logger.info(f"Fichier PDF généré: {filename}")
+        
+        return FileResponse(
+            path,
+            media_type=PDF_MEDIA_TYPE,
+            filename=filename,
+            background=BackgroundTask(os.remove, path)
+        )
+    
+    except ExportQueueFull as e:
+        logger.warning(f"File d'export pleine: {str(e)}")
+        return JSONResponse(status_code=503, content={"error": str(e)}, headers={"Retry-After": "5"})
+    except ExportTimeout as e:
+        logger.error(f"Export PDF trop long: {str(e)}")
+        return JSONResponse(status_code=504, content={"error": str(e)})
+    except BrokenProcessPool as e:
+        # Processus d'export arrêté brutalement: le pool est recréé à l'export suivant
+        logger.error(f"Pool d'export cassé pendant l'export PDF: {str(e)}")
+        return JSONResponse(status_code=503, content={"error": "Service d'export indisponible, réessayez"}, headers={"Retry-After": "5"})
+    except Exception as e:
+        logger.error(f"Erreur lors de l'export PDF: {str(e)}")
+        logger.error(traceback.format_exc())
+        return JSONResponse(
+            status_code=500,
+            content={"error": f"Erreur lors de l'export PDF: {str(e)}"}
+        )
+
 @app.post("/api/programs/list", response_model=ProgramListResponse)
 async def list_programs(query: ProgramQuery = None):
     """
-    Liste les programmes d'entraînement disponibles, avec filtrage optionnel.
+    Liste les programmes d'entraînement disponibles, page par page, avec filtrage optionnel.
+    
+    Les résultats viennent du catalogue (requête indexée, aucun fichier XLSX ouvert). La page
+    suivante s'obtient en renvoyant `next_cursor` dans `cursor`; `fields` ajoute aux noms de
+    fichiers les champs demandés du catalogue (`items`).
     """
+    from models.program_catalog import get_program_catalog
+    
+    query = query or ProgramQuery()
     try:
         manager = get_program_manager()
         
-        if query and (query.discipline or query.level or query.duration):
-            # Recherche avec critères
-            programs_data = manager.search_program_by_criteria(
-                discipline=query.discipline,
-                level=query.level,
-                duration=query.duration
-            )
-            # Extraire juste les noms de fichiers
-            program_names = [p.get("filename") for p in programs_data]
-        else:
-            # Liste complète
-            program_names = manager.get_available_programs()
+        # Un fichier nouveau ou modifié est analysé hors de la boucle d'événements
+        page = await asyncio.to_thread(
+            get_program_catalog(manager).page,
+            discipline=query.discipline,
+            level=query.level,
+            duration=query.duration,
+            sort=query.sort,
+            order=query.order,
+            limit=query.limit,
+            cursor=query.cursor,
+            fields=["filename"] + [name for name in query.fields or [] if name != "filename"]
+        )
         
-        return ProgramListResponse(programs=program_names)
+        return ProgramListResponse(
+            programs=[item["filename"] for item in page.items],
+            items=page.items if query.fields else None,
+            next_cursor=page.next_cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Erreur lors de la récupération des programmes: {str(e)}")
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Erreur: {str(e)}")
 
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparaison faible des ETags de l'en-tête If-None-Match (RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+def _not_modified_since(if_modified_since: Optional[str], last_modified: float) -> bool:
+    """Indique si la ressource n'a pas changé depuis la date If-Modified-Since."""
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    return since is not None and int(last_modified) <= since.timestamp()
+
 @app.get("/api/programs/{program_name}", response_model=ProgramDetailResponse)
-async def get_program_detail(program_name: str):
+async def get_program_detail(program_name: str, request: Request):
     """
     Récupère les détails d'un programme spécifique.
+    
+    Le résumé est rendu une fois par version du fichier et servi avec ETag et Last-Modified;
+    une requête conditionnelle sur une version inchangée reçoit une réponse 304 sans corps.
     """
+    from fastapi.responses import JSONResponse, Response
+    
     try:
         manager = get_program_manager()
         
-        # Vérifier si le fichier existe
-        available_programs = manager.get_available_programs()
-        if program_name not in available_programs:
+        # Vérifier que le fichier existe (sans lister le répertoire)
+        if (os.path.basename(program_name) != program_name or not program_name.endswith(".xlsx")
+                or not os.path.isfile(os.path.join(manager.programs_dir, program_name))):
             raise HTTPException(status_code=404, detail=f"Programme '{program_name}' non trouvé")
         
-        # Générer le résumé du programme
-        summary = manager.get_program_summary(program_name)
         title = os.path.splitext(program_name)[0]
         
-        return ProgramDetailResponse(title=title, content=summary)
+        # Résumé mis en cache; seul le premier accès à une version du fichier l'analyse (hors de la boucle)
+        summary = await asyncio.to_thread(manager.get_program_summary_entry, program_name)
+        if summary is None:
+            return ProgramDetailResponse(title=title, content="Programme non trouvé ou invalide.")
+        
+        headers = {
+            "ETag": summary.etag,
+            "Last-Modified": formatdate(summary.last_modified, usegmt=True),
+            "Cache-Control": "no-cache"
+        }
+        if_none_match = request.headers.get("if-none-match")
+        if _etag_matches(if_none_match, summary.etag) or (
+            if_none_match is None and _not_modified_since(request.headers.get("if-modified-since"), summary.last_modified)
+        ):
+            return Response(status_code=304, headers=headers)
+        
+        return JSONResponse(
+            content=ProgramDetailResponse(title=title, content=summary.content).model_dump(),
+            headers=headers
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -1,5 +1,18 @@
-from .knowledge_base import KnowledgeBase
-from .qwen_model import QwenLLM
-from .program_data import ProgramDataManager
+import importlib
+
+# Imports différés: les processus d'export n'importent que les modules dont ils ont besoin
+# (program_parser), sans charger LangChain via KnowledgeBase
+_EXPORTS = {
+    "KnowledgeBase": ".knowledge_base",
+    "QwenLLM": ".qwen_model",
+    "ProgramDataManager": ".program_data",
+}
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = ["KnowledgeBase", "QwenLLM", "ProgramDataManager"] 
\ No newline at end of file
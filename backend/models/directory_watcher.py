@@ -0,0 +1,427 @@
+import ctypes
+import ctypes.util
+import errno
+import itertools
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger("athly.watcher")
+
+# Rappel appelé avec (fichiers ajoutés ou modifiés, fichiers supprimés);
+# changed vaut None après une perte d'événements: le consommateur doit se resynchroniser
+ChangeCallback = Callable[[Optional[Set[str]], Set[str]], None]
+
+# Constantes inotify (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _ignored_name(name: str) -> bool:
+    """Fichiers cachés, temporaires et verrous Excel (~$fichier.xlsx)."""
+    return name.startswith((".", "~$")) or name.endswith((".tmp", "~"))
+
+
+class _Watch:
+    """Un répertoire surveillé et son consommateur."""
+
+    def __init__(self, watch_id: int, path: str, callback: ChangeCallback, suffixes: Tuple[str, ...],
+                 recursive: bool):
+        self.id = watch_id
+        self.path = path
+        self.callback = callback
+        self.suffixes = suffixes
+        self.recursive = recursive
+        self.snapshot: Dict[str, Tuple[int, int]] = {}
+
+    def matches(self, path: str) -> bool:
+        name = os.path.basename(path)
+        return name.endswith(self.suffixes) and not _ignored_name(name)
+
+    def scan(self) -> Dict[str, Tuple[int, int]]:
+        """Version (mtime, taille) des fichiers surveillés."""
+        versions = {}
+        for directory in self.directories():
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_file() and self.matches(entry.path):
+                            stat = entry.stat()
+                            versions[entry.path] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                continue
+        return versions
+
+    def directories(self) -> Iterable[str]:
+        if not self.recursive:
+            yield self.path
+            return
+        for directory, subdirectories, _ in os.walk(self.path):
+            subdirectories[:] = [d for d in subdirectories if not d.startswith(".")]
+            yield directory
+
+
+class _Inotify:
+    """Accès minimal à inotify par ctypes (Linux)."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+
+    def add_watch(self, path: str) -> int:
+        wd = self._add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, f"inotify_add_watch({path}): {os.strerror(code)}")
+        return wd
+
+    def remove_watch(self, wd: int) -> None:
+        self._rm_watch(self.fd, wd)
+
+    def read_events(self) -> List[Tuple[int, int, str]]:
+        """Lit les événements disponibles: liste de (wd, masque, nom)."""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class DirectoryWatcher:
+    """
+    Surveillance de répertoires en arrière-plan (inotify, ou scrutation périodique à défaut).
+
+    Les événements sont regroupés: un consommateur est appelé une fois par rafale, quand
+    aucun changement n'est survenu pendant `debounce` secondes (au plus tard après
+    `max_delay`), avec l'ensemble des fichiers ajoutés/modifiés et supprimés. Les rappels
+    sont exécutés dans le thread du watcher, jamais dans celui des requêtes.
+    """
+
+    def __init__(self, backend: str = "auto", debounce: float = 0.5, max_delay: float = 5.0,
+                 poll_interval: float = 2.0):
+        """
+        Initialise le watcher.
+
+        Args:
+            backend: "inotify", "polling" ou "auto" (inotify si disponible)
+            debounce: Durée sans événement avant de notifier une rafale (secondes)
+            max_delay: Délai maximal de notification pendant une rafale continue (secondes)
+            poll_interval: Intervalle de scrutation du mode polling (secondes)
+        """
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self._ids = itertools.count(1)
+        self._watches: Dict[int, _Watch] = {}
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._pending: Dict[int, Tuple[Set[str], Set[str], bool]] = {}
+        self._first_event = 0.0
+        self._last_event = 0.0
+        self._running = False
+        self._threads: List[threading.Thread] = []
+        self._stop_pipe: Optional[Tuple[int, int]] = None
+
+        self._inotify: Optional[_Inotify] = None
+        # Un même répertoire surveillé deux fois partage son descripteur (wd) inotify
+        self._wd_dirs: Dict[int, List[Tuple[int, str]]] = {}
+        self._polled: Set[int] = set()
+        if backend not in ("auto", "inotify", "polling"):
+            raise ValueError(f"Backend de surveillance inconnu: {backend}")
+        if backend != "polling" and sys.platform.startswith("linux"):
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError) as e:
+                if backend == "inotify":
+                    raise
+                logger.warning(f"inotify indisponible, surveillance par scrutation: {str(e)}")
+        elif backend == "inotify":
+            raise OSError(errno.ENOSYS, "inotify n'est disponible que sous Linux")
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if self._inotify is not None else "polling"
+
+    def watch(self, path: str, callback: ChangeCallback, suffixes: Iterable[str] = ("",),
+              recursive: bool = False) -> int:
+        """
+        Surveille un répertoire (créé s'il n'existe pas).
+
+        Args:
+            path: Le répertoire
+            callback: Appelé avec (fichiers ajoutés ou modifiés, fichiers supprimés)
+            suffixes: Extensions des fichiers surveillés (tous les fichiers par défaut)
+            recursive: Surveille aussi les sous-répertoires
+
+        Returns:
+            L'identifiant de la surveillance
+        """
+        os.makedirs(path, exist_ok=True)
+        watch = _Watch(next(self._ids), path, callback, tuple(suffixes), recursive)
+        use_polling = self._inotify is None
+        if not use_polling:
+            try:
+                for directory in watch.directories():
+                    self._add_directory(watch, directory)
+            except OSError as e:
+                # Limite de surveillances atteinte (ENOSPC) ou système de fichiers non supporté
+                logger.warning(f"inotify impossible sur {path}, surveillance par scrutation: {str(e)}")
+                self._remove_directories(watch.id)
+                use_polling = True
+        if use_polling:
+            watch.snapshot = watch.scan()
+        with self._lock:
+            self._watches[watch.id] = watch
+            if use_polling:
+                self._polled.add(watch.id)
+        logger.info(f"Surveillance de {path} ({'polling' if use_polling else 'inotify'})")
+        return watch.id
+
+    def unwatch(self, watch_id: int) -> None:
+        """Arrête la surveillance d'un répertoire."""
+        with self._lock:
+            self._watches.pop(watch_id, None)
+            self._polled.discard(watch_id)
+            self._pending.pop(watch_id, None)
+        self._remove_directories(watch_id)
+
+    def start(self) -> None:
+        """Démarre les threads de surveillance et de notification."""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+        self._stop_pipe = os.pipe()
+        targets = [self._dispatch_loop, self._poll_loop]
+        if self._inotify is not None:
+            targets.append(self._inotify_loop)
+        self._threads = [
+            threading.Thread(target=target, name=f"athly-watcher-{target.__name__.strip('_')}", daemon=True)
+            for target in targets
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        """Arrête les threads (les événements en attente sont abandonnés)."""
+        with self._condition:
+            if not self._running:
+                return
+            self._running = False
+            self._condition.notify_all()
+        os.write(self._stop_pipe[1], b"x")
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+        for fd in self._stop_pipe:
+            os.close(fd)
+        self._stop_pipe = None
+
+    def close(self) -> None:
+        """Arrête le watcher et libère le descripteur inotify."""
+        self.stop()
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    # Enregistrement des événements
+
+    def _record(self, watch: _Watch, changed: Iterable[str] = (), removed: Iterable[str] = (),
+                resync: bool = False) -> None:
+        with self._condition:
+            if watch.id not in self._watches:
+                return
+            pending_changed, pending_removed, pending_resync = self._pending.get(watch.id, (set(), set(), False))
+            for path in changed:
+                pending_removed.discard(path)
+                pending_changed.add(path)
+            for path in removed:
+                pending_changed.discard(path)
+                pending_removed.add(path)
+            now = time.monotonic()
+            if not self._pending:
+                self._first_event = now
+            self._last_event = now
+            self._pending[watch.id] = (pending_changed, pending_removed, pending_resync or resync)
+            self._condition.notify_all()
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            with self._condition:
+                while self._running and not self._pending:
+                    self._condition.wait()
+                # Attendre la fin de la rafale
+                while self._running:
+                    now = time.monotonic()
+                    remaining = min(self._last_event + self.debounce, self._first_event + self.max_delay) - now
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if not self._running:
+                    return
+                batches, self._pending = self._pending, {}
+                watches = {watch_id: self._watches.get(watch_id) for watch_id in batches}
+
+            # Ordre d'enregistrement: la liste des programmes est à jour avant l'index qui la lit
+            for watch_id, (changed, removed, resync) in sorted(batches.items()):
+                watch = watches.get(watch_id)
+                if watch is None:
+                    continue
+                try:
+                    watch.callback(None if resync else changed, removed)
+                except Exception as e:
+                    logger.exception(f"Erreur lors du traitement des changements de {watch.path}: {str(e)}")
+
+    # Scrutation périodique
+
+    def _poll_loop(self) -> None:
+        while self._running:
+            with self._lock:
+                watches = [self._watches[watch_id] for watch_id in self._polled if watch_id in self._watches]
+            for watch in watches:
+                current = watch.scan()
+                previous = watch.snapshot
+                changed = [path for path, version in current.items() if previous.get(path) != version]
+                removed = [path for path in previous if path not in current]
+                watch.snapshot = current
+                if changed or removed:
+                    self._record(watch, changed, removed)
+            readable, _, _ = select.select([self._stop_pipe[0]], [], [], self.poll_interval)
+            if readable:
+                return
+
+    # inotify
+
+    def _add_directory(self, watch: _Watch, directory: str) -> None:
+        wd = self._inotify.add_watch(directory)
+        with self._lock:
+            owners = self._wd_dirs.setdefault(wd, [])
+            if (watch.id, directory) not in owners:
+                owners.append((watch.id, directory))
+
+    def _remove_directories(self, watch_id: int) -> None:
+        released = []
+        with self._lock:
+            for wd, owners in list(self._wd_dirs.items()):
+                owners[:] = [owner for owner in owners if owner[0] != watch_id]
+                if not owners:
+                    del self._wd_dirs[wd]
+                    released.append(wd)
+        if self._inotify is not None:
+            for wd in released:
+                self._inotify.remove_watch(wd)
+
+    def _inotify_loop(self) -> None:
+        fd = self._inotify.fd
+        while self._running:
+            readable, _, _ = select.select([fd, self._stop_pipe[0]], [], [])
+            if self._stop_pipe[0] in readable:
+                return
+            for wd, mask, name in self._inotify.read_events():
+                self._handle_event(wd, mask, name)
+
+    def _handle_event(self, wd: int, mask: int, name: str) -> None:
+        if mask & IN_Q_OVERFLOW:
+            # File d'événements du noyau pleine: resynchronisation complète de chaque consommateur
+            logger.warning("Événements inotify perdus, resynchronisation")
+            with self._lock:
+                watches = list(self._watches.values())
+            for watch in watches:
+                self._record(watch, resync=True)
+            return
+
+        with self._lock:
+            if mask & IN_IGNORED:
+                self._wd_dirs.pop(wd, None)
+                return
+            owners = [
+                (self._watches[watch_id], directory)
+                for watch_id, directory in self._wd_dirs.get(wd, ()) if watch_id in self._watches
+            ]
+        for watch, directory in owners:
+            self._handle_watch_event(watch, directory, mask, name)
+
+    def _handle_watch_event(self, watch: _Watch, directory: str, mask: int, name: str) -> None:
+        path = os.path.join(directory, name) if name else directory
+
+        if mask & IN_ISDIR:
+            if not watch.recursive or _ignored_name(name):
+                return
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                # Nouveau sous-répertoire: le surveiller et signaler les fichiers déjà présents
+                subwatch = _Watch(watch.id, path, watch.callback, watch.suffixes, True)
+                try:
+                    for subdirectory in subwatch.directories():
+                        self._add_directory(watch, subdirectory)
+                except OSError as e:
+                    logger.warning(f"inotify impossible sur {path}: {str(e)}")
+                self._record(watch, changed=list(subwatch.scan()))
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self._record(watch, resync=True)
+            return
+
+        if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+            if directory == watch.path:
+                logger.warning(f"Répertoire surveillé supprimé ou déplacé: {directory}")
+                self._record(watch, resync=True)
+            return
+
+        if not watch.matches(path):
+            return
+        if mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+            self._record(watch, changed=[path])
+        elif mask & (IN_DELETE | IN_MOVED_FROM):
+            self._record(watch, removed=[path])
+
+
+_watcher: Optional[DirectoryWatcher] = None
+_watcher_lock = threading.Lock()
+
+
+def get_directory_watcher() -> DirectoryWatcher:
+    """
+    Retourne le watcher partagé du processus, configuré par WATCHER_BACKEND (auto, inotify, polling).
+
+    Returns:
+        Le watcher (à démarrer avec start())
+    """
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = DirectoryWatcher(backend=os.getenv("WATCHER_BACKEND", "auto"))
+        return _watcher
@@ -2,9 +2,41 @@ from langchain_community.vectorstores import Chroma
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import TextLoader, DirectoryLoader
+from langchain_core.embeddings import Embeddings
 import os
 import json
-from typing import List, Dict, Any
+import logging
+import threading
+from functools import partial
+from typing import List, Dict, Any, Optional, Set
+
+from monitoring.instruments import KB_EMBEDDING_SECONDS, KB_SEARCH_SECONDS
+from monitoring.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Répertoires de connaissances surveillés: (sous-répertoire, extension des fichiers)
+KNOWLEDGE_DIRECTORIES = [("running", ".txt"), ("bodyweight", ".txt"), ("strength", ".txt"), ("exercises", ".json")]
+
+class TimedEmbeddings(Embeddings):
+    """
+    Modèle d'embedding mesuré: délègue au modèle et enregistre la durée de chaque calcul.
+    """
+    
+    def __init__(self, model):
+        self.model = model
+    
+    def __getattr__(self, name):
+        # Autres attributs (model_name, ...) lus sur le modèle mesuré
+        return getattr(self.model, name)
+    
+    def embed_documents(self, texts):
+        with KB_EMBEDDING_SECONDS.labels(operation="documents").time():
+            return self.model.embed_documents(texts)
+    
+    def embed_query(self, text):
+        with KB_EMBEDDING_SECONDS.labels(operation="query").time():
+            return self.model.embed_query(text)
 
 class KnowledgeBase:
     """
@@ -19,9 +51,11 @@ class KnowledgeBase:
             embedding_model: Le modèle d'embedding à utiliser
             data_path: Le chemin vers les données d'entraînement
         """
-        self.embedding_model = embedding_model or HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+        self.embedding_model = TimedEmbeddings(embedding_model or HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2"))
         self.data_path = data_path
         self.vector_db = self._initialize_db()
+        self._write_lock = threading.Lock()
+        self._watched = False
         
         # Si la base de données vectorielle est vide, chargez les données
         if not self._db_exists():
@@ -76,22 +110,7 @@ class KnowledgeBase:
         if os.path.exists(exercises_path):
             for filename in os.listdir(exercises_path):
                 if filename.endswith(".json"):
-                    with open(os.path.join(exercises_path, filename), "r", encoding="utf-8") as f:
-                        data = json.load(f)
-                        for exercise in data:
-                            content = f"Exercice: {exercise['name']}\n"
-                            content += f"Type: {exercise['type']}\n"
-                            content += f"Muscles ciblés: {', '.join(exercise['muscles'])}\n"
-                            content += f"Niveau: {exercise['level']}\n"
-                            content += f"Description: {exercise['description']}\n"
-                            content += f"Instructions: {exercise['instructions']}\n"
-                            
-                            from langchain_core.documents import Document
-                            doc = Document(
-                                page_content=content,
-                                metadata={"source": filename, "type": "exercise", "name": exercise["name"]}
-                            )
-                            documents.append(doc)
+                    documents.extend(self._exercise_documents(os.path.join(exercises_path, filename)))
         
         # Division des documents en chunks
         text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
@@ -101,6 +120,117 @@ class KnowledgeBase:
         self.vector_db.add_documents(documents=splits)
         self.vector_db.persist()
     
+    @staticmethod
+    def _exercise_documents(path):
+        """
+        Crée un document par exercice d'un fichier JSON.
+        
+        Args:
+            path: Le chemin du fichier JSON
+            
+        Returns:
+            Liste des documents (source: nom du fichier)
+        """
+        from langchain_core.documents import Document
+        
+        filename = os.path.basename(path)
+        documents = []
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+            for exercise in data:
+                content = f"Exercice: {exercise['name']}\n"
+                content += f"Type: {exercise['type']}\n"
+                content += f"Muscles ciblés: {', '.join(exercise['muscles'])}\n"
+                content += f"Niveau: {exercise['level']}\n"
+                content += f"Description: {exercise['description']}\n"
+                content += f"Instructions: {exercise['instructions']}\n"
+                
+                doc = Document(
+                    page_content=content,
+                    metadata={"source": filename, "type": "exercise", "name": exercise["name"]}
+                )
+                documents.append(doc)
+        return documents
+    
+    @staticmethod
+    def _sources(path):
+        """Valeurs possibles de la métadonnée `source` des documents issus d'un fichier."""
+        if path.endswith(".json"):
+            return [os.path.basename(path)]
+        # DirectoryLoader normalise les chemins (data/running/x.txt pour ./data/running/x.txt)
+        return sorted({path, os.path.normpath(path)})
+    
+    def index_file(self, path):
+        """
+        (Ré)indexe un fichier de connaissances: ses anciens chunks sont remplacés.
+        
+        Args:
+            path: Le chemin du fichier (.txt ou .json d'exercices)
+        """
+        if path.endswith(".json"):
+            documents = self._exercise_documents(path)
+        else:
+            documents = TextLoader(path).load()
+        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
+        splits = text_splitter.split_documents(documents)
+        
+        with self._write_lock:
+            self._delete_sources(self._sources(path))
+            if splits:
+                self.vector_db.add_documents(documents=splits)
+            self.vector_db.persist()
+        logger.info(f"Base de connaissances: {path} indexé ({len(splits)} chunks)")
+    
+    def remove_file(self, path):
+        """
+        Retire de la base les chunks d'un fichier supprimé.
+        
+        Args:
+            path: Le chemin du fichier
+        """
+        with self._write_lock:
+            self._delete_sources(self._sources(path))
+            self.vector_db.persist()
+        logger.info(f"Base de connaissances: {path} retiré")
+    
+    def _delete_sources(self, sources):
+        ids = self.vector_db.get(where={"source": {"$in": sources}}, include=[])["ids"]
+        if ids:
+            self.vector_db.delete(ids=ids)
+    
+    def attach_watcher(self, watcher):
+        """
+        Réindexe en arrière-plan les fichiers de connaissances ajoutés, modifiés ou supprimés
+        après le démarrage. Sans effet si la base est déjà surveillée.
+        
+        Args:
+            watcher: Le watcher (models.directory_watcher.DirectoryWatcher)
+        """
+        with self._write_lock:
+            if self._watched:
+                return
+            self._watched = True
+        for directory, suffix in KNOWLEDGE_DIRECTORIES:
+            path = os.path.join(self.data_path, directory)
+            watcher.watch(path, partial(self._on_files_changed, path, suffix), suffixes=(suffix,), recursive=True)
+    
+    def _on_files_changed(self, directory: str, suffix: str, changed: Optional[Set[str]], removed: Set[str]):
+        """Met à jour la base avec les fichiers signalés par le watcher (changed=None: tout le répertoire)."""
+        if changed is None:
+            changed = {
+                os.path.join(root, name)
+                for root, _, names in os.walk(directory) for name in names if name.endswith(suffix)
+            }
+        for path in removed:
+            self.remove_file(path)
+        for path in changed:
+            try:
+                self.index_file(path)
+            except FileNotFoundError:
+                self.remove_file(path)
+            except Exception as e:
+                logger.error(f"Impossible d'indexer {path}: {str(e)}")
+    
     def _create_sample_data(self):
         """
         Crée des données d'exemple pour la base de connaissances.
@@ -250,7 +380,24 @@ class KnowledgeBase:
         Returns:
             Les documents les plus pertinents
         """
-        return self.vector_db.similarity_search(query_text, k=n_results)
+        with span("kb.query", method="similarity", k=n_results, query_chars=len(query_text)), \
+                KB_SEARCH_SECONDS.labels(method="similarity").time():
+            return self.vector_db.similarity_search(query_text, k=n_results)
+    
+    def query_with_scores(self, query_text, n_results=3):
+        """
+        Interroge la base de connaissances et retourne les scores de pertinence.
+        
+        Args:
+            query_text: Le texte de la requête
+            n_results: Le nombre de résultats à retourner
+            
+        Returns:
+            Liste de tuples (document, score) avec un score entre 0 et 1
+        """
+        with span("kb.query", method="relevance_scores", k=n_results, query_chars=len(query_text)), \
+                KB_SEARCH_SECONDS.labels(method="relevance_scores").time():
+            return self.vector_db.similarity_search_with_relevance_scores(query_text, k=n_results)
     
     def query_with_metadata_filter(self, query_text, filter_dict, n_results=5):
         """
@@ -264,11 +411,13 @@ class KnowledgeBase:
         Returns:
             Les documents les plus pertinents qui correspondent aux filtres
         """
-        return self.vector_db.similarity_search(
-            query_text,
-            k=n_results,
-            filter=filter_dict
-        )
+        with span("kb.query", method="metadata_filter", k=n_results, query_chars=len(query_text)), \
+                KB_SEARCH_SECONDS.labels(method="metadata_filter").time():
+            return self.vector_db.similarity_search(
+                query_text,
+                k=n_results,
+                filter=filter_dict
+            )
     
     def get_exercise_by_name(self, exercise_name):
         """
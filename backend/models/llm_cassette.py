@@ -0,0 +1,325 @@
+from langchain_core.language_models.llms import LLM
+from langchain_core.callbacks.manager import CallbackManagerForLLMRun
+from langchain_core.outputs import Generation, GenerationChunk, LLMResult
+from langchain_core.pydantic_v1 import Field, PrivateAttr
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from monitoring.instruments import cache_lookup
+from .llm_response import complete, finish_reason, generation_info, response_text, stream_chunks, token_usage
+
+logger = logging.getLogger(__name__)
+
+RECORD = "record"
+REPLAY = "replay"
+AUTO = "auto"
+MODES = (RECORD, REPLAY, AUTO)
+
+
+class CassetteMiss(KeyError):
+    """Aucun enregistrement pour ce prompt en mode replay."""
+
+
+def fingerprint(prompt: str, stop: Optional[List[str]] = None) -> str:
+    """
+    Empreinte d'un appel: le prompt (espaces de fin de ligne ignorés) et les séquences d'arrêt.
+
+    Args:
+        prompt: Le prompt envoyé au LLM
+        stop: Séquences d'arrêt
+
+    Returns:
+        L'empreinte SHA-256 en hexadécimal
+    """
+    normalized = "\n".join(line.rstrip() for line in prompt.strip().splitlines())
+    payload = json.dumps({"prompt": normalized, "stop": list(stop or [])}, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """
+    Enregistrements prompt -> réponse d'un fichier JSON-lines (une ligne par appel).
+
+    Chaque enregistrement conserve le texte, la raison de fin, l'usage en tokens, la latence
+    et les morceaux du flux avec leur instant d'arrivée. Un même prompt enregistré plusieurs
+    fois est rejoué dans l'ordre d'enregistrement (puis en boucle).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._replayed: Counter = Counter()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Dernière ligne tronquée par un arrêt pendant l'enregistrement
+                    logger.warning(f"Ligne {number} de la cassette {self.path} illisible, ignorée")
+                    continue
+                self._entries.setdefault(entry["key"], []).append(entry)
+        logger.info(f"Cassette {self.path}: {len(self)} enregistrements")
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def next_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """Prochain enregistrement à rejouer pour cette empreinte (None si absent)."""
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                return None
+            index = self._replayed[key] % len(entries)
+            self._replayed[key] += 1
+            return entries[index]
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        """Ajoute un enregistrement et l'écrit immédiatement sur disque."""
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._entries.setdefault(entry["key"], []).append(entry)
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+_cassettes: Dict[str, Cassette] = {}
+_cassettes_lock = threading.Lock()
+
+
+def get_cassette(path: str) -> Cassette:
+    """Cassette partagée par tous les LLM enregistrant dans le même fichier."""
+    path = os.path.abspath(path)
+    with _cassettes_lock:
+        if path not in _cassettes:
+            _cassettes[path] = Cassette(path)
+        return _cassettes[path]
+
+
+class CassetteLLM(LLM):
+    """
+    LLM enregistrant les appels d'un autre LLM (ChatMistralAI, QwenLLM, ...) dans une cassette,
+    puis les rejouant sans réseau, à la vitesse enregistrée ou accélérée.
+
+    Modes: "record" (toujours appeler le LLM et enregistrer), "replay" (rejouer uniquement,
+    CassetteMiss si le prompt est inconnu), "auto" (rejouer si possible, sinon enregistrer).
+    La raison de fin et l'usage enregistrés sont rendus dans le generation_info de chaque Generation.
+    """
+
+    mode: str = Field(default=AUTO, description="record, replay ou auto")
+    speed: float = Field(default=1.0, description="Facteur d'accélération du rejeu (0: sans attente)")
+    model_name: str = Field(default="cassette", description="Modèle enregistré")
+
+    _llm: Any = PrivateAttr(default=None)
+    _cassette: Cassette = PrivateAttr(default=None)
+
+    def __init__(self, llm: Any = None, path: str = "data/cassettes/llm.jsonl", **kwargs):
+        """
+        Initialise la cassette.
+
+        Args:
+            llm: Le LLM enregistré (facultatif en mode replay)
+            path: Fichier JSON-lines de la cassette
+        """
+        model = getattr(llm, "model_name", None) or getattr(llm, "model", None)
+        if isinstance(model, str):
+            kwargs.setdefault("model_name", model)
+        super().__init__(**kwargs)
+        if self.mode not in MODES:
+            raise ValueError(f"Mode de cassette inconnu: {self.mode} (attendu: {', '.join(MODES)})")
+        if llm is None and self.mode != REPLAY:
+            raise ValueError("Un LLM est requis pour enregistrer une cassette")
+        self._llm = llm
+        self._cassette = get_cassette(path)
+
+    @property
+    def _llm_type(self) -> str:
+        return "athly_cassette"
+
+    @property
+    def cassette(self) -> Cassette:
+        return self._cassette
+
+    def _lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """Enregistrement à rejouer, ou None s'il faut appeler le LLM."""
+        if self.mode == RECORD:
+            return None
+        entry = self._cassette.next_entry(key)
+        cache_lookup("llm_cassette", entry is not None)
+        if entry is None and self.mode == REPLAY:
+            raise CassetteMiss(f"Prompt absent de la cassette {self._cassette.path} ({key[:12]})")
+        return entry
+
+    def _wait_until(self, start: float, offset: float) -> None:
+        if self.speed <= 0:
+            return
+        delay = start + offset / self.speed - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _replay_chunks(self, entry: Dict[str, Any]) -> Iterator[str]:
+        """Rejoue les morceaux enregistrés, chacun à son instant d'arrivée (divisé par `speed`)."""
+        start = time.monotonic()
+        for offset, text in entry["chunks"]:
+            self._wait_until(start, offset)
+            yield text
+        self._wait_until(start, entry["latency"])
+
+    def _record(self, key: str, prompt: str, chunks: List[Tuple[float, str]], latency: float,
+                finish_reason: Optional[str], usage: Optional[Dict[str, Any]], streamed: bool) -> None:
+        self._cassette.append({
+            "key": key,
+            "model": self.model_name,
+            "prompt_chars": len(prompt),
+            "text": "".join(text for _, text in chunks),
+            "finish_reason": finish_reason,
+            "usage": usage,
+            "latency": round(latency, 6),
+            "streamed": streamed,
+            "chunks": [[round(offset, 6), text] for offset, text in chunks],
+        })
+
+    def _call(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs
+    ) -> str:
+        """
+        Rejoue la réponse enregistrée pour ce prompt, ou appelle le LLM et l'enregistre.
+
+        Args:
+            prompt: Le prompt à envoyer
+            stop: Séquences d'arrêt
+            run_manager: CallbackManager du run
+
+        Returns:
+            Le texte de la réponse
+        """
+        return self._complete(prompt, stop).text
+
+    def _generate(
+        self,
+        prompts: List[str],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs
+    ) -> LLMResult:
+        """
+        Rejoue ou enregistre chaque prompt, avec la raison de fin et l'usage dans generation_info.
+
+        Args:
+            prompts: Les prompts à envoyer
+            stop: Séquences d'arrêt
+            run_manager: CallbackManager du run
+
+        Returns:
+            Une génération par prompt
+        """
+        return LLMResult(generations=[[self._complete(prompt, stop)] for prompt in prompts])
+
+    def _complete(self, prompt: str, stop: Optional[List[str]]) -> Generation:
+        """Rejoue la réponse enregistrée pour ce prompt, ou appelle le LLM et l'enregistre."""
+        key = fingerprint(prompt, stop)
+        entry = self._lookup(key)
+        if entry is not None:
+            text = "".join(self._replay_chunks(entry))
+            return Generation(text=text, generation_info=generation_info(entry.get("finish_reason"), entry.get("usage")))
+
+        start = time.monotonic()
+        response = complete(self._llm, prompt, stop)
+        latency = time.monotonic() - start
+        text = response_text(response)
+        reason, usage = finish_reason(response), token_usage(response)
+        self._record(key, prompt, [(latency, text)], latency, reason, usage, streamed=False)
+        return Generation(text=text, generation_info=generation_info(reason, usage))
+
+    def _stream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs
+    ) -> Iterator[GenerationChunk]:
+        """
+        Diffuse la réponse: morceaux rejoués avec leur rythme d'origine, ou flux du LLM enregistré au passage.
+
+        Args:
+            prompt: Le prompt à envoyer
+            stop: Séquences d'arrêt
+            run_manager: CallbackManager du run
+
+        Returns:
+            Itérateur sur les morceaux de la réponse
+        """
+        key = fingerprint(prompt, stop)
+        entry = self._lookup(key)
+        if entry is not None:
+            texts = self._replay_chunks(entry)
+        else:
+            texts = self._record_stream(key, prompt, stop)
+        for text in texts:
+            chunk = GenerationChunk(text=text)
+            if run_manager:
+                run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
+
+    def _record_stream(self, key: str, prompt: str, stop: Optional[List[str]]) -> Iterator[str]:
+        chunks: List[Tuple[float, str]] = []
+        reason, usage = None, None
+        start = time.monotonic()
+        for chunk in stream_chunks(self._llm, prompt, stop):
+            # La raison de fin et l'usage arrivent avec les derniers morceaux du flux
+            reason = finish_reason(chunk) or reason
+            usage = token_usage(chunk) or usage
+            text = response_text(chunk)
+            if text:
+                chunks.append((time.monotonic() - start, text))
+                yield text
+        # Flux interrompu (exception, consommateur arrêté): rien n'est enregistré
+        self._record(key, prompt, chunks, time.monotonic() - start, reason, usage, streamed=True)
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name, "mode": self.mode, "path": self._cassette.path}
+
+
+def cassette_from_env(llm: Any = None) -> Any:
+    """
+    Enveloppe un LLM dans une cassette si LLM_CASSETTE (chemin du fichier) est défini,
+    avec LLM_CASSETTE_MODE (record, replay, auto) et LLM_CASSETTE_SPEED.
+
+    Args:
+        llm: Le LLM à envelopper (None: cassette seule, en mode replay)
+
+    Returns:
+        Le LLM, enveloppé ou non
+    """
+    path = os.getenv("LLM_CASSETTE")
+    if not path:
+        return llm
+    return CassetteLLM(
+        llm,
+        path=path,
+        mode=os.getenv("LLM_CASSETTE_MODE", AUTO).lower(),
+        speed=float(os.getenv("LLM_CASSETTE_SPEED", "1.0"))
+    )
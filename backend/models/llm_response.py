@@ -0,0 +1,97 @@
+from langchain_core.language_models.llms import BaseLLM
+from typing import Any, Dict, Iterator, List, Optional
+
+# La raison de fin et l'usage en tokens d'un appel sont lus sur l'objet réponse (AIMessage des modèles
+# de chat, Generation des LLM texte), jamais sur l'instance du LLM, partagée par les requêtes concurrentes.
+
+
+def complete(llm: Any, prompt: str, stop: Optional[List[str]] = None) -> Any:
+    """
+    Appelle un LLM en conservant les métadonnées de la réponse.
+
+    Args:
+        llm: Le LLM (modèle de chat, LLM texte LangChain ou objet exposant invoke)
+        prompt: Le prompt à envoyer
+        stop: Séquences d'arrêt
+
+    Returns:
+        La réponse: AIMessage pour un modèle de chat, Generation pour un LLM texte
+        (invoke n'en rendrait que le texte), sinon le retour de invoke
+    """
+    if isinstance(llm, BaseLLM):
+        return llm.generate([prompt], stop=stop).generations[0][0]
+    return llm.invoke(prompt, stop=stop) if stop else llm.invoke(prompt)
+
+
+def stream_chunks(llm: Any, prompt: str, stop: Optional[List[str]] = None) -> Iterator[Any]:
+    """
+    Diffuse la réponse d'un LLM en conservant les métadonnées des morceaux.
+
+    Args:
+        llm: Le LLM
+        prompt: Le prompt à envoyer
+        stop: Séquences d'arrêt
+
+    Returns:
+        Itérateur sur les morceaux (AIMessageChunk, GenerationChunk ou chaînes)
+    """
+    if isinstance(llm, BaseLLM) and type(llm)._stream != BaseLLM._stream:
+        # BaseLLM.stream ne rend que le texte des morceaux, sans leur generation_info
+        yield from llm._stream(prompt, stop=stop)
+    else:
+        yield from (llm.stream(prompt, stop=stop) if stop else llm.stream(prompt))
+
+
+def response_text(response: Any) -> str:
+    """Extrait le texte d'une réponse LLM (AIMessage, Generation ou chaîne)."""
+    if hasattr(response, "content"):
+        return response.content
+    if hasattr(response, "text") and isinstance(response.text, str):
+        return response.text
+    return str(response)
+
+
+def _metadata(response: Any) -> Dict[str, Any]:
+    for attribute in ("response_metadata", "generation_info"):
+        metadata = getattr(response, attribute, None)
+        if isinstance(metadata, dict):
+            return metadata
+    return {}
+
+
+def finish_reason(response: Any) -> Optional[str]:
+    """
+    Raison de fin de génération d'une réponse.
+
+    Args:
+        response: La réponse du LLM
+
+    Returns:
+        La raison de fin ("stop", "length", ...) ou None si inconnue
+    """
+    metadata = _metadata(response)
+    reason = metadata.get("finish_reason") or metadata.get("stop_reason")
+    return reason if isinstance(reason, str) else None
+
+
+def token_usage(response: Any) -> Optional[Dict[str, int]]:
+    """
+    Usage en tokens d'une réponse, au format prompt_tokens / completion_tokens.
+
+    Args:
+        response: La réponse du LLM
+
+    Returns:
+        L'usage en tokens, ou None s'il n'est pas fourni
+    """
+    usage = getattr(response, "usage_metadata", None)
+    if isinstance(usage, dict):
+        return {"prompt_tokens": usage.get("input_tokens"), "completion_tokens": usage.get("output_tokens")}
+    usage = _metadata(response).get("usage")
+    return dict(usage) if isinstance(usage, dict) else None
+
+
+def generation_info(finish_reason: Optional[str], usage: Optional[Dict[str, Any]], **extra) -> Dict[str, Any]:
+    """Métadonnées d'une Generation: raison de fin, usage en tokens et champs supplémentaires renseignés."""
+    info = {"finish_reason": finish_reason, "usage": usage, **extra}
+    return {key: value for key, value in info.items() if value is not None}
@@ -0,0 +1,306 @@
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.callbacks.manager import CallbackManagerForLLMRun
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, get_buffer_string
+from langchain_core.outputs import ChatGeneration, ChatResult
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from collections import deque
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import logging
+import threading
+import time
+
+import numpy as np
+from langchain_core.pydantic_v1 import Field, PrivateAttr
+
+from monitoring.instruments import ERRORS, LLM_CALL_SECONDS, LLM_IN_FLIGHT, RETRIES
+from monitoring.tracing import run_in_context, span
+from .llm_response import complete, finish_reason as get_finish_reason, generation_info, response_text, token_usage
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ProviderState:
+    """
+    Statistiques et disjoncteur d'un fournisseur de LLM.
+
+    Le disjoncteur s'ouvre après `failure_threshold` erreurs consécutives; après
+    `reset_timeout` secondes, un seul appel d'essai est autorisé (demi-ouvert) et
+    son succès referme le disjoncteur.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 30.0, window: int = 200):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.latencies = deque(maxlen=window)
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now: float) -> str:
+        if self.opened_at is None:
+            return CLOSED
+        if now - self.opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return OPEN
+
+    def acquire(self) -> bool:
+        """Indique si un appel peut être envoyé à ce fournisseur (et réserve l'appel d'essai)."""
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self, latency: float) -> None:
+        with self._lock:
+            self.latencies.append(latency)
+            self.successes += 1
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            if self._trial_in_flight or self.consecutive_failures >= self.failure_threshold:
+                if self.opened_at is None or self._trial_in_flight:
+                    logger.warning(f"Disjoncteur ouvert pour le fournisseur {self.name}")
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Percentile des latences récentes (None si aucune mesure)."""
+        with self._lock:
+            if not self.latencies:
+                return None
+            return float(np.percentile(np.fromiter(self.latencies, dtype=float), q))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "successes": self.successes,
+            "failures": self.failures,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+        }
+
+
+def _token_attributes(usage: Optional[Dict[str, Any]]) -> Dict[str, int]:
+    """Attributs de span du nombre de tokens du prompt et de la réponse, s'ils sont fournis par le fournisseur."""
+    if not usage:
+        return {}
+    tokens = {"input_tokens": usage.get("prompt_tokens"), "output_tokens": usage.get("completion_tokens")}
+    return {key: value for key, value in tokens.items() if isinstance(value, int)}
+
+
+def _text_prompt(messages: List[BaseMessage]) -> str:
+    """Prompt d'un fournisseur texte: le message seul s'il est unique, sinon la conversation mise à plat."""
+    if len(messages) == 1 and isinstance(messages[0], HumanMessage) and isinstance(messages[0].content, str):
+        return messages[0].content
+    return get_buffer_string(messages)
+
+
+def _ai_message(response: Any, provider: str) -> AIMessage:
+    """Réponse d'un fournisseur sous forme d'AIMessage, le fournisseur retenu ajouté à response_metadata."""
+    if isinstance(response, AIMessage):
+        return response.copy(update={"response_metadata": {**response.response_metadata, "provider": provider}})
+    return AIMessage(
+        content=response_text(response),
+        response_metadata=generation_info(get_finish_reason(response), token_usage(response), provider=provider)
+    )
+
+
+class LLMRouter(BaseChatModel):
+    """
+    Modèle de chat routant les appels entre plusieurs fournisseurs (ChatMistralAI, QwenLLM, ...).
+
+    Les fournisseurs sont essayés dans l'ordre configuré, en sautant ceux dont le disjoncteur
+    est ouvert. Si le premier fournisseur dépasse sa latence p95, une requête de couverture
+    (hedged request) est envoyée au suivant et la première réponse réussie est retournée.
+    Les modèles de chat reçoivent les messages tels quels (rôles, appels d'outils); les LLM
+    texte reçoivent le prompt mis à plat. La réponse est un AIMessage dont response_metadata
+    porte la raison de fin, l'usage en tokens et le fournisseur retenu, le routeur étant
+    partagé entre les requêtes.
+    """
+
+    hedge_min_delay: float = Field(default=2.0, description="Délai minimal avant la requête de couverture (s)")
+    hedge_default_delay: float = Field(default=20.0, description="Délai de couverture tant que la p95 n'est pas connue (s)")
+    min_samples: int = Field(default=5, description="Nombre de mesures avant d'utiliser la p95")
+    failure_threshold: int = Field(default=3, description="Erreurs consécutives avant ouverture du disjoncteur")
+    reset_timeout: float = Field(default=30.0, description="Durée d'ouverture du disjoncteur (s)")
+
+    _providers: List[Tuple[str, Any]] = PrivateAttr(default_factory=list)
+    _states: Dict[str, ProviderState] = PrivateAttr(default_factory=dict)
+    _executor: Any = PrivateAttr(default=None)
+
+    def __init__(self, providers: Sequence[Tuple[str, Any]], **kwargs):
+        """
+        Initialise le routeur.
+
+        Args:
+            providers: Liste ordonnée de couples (nom, llm), le premier étant le fournisseur préféré
+        """
+        if not providers:
+            raise ValueError("Au moins un fournisseur de LLM est requis")
+        super().__init__(**kwargs)
+        self._providers = list(providers)
+        self._states = {
+            name: ProviderState(name, self.failure_threshold, self.reset_timeout) for name, _ in self._providers
+        }
+        # Deux appels par requête au plus (principal + couverture), plus les appels perdants encore en cours
+        self._executor = ThreadPoolExecutor(max_workers=8 * len(self._providers), thread_name_prefix="llm-router")
+
+    @property
+    def _llm_type(self) -> str:
+        return "athly_llm_router"
+
+    @property
+    def providers(self) -> List[str]:
+        return [name for name, _ in self._providers]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Statistiques de latence, d'erreurs et état du disjoncteur par fournisseur."""
+        return {name: self._states[name].snapshot() for name, _ in self._providers}
+
+    def _hedge_delay(self, name: str) -> float:
+        """Délai avant d'envoyer une requête de couverture: la p95 du fournisseur."""
+        state = self._states[name]
+        if len(state.latencies) < self.min_samples:
+            return self.hedge_default_delay
+        return max(self.hedge_min_delay, state.percentile(95))
+
+    def _fallback_provider(self) -> Tuple[str, Any]:
+        """Fournisseur à tenter quand tous les disjoncteurs sont ouverts: celui ouvert depuis le plus longtemps."""
+        name, llm = min(self._providers, key=lambda provider: self._states[provider[0]].opened_at or 0.0)
+        logger.warning(f"Tous les fournisseurs sont indisponibles, tentative avec {name}")
+        return name, llm
+
+    def _invoke_provider(self, name: str, llm: Any, messages: List[BaseMessage], stop: Optional[List[str]]) -> AIMessage:
+        """Appelle un fournisseur et met à jour ses statistiques; retourne sa réponse."""
+        model = getattr(llm, "model_name", None) or getattr(llm, "model", None)
+        model = model if isinstance(model, str) else name
+        prompt_chars = sum(len(str(message.content)) for message in messages)
+        with span("llm.invoke", provider=name, model=model, prompt_chars=prompt_chars) as call_span:
+            start = time.monotonic()
+            try:
+                with LLM_IN_FLIGHT.labels(provider=name).track_inprogress():
+                    if isinstance(llm, BaseChatModel):
+                        response = llm.invoke(messages, stop=stop) if stop else llm.invoke(messages)
+                    else:
+                        response = complete(llm, _text_prompt(messages), stop)
+            except Exception as e:
+                LLM_CALL_SECONDS.labels(provider=name, model=model, outcome="error").observe(time.monotonic() - start)
+                ERRORS.labels(component=f"llm_{name}").inc()
+                self._states[name].record_failure()
+                logger.error(f"Erreur du fournisseur {name}: {str(e)}")
+                raise
+            elapsed = time.monotonic() - start
+            LLM_CALL_SECONDS.labels(provider=name, model=model, outcome="ok").observe(elapsed)
+            self._states[name].record_success(elapsed)
+
+            message = _ai_message(response, name)
+            finish_reason = get_finish_reason(message)
+            call_span.set_attributes(
+                response_chars=len(response_text(message)), finish_reason=finish_reason or "",
+                **_token_attributes(token_usage(message))
+            )
+        return message
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs
+    ) -> ChatResult:
+        """
+        Envoie les messages au fournisseur préféré, avec couverture et bascule sur les suivants.
+
+        Args:
+            messages: Les messages de la conversation
+            stop: Séquences d'arrêt
+            run_manager: CallbackManager du run
+
+        Returns:
+            La première réponse réussie (AIMessage)
+        """
+        with span("llm.route", providers=",".join(self.providers)) as route_span:
+            message = self._route(messages, stop)
+            route_span.set_attribute("provider", message.response_metadata["provider"])
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _route(self, messages: List[BaseMessage], stop: Optional[List[str]]) -> AIMessage:
+        """
+        Appels aux fournisseurs: principal, couverture au-delà de la p95 et bascule sur erreur.
+
+        Returns:
+            La première réponse réussie, son fournisseur dans response_metadata
+        """
+        candidates = list(self._providers)
+        pending: Dict[Future, str] = {}
+        last_error: Optional[Exception] = None
+
+        def submit(name, llm):
+            # Le span courant suit l'appel dans le thread de l'exécuteur
+            pending[self._executor.submit(run_in_context(self._invoke_provider, name, llm, messages, stop))] = name
+            return name
+
+        def launch():
+            # Le disjoncteur n'est consulté qu'au moment de l'envoi, pour ne réserver l'appel d'essai qu'à bon escient
+            while candidates:
+                name, llm = candidates.pop(0)
+                if self._states[name].acquire():
+                    return submit(name, llm)
+            return None
+
+        current = launch() or submit(*self._fallback_provider())
+        while pending:
+            # Tant qu'un fournisseur de secours existe, n'attendre que jusqu'à la p95 du fournisseur courant
+            timeout = self._hedge_delay(current) if candidates else None
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                logger.info(f"Fournisseur {current} au-delà de sa p95, requête de couverture")
+                RETRIES.labels(component="llm_router", reason="hedge").inc()
+                current = launch() or current
+                continue
+
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    message = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                if pending:
+                    logger.info(f"Réponse de {name} retenue, {len(pending)} requête(s) abandonnée(s)")
+                return message
+
+            # Tous les appels terminés ont échoué: basculer immédiatement sur le fournisseur suivant
+            if not pending:
+                current = launch() or current
+                if pending:
+                    RETRIES.labels(component="llm_router", reason="fallback").inc()
+
+        raise last_error or RuntimeError("Aucun fournisseur de LLM n'a répondu")
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"providers": self.providers, "hedge_min_delay": self.hedge_min_delay}
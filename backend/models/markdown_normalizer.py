@@ -0,0 +1,166 @@
+import re
+from typing import List, Optional
+
+HEADING = "heading"
+TABLE = "table"
+LIST = "list"
+PARAGRAPH = "paragraph"
+CODE = "code"
+
+_HEADING = re.compile(r"#{1,6}\s")
+_LIST_ITEM = re.compile(r"(\s*)(?:([-*+])\s*(?=\*\*)|([-*+])\s+|(\d+[.)])\s+)")
+# Titre collé à la fin d'un paragraphe ("... ### Semaine 1")
+_INLINE_HEADING = re.compile(r"\s(#{2,6}\s)")
+# Ponctuation collée entre deux mots ("fin.Début", "force,endurance"); les nombres (2.5, 10,5) ne sont pas concernés
+_GLUED_SENTENCE = re.compile(r"(?<=[a-zà-ÿ\)])([.!?])(?=[A-ZÀ-Ý])")
+_GLUED_COMMA = re.compile(r"(?<=[A-Za-zÀ-ÿ]),(?=[A-Za-zÀ-ÿ])")
+
+
+def _classify(stripped: str) -> str:
+    if _HEADING.match(stripped):
+        return HEADING
+    if stripped.startswith("|"):
+        return TABLE
+    if _LIST_ITEM.match(stripped):
+        return LIST
+    return PARAGRAPH
+
+
+def _fix_spacing(line: str) -> str:
+    """Ajoute l'espace manquant après la ponctuation, hors code en ligne."""
+    if "`" not in line:
+        return _GLUED_COMMA.sub(", ", _GLUED_SENTENCE.sub(r"\1 ", line))
+    parts = line.split("`")
+    for i in range(0, len(parts), 2):
+        parts[i] = _GLUED_COMMA.sub(", ", _GLUED_SENTENCE.sub(r"\1 ", parts[i]))
+    return "`".join(parts)
+
+
+class MarkdownNormalizer:
+    """
+    Normaliseur markdown en une seule passe, ligne par ligne.
+
+    Chaque ligne est classée (titre, tableau, liste, paragraphe, code) et seules les
+    séparations entre blocs sont corrigées: ligne vide autour des titres et des tableaux,
+    avant une liste qui suit un paragraphe, espaces après la ponctuation collée entre deux
+    mots. Les blocs de code, les lignes de tableau et les nombres (2.5 km, 10:30) ne sont
+    pas modifiés. Le texte peut être fourni par fragments (streaming).
+    """
+
+    def __init__(self):
+        self._partial: List[str] = []
+        self._in_code = False
+        self._previous: Optional[str] = None
+        self._blank = False
+
+    def feed(self, chunk: str) -> str:
+        """
+        Traite un fragment de texte.
+
+        Args:
+            chunk: Le fragment reçu
+
+        Returns:
+            Le texte normalisé des lignes complètes
+        """
+        if "\n" not in chunk:
+            self._partial.append(chunk)
+            return ""
+        out: List[str] = []
+        lines = chunk.split("\n")
+        self._partial.append(lines[0])
+        lines[0] = "".join(self._partial)
+        self._partial = [lines.pop()]
+        for line in lines:
+            self._line(line, out)
+        return "".join(out)
+
+    def flush(self) -> str:
+        """
+        Termine le flux et retourne la dernière ligne normalisée (sans retour à la ligne final).
+
+        Returns:
+            Le texte normalisé restant
+        """
+        out: List[str] = []
+        last = "".join(self._partial)
+        self._partial = []
+        if last:
+            self._line(last, out)
+            if out and out[-1].endswith("\n"):
+                out[-1] = out[-1][:-1]
+        return "".join(out)
+
+    def _emit(self, kind: str, text: str, out: List[str]) -> None:
+        previous = self._previous
+        if previous is not None:
+            separate = (
+                self._blank
+                or kind == HEADING or previous == HEADING
+                or (kind == TABLE) != (previous == TABLE)
+                or (kind == CODE) != (previous == CODE)
+                or (kind == LIST and previous == PARAGRAPH)
+            )
+            if separate:
+                out.append("\n")
+        out.append(text + "\n")
+        self._previous = kind
+        self._blank = False
+
+    def _line(self, line: str, out: List[str]) -> None:
+        if line.endswith("\r"):
+            line = line[:-1]
+
+        if self._in_code:
+            out.append(line + "\n")
+            if line.strip().startswith(("```", "~~~")):
+                self._in_code = False
+            return
+
+        stripped = line.strip()
+        if not stripped:
+            if self._previous is not None:
+                self._blank = True
+            return
+
+        if stripped.startswith(("```", "~~~")):
+            self._emit(CODE, line.rstrip(), out)
+            fence = "```" if stripped.startswith("```") else "~~~"
+            # Une clôture sur la même ligne ("```code```") n'ouvre pas de bloc
+            self._in_code = stripped.count(fence) == 1
+            return
+
+        kind = _classify(stripped)
+        if kind == TABLE:
+            self._emit(TABLE, stripped, out)
+            return
+
+        if kind != HEADING:
+            match = _INLINE_HEADING.search(line)
+            if match:
+                self._line(line[:match.start()], out)
+                self._line(line[match.start() + 1:], out)
+                return
+
+        if kind == LIST:
+            match = _LIST_ITEM.match(line)
+            indent, marker = match.group(1), match.group(2) or match.group(3) or match.group(4)
+            line = f"{indent}{marker} {line[match.end():]}"
+
+        self._emit(kind, _fix_spacing(line.rstrip()), out)
+
+
+def normalize_markdown(text: str) -> str:
+    """
+    Normalise un texte markdown complet.
+
+    Args:
+        text: Le texte à normaliser
+
+    Returns:
+        Le texte normalisé
+    """
+    if not text:
+        return text
+    normalizer = MarkdownNormalizer()
+    return normalizer.feed(text) + normalizer.flush()
@@ -0,0 +1,264 @@
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .program_schema import Exercise, Session, TrainingProgram, Week
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Phase:
+    """Une phase de périodisation et ses paramètres de charge."""
+
+    name: str
+    end: float                      # fin de la phase, en fraction de la durée totale
+    sets: Tuple[float, float]       # séries en début / fin de phase
+    reps: str
+    intensity: Tuple[float, float]  # intensité en début / fin de phase (%1RM, %FCMax ou RPE)
+    rest: str
+    exercises: Tuple[str, ...]
+
+
+# Règles transcrites du corpus de KnowledgeBase._create_sample_data.
+# Les bornes de phase sont exprimées en fraction de la durée de référence du corpus,
+# ce qui permet de les appliquer à un programme de 8 à 16 semaines.
+DISCIPLINE_PHASES: Dict[str, Tuple[Phase, ...]] = {
+    # Course à pied (référence: 12 semaines, niveau débutant)
+    "running": (
+        Phase("Introduction - alternance marche/course", 3 / 12, (1, 1), "continu", (60, 65), "marche active",
+              ("Alternance marche 2 min / course 1 min", "Technique de course (skipping, talons-fesses)")),
+        Phase("Développement - augmentation du temps de course", 6 / 12, (1, 1), "continu", (65, 70), "-",
+              ("Course lente continue", "Technique de course (skipping, talons-fesses)")),
+        Phase("Consolidation - courses continues", 10 / 12, (1, 1), "continu", (65, 75), "-",
+              ("Course lente continue", "Fartlek léger (accélérations courtes)")),
+        Phase("Test - évaluation des progrès", 1.0, (1, 1), "continu", (70, 75), "-",
+              ("Course continue longue", "Fartlek léger (accélérations courtes)")),
+    ),
+    # Poids de corps (référence: 16 semaines, niveau intermédiaire)
+    "bodyweight": (
+        Phase("Évaluation et reprise", 3 / 16, (3, 3), "8-12", (7, 7), "90 sec",
+              ("Pompes", "Squats", "Tractions prise large", "Gainage planche", "Mountain climbers")),
+        Phase("Développement de la force", 8 / 16, (3, 4), "6-10", (7, 8), "2 min",
+              ("Pompes diamant", "Pistol squats partiels", "Tractions", "Dips", "L-sit (progression)")),
+        Phase("Endurance musculaire et explosivité", 12 / 16, (4, 4), "12-15", (8, 9), "60 sec",
+              ("Burpees avec saut", "Pompes déclinées", "Squats sautés", "Mountain climbers rapides", "Tractions")),
+        Phase("Mouvements complexes", 1.0, (4, 5), "5-8", (8, 9), "2 min",
+              ("Pompes archer", "Pistol squats", "Tractions lestées", "Dips complets", "L-sit")),
+    ),
+    # Musculation (référence: 16 semaines, niveau avancé)
+    "strength": (
+        Phase("Volume (hypertrophie)", 4 / 16, (4, 5), "8-12", (60, 75), "90 sec",
+              ("Squat", "Développé couché", "Soulevé de terre roumain", "Rowing barre", "Développé militaire")),
+        Phase("Force", 8 / 16, (5, 6), "3-6", (80, 90), "3 min",
+              ("Squat", "Développé couché", "Soulevé de terre", "Tractions lestées")),
+        Phase("Puissance", 12 / 16, (3, 4), "2-5", (85, 95), "3 min",
+              ("Power clean", "Squat", "Développé couché", "Soulevé de terre", "Sauts sur box", "Lancers de médecine-ball")),
+        Phase("Pic d'intensité", 14 / 16, (2, 3), "1-3", (90, 100), "4 min",
+              ("Squat", "Développé couché", "Soulevé de terre")),
+        Phase("Décharge active", 1.0, (2, 3), "8-10", (50, 60), "90 sec",
+              ("Squat", "Développé couché", "Soulevé de terre", "Rowing barre")),
+    ),
+}
+
+# Durée des séances de course (semaine de référence, minutes) - corpus course débutant
+RUNNING_MINUTES_ANCHORS = (np.array([1, 4, 8, 12]) / 12, np.array([20, 30, 35, 52]))
+
+# Ajustements par niveau: (facteur de volume, décalage d'intensité en points, séries en plus)
+LEVEL_ADJUSTMENTS = {
+    "débutant": (0.8, -10.0, -1),
+    "intermédiaire": (1.0, -5.0, 0),
+    "avancé": (1.2, 0.0, 0),
+}
+
+INTENSITY_UNITS = {"running": "% FCMax", "bodyweight": "RPE", "strength": "% 1RM"}
+
+WEEK_DAYS = ("Lundi", "Mardi", "Mercredi", "Jeudi", "Vendredi", "Samedi", "Dimanche")
+DAY_LAYOUTS = {
+    1: (0,), 2: (0, 3), 3: (0, 2, 4), 4: (0, 1, 3, 4), 5: (0, 1, 2, 4, 5), 6: (0, 1, 2, 3, 4, 5),
+    7: (0, 1, 2, 3, 4, 5, 6),
+}
+
+# Toutes les 4 semaines, une semaine allégée (hors dernière semaine)
+DELOAD_EVERY = 4
+DELOAD_FACTOR = 0.8
+
+
+def normalize_level(level: str) -> str:
+    """Ramène un niveau saisi librement à débutant / intermédiaire / avancé."""
+    level = (level or "").lower()
+    if level.startswith(("av", "adv", "exp")):
+        return "avancé"
+    if level.startswith(("int", "moy")):
+        return "intermédiaire"
+    return "débutant"
+
+
+def normalize_discipline(discipline: str) -> Optional[str]:
+    """Ramène une discipline saisie librement à running / bodyweight / strength."""
+    discipline = (discipline or "").lower()
+    if any(k in discipline for k in ("run", "course", "cours", "jog")):
+        return "running"
+    if any(k in discipline for k in ("body", "poids de corps", "calisth")):
+        return "bodyweight"
+    if any(k in discipline for k in ("strength", "muscu", "force", "halt")):
+        return "strength"
+    return None
+
+
+class PeriodizationEngine:
+    """
+    Moteur de périodisation déterministe.
+
+    Calcule semaine par semaine les courbes de volume et d'intensité (vectorisées avec NumPy)
+    puis produit instantanément le squelette complet d'un programme structuré, sans appel au LLM.
+    """
+
+    def __init__(self, phases: Optional[Dict[str, Tuple[Phase, ...]]] = None):
+        """
+        Initialise le moteur.
+
+        Args:
+            phases: Règles de périodisation par discipline (par défaut, celles du corpus)
+        """
+        self.phases = phases or DISCIPLINE_PHASES
+
+    def compute_curves(self, discipline: str, duration: int, level: str, time_per_session: int = 60) -> Dict[str, np.ndarray]:
+        """
+        Calcule les courbes hebdomadaires d'une discipline.
+
+        Args:
+            discipline: running, bodyweight ou strength
+            duration: Durée du programme en semaines
+            level: Niveau de l'utilisateur
+            time_per_session: Temps disponible par séance en minutes
+
+        Returns:
+            Dictionnaire de tableaux de longueur `duration`: phase, sets, intensity, minutes, volume
+        """
+        phases = self.phases[discipline]
+        volume_factor, intensity_offset, extra_sets = LEVEL_ADJUSTMENTS[normalize_level(level)]
+
+        weeks = np.arange(1, duration + 1)
+        progress = weeks / duration
+
+        # Phase de chaque semaine et position dans la phase (0 -> 1)
+        ends = np.array([phase.end for phase in phases])
+        starts = np.concatenate(([0.0], ends[:-1]))
+        phase_index = np.minimum(np.searchsorted(ends * duration, weeks - 1e-9), len(phases) - 1)
+        phase_start = np.floor(starts[phase_index] * duration)
+        phase_length = np.maximum(np.round(ends[phase_index] * duration) - phase_start, 1)
+        position = np.clip((weeks - phase_start - 1) / np.maximum(phase_length - 1, 1), 0.0, 1.0)
+
+        sets_bounds = np.array([phase.sets for phase in phases], dtype=float)[phase_index]
+        intensity_bounds = np.array([phase.intensity for phase in phases], dtype=float)[phase_index]
+        sets = sets_bounds[:, 0] + (sets_bounds[:, 1] - sets_bounds[:, 0]) * position
+        intensity = intensity_bounds[:, 0] + (intensity_bounds[:, 1] - intensity_bounds[:, 0]) * position
+
+        # Semaines allégées
+        deload = (weeks % DELOAD_EVERY == 0) & (weeks < duration)
+        load = np.where(deload, DELOAD_FACTOR, 1.0)
+
+        if discipline == "running":
+            minutes = np.interp(progress, *RUNNING_MINUTES_ANCHORS) * volume_factor
+            minutes = np.minimum(minutes, time_per_session) * load
+            # Les zones de FC du corpus s'appliquent à tous les niveaux: seul le volume varie
+            sets = np.ones_like(minutes)
+        else:
+            # Le RPE est sur 10: décalage réduit
+            offset = intensity_offset / 10 if discipline == "bodyweight" else intensity_offset
+            intensity = intensity + offset
+            sets = np.maximum(np.round(sets + extra_sets - (1 - load) * 5), 1)
+            minutes = np.full(duration, float(time_per_session)) * load
+
+        return {
+            "phase": phase_index,
+            "sets": sets,
+            "intensity": np.round(intensity, 1),
+            "minutes": np.round(minutes / 5) * 5 if discipline == "running" else minutes,
+            "volume": np.round(sets * minutes, 1),
+            "deload": deload,
+        }
+
+    def _format_intensity(self, discipline: str, value: float) -> str:
+        unit = INTENSITY_UNITS[discipline]
+        if discipline == "bodyweight":
+            return f"RPE {value:g}/10"
+        return f"{value:.0f}-{value + 10:.0f}{unit}" if discipline == "running" else f"{value:.0f}{unit}"
+
+    def _build_session(self, discipline: str, day: str, week_index: int, curves: Dict[str, np.ndarray],
+                       time_per_session: int) -> Session:
+        phase = self.phases[discipline][int(curves["phase"][week_index])]
+        intensity = self._format_intensity(discipline, float(curves["intensity"][week_index]))
+
+        if discipline == "running":
+            minutes = int(curves["minutes"][week_index])
+            exercises = [
+                Exercise(name=phase.exercises[0], sets_reps=f"{minutes} min", intensity=intensity, rest=phase.rest,
+                         notes="Rester en aisance respiratoire"),
+                Exercise(name=phase.exercises[1], sets_reps="3 x 20 s", intensity="Vive", rest="1 min",
+                         notes="Après l'échauffement"),
+            ]
+        else:
+            count = int(np.clip(time_per_session // 12, 3, len(phase.exercises)))
+            sets = int(curves["sets"][week_index])
+            exercises = [
+                Exercise(name=name, sets_reps=f"{sets} x {phase.reps}", intensity=intensity, rest=phase.rest)
+                for name in phase.exercises[:count]
+            ]
+
+        label = {"running": "Course à pied", "bodyweight": "Poids de corps", "strength": "Musculation"}[discipline]
+        return Session(day=day, focus=f"{label} - {phase.name}", exercises=exercises)
+
+    def build_program(self, disciplines: Sequence[str], duration: int, level: str, goals: str = "",
+                      frequency: int = 3, time_per_session: int = 60) -> TrainingProgram:
+        """
+        Construit le squelette complet d'un programme structuré.
+
+        Args:
+            disciplines: Liste des disciplines choisies
+            duration: Durée du programme en semaines
+            level: Niveau de l'utilisateur
+            goals: Objectifs principaux
+            frequency: Fréquence d'entraînement par semaine
+            time_per_session: Temps disponible par séance en minutes
+
+        Returns:
+            Le programme structuré
+        """
+        known = [d for d in (normalize_discipline(d) for d in disciplines) if d]
+        known = list(dict.fromkeys(known)) or ["running"]
+        frequency = int(np.clip(frequency, 1, 7))
+
+        curves = {d: self.compute_curves(d, duration, level, time_per_session) for d in known}
+        days = [WEEK_DAYS[i] for i in DAY_LAYOUTS[frequency]]
+
+        weeks: List[Week] = []
+        for week_index in range(duration):
+            sessions = [
+                # Les disciplines alternent sur les jours d'entraînement, d'une semaine à l'autre
+                self._build_session(known[(i + week_index) % len(known)], day, week_index,
+                                    curves[known[(i + week_index) % len(known)]], time_per_session)
+                for i, day in enumerate(days)
+            ]
+            main_phase = self.phases[known[0]][int(curves[known[0]]["phase"][week_index])].name
+            is_deload = bool(curves[known[0]]["deload"][week_index])
+            weeks.append(Week(
+                number=week_index + 1,
+                theme=main_phase + (" (semaine allégée)" if is_deload else ""),
+                sessions=sessions,
+            ))
+
+        labels = {"running": "Course à pied", "bodyweight": "Poids de corps", "strength": "Musculation"}
+        title = f"Programme Personnalisé - {' / '.join(labels[d] for d in known)} ({duration} semaines)"
+        introduction = (
+            f"Programme de {duration} semaines, niveau {normalize_level(level)}, "
+            f"{frequency} séances de {time_per_session} minutes par semaine."
+        )
+        if goals:
+            introduction += f" Objectifs: {goals}."
+
+        logger.info(f"Squelette de programme calculé: {duration} semaines, disciplines {known}")
+        return TrainingProgram(title=title, introduction=introduction, weeks=weeks)
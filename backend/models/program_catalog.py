@@ -0,0 +1,378 @@
+import base64
+import binascii
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from .periodization import normalize_discipline, normalize_level
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS programs (
+    filename TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    level TEXT,
+    duration INTEGER NOT NULL,
+    frequency INTEGER NOT NULL,
+    sheet_count INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS program_disciplines (
+    filename TEXT NOT NULL REFERENCES programs(filename) ON DELETE CASCADE,
+    discipline TEXT NOT NULL,
+    PRIMARY KEY (discipline, filename)
+);
+CREATE INDEX IF NOT EXISTS idx_programs_level_duration ON programs(level, duration);
+CREATE INDEX IF NOT EXISTS idx_programs_duration ON programs(duration, filename);
+CREATE INDEX IF NOT EXISTS idx_programs_mtime ON programs(mtime_ns, filename);
+"""
+
+# Clés de tri exposées et colonnes correspondantes (le nom de fichier départage les égalités)
+SORT_COLUMNS = {"name": "filename", "duration": "duration", "mtime": "mtime_ns"}
+# Champs du catalogue pouvant être projetés
+CATALOG_FIELDS = ("filename", "title", "disciplines", "level", "duration", "frequency", "sheet_count", "modified")
+_FIELD_COLUMNS = {
+    "filename": "filename", "title": "title", "level": "level", "duration": "duration",
+    "frequency": "frequency", "sheet_count": "sheet_count", "modified": "mtime_ns",
+}
+
+
+@dataclass
+class CatalogPage:
+    """Une page de résultats du catalogue."""
+
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+
+
+def _encode_cursor(sort: str, order: str, value: Any, filename: str) -> str:
+    data = json.dumps([sort, order, value, filename], ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort: str, order: str) -> Tuple[Any, str]:
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, cursor_order, value, filename = json.loads(data)
+    except (binascii.Error, ValueError, TypeError):
+        raise ValueError("Curseur de pagination invalide")
+    if (cursor_sort, cursor_order) != (sort, order):
+        raise ValueError("Le curseur ne correspond pas au tri demandé")
+    return value, filename
+
+
+class ProgramCatalog:
+    """
+    Catalogue SQLite des programmes stockés dans data/programs.
+
+    Les caractéristiques de chaque programme (disciplines, niveau, durée, fréquence, nombre
+    de feuilles) sont extraites de son contenu une seule fois par version du fichier (date de
+    modification et taille). La mise à jour ne fait qu'un `stat` par fichier; les recherches
+    sont des requêtes indexées qui n'ouvrent aucun fichier XLSX.
+    """
+
+    def __init__(self, program_manager, db_path: Optional[str] = None, refresh_interval: float = 2.0):
+        """
+        Initialise le catalogue.
+
+        Args:
+            program_manager: Le gestionnaire de programmes (ProgramDataManager)
+            db_path: Chemin de la base SQLite (par défaut: dans le cache du gestionnaire)
+            refresh_interval: Délai minimal en secondes entre deux vérifications du répertoire
+        """
+        self.program_manager = program_manager
+        self.db_path = db_path or os.path.join(program_manager.cache_dir, "catalog.sqlite3")
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._last_refresh = 0.0
+        self._watched = False
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._init_schema()
+
+    def _init_schema(self) -> None:
+        with self._lock, self._conn:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                # Catalogue dérivé des fichiers: reconstruit intégralement si le schéma change
+                self._conn.execute("DROP TABLE IF EXISTS program_disciplines")
+                self._conn.execute("DROP TABLE IF EXISTS programs")
+                self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self._conn.executescript(SCHEMA)
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        """Version (mtime, taille) de chaque fichier XLSX du répertoire."""
+        versions = {}
+        try:
+            with os.scandir(self.program_manager.programs_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".xlsx") and entry.is_file():
+                        stat = entry.stat()
+                        versions[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            pass
+        return versions
+
+    def refresh(self, force: bool = False) -> None:
+        """
+        Met à jour le catalogue avec les fichiers ajoutés, modifiés ou supprimés.
+
+        Sans effet (hors `force`) quand un DirectoryWatcher tient le catalogue à jour.
+
+        Args:
+            force: Vérifie le répertoire même si la dernière vérification est récente
+        """
+        if self._watched and not force:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_refresh < self.refresh_interval:
+                return
+            self._last_refresh = now
+
+            versions = self._scan()
+            known = self._known_versions()
+            self._apply(
+                {filename: version for filename, version in versions.items() if known.get(filename) != version},
+                [filename for filename in known if filename not in versions]
+            )
+
+    def attach_watcher(self, watcher) -> None:
+        """
+        Met le catalogue à jour en arrière-plan avec un DirectoryWatcher: les recherches ne
+        vérifient plus le répertoire. Sans effet si le catalogue est déjà surveillé.
+
+        Args:
+            watcher: Le watcher (models.directory_watcher.DirectoryWatcher)
+        """
+        with self._lock:
+            if self._watched:
+                return
+            self._watched = True
+        watcher.watch(self.program_manager.programs_dir, self._on_files_changed, suffixes=(".xlsx",))
+        self.refresh(force=True)
+
+    def _on_files_changed(self, changed: Optional[Set[str]], removed: Set[str]) -> None:
+        """Indexe les fichiers signalés par le watcher (changed=None: vérification complète)."""
+        if changed is None:
+            self.refresh(force=True)
+            return
+        versions = {}
+        missing = {os.path.basename(path) for path in removed}
+        for path in changed:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                missing.add(os.path.basename(path))
+                continue
+            versions[os.path.basename(path)] = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            known = self._known_versions()
+            self._apply(
+                {filename: version for filename, version in versions.items() if known.get(filename) != version},
+                [filename for filename in missing if filename in known and filename not in versions]
+            )
+
+    def _known_versions(self) -> Dict[str, Tuple[int, int]]:
+        return {
+            filename: (mtime_ns, size)
+            for filename, mtime_ns, size in self._conn.execute("SELECT filename, mtime_ns, size FROM programs")
+        }
+
+    def _apply(self, changed: Dict[str, Tuple[int, int]], removed: List[str]) -> None:
+        """Enregistre les fichiers modifiés et supprime les autres (verrou déjà pris)."""
+        if not removed and not changed:
+            return
+        with self._conn:
+            self._conn.executemany("DELETE FROM programs WHERE filename = ?", [(f,) for f in removed])
+            for filename, version in changed.items():
+                self._index_file(filename, version)
+        logger.info(f"Catalogue des programmes mis à jour: {len(changed)} modifiés, {len(removed)} supprimés")
+
+    def _index_file(self, filename: str, version: Tuple[int, int]) -> None:
+        """Extrait les caractéristiques d'un fichier et les enregistre (connexion déjà en transaction)."""
+        self._conn.execute("DELETE FROM programs WHERE filename = ?", (filename,))
+        program_data = self.program_manager.extract_program_data(filename)
+        description = self.program_manager.describe_program(filename, program_data)
+        if not description:
+            return
+        self._conn.execute(
+            "INSERT INTO programs (filename, title, level, duration, frequency, sheet_count, mtime_ns, size) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                filename, str(description["title"]), description["level"], description["duration"],
+                description["frequency"], program_data.get("sheet_count", description["duration"]),
+                version[0], version[1]
+            )
+        )
+        self._conn.executemany(
+            "INSERT INTO program_disciplines (filename, discipline) VALUES (?, ?)",
+            [(filename, discipline) for discipline in description["disciplines"]]
+        )
+
+    def search(self, discipline: Optional[str] = None, level: Optional[str] = None,
+               duration: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Recherche tous les programmes correspondant aux critères.
+
+        Args:
+            discipline: Discipline (course, musculation, poids de corps... ou texte libre)
+            level: Niveau du pratiquant
+            duration: Durée exacte en semaines
+
+        Returns:
+            Les entrées du catalogue (tous les champs), triées par nom de fichier
+        """
+        return self.page(discipline=discipline, level=level, duration=duration, limit=None).items
+
+    def page(self, discipline: Optional[str] = None, level: Optional[str] = None, duration: Optional[int] = None,
+             sort: str = "name", order: str = "asc", limit: Optional[int] = 50, cursor: Optional[str] = None,
+             fields: Optional[Sequence[str]] = None) -> CatalogPage:
+        """
+        Retourne une page de programmes (pagination par curseur sur la clé de tri).
+
+        Seules les lignes de la page sont lues, grâce aux index sur les clés de tri: le coût
+        d'une page ne dépend pas du nombre de programmes.
+
+        Args:
+            discipline: Discipline (course, musculation, poids de corps... ou texte libre)
+            level: Niveau du pratiquant
+            duration: Durée exacte en semaines
+            sort: Clé de tri (name, duration, mtime)
+            order: Ordre du tri (asc, desc)
+            limit: Taille de la page (None: tous les résultats)
+            cursor: Curseur retourné par la page précédente
+            fields: Champs à retourner (tous par défaut, voir CATALOG_FIELDS)
+
+        Returns:
+            La page, avec le curseur de la page suivante s'il en reste
+
+        Raises:
+            ValueError: Si le tri, les champs ou le curseur sont invalides
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Tri inconnu: {sort} (valeurs possibles: {', '.join(SORT_COLUMNS)})")
+        if order not in ("asc", "desc"):
+            raise ValueError(f"Ordre inconnu: {order} (asc ou desc)")
+        fields = list(fields) if fields else list(CATALOG_FIELDS)
+        unknown = [name for name in fields if name not in CATALOG_FIELDS]
+        if unknown:
+            raise ValueError(f"Champs inconnus: {', '.join(unknown)}")
+
+        self.refresh()
+
+        sort_column = SORT_COLUMNS[sort]
+        clauses, params = self._criteria(discipline, level, duration)
+        if cursor:
+            value, filename = _decode_cursor(cursor, sort, order)
+            clauses.append(f"({sort_column}, filename) {'>' if order == 'asc' else '<'} (?, ?)")
+            params.extend([value, filename])
+
+        columns = ["filename", sort_column] + [
+            _FIELD_COLUMNS[name] for name in fields if name in _FIELD_COLUMNS
+        ]
+        direction = "ASC" if order == "asc" else "DESC"
+        query = f"SELECT {', '.join(columns)} FROM programs"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += f" ORDER BY {sort_column} {direction}, filename {direction}"
+        if limit is not None:
+            # Une ligne de plus pour savoir s'il reste une page
+            query += " LIMIT ?"
+            params.append(int(limit) + 1)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+            next_cursor = None
+            if limit is not None and len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = _encode_cursor(sort, order, rows[-1][1], rows[-1][0])
+            disciplines = self._disciplines([row[0] for row in rows]) if "disciplines" in fields else {}
+
+        items = []
+        for row in rows:
+            values = dict(zip(columns[2:], row[2:]))
+            item = {}
+            for name in fields:
+                if name == "disciplines":
+                    item[name] = disciplines.get(row[0], [])
+                elif name == "modified":
+                    item[name] = datetime.fromtimestamp(values["mtime_ns"] / 1e9, tz=timezone.utc).isoformat()
+                else:
+                    item[name] = values[_FIELD_COLUMNS[name]]
+            items.append(item)
+        return CatalogPage(items=items, next_cursor=next_cursor)
+
+    @staticmethod
+    def _criteria(discipline: Optional[str], level: Optional[str],
+                  duration: Optional[int]) -> Tuple[List[str], List[Any]]:
+        """Clauses SQL des critères de recherche."""
+        clauses, params = [], []
+        if discipline:
+            normalized = normalize_discipline(discipline)
+            if normalized:
+                clauses.append("filename IN (SELECT filename FROM program_disciplines WHERE discipline = ?)")
+                params.append(normalized)
+            else:
+                # Discipline inconnue du catalogue: recherche dans le nom et le titre
+                clauses.append("(filename LIKE ? OR title LIKE ?)")
+                params.extend([f"%{discipline}%"] * 2)
+        if level:
+            clauses.append("level = ?")
+            params.append(normalize_level(level))
+        if duration:
+            clauses.append("duration = ?")
+            params.append(int(duration))
+        return clauses, params
+
+    def _disciplines(self, filenames: List[str]) -> Dict[str, List[str]]:
+        """Disciplines des programmes donnés (verrou déjà pris)."""
+        disciplines: Dict[str, List[str]] = {}
+        if filenames:
+            marks = ",".join("?" * len(filenames))
+            for filename, name in self._conn.execute(
+                f"SELECT filename, discipline FROM program_disciplines WHERE filename IN ({marks}) "
+                "ORDER BY discipline", filenames
+            ):
+                disciplines.setdefault(filename, []).append(name)
+        return disciplines
+
+    def close(self) -> None:
+        """Ferme la base."""
+        with self._lock:
+            self._conn.close()
+
+
+_catalogs: Dict[str, ProgramCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_program_catalog(program_manager) -> ProgramCatalog:
+    """
+    Retourne le catalogue partagé du répertoire de programmes (un seul catalogue par processus et par répertoire).
+
+    Args:
+        program_manager: Le gestionnaire de programmes
+
+    Returns:
+        Le catalogue des programmes
+    """
+    key = os.path.abspath(program_manager.programs_dir)
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = ProgramCatalog(program_manager)
+            _catalogs[key] = catalog
+        return catalog
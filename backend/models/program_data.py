@@ -1,25 +1,69 @@
 import os
+import copy
+import hashlib
+import pickle
+import tempfile
+import threading
 import pandas as pd
 import logging
-from typing import List, Dict, Any, Optional
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
+
+from monitoring.instruments import cache_lookup
+from models.program_parser import HEADING, PARAGRAPH, TABLE, Block, ProgramBuilder, ProgramTable
 
 logger = logging.getLogger(__name__)
 
+# Version du format des données mises en cache (à incrémenter si extract_program_data change)
+CACHE_FORMAT = 2
+
+# Mots-clés utilisés pour déduire la discipline et le niveau du contenu d'un programme
+DISCIPLINE_KEYWORDS = {
+    "running": ["course", "running", "courir", "jogging", "fractionné", "footing", "fcmax"],
+    "bodyweight": ["poids de corps", "bodyweight", "pompes", "tractions", "burpees", "calisthenics"],
+    "strength": ["musculation", "strength", "1rm", "squat", "développé", "soulevé de terre"],
+}
+LEVEL_KEYWORDS = {
+    "débutant": ["débutant", "debutant", "beginner"],
+    "intermédiaire": ["intermédiaire", "intermediaire", "intermediate"],
+    "avancé": ["avancé", "avance", "advanced", "expert"],
+}
+
+@dataclass(frozen=True)
+class ProgramSummary:
+    """Résumé rendu d'une version d'un fichier de programme."""
+    
+    content: str
+    etag: str
+    last_modified: float
+
+
 class ProgramDataManager:
     """
     Gestionnaire pour les données de programmes d'entraînement stockés dans des fichiers Excel (XLSX).
     Cette classe permet d'extraire et d'analyser des données de programmes pour être utilisées par l'IA.
     """
     
-    def __init__(self, programs_dir: str = "./data/programs"):
+    def __init__(self, programs_dir: str = "./data/programs", cache_dir: Optional[str] = None,
+                 summary_cache_size: int = 128):
         """
         Initialise le gestionnaire de données de programmes.
         
         Args:
             programs_dir: Le répertoire contenant les fichiers XLSX de programmes
+            cache_dir: Répertoire du cache des programmes extraits (par défaut: programs_dir/.cache)
+            summary_cache_size: Nombre maximal de résumés rendus gardés en mémoire
         """
         self.programs_dir = programs_dir
+        self.cache_dir = cache_dir or os.path.join(programs_dir, ".cache")
         os.makedirs(programs_dir, exist_ok=True)
+        self._cache: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+        self._cache_lock = threading.Lock()
+        self.summary_cache_size = summary_cache_size
+        self._summaries: "OrderedDict[str, Tuple[Tuple[int, int], ProgramSummary]]" = OrderedDict()
+        # Liste des fichiers tenue à jour par un DirectoryWatcher (None: lecture du répertoire)
+        self._available: Optional[set] = None
         
     def get_available_programs(self) -> List[str]:
         """
@@ -28,60 +72,129 @@ class ProgramDataManager:
         Returns:
             Liste des noms de fichiers XLSX disponibles
         """
+        available = self._available
+        if available is not None:
+            return sorted(available)
+        return self._list_programs()
+
+    def _list_programs(self) -> List[str]:
         if not os.path.exists(self.programs_dir):
             return []
             
         return [f for f in os.listdir(self.programs_dir) if f.endswith('.xlsx')]
+
+    def attach_watcher(self, watcher) -> None:
+        """
+        Tient la liste des programmes à jour avec un DirectoryWatcher au lieu de relire le
+        répertoire à chaque appel. Sans effet si le gestionnaire est déjà surveillé.
+        
+        Args:
+            watcher: Le watcher (models.directory_watcher.DirectoryWatcher)
+        """
+        with self._cache_lock:
+            if self._available is not None:
+                return
+            self._available = set()
+        # Surveillance enregistrée avant la lecture: aucun fichier ajouté entre les deux n'est perdu
+        watcher.watch(self.programs_dir, self._on_files_changed, suffixes=(".xlsx",))
+        self._on_files_changed(None, set())
+
+    def _on_files_changed(self, changed: Optional[set], removed: set) -> None:
+        """Met à jour la liste des programmes et oublie les données des fichiers supprimés."""
+        if changed is None:
+            available = set(self._list_programs())
+            with self._cache_lock:
+                # Parcours du cache sous verrou: les requêtes et le watcher le modifient en parallèle
+                removed = {filename for filename in self._cache if filename not in available}
+                self._available = available
+        else:
+            changed = {os.path.basename(path) for path in changed}
+            removed = {os.path.basename(path) for path in removed}
+            with self._cache_lock:
+                self._available.difference_update(removed)
+                self._available.update(changed)
+        with self._cache_lock:
+            for filename in removed:
+                self._cache.pop(filename, None)
+                self._summaries.pop(filename, None)
     
     def extract_program_data(self, filename: str) -> Dict[str, Any]:
         """
         Extrait les données d'un fichier de programme spécifique.
         
+        Le résultat est mis en cache (en mémoire et sur disque) selon la date de modification
+        et la taille du fichier: un programme n'est relu depuis le XLSX qu'après modification.
+        
         Args:
             filename: Nom du fichier XLSX à analyser
             
         Returns:
-            Dictionnaire contenant les données structurées du programme
+            Dictionnaire contenant les données structurées du programme (copie que l'appelant peut modifier)
         """
+        return copy.deepcopy(self._cached_program_data(filename))
+    
+    def _cached_program_data(self, filename: str) -> Dict[str, Any]:
+        """Données d'un programme telles qu'en cache: partagées entre les appels, à ne pas modifier."""
         file_path = os.path.join(self.programs_dir, filename)
-        if not os.path.exists(file_path):
+        try:
+            stat = os.stat(file_path)
+        except OSError:
             logger.error(f"Fichier de programme introuvable: {file_path}")
             return {}
+        version = (stat.st_mtime_ns, stat.st_size)
+        
+        with self._cache_lock:
+            cached = self._cache.get(filename)
+        cache_lookup("program_data", cached is not None and cached[0] == version)
+        if cached is None or cached[0] != version:
+            program_data = self._load_cached(filename, version)
+            cache_lookup("program_data_disk", program_data is not None)
+            if program_data is None:
+                program_data = self._read_program_file(file_path, filename)
+                if not program_data:
+                    return {}
+                self._store_cached(filename, version, program_data)
+            cached = (version, program_data)
+            with self._cache_lock:
+                self._cache[filename] = cached
+        
+        return cached[1]
+    
+    def _read_program_file(self, file_path: str, filename: str) -> Dict[str, Any]:
+        """
+        Lit un fichier XLSX de programme: le classeur est ouvert une seule fois pour toutes les feuilles.
         
+        Args:
+            file_path: Chemin du fichier
+            filename: Nom du fichier
+            
+        Returns:
+            Les données du programme, ou un dictionnaire vide en cas d'erreur
+        """
         try:
-            # Charger le fichier Excel
             logger.info(f"Chargement du fichier programme: {file_path}")
-            xls = pd.ExcelFile(file_path)
-            
-            # Récupérer les noms des feuilles
-            sheets = xls.sheet_names
-            
-            # Données du programme
-            program_data = {
-                "title": os.path.splitext(filename)[0],
-                "weeks": {}
-            }
-            
-            # Charger les informations de base si disponibles
-            if "Introduction" in sheets:
-                intro_df = pd.read_excel(file_path, sheet_name="Introduction")
-                if not intro_df.empty and "Introduction" in intro_df.columns:
-                    program_data["introduction"] = intro_df["Introduction"].iloc[0]
-            
-            # Charger chaque semaine
-            for sheet in sheets:
-                if sheet != "Introduction" and "Semaine" in sheet:
-                    week_df = pd.read_excel(file_path, sheet_name=sheet)
-                    
-                    # S'assurer que le DataFrame n'est pas vide
-                    if not week_df.empty:
-                        # Convertir le DataFrame en dictionnaire structuré
-                        week_data = []
-                        for _, row in week_df.iterrows():
-                            week_data.append(dict(row))
-                        
-                        # Ajouter les données de la semaine
-                        program_data["weeks"][sheet] = week_data
+            with pd.ExcelFile(file_path) as xls:
+                sheets = xls.sheet_names
+                
+                # Données du programme
+                program_data = {
+                    "title": os.path.splitext(filename)[0],
+                    "sheet_count": len(sheets),
+                    "weeks": {}
+                }
+                
+                # Charger les informations de base si disponibles
+                if "Introduction" in sheets:
+                    intro_df = xls.parse("Introduction")
+                    if not intro_df.empty and "Introduction" in intro_df.columns:
+                        program_data["introduction"] = intro_df["Introduction"].iloc[0]
+                
+                # Charger chaque semaine depuis le classeur déjà ouvert
+                for sheet in sheets:
+                    if sheet != "Introduction" and "Semaine" in sheet:
+                        week_df = xls.parse(sheet)
+                        if not week_df.empty:
+                            program_data["weeks"][sheet] = week_df.to_dict("records")
             
             return program_data
         
@@ -89,6 +202,37 @@ class ProgramDataManager:
             logger.error(f"Erreur lors de l'extraction des données du programme {filename}: {str(e)}")
             return {}
     
+    def _cache_path(self, filename: str) -> str:
+        return os.path.join(self.cache_dir, f"{filename}.pkl")
+    
+    def _load_cached(self, filename: str, version: Tuple[int, int]) -> Optional[Dict[str, Any]]:
+        """Lit le cache disque d'un programme s'il correspond à la version du fichier."""
+        try:
+            with open(self._cache_path(filename), "rb") as f:
+                entry = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Cache illisible pour le programme {filename}: {str(e)}")
+            return None
+        if entry.get("format") != CACHE_FORMAT or entry.get("version") != version:
+            return None
+        return entry.get("data")
+    
+    def _store_cached(self, filename: str, version: Tuple[int, int], program_data: Dict[str, Any]) -> None:
+        """Écrit le cache disque d'un programme (écriture atomique)."""
+        tmp_path = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump({"format": CACHE_FORMAT, "version": version, "data": program_data}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._cache_path(filename))
+        except Exception as e:
+            logger.warning(f"Impossible d'écrire le cache du programme {filename}: {str(e)}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
     def search_program_by_criteria(self, 
                                   discipline: Optional[str] = None, 
                                   level: Optional[str] = None, 
@@ -96,6 +240,9 @@ class ProgramDataManager:
         """
         Recherche des programmes correspondant à des critères spécifiques.
         
+        La sélection se fait dans le catalogue (caractéristiques extraites du contenu des
+        fichiers); seuls les programmes retenus sont chargés.
+        
         Args:
             discipline: Discipline sportive (course, musculation, etc.)
             level: Niveau du pratiquant (débutant, intermédiaire, avancé)
@@ -104,30 +251,14 @@ class ProgramDataManager:
         Returns:
             Liste des programmes correspondant aux critères
         """
-        results = []
+        from models.program_catalog import get_program_catalog
         
-        for filename in self.get_available_programs():
-            # Vérifier si le nom du fichier contient les critères de recherche
-            filename_lower = filename.lower()
-            
-            matches_criteria = True
-            
-            if discipline and discipline.lower() not in filename_lower:
-                matches_criteria = False
-                
-            if level and level.lower() not in filename_lower:
-                matches_criteria = False
-                
-            if duration:
-                # Chercher le nombre de semaines dans le nom du fichier
-                if str(duration) not in filename and f"{duration}sem" not in filename_lower:
-                    matches_criteria = False
-            
-            if matches_criteria:
-                program_data = self.extract_program_data(filename)
-                if program_data:
-                    program_data["filename"] = filename
-                    results.append(program_data)
+        results = []
+        for entry in get_program_catalog(self).search(discipline=discipline, level=level, duration=duration):
+            program_data = self.extract_program_data(entry["filename"])
+            if program_data:
+                program_data["filename"] = entry["filename"]
+                results.append(program_data)
         
         return results
     
@@ -141,29 +272,127 @@ class ProgramDataManager:
         Returns:
             Résumé textuel du programme
         """
-        program_data = self.extract_program_data(filename)
-        if not program_data:
+        summary = self.get_program_summary_entry(filename)
+        if summary is None:
             return "Programme non trouvé ou invalide."
+        return summary.content
+    
+    def get_program_summary_entry(self, filename: str) -> Optional[ProgramSummary]:
+        """
+        Retourne le résumé d'un programme, rendu une seule fois par version du fichier.
+        
+        Les résumés sont gardés dans un cache LRU borné (summary_cache_size), avec leur ETag
+        (empreinte du contenu) et leur date de modification.
+        
+        Args:
+            filename: Nom du fichier de programme
+            
+        Returns:
+            Le résumé, ou None si le programme est introuvable ou invalide
+        """
+        try:
+            stat = os.stat(os.path.join(self.programs_dir, filename))
+        except OSError:
+            return None
+        version = (stat.st_mtime_ns, stat.st_size)
+        
+        with self._cache_lock:
+            cached = self._summaries.get(filename)
+            if cached is not None and cached[0] == version:
+                self._summaries.move_to_end(filename)
+                cache_lookup("program_summary", True)
+                return cached[1]
+        cache_lookup("program_summary", False)
+        
+        content = self._render_summary(filename)
+        if content is None:
+            return None
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()[:32]
+        summary = ProgramSummary(content=content, etag=f'"{digest}"', last_modified=stat.st_mtime)
+        
+        with self._cache_lock:
+            self._summaries[filename] = (version, summary)
+            self._summaries.move_to_end(filename)
+            while len(self._summaries) > self.summary_cache_size:
+                self._summaries.popitem(last=False)
+        return summary
+    
+    def _render_summary(self, filename: str) -> Optional[str]:
+        """Rend le résumé markdown d'un programme (titre, introduction, un tableau par semaine)."""
+        program_data = self._cached_program_data(filename)
+        if not program_data:
+            return None
         
-        summary = f"# {program_data['title']}\n\n"
+        builder = ProgramBuilder()
+        builder.add(Block(HEADING, str(program_data["title"]), 1))
         
         # Ajouter l'introduction si disponible
-        if "introduction" in program_data:
-            summary += f"{program_data['introduction']}\n\n"
+        if program_data.get("introduction"):
+            builder.add(Block(PARAGRAPH, str(program_data["introduction"])))
         
-        # Ajouter un résumé de chaque semaine
+        # Ajouter un tableau par semaine
         for week_name, week_data in program_data.get("weeks", {}).items():
-            summary += f"## {week_name}\n\n"
-            
+            builder.add_week(week_name, level=2)
             if week_data:
-                # Créer un tableau markdown
                 headers = list(week_data[0].keys())
-                summary += "| " + " | ".join(headers) + " |\n"
-                summary += "| " + " | ".join(["---"] * len(headers)) + " |\n"
-                
-                for session in week_data:
-                    summary += "| " + " | ".join([str(session.get(h, "")) for h in headers]) + " |\n"
-                
-                summary += "\n"
+                rows = [[str(session.get(h, "")) for h in headers] for session in week_data]
+                builder.add(Block(TABLE, table=ProgramTable(headers, rows)))
+        
+        return builder.document.to_markdown()
+    
+    def describe_program(self, filename: str, program_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Déduit les caractéristiques d'un programme à partir de son contenu.
+        
+        Args:
+            filename: Nom du fichier de programme
+            program_data: Données déjà extraites (évite une nouvelle lecture du fichier)
+            
+        Returns:
+            Dictionnaire avec les disciplines, le niveau, la durée, la fréquence et un texte résumé
+        """
+        program_data = program_data if program_data is not None else self._cached_program_data(filename)
+        if not program_data:
+            return {}
+        
+        weeks = program_data.get("weeks", {})
+        header_text = f"{filename} {program_data.get('title', '')} {program_data.get('introduction', '')}".lower()
+        rows_text = " ".join(
+            str(value) for rows in weeks.values() for row in rows for value in row.values()
+        ).lower()
+        full_text = f"{header_text} {rows_text}"
+        
+        disciplines = [
+            discipline for discipline, keywords in DISCIPLINE_KEYWORDS.items()
+            if any(keyword in full_text for keyword in keywords)
+        ]
+        # Le niveau est cherché d'abord dans le titre et l'introduction
+        level = next(
+            (level for level, keywords in LEVEL_KEYWORDS.items() if any(k in header_text for k in keywords)),
+            next((level for level, keywords in LEVEL_KEYWORDS.items() if any(k in rows_text for k in keywords)), None)
+        )
         
-        return summary 
\ No newline at end of file
+        summary_text = " ".join(
+            [str(program_data.get("title", "")), str(program_data.get("introduction", ""))]
+            + [rows_text[:1000]]
+        )
+        
+        return {
+            "filename": filename,
+            "title": program_data.get("title", os.path.splitext(filename)[0]),
+            "disciplines": disciplines,
+            "level": level,
+            "duration": len(weeks),
+            "frequency": max((self._count_sessions(rows) for rows in weeks.values()), default=0),
+            "summary_text": summary_text,
+        }
+    
+    @staticmethod
+    def _count_sessions(rows: List[Dict[str, Any]]) -> int:
+        """Compte les séances d'une semaine: jours distincts si une colonne Jour existe, lignes sinon."""
+        if not rows:
+            return 0
+        day_column = next((column for column in rows[0] if str(column).lower().startswith("jour")), None)
+        if day_column is None:
+            return len(rows)
+        return len({str(row.get(day_column)) for row in rows if pd.notna(row.get(day_column))})
@@ -0,0 +1,253 @@
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from .periodization import normalize_discipline, normalize_level
+
+logger = logging.getLogger(__name__)
+
+DISCIPLINES = ("running", "bodyweight", "strength")
+LEVELS = ("débutant", "intermédiaire", "avancé")
+
+# Poids des composantes du score de similarité
+FEATURE_WEIGHTS = {"disciplines": 0.4, "level": 0.2, "duration": 0.2, "text": 0.2}
+
+
+class ProgramIndex:
+    """
+    Index de recherche par plus proches voisins sur les programmes stockés dans data/programs.
+
+    Chaque programme est décrit par des caractéristiques (disciplines, niveau, durée) extraites
+    de son contenu et, si un modèle d'embedding est disponible, par l'embedding de son résumé.
+    L'index est mis à jour de façon incrémentale: seuls les fichiers modifiés sont relus.
+    """
+
+    def __init__(self, program_manager, embedding_model=None):
+        """
+        Initialise l'index.
+
+        Args:
+            program_manager: Le gestionnaire de programmes (ProgramDataManager)
+            embedding_model: Modèle d'embedding LangChain optionnel (embed_documents / embed_query)
+        """
+        self.program_manager = program_manager
+        self.embedding_model = embedding_model
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._versions: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None
+        self._embeddings: Optional[np.ndarray] = None
+        self._filenames: List[str] = []
+        self._watched = False
+
+    def _file_version(self, filename: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(os.path.join(self.program_manager.programs_dir, filename))
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _feature_vector(disciplines: Sequence[str], level: Optional[str], duration: int) -> np.ndarray:
+        """Encode disciplines (one-hot), niveau (ordinal) et durée dans un vecteur."""
+        vector = np.zeros(len(DISCIPLINES) + 2)
+        for discipline in disciplines:
+            if discipline in DISCIPLINES:
+                vector[DISCIPLINES.index(discipline)] = 1.0
+        vector[-2] = LEVELS.index(level) / (len(LEVELS) - 1) if level in LEVELS else np.nan
+        vector[-1] = duration
+        return vector
+
+    def refresh(self, force: bool = False) -> None:
+        """
+        Met à jour l'index avec les fichiers ajoutés, modifiés ou supprimés.
+
+        Sans effet (hors `force`) quand un DirectoryWatcher tient l'index à jour.
+
+        Args:
+            force: Relit le répertoire même si l'index est surveillé
+        """
+        if self._watched and not force:
+            return
+        with self._lock:
+            filenames = self.program_manager.get_available_programs()
+            self._update(filenames, set(self._entries) - set(filenames))
+
+    def attach_watcher(self, watcher) -> None:
+        """
+        Met l'index à jour en arrière-plan avec un DirectoryWatcher: les recherches ne
+        vérifient plus le répertoire. Sans effet si l'index est déjà surveillé.
+
+        Args:
+            watcher: Le watcher (models.directory_watcher.DirectoryWatcher)
+        """
+        with self._lock:
+            if self._watched:
+                return
+            self._watched = True
+        watcher.watch(self.program_manager.programs_dir, self._on_files_changed, suffixes=(".xlsx",))
+        self.refresh(force=True)
+
+    def _on_files_changed(self, changed: Optional[Set[str]], removed: Set[str]) -> None:
+        """Relit les fichiers signalés par le watcher (changed=None: relecture complète)."""
+        if changed is None:
+            self.refresh(force=True)
+            return
+        with self._lock:
+            self._update(
+                [os.path.basename(path) for path in changed],
+                {os.path.basename(path) for path in removed} & set(self._entries)
+            )
+
+    def _update(self, filenames: Sequence[str], removed: Set[str]) -> None:
+        """Relit les fichiers modifiés parmi `filenames` et retire `removed` (verrou déjà pris)."""
+        changed = False
+        for filename in removed:
+            self._entries.pop(filename, None)
+            self._versions.pop(filename, None)
+            changed = True
+
+        new_texts = []
+        for filename in filenames:
+            version = self._file_version(filename)
+            if version is None:
+                if self._entries.pop(filename, None) is not None:
+                    self._versions.pop(filename, None)
+                    changed = True
+                continue
+            if self._versions.get(filename) == version:
+                continue
+            description = self.program_manager.describe_program(filename)
+            if not description:
+                continue
+            self._entries[filename] = description
+            self._versions[filename] = version
+            new_texts.append(filename)
+            changed = True
+
+        if self.embedding_model is not None and new_texts:
+            try:
+                vectors = self.embedding_model.embed_documents(
+                    [self._entries[f]["summary_text"] for f in new_texts]
+                )
+                for filename, vector in zip(new_texts, vectors):
+                    vector = np.asarray(vector, dtype=float)
+                    self._entries[filename]["embedding"] = vector / (np.linalg.norm(vector) or 1.0)
+            except Exception as e:
+                logger.warning(f"Embeddings des programmes indisponibles: {str(e)}")
+
+        if changed:
+            self._rebuild()
+            logger.info(f"Index des programmes mis à jour: {len(self._entries)} programmes")
+
+    def _rebuild(self) -> None:
+        """Reconstruit les matrices de caractéristiques à partir des entrées."""
+        self._filenames = sorted(self._entries)
+        if not self._filenames:
+            self._matrix = None
+            self._embeddings = None
+            return
+        entries = [self._entries[f] for f in self._filenames]
+        self._matrix = np.vstack([
+            self._feature_vector(e["disciplines"], e["level"], e["duration"]) for e in entries
+        ])
+        if all("embedding" in e for e in entries):
+            self._embeddings = np.vstack([e["embedding"] for e in entries])
+        else:
+            self._embeddings = None
+
+    def search(self, disciplines: Sequence[str], level: Optional[str] = None, duration: Optional[int] = None,
+               goals: str = "", k: int = 3) -> List[Dict[str, Any]]:
+        """
+        Recherche les programmes les plus proches des critères.
+
+        Args:
+            disciplines: Disciplines souhaitées
+            level: Niveau de l'utilisateur
+            duration: Durée souhaitée en semaines
+            goals: Objectifs (utilisés pour la similarité textuelle)
+            k: Nombre de résultats
+
+        Returns:
+            Liste des descriptions de programmes avec leur score (0 à 1), triée par score décroissant
+        """
+        self.refresh()
+        if self._matrix is None:
+            return []
+
+        wanted = [d for d in (normalize_discipline(d) for d in disciplines) if d]
+        level = normalize_level(level) if level else None
+        query = self._feature_vector(wanted, level, duration or 0)
+        matrix = self._matrix
+        weights = dict(FEATURE_WEIGHTS)
+
+        # Disciplines: indice de Jaccard entre les ensembles one-hot
+        n = len(DISCIPLINES)
+        intersection = matrix[:, :n] @ query[:n]
+        union = np.clip(matrix[:, :n] + query[:n], 0.0, 1.0).sum(axis=1)
+        scores = weights["disciplines"] * np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+        # Niveau: proximité ordinale (niveau inconnu = neutre)
+        if level:
+            level_score = 1.0 - np.abs(matrix[:, -2] - query[-2])
+            scores += weights["level"] * np.nan_to_num(level_score, nan=0.5)
+        else:
+            weights["level"] = 0.0
+
+        # Durée: écart relatif
+        if duration:
+            scores += weights["duration"] * np.clip(1.0 - np.abs(matrix[:, -1] - duration) / duration, 0.0, 1.0)
+        else:
+            weights["duration"] = 0.0
+
+        # Similarité textuelle entre les objectifs et le résumé du programme
+        if self._embeddings is not None and self.embedding_model is not None:
+            text = f"{' '.join(disciplines)} {level or ''} {goals} {duration or ''} semaines"
+            vector = np.asarray(self.embedding_model.embed_query(text), dtype=float)
+            vector = vector / (np.linalg.norm(vector) or 1.0)
+            scores += weights["text"] * np.clip(self._embeddings @ vector, 0.0, 1.0)
+        else:
+            weights["text"] = 0.0
+
+        total = sum(weights.values()) or 1.0
+        scores = scores / total
+
+        top = np.argsort(-scores)[:k]
+        return [
+            {**{key: value for key, value in self._entries[self._filenames[i]].items() if key != "embedding"},
+             "score": float(scores[i])}
+            for i in top
+        ]
+
+
+_indexes: Dict[str, ProgramIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_program_index(program_manager, embedding_model=None) -> ProgramIndex:
+    """
+    Retourne l'index partagé du répertoire de programmes (un seul index par processus et par répertoire).
+
+    Args:
+        program_manager: Le gestionnaire de programmes
+        embedding_model: Modèle d'embedding optionnel
+
+    Returns:
+        L'index des programmes
+    """
+    key = os.path.abspath(program_manager.programs_dir)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = ProgramIndex(program_manager, embedding_model)
+            _indexes[key] = index
+        elif embedding_model is not None and index.embedding_model is None:
+            # Les embeddings seront calculés à la prochaine relecture complète
+            index.embedding_model = embedding_model
+            index._versions.clear()
+            if index._watched:
+                index.refresh(force=True)
+        return index
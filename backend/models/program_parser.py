@@ -0,0 +1,427 @@
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+HEADING = "heading"
+STRONG = "strong"
+PARAGRAPH = "paragraph"
+LIST = "list"
+TABLE = "table"
+CODE = "code"
+
+# Niveau attribué aux lignes en gras, plus bas que tous les titres markdown
+STRONG_LEVEL = 7
+
+_HEADING = re.compile(r"(#{1,6})\s+(.*)")
+_LIST_ITEM = re.compile(r"(?:[-*+]|\d+[.)])\s+(.*)")
+_LABEL = re.compile(r"(\*\*|__|\*|_)(?=\S)((?:(?!\1).)+)(?<=\S)\1:?$")
+_INLINE_MARKUP = re.compile(r"\*\*|__|`")
+_CELL_SPLIT = re.compile(r"(?<!\\)\|")
+_SEPARATOR_CELL = re.compile(r":?-+:?")
+_WEEK = re.compile(r"(?:semaine|week)\s*(\d+)", re.IGNORECASE)
+_DAY = re.compile(
+    r"(?:lundi|mardi|mercredi|jeudi|vendredi|samedi|dimanche|monday|tuesday|wednesday|thursday|friday|"
+    r"saturday|sunday|jour\s*\d+|day\s*\d+|s[ée]ance\s*\w+)\b",
+    re.IGNORECASE
+)
+
+WeekTable = Tuple[str, List[str], List[List[str]]]
+
+
+@dataclass
+class ProgramTable:
+    """Un tableau d'exercices."""
+
+    headers: List[str]
+    rows: List[List[str]] = field(default_factory=list)
+
+
+@dataclass
+class ProgramDay:
+    """Une séance (jour) et ses tableaux; titre vide pour les tableaux hors séance."""
+
+    title: str = ""
+    tables: List[ProgramTable] = field(default_factory=list)
+
+
+@dataclass
+class ProgramWeek:
+    """Une semaine du programme; titre vide pour les tableaux placés avant la première semaine."""
+
+    title: str = ""
+    number: Optional[int] = None
+    days: List[ProgramDay] = field(default_factory=list)
+    notes: List[str] = field(default_factory=list)
+    level: int = STRONG_LEVEL
+
+    def iter_tables(self) -> Iterator[Tuple[str, ProgramTable]]:
+        """Itère sur les tableaux de la semaine avec le titre de leur séance."""
+        for day in self.days:
+            for table in day.tables:
+                yield day.title, table
+
+
+@dataclass
+class Block:
+    """Un bloc du document, dans l'ordre du texte (titre, ligne en gras, paragraphe, liste, tableau, code)."""
+
+    kind: str
+    text: str = ""
+    level: int = 0
+    table: Optional[ProgramTable] = None
+
+
+@dataclass
+class ProgramDocument:
+    """
+    Programme d'entraînement analysé.
+
+    `blocks` conserve le contenu dans l'ordre pour les rendus mis en page (PDF, résumé);
+    `weeks` en donne la structure semaine / séance / tableau pour les rendus tabulaires (Excel).
+    """
+
+    title: str = ""
+    introduction: str = ""
+    weeks: List[ProgramWeek] = field(default_factory=list)
+    notes: List[str] = field(default_factory=list)
+    blocks: List[Block] = field(default_factory=list)
+
+    def week_tables(self) -> List[WeekTable]:
+        """
+        Retourne les tableaux de chaque semaine sous la forme (titre, en-têtes, lignes).
+
+        Les tableaux des séances d'une même semaine sont fusionnés, préfixés par une colonne
+        "Jour"; un tableau aux en-têtes différents donne une entrée séparée.
+        """
+        tables: List[WeekTable] = []
+        for week in self.weeks:
+            merge = len(week.days) > 1 or any(day.title for day in week.days)
+            current: Optional[WeekTable] = None
+            for day_title, table in week.iter_tables():
+                prefix = merge and not (table.headers and table.headers[0].lower().startswith("jour"))
+                headers = ["Jour"] + table.headers if prefix else list(table.headers)
+                rows = [[day_title] + row for row in table.rows] if prefix else [list(row) for row in table.rows]
+                if current is not None and current[1] == headers:
+                    current[2].extend(rows)
+                else:
+                    current = (week.title, headers, rows)
+                    tables.append(current)
+        return tables
+
+    def to_markdown(self) -> str:
+        """
+        Rend le document en markdown.
+
+        Returns:
+            Le texte markdown, blocs séparés par une ligne vide
+        """
+        parts = []
+        for block in self.blocks:
+            if block.kind == HEADING:
+                parts.append(f"{'#' * block.level} {block.text}")
+            elif block.kind == STRONG:
+                parts.append(f"**{block.text}**")
+            elif block.kind == LIST:
+                parts.append(f"- {block.text}")
+            elif block.kind == TABLE:
+                table = block.table
+                lines = ["| " + " | ".join(_escape_cell(cell) for cell in table.headers) + " |",
+                         "| " + " | ".join(["---"] * len(table.headers)) + " |"]
+                lines.extend("| " + " | ".join(_escape_cell(cell) for cell in row) + " |" for row in table.rows)
+                parts.append("\n".join(lines))
+            elif block.kind == CODE:
+                parts.append(f"```\n{block.text}\n```")
+            else:
+                parts.append(block.text)
+        return "\n\n".join(parts) + "\n" if parts else ""
+
+
+def _escape_cell(value: str) -> str:
+    return str(value).replace("|", "\\|").replace("\n", " ")
+
+
+def _clean(text: str) -> str:
+    return _INLINE_MARKUP.sub("", text).strip()
+
+
+class ProgramBuilder:
+    """
+    Construit un ProgramDocument bloc par bloc.
+
+    Une ligne en gras ou un titre commençant par "Semaine N" ouvre une semaine, un jour ou
+    une séance ("Lundi", "Jour 2", "Séance A") ouvre une séance. Un titre de niveau égal ou
+    supérieur à celui de la semaine courante (ex: "### Conseils") la termine. Les paragraphes
+    précédant la première semaine forment l'introduction.
+    """
+
+    def __init__(self):
+        self.document = ProgramDocument()
+        self._week: Optional[ProgramWeek] = None
+        self._day: Optional[ProgramDay] = None
+
+    def add(self, block: Block) -> None:
+        """
+        Ajoute un bloc au document.
+
+        Args:
+            block: Le bloc à ajouter
+        """
+        document = self.document
+        document.blocks.append(block)
+
+        if block.kind in (HEADING, STRONG):
+            level = block.level if block.kind == HEADING else STRONG_LEVEL
+            week = _WEEK.match(block.text)
+            if week:
+                self._start_week(block.text, int(week.group(1)), level)
+            elif _DAY.match(block.text):
+                if self._week is None:
+                    self._start_week("", None, level)
+                self._day = ProgramDay(block.text)
+                self._week.days.append(self._day)
+            elif block.kind == HEADING and self._week is not None and level <= self._week.level:
+                self._week = self._day = None
+            elif block.kind == HEADING and not document.title and not document.weeks:
+                document.title = block.text
+            return
+
+        if block.kind == TABLE:
+            if self._week is None:
+                self._start_week("", None, STRONG_LEVEL)
+            if self._day is None:
+                self._day = ProgramDay()
+                self._week.days.append(self._day)
+            self._day.tables.append(block.table)
+            return
+
+        text = f"- {block.text}" if block.kind == LIST else block.text
+        if self._week is not None:
+            self._week.notes.append(text)
+        elif not document.weeks:
+            document.introduction = f"{document.introduction}\n{text}" if document.introduction else text
+        else:
+            document.notes.append(text)
+
+    def add_week(self, title: str, level: int = STRONG_LEVEL) -> None:
+        """
+        Ajoute le titre d'une semaine et l'ouvre, même sans "Semaine N" dans le titre.
+
+        Args:
+            title: Titre de la semaine
+            level: Niveau de titre markdown (ligne en gras par défaut)
+        """
+        week = _WEEK.match(title)
+        self.document.blocks.append(
+            Block(STRONG, title) if level == STRONG_LEVEL else Block(HEADING, title, level)
+        )
+        self._start_week(title, int(week.group(1)) if week else None, level)
+
+    def add_day(self, title: str) -> None:
+        """
+        Ajoute le titre d'une séance à la semaine courante.
+
+        Args:
+            title: Titre de la séance
+        """
+        self.document.blocks.append(Block(STRONG, title))
+        if self._week is None:
+            self._start_week("", None, STRONG_LEVEL)
+        self._day = ProgramDay(title)
+        self._week.days.append(self._day)
+
+    def _start_week(self, title: str, number: Optional[int], level: int) -> None:
+        self._week = ProgramWeek(title=title, number=number, level=level)
+        self._day = None
+        self.document.weeks.append(self._week)
+
+
+class ProgramParser:
+    """
+    Analyseur markdown incrémental des programmes d'entraînement.
+
+    Le texte est lu en une seule passe, ligne par ligne, et peut être fourni par fragments
+    au fil de la génération du LLM: `feed` retourne les blocs terminés, `close` termine le
+    document. Les tableaux sont reconnus avec ou sans barre initiale, quelle que soit la
+    forme de la ligne de séparation (`|---|`, `---|---`, `|:---:|`).
+    """
+
+    def __init__(self):
+        self._builder = ProgramBuilder()
+        # Fragments de la ligne en cours, joints seulement à l'arrivée d'un saut de ligne
+        self._partial: List[str] = []
+        self._paragraph: List[str] = []
+        self._table: Optional[ProgramTable] = None
+        self._pending: Optional[str] = None
+        self._code: Optional[List[str]] = None
+        self._out: List[Block] = []
+
+    @property
+    def document(self) -> ProgramDocument:
+        """Le document en cours de construction."""
+        return self._builder.document
+
+    def feed(self, chunk: str) -> List[Block]:
+        """
+        Traite un fragment de texte.
+
+        Args:
+            chunk: Le fragment reçu
+
+        Returns:
+            Les blocs terminés par ce fragment
+        """
+        self._partial.append(chunk)
+        if "\n" in chunk:
+            lines = "".join(self._partial).split("\n")
+            self._partial = [lines.pop()]
+            for line in lines:
+                self._line(line)
+        out, self._out = self._out, []
+        return out
+
+    def finish(self) -> List[Block]:
+        """
+        Termine l'analyse (fin du flux).
+
+        Returns:
+            Les derniers blocs terminés
+        """
+        partial = "".join(self._partial)
+        self._partial = []
+        if partial:
+            self._line(partial)
+        if self._code is not None:
+            self._emit(Block(CODE, "\n".join(self._code)))
+            self._code = None
+        self._flush_pending()
+        self._flush()
+        out, self._out = self._out, []
+        return out
+
+    def close(self) -> ProgramDocument:
+        """
+        Termine l'analyse.
+
+        Returns:
+            Le document complet
+        """
+        self.finish()
+        return self.document
+
+    def _emit(self, block: Block) -> None:
+        self._builder.add(block)
+        self._out.append(block)
+
+    def _flush(self) -> None:
+        if self._table is not None:
+            self._emit(Block(TABLE, table=self._table))
+            self._table = None
+        if self._paragraph:
+            self._emit(Block(PARAGRAPH, _clean(" ".join(self._paragraph))))
+            self._paragraph = []
+
+    def _flush_pending(self) -> None:
+        if self._pending is not None:
+            self._paragraph.append(self._pending)
+            self._pending = None
+
+    @staticmethod
+    def _cells(line: str) -> List[str]:
+        line = line.strip()
+        if line.startswith("|"):
+            line = line[1:]
+        if line.endswith("|") and not line.endswith("\\|"):
+            line = line[:-1]
+        return [_clean(cell).replace("\\|", "|") for cell in _CELL_SPLIT.split(line)]
+
+    def _line(self, line: str) -> None:
+        stripped = line.strip()
+
+        if self._code is not None:
+            if stripped.startswith(("```", "~~~")):
+                self._emit(Block(CODE, "\n".join(self._code)))
+                self._code = None
+            else:
+                self._code.append(line.rstrip("\r"))
+            return
+
+        if "|" in stripped:
+            cells = self._cells(stripped)
+            if all(_SEPARATOR_CELL.fullmatch(cell) for cell in cells):
+                # Ligne de séparation: confirme un en-tête sans barre initiale
+                if self._table is None and self._pending is not None:
+                    self._flush()
+                    self._table = ProgramTable(self._cells(self._pending))
+                    self._pending = None
+                return
+            if self._table is not None:
+                self._table.rows.append(cells)
+                return
+            self._flush_pending()
+            if stripped.startswith("|"):
+                self._flush()
+                self._table = ProgramTable(cells)
+            else:
+                # En-tête possible, confirmé seulement par une ligne de séparation
+                self._pending = stripped
+            return
+
+        self._flush_pending()
+
+        if not stripped:
+            self._flush()
+            return
+
+        if stripped.startswith(("```", "~~~")):
+            self._flush()
+            self._code = []
+            return
+
+        heading = _HEADING.match(stripped)
+        label = None if heading else _LABEL.match(stripped)
+        list_item = None if heading or label else _LIST_ITEM.match(stripped)
+        if heading:
+            self._flush()
+            self._emit(Block(HEADING, _clean(heading.group(2)), len(heading.group(1))))
+        elif label:
+            self._flush()
+            self._emit(Block(STRONG, _clean(label.group(2))))
+        elif list_item:
+            self._flush()
+            self._emit(Block(LIST, _clean(list_item.group(1))))
+        elif self._table is not None:
+            self._flush()
+            self._paragraph.append(stripped)
+        else:
+            self._paragraph.append(stripped)
+
+
+def parse_program(text: str) -> ProgramDocument:
+    """
+    Analyse un programme markdown complet.
+
+    Args:
+        text: Le programme en markdown
+
+    Returns:
+        Le document analysé
+    """
+    parser = ProgramParser()
+    parser.feed(text)
+    return parser.close()
+
+
+def parse_program_stream(chunks: Iterable[str]) -> Iterator[Block]:
+    """
+    Analyse un programme reçu par fragments.
+
+    Args:
+        chunks: Les fragments de texte
+
+    Returns:
+        Itérateur sur les blocs au fur et à mesure qu'ils sont terminés
+    """
+    parser = ProgramParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.finish()
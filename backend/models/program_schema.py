@@ -0,0 +1,380 @@
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, Field, ValidationError, field_validator, model_validator
+
+from models.program_parser import HEADING, LIST, PARAGRAPH, TABLE, Block, ProgramBuilder, ProgramDocument, ProgramTable
+
+logger = logging.getLogger(__name__)
+
+# Colonnes utilisées pour les tableaux d'exercices (markdown, Excel, etc.)
+EXERCISE_COLUMNS = ["Exercice", "Séries/Répétitions", "Intensité", "Récupération", "Notes"]
+
+
+class Exercise(BaseModel):
+    """Un exercice (ou une activité) d'une séance."""
+
+    name: str = Field(description="Nom de l'exercice ou de l'activité")
+    sets_reps: str = Field(default="", description="Séries/répétitions ou durée")
+    intensity: str = Field(default="", description="Intensité ou charge")
+    rest: str = Field(default="", description="Temps de récupération")
+    notes: str = Field(default="", description="Notes techniques")
+
+    @field_validator("sets_reps", "intensity", "rest", "notes", mode="before")
+    @classmethod
+    def _coerce_text(cls, value: Any) -> str:
+        # Le LLM renvoie souvent des nombres (ex: "sets_reps": 4) ou null
+        if value is None:
+            return ""
+        if isinstance(value, (list, tuple)):
+            return ", ".join(str(v) for v in value)
+        return str(value)
+
+    def as_row(self) -> List[str]:
+        """Retourne l'exercice sous forme de ligne de tableau."""
+        return [self.name, self.sets_reps, self.intensity, self.rest, self.notes]
+
+
+class Session(BaseModel):
+    """Une séance d'entraînement (un jour de la semaine)."""
+
+    day: str = Field(description="Jour de la séance (ex: Lundi, Jour 1)")
+    focus: str = Field(default="", description="Type ou objectif de la séance")
+    exercises: List[Exercise] = Field(default_factory=list)
+
+    @field_validator("focus", mode="before")
+    @classmethod
+    def _coerce_focus(cls, value: Any) -> str:
+        return "" if value is None else str(value)
+
+
+class Week(BaseModel):
+    """Une semaine du programme."""
+
+    number: int = Field(ge=1, description="Numéro de la semaine")
+    theme: str = Field(default="", description="Phase ou objectif de la semaine")
+    sessions: List[Session] = Field(default_factory=list)
+    notes: str = Field(default="", description="Remarques sur la semaine")
+
+    @field_validator("theme", "notes", mode="before")
+    @classmethod
+    def _coerce_text(cls, value: Any) -> str:
+        return "" if value is None else str(value)
+
+    @property
+    def title(self) -> str:
+        """Titre affichable de la semaine."""
+        return f"Semaine {self.number} - {self.theme}" if self.theme else f"Semaine {self.number}"
+
+
+class TrainingProgram(BaseModel):
+    """
+    Programme d'entraînement structuré.
+
+    C'est l'objet de référence à partir duquel le markdown, l'Excel et les autres
+    formats sont rendus de manière déterministe.
+    """
+
+    title: str = Field(default="Programme Personnalisé")
+    introduction: str = Field(default="")
+    weeks: List[Week] = Field(default_factory=list)
+    advice: str = Field(default="", description="Conseils de progression et d'adaptation")
+
+    @field_validator("introduction", "advice", mode="before")
+    @classmethod
+    def _coerce_text(cls, value: Any) -> str:
+        if value is None:
+            return ""
+        if isinstance(value, (list, tuple)):
+            return "\n".join(f"- {v}" for v in value)
+        return str(value)
+
+    @model_validator(mode="after")
+    def _sort_weeks(self) -> "TrainingProgram":
+        self.weeks.sort(key=lambda week: week.number)
+        return self
+
+    def iter_week_tables(self) -> List[Tuple[str, List[str], List[List[str]]]]:
+        """
+        Retourne un tableau par semaine sous la forme (titre, en-têtes, lignes).
+
+        Chaque ligne est préfixée par le jour de la séance.
+        """
+        return self.to_document().week_tables()
+
+    def to_document(self) -> ProgramDocument:
+        """
+        Convertit le programme dans le modèle de document partagé par les exports (Excel, PDF).
+
+        Returns:
+            Le document, sans passer par le markdown
+        """
+        builder = ProgramBuilder()
+        builder.add(Block(HEADING, self.title, 3))
+        _add_text(builder, self.introduction)
+
+        for week in self.weeks:
+            builder.add_week(week.title)
+            for session in week.sessions:
+                builder.add_day(f"{session.day} - {session.focus}" if session.focus else session.day)
+                rows = [exercise.as_row() for exercise in session.exercises]
+                builder.add(Block(TABLE, table=ProgramTable(list(EXERCISE_COLUMNS), rows)))
+            _add_text(builder, week.notes)
+
+        if self.advice:
+            builder.add(Block(HEADING, "Conseils de progression", 3))
+            _add_text(builder, self.advice)
+
+        return builder.document
+
+    def to_markdown(self) -> str:
+        """
+        Rend le programme en markdown.
+
+        Returns:
+            Le programme au même format que la génération en texte libre
+        """
+        parts = [f"### {self.title}", ""]
+        if self.introduction:
+            parts.extend([self.introduction, ""])
+
+        for week in self.weeks:
+            parts.extend([f"**{week.title}**", ""])
+            for session in week.sessions:
+                day = f"{session.day} - {session.focus}" if session.focus else session.day
+                parts.extend([f"*{day}*", ""])
+                parts.append("| " + " | ".join(EXERCISE_COLUMNS) + " |")
+                parts.append("|" + "|".join(["---"] * len(EXERCISE_COLUMNS)) + "|")
+                for exercise in session.exercises:
+                    cells = [_escape_cell(cell) for cell in exercise.as_row()]
+                    parts.append("| " + " | ".join(cells) + " |")
+                parts.append("")
+            if week.notes:
+                parts.extend([week.notes, ""])
+
+        if self.advice:
+            parts.extend(["### Conseils de progression", "", self.advice, ""])
+
+        return "\n".join(parts).strip() + "\n"
+
+
+def _add_text(builder: ProgramBuilder, text: str) -> None:
+    """Ajoute un texte libre au document, une ligne "- " devenant un élément de liste."""
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith(("- ", "* ")):
+            builder.add(Block(LIST, line[2:].strip()))
+        elif line:
+            builder.add(Block(PARAGRAPH, line))
+
+
+def _escape_cell(value: str) -> str:
+    """Échappe une valeur pour une cellule de tableau markdown."""
+    return value.replace("|", "/").replace("\n", " ")
+
+
+def program_json_instructions() -> str:
+    """
+    Décrit au LLM le schéma JSON attendu pour un programme structuré.
+
+    Returns:
+        Les instructions de format à ajouter au prompt
+    """
+    example = {
+        "title": "Programme Personnalisé - Course à pied",
+        "introduction": "Objectifs du programme...",
+        "weeks": [
+            {
+                "number": 1,
+                "theme": "Phase d'introduction",
+                "sessions": [
+                    {
+                        "day": "Lundi",
+                        "focus": "Endurance fondamentale",
+                        "exercises": [
+                            {
+                                "name": "Course lente",
+                                "sets_reps": "20 min",
+                                "intensity": "60-70% FCMax",
+                                "rest": "-",
+                                "notes": "Rester en aisance respiratoire",
+                            }
+                        ],
+                    }
+                ],
+                "notes": "",
+            }
+        ],
+        "advice": "Conseils de progression...",
+    }
+    return (
+        "Réponds UNIQUEMENT avec un objet JSON valide (sans texte autour, sans bloc de code) "
+        "respectant exactement cette structure:\n"
+        f"{json.dumps(example, ensure_ascii=False, indent=2)}"
+    )
+
+
+def repair_json_text(text: str) -> str:
+    """
+    Répare localement les erreurs de JSON les plus fréquentes des LLM.
+
+    Gère les blocs de code markdown, le texte autour de l'objet, les virgules
+    finales et les chaînes/accolades non fermées (réponse tronquée).
+
+    Args:
+        text: La réponse brute du LLM
+
+    Returns:
+        Le texte JSON réparé
+    """
+    text = text.strip()
+
+    # Retirer un éventuel bloc de code ```json ... ```
+    fence = re.search(r"```(?:json)?\s*(.*?)(?:```|$)", text, re.DOTALL)
+    if fence:
+        text = fence.group(1).strip()
+
+    # Ne garder que ce qui commence au premier objet
+    start = text.find("{")
+    if start == -1:
+        return text
+    text = text[start:]
+
+    # Fermer les chaînes et structures ouvertes, en un seul passage
+    stack = []
+    in_string = False
+    escaped = False
+    end = len(text)
+    for index, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                end = index + 1
+                break
+
+    text = text[:end]
+    if in_string:
+        text += '"'
+    if stack:
+        # Retirer une paire clé/valeur incomplète en fin de texte
+        text = re.sub(r',\s*"[^"]*"\s*:?\s*$', "", text)
+        text = re.sub(r"[,:]\s*$", "", text)
+        text += "".join(reversed(stack))
+
+    # Retirer les virgules finales
+    return re.sub(r",\s*([}\]])", r"\1", text)
+
+
+def parse_training_program(text: str, expected_weeks: Optional[int] = None, first_week: int = 1) -> TrainingProgram:
+    """
+    Valide la réponse JSON du LLM et la transforme en programme structuré.
+
+    Args:
+        text: La réponse brute du LLM
+        expected_weeks: Nombre de semaines attendu (pour numéroter les semaines manquantes)
+        first_week: Premier numéro attribué aux semaines rendues sans numéro
+
+    Returns:
+        Le programme validé
+
+    Raises:
+        ValueError: Si la réponse ne peut pas être réparée
+    """
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        logger.debug("JSON invalide, tentative de réparation locale")
+        try:
+            data = json.loads(repair_json_text(text))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Réponse JSON du programme invalide: {e}") from e
+
+    if isinstance(data, list):
+        data = {"weeks": data}
+    if not isinstance(data, dict):
+        raise ValueError("Le programme doit être un objet JSON")
+
+    data = _normalize_program_dict(data, first_week)
+
+    try:
+        program = TrainingProgram.model_validate(data)
+    except ValidationError as e:
+        raise ValueError(f"Programme structuré invalide: {e}") from e
+
+    if expected_weeks and len(program.weeks) < expected_weeks:
+        logger.warning(f"Programme incomplet: {len(program.weeks)}/{expected_weeks} semaines")
+    return program
+
+
+def _week_number(week: Dict[str, Any]) -> Optional[int]:
+    """Numéro explicite d'une semaine ("Semaine 3" -> 3), None s'il est absent."""
+    number = week.get("number", week.get("week"))
+    match = re.search(r"\d+", str(number)) if number is not None else None
+    return int(match.group()) if match else None
+
+
+def _normalize_program_dict(data: Dict[str, Any], first_week: int = 1) -> Dict[str, Any]:
+    """Corrige les écarts de structure mineurs avant validation."""
+    weeks = data.get("weeks") or []
+    if isinstance(weeks, dict):
+        weeks = list(weeks.values())
+    weeks = [week for week in weeks if isinstance(week, dict)]
+
+    # Numéro absent -> premier numéro libre à partir de first_week, sans reprendre un numéro explicite
+    taken = {_week_number(week) for week in weeks}
+    next_number = first_week
+    normalized_weeks = []
+    for week in weeks:
+        week = dict(week)
+        number = _week_number(week)
+        if number is None:
+            while next_number in taken:
+                next_number += 1
+            number = next_number
+            next_number += 1
+        week["number"] = number
+
+        sessions = week.get("sessions") or week.get("days") or []
+        week["sessions"] = [_normalize_session(s) for s in sessions if isinstance(s, dict)]
+        normalized_weeks.append(week)
+
+    data = dict(data)
+    data["weeks"] = normalized_weeks
+    return data
+
+
+def _normalize_session(session: Dict[str, Any]) -> Dict[str, Any]:
+    """Corrige une séance: noms de clés alternatifs et exercices sans nom."""
+    session = dict(session)
+    session["day"] = str(session.get("day") or session.get("jour") or "Séance")
+    exercises = []
+    for exercise in session.get("exercises") or []:
+        if isinstance(exercise, str):
+            exercises.append({"name": exercise})
+        elif isinstance(exercise, dict):
+            exercise = dict(exercise)
+            exercise["name"] = str(exercise.get("name") or exercise.get("exercise") or "Exercice")
+            if "sets_reps" not in exercise:
+                sets, reps = exercise.get("sets"), exercise.get("reps")
+                if sets and reps:
+                    exercise["sets_reps"] = f"{sets} x {reps}"
+                else:
+                    exercise["sets_reps"] = sets or reps or exercise.get("duration")
+            exercises.append(exercise)
+    session["exercises"] = exercises
+    return session
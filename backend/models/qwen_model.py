@@ -1,31 +1,111 @@
-from huggingface_hub import InferenceClient
 from langchain_core.language_models.llms import LLM
-from langchain_core.callbacks.manager import CallbackManagerForLLMRun
-from typing import Any, List, Optional, Dict
+from langchain_core.callbacks.manager import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.pydantic_v1 import Field, PrivateAttr
+from langchain_core.outputs import Generation, GenerationChunk, LLMResult
+from typing import Any, Iterator, List, Optional, Dict, Tuple
+import asyncio
+import json
 import os
+import random
+import threading
+import time
+import weakref
 from dotenv import load_dotenv
 import logging
-from pydantic import Field, PrivateAttr
-import requests
-import re
+import httpx
+
+from monitoring.instruments import FORMAT_SECONDS, RETRIES
+from .llm_response import generation_info
+from .reasoning_filter import ReasoningFilter, strip_reasoning
 
 logger = logging.getLogger(__name__)
 
 load_dotenv()
 
+# Codes HTTP pour lesquels l'appel est retenté (limite de débit et erreurs serveur)
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Clients HTTP partagés par processus: les connexions (et leurs handshakes TLS) sont réutilisées entre les appels
+_clients: Dict[Tuple[str, int], httpx.Client] = {}
+# Un client asynchrone est lié à la boucle d'événements qui l'a créé: les clients sont rangés par boucle,
+# et ceux d'une boucle fermée sont oubliés (ses connexions ne sont plus utilisables)
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, int], httpx.AsyncClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+_clients_lock = threading.Lock()
+
+
+def _limits(max_connections: int) -> httpx.Limits:
+    return httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections, keepalive_expiry=60.0)
+
+
+def get_http_client(base_url: str, max_connections: int) -> httpx.Client:
+    """Retourne le client HTTP synchrone partagé pour une URL de base."""
+    key = (base_url, max_connections)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.Client(limits=_limits(max_connections))
+            _clients[key] = client
+        return client
+
+
+def get_async_http_client(base_url: str, max_connections: int) -> httpx.AsyncClient:
+    """Retourne le client HTTP asynchrone partagé pour une URL de base et la boucle d'événements courante."""
+    loop = asyncio.get_running_loop()
+    key = (base_url, max_connections)
+    with _clients_lock:
+        for closed_loop in [other for other in _async_clients if other.is_closed()]:
+            del _async_clients[closed_loop]
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(limits=_limits(max_connections))
+            clients[key] = client
+        return client
+
+
+async def close_http_clients() -> None:
+    """
+    Ferme les clients HTTP partagés (à l'arrêt du serveur).
+
+    Les clients asynchrones de la boucle courante sont fermés; ceux des autres boucles ne peuvent
+    pas l'être depuis celle-ci et sont seulement oubliés.
+    """
+    with _clients_lock:
+        clients = list(_clients.values())
+        async_clients = list(_async_clients.pop(asyncio.get_running_loop(), {}).values())
+        _clients.clear()
+        _async_clients.clear()
+    for client in clients:
+        client.close()
+    for client in async_clients:
+        await client.aclose()
+
+
 class QwenLLM(LLM):
     """
     LangChain wrapper for LLMs via Hugging Face Inference API.
+    
+    Calls go through process-wide pooled HTTP clients (keep-alive), with a per-call
+    timeout and jittered exponential retry on 429/5xx responses.
     """
     
     # Champs publics Pydantic
     model_name: str = Field(default="Qwen/QwQ-32B", description="The name of the model to use")
     max_tokens: int = Field(default=1500, description="Maximum number of tokens to generate")
     temperature: float = Field(default=0.3, description="Sampling temperature")
-    timeout: int = Field(default=120, description="Timeout in seconds for API calls")
+    timeout: float = Field(default=120, description="Timeout in seconds for API calls")
+    base_url: str = Field(
+        default="https://router.huggingface.co/hf-inference/models",
+        description="Base URL of the inference API (the model name and /v1/chat/completions are appended)"
+    )
+    max_connections: int = Field(default=20, description="Maximum number of pooled connections")
+    max_retries: int = Field(default=3, description="Maximum number of retries on 429/5xx responses")
+    retry_base_delay: float = Field(default=0.5, description="Base delay in seconds of the exponential backoff")
+    retry_max_delay: float = Field(default=8.0, description="Maximum delay in seconds between two retries")
     
     # Attributs privés (non inclus dans le schéma)
-    _client: Any = PrivateAttr(default=None)
     _api_key: str = PrivateAttr(default="")
     
     def __init__(self, **kwargs):
@@ -43,12 +123,6 @@ class QwenLLM(LLM):
         # Configurer les attributs privés après l'initialisation Pydantic
         self._api_key = api_key
         
-        # Créer le client
-        self._client = InferenceClient(
-            provider="hf-inference",
-            api_key=api_key
-        )
-        
         logger.info(f"Initialized HF LLM with model: {self.model_name} (timeout: {self.timeout}s)")
     
     @property
@@ -56,6 +130,98 @@ class QwenLLM(LLM):
         """Return type of LLM."""
         return "huggingface_inference"
     
+    @property
+    def _url(self) -> str:
+        return f"{self.base_url.rstrip('/')}/{self.model_name}/v1/chat/completions"
+    
+    @property
+    def _headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self._api_key}"}
+    
+    @property
+    def _timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(self.timeout, connect=min(10.0, self.timeout))
+    
+    def _payload(self, prompt: str, stop: Optional[List[str]], stream: bool = False) -> Dict[str, Any]:
+        """Build the chat completion request body."""
+        # Add instruction to respond directly
+        enhanced_prompt = f"{prompt}\n\nRÉPONDS DIRECTEMENT À L'UTILISATEUR SANS MONTRER TON RAISONNEMENT INTERNE."
+        payload = {
+            "model": self.model_name,
+            "messages": [{"role": "user", "content": enhanced_prompt}],
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+        }
+        if stop:
+            payload["stop"] = stop
+        if stream:
+            payload["stream"] = True
+        return payload
+    
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """Delay before the next retry: Retry-After if provided, otherwise full-jitter exponential backoff."""
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.retry_max_delay)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+    
+    def _handle_completion(self, data: Dict[str, Any]) -> Generation:
+        """Extract the response text, why generation stopped ("length" when truncated) and the token usage."""
+        choice = data["choices"][0]
+        response = choice["message"]["content"] or ""
+        
+        # Filter out thinking process just in case
+        with FORMAT_SECONDS.labels(stage="reasoning_filter").time():
+            response = self._filter_thinking(response)
+        
+        # Log first part of response
+        logger.debug(f"Qwen model response: {response[:100]}...")
+        # Finish reason and usage travel with the response: the instance is shared by concurrent requests
+        return Generation(text=response, generation_info=generation_info(choice.get("finish_reason"), data.get("usage")))
+    
+    def _post(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POST the request on the pooled client, retrying on 429/5xx and transport errors."""
+        client = get_http_client(self.base_url, self.max_connections)
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                response = client.post(self._url, json=payload, headers=self._headers, timeout=self._timeout)
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    response.raise_for_status()
+                    return response.json()
+                error = httpx.HTTPStatusError(f"HTTP {response.status_code}", request=response.request, response=response)
+            except httpx.TransportError as e:
+                error = e
+            if attempt == self.max_retries:
+                raise error
+            delay = self._retry_delay(attempt, response)
+            RETRIES.labels(component="qwen", reason=str(response.status_code) if response is not None else "transport").inc()
+            logger.warning(f"HF Inference API error ({error}), retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+            time.sleep(delay)
+    
+    async def _apost(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Async variant of `_post`."""
+        client = get_async_http_client(self.base_url, self.max_connections)
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                response = await client.post(self._url, json=payload, headers=self._headers, timeout=self._timeout)
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    response.raise_for_status()
+                    return response.json()
+                error = httpx.HTTPStatusError(f"HTTP {response.status_code}", request=response.request, response=response)
+            except httpx.TransportError as e:
+                error = e
+            if attempt == self.max_retries:
+                raise error
+            delay = self._retry_delay(attempt, response)
+            RETRIES.labels(component="qwen", reason=str(response.status_code) if response is not None else "transport").inc()
+            logger.warning(f"HF Inference API error ({error}), retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+    
     def _call(
         self,
         prompt: str,
@@ -78,101 +244,175 @@ class QwenLLM(LLM):
         logger.debug(f"Calling Qwen model with prompt: {prompt[:100]}...")
         
         try:
-            # Add instruction to respond directly
-            enhanced_prompt = f"{prompt}\n\nRÉPONDS DIRECTEMENT À L'UTILISATEUR SANS MONTRER TON RAISONNEMENT INTERNE."
-            
-            # Prepare message for chat completion
-            messages = [
-                {
-                    "role": "user",
-                    "content": enhanced_prompt
-                }
-            ]
-            
-            # Make API call
-            completion = self._client.chat_completion(
-                model=self.model_name,
-                messages=messages,
-                max_tokens=self.max_tokens,
-                temperature=self.temperature
-            )
-            
-            # Extract response text
-            response = completion.choices[0].message.content
-            
-            # Filter out thinking process just in case
-            response = self._filter_thinking(response)
-            
-            # Log first part of response
-            logger.debug(f"Qwen model response: {response[:100]}...")
+            return self._handle_completion(self._post(self._payload(prompt, stop))).text
+        except Exception as e:
+            logger.error(f"Error calling HF Inference API: {e}")
+            raise
+    
+    async def _acall(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs
+    ) -> str:
+        """
+        Async call of the model with the given prompt.
+        
+        Args:
+            prompt: The prompt to send to the model
+            stop: List of strings to stop generation when encountered
+            run_manager: CallbackManager for LLM run
             
-            return response
+        Returns:
+            Generated text
+        """
+        logger.debug(f"Calling Qwen model (async) with prompt: {prompt[:100]}...")
         
+        try:
+            return self._handle_completion(await self._apost(self._payload(prompt, stop))).text
         except Exception as e:
             logger.error(f"Error calling HF Inference API: {e}")
             raise
     
-    def _filter_thinking(self, text: str) -> str:
+    def _generate(
+        self,
+        prompts: List[str],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs
+    ) -> LLMResult:
         """
-        Filter out the thinking process from the model's response.
+        Call the model for each prompt, keeping the finish reason and token usage in generation_info.
         
         Args:
-            text: The original response text
-        
+            prompts: The prompts to send to the model
+            stop: List of strings to stop generation when encountered
+            run_manager: CallbackManager for LLM run
+            
         Returns:
-            Filtered text without the thinking parts
+            One generation per prompt
         """
-        # Check if there's any indication of internal thinking
-        if "Wait," in text or "Hmm," in text or "Let me" in text:
-            # Try to find the actual response after the thinking process
-            # Common patterns that indicate the end of thinking
-            patterns = [
-                r"^(.*?Wait,.*?)(So,\s*)(.*?)$",
-                r"^(.*?Let me.*?)(Here's\s*)(.*?)$",
-                r"^(.*?Hmm,.*?)(To summarize,\s*)(.*?)$",
-                r"^(.*?I need to.*?)(In conclusion,\s*)(.*?)$"
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, text, re.DOTALL)
-                if match and match.group(3):
-                    # Return the part after the thinking
-                    return match.group(3).strip()
-            
-            # If we couldn't extract a clear response, use a simpler approach:
-            # Split by sentences and skip the ones with thinking patterns
-            sentences = re.split(r'(?<=[.!?])\s+', text)
-            filtered_sentences = []
-            
-            skip_patterns = ["Wait,", "Hmm,", "Let me", "I should", "I need to", 
-                            "Maybe", "The user mentioned", "I'll", "Also,"]
-            
-            for sentence in sentences:
-                if not any(pattern in sentence for pattern in skip_patterns):
-                    filtered_sentences.append(sentence)
-            
-            # Join the filtered sentences
-            if filtered_sentences:
-                return " ".join(filtered_sentences)
-        
-        # Format the response for better readability
-        # Add line breaks before numbered list items
-        text = re.sub(r'(\d+\. )', r'\n\n\1', text)
+        generations = []
+        for prompt in prompts:
+            logger.debug(f"Calling Qwen model with prompt: {prompt[:100]}...")
+            try:
+                generations.append([self._handle_completion(self._post(self._payload(prompt, stop)))])
+            except Exception as e:
+                logger.error(f"Error calling HF Inference API: {e}")
+                raise
+        return LLMResult(generations=generations)
+    
+    async def _agenerate(
+        self,
+        prompts: List[str],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs
+    ) -> LLMResult:
+        """
+        Async variant of `_generate`.
         
-        # Add line breaks before bullet points
-        text = re.sub(r'(- )', r'\n\n\1', text)
+        Args:
+            prompts: The prompts to send to the model
+            stop: List of strings to stop generation when encountered
+            run_manager: CallbackManager for LLM run
+            
+        Returns:
+            One generation per prompt
+        """
+        generations = []
+        for prompt in prompts:
+            logger.debug(f"Calling Qwen model (async) with prompt: {prompt[:100]}...")
+            try:
+                generations.append([self._handle_completion(await self._apost(self._payload(prompt, stop)))])
+            except Exception as e:
+                logger.error(f"Error calling HF Inference API: {e}")
+                raise
+        return LLMResult(generations=generations)
+    
+    def _stream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs
+    ) -> Iterator[GenerationChunk]:
+        """
+        Stream the model response, dropping the thinking process as tokens arrive.
         
-        # Add double line breaks before headers
-        text = re.sub(r'(#+\s+)', r'\n\n\1', text)
+        Args:
+            prompt: The prompt to send to the model
+            stop: List of strings to stop generation when encountered
+            run_manager: CallbackManager for LLM run
+            
+        Returns:
+            Iterator over the filtered response chunks (the last one carries the finish reason and usage)
+        """
+        client = get_http_client(self.base_url, self.max_connections)
+        payload = self._payload(prompt, stop, stream=True)
+        reasoning_filter = ReasoningFilter()
+        streamed = False
+        finish_reason = None
+        usage = None
         
-        # Ensure proper spacing around strong/bold text
-        text = re.sub(r'(\*\*[^*]+\*\*)', r' \1 ', text)
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                with client.stream("POST", self._url, json=payload, headers=self._headers, timeout=self._timeout) as response:
+                    if response.status_code not in RETRYABLE_STATUS_CODES:
+                        response.raise_for_status()
+                        for line in response.iter_lines():
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[len("data:"):].strip()
+                            if data == "[DONE]":
+                                break
+                            event = json.loads(data)
+                            if event.get("usage"):
+                                usage = event["usage"]
+                            if not event.get("choices"):
+                                continue
+                            choice = event["choices"][0]
+                            if choice.get("finish_reason"):
+                                finish_reason = choice["finish_reason"]
+                            text = reasoning_filter.feed((choice.get("delta") or {}).get("content") or "")
+                            if text:
+                                chunk = GenerationChunk(text=text)
+                                if run_manager:
+                                    run_manager.on_llm_new_token(text, chunk=chunk)
+                                streamed = True
+                                yield chunk
+                        text = reasoning_filter.flush()
+                        info = generation_info(finish_reason, usage)
+                        if text or info:
+                            yield GenerationChunk(text=text, generation_info=info or None)
+                        return
+                    error = httpx.HTTPStatusError(f"HTTP {response.status_code}", request=response.request, response=response)
+            except httpx.TransportError as e:
+                # Une coupure après le début du flux ne peut pas être rejouée
+                if streamed:
+                    raise
+                error = e
+            if attempt == self.max_retries:
+                logger.error(f"Error streaming from HF Inference API: {error}")
+                raise error
+            delay = self._retry_delay(attempt, response)
+            RETRIES.labels(component="qwen", reason=str(response.status_code) if response is not None else "transport").inc()
+            logger.warning(f"HF Inference API error ({error}), retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+            time.sleep(delay)
+    
+    def _filter_thinking(self, text: str) -> str:
+        """
+        Filter out the thinking process from the model's response.
         
-        # Improve table formatting
-        text = re.sub(r'\n\|\s*', r'\n| ', text)
+        Args:
+            text: The original response text
         
-        # If no thinking patterns detected, return the formatted text
-        return text
+        Returns:
+            Filtered text without the thinking parts
+        """
+        return strip_reasoning(text)
     
     @property
     def _identifying_params(self) -> Dict[str, Any]:
@@ -181,5 +421,6 @@ class QwenLLM(LLM):
             "model_name": self.model_name,
             "temperature": self.temperature,
             "max_tokens": self.max_tokens,
-            "timeout": self.timeout
+            "timeout": self.timeout,
+            "base_url": self.base_url
         } 
\ No newline at end of file
@@ -0,0 +1,198 @@
+import re
+from typing import Iterable, Iterator, List
+
+# Débuts de phrase caractéristiques du raisonnement interne des modèles (QwQ)
+REASONING_MARKERS = (
+    "wait,", "hmm,", "let me", "i should", "i need to", "maybe", "the user mentioned",
+    "i'll", "also,", "okay,", "alright,", "first, i",
+)
+# Marqueurs de fin de raisonnement: le texte qui suit est la réponse
+TRANSITION_MARKERS = ("so,", "to summarize,", "in conclusion,")
+
+OPEN_TAG = "<think>"
+CLOSE_TAG = "</think>"
+
+_SENTENCE_END = re.compile(r"[.!?](?=\s)|\n")
+
+PREAMBLE = "preamble"
+SKIP_SENTENCE = "skip_sentence"
+THINK = "think"
+BODY = "body"
+
+
+class ReasoningFilter:
+    """
+    Filtre incrémental du raisonnement interne d'un LLM.
+
+    Machine à états appliquée aux fragments de texte au fil de la génération: les blocs
+    `<think>...</think>` sont supprimés partout, et les phrases de raisonnement en tête de
+    réponse ("Wait, ...", "Let me ...") sont ignorées jusqu'à la première phrase de réponse.
+    Chaque caractère n'est examiné qu'un nombre borné de fois (O(n)); seul un court suffixe
+    (balise ou marqueur incomplet) est conservé entre deux fragments.
+    """
+
+    def __init__(self, reasoning_markers: Iterable[str] = REASONING_MARKERS,
+                 transition_markers: Iterable[str] = TRANSITION_MARKERS):
+        """
+        Initialise le filtre.
+
+        Args:
+            reasoning_markers: Débuts de phrase (en minuscules) indiquant du raisonnement
+            transition_markers: Débuts de phrase (en minuscules) annonçant la réponse
+        """
+        self.reasoning_markers = tuple(reasoning_markers)
+        self.transition_markers = tuple(transition_markers)
+        self._lookahead = max(len(m) for m in self.reasoning_markers + self.transition_markers + (CLOSE_TAG,))
+        self._state = PREAMBLE
+        self._buffer = ""
+        self._emitted = False
+
+    @staticmethod
+    def _is_partial_tag(lower: str, pos: int) -> bool:
+        """Indique si le texte restant est un début incomplet de balise."""
+        rest = lower[pos:]
+        return OPEN_TAG.startswith(rest) or CLOSE_TAG.startswith(rest)
+
+    def feed(self, chunk: str) -> str:
+        """
+        Traite un fragment de texte.
+
+        Args:
+            chunk: Le fragment reçu du modèle
+
+        Returns:
+            Le texte de réponse pouvant être émis
+        """
+        self._buffer += chunk
+        return self._process(final=False)
+
+    def flush(self) -> str:
+        """
+        Termine le flux et retourne le texte encore retenu.
+
+        Returns:
+            Le texte de réponse restant
+        """
+        return self._process(final=True)
+
+    def _process(self, final: bool) -> str:
+        buf = self._buffer
+        lower = buf.lower()
+        length = len(buf)
+        out: List[str] = []
+        pos = 0
+
+        while pos < length:
+            if self._state == THINK:
+                end = lower.find(CLOSE_TAG, pos)
+                if end < 0:
+                    # Conserver uniquement un éventuel début de balise fermante
+                    pos = max(pos, length - len(CLOSE_TAG) + 1) if not final else length
+                    break
+                pos = end + len(CLOSE_TAG)
+                self._state = BODY if out or self._emitted else PREAMBLE
+                continue
+
+            if self._state == BODY:
+                tag = lower.find("<", pos)
+                if tag < 0:
+                    out.append(buf[pos:])
+                    pos = length
+                    break
+                out.append(buf[pos:tag])
+                pos = tag
+                if lower.startswith(OPEN_TAG, pos):
+                    pos += len(OPEN_TAG)
+                    self._state = THINK
+                elif lower.startswith(CLOSE_TAG, pos):
+                    pos += len(CLOSE_TAG)
+                elif not final and self._is_partial_tag(lower, pos):
+                    break
+                else:
+                    out.append("<")
+                    pos += 1
+                continue
+
+            if self._state == SKIP_SENTENCE:
+                match = _SENTENCE_END.search(buf, pos)
+                if match:
+                    pos = match.end()
+                    self._state = PREAMBLE
+                    continue
+                # Un point final n'est confirmé qu'au caractère suivant
+                pos = length if final else max(pos, length - 1)
+                break
+
+            # PREAMBLE: décider de la nature de la phrase suivante
+            while pos < length and buf[pos].isspace():
+                pos += 1
+            if pos >= length:
+                break
+            if lower.startswith(OPEN_TAG, pos):
+                pos += len(OPEN_TAG)
+                self._state = THINK
+                continue
+            if lower.startswith(CLOSE_TAG, pos):
+                # Balise fermante orpheline: le raisonnement précédent a déjà été ignoré
+                pos += len(CLOSE_TAG)
+                continue
+            if not final and length - pos < self._lookahead and not _SENTENCE_END.search(buf, pos):
+                break
+
+            head = lower[pos:pos + self._lookahead]
+            transition = next((m for m in self.transition_markers if head.startswith(m)), None)
+            if transition:
+                pos += len(transition)
+                while pos < length and buf[pos] == " ":
+                    pos += 1
+                self._state = BODY
+            elif head.startswith(self.reasoning_markers):
+                self._state = SKIP_SENTENCE
+            else:
+                self._state = BODY
+
+        self._buffer = buf[pos:] if not final else ""
+        text = "".join(out)
+        if text:
+            self._emitted = True
+        return text
+
+    def filter_stream(self, chunks: Iterable[str]) -> Iterator[str]:
+        """
+        Filtre un flux de fragments.
+
+        Args:
+            chunks: Les fragments reçus du modèle
+
+        Returns:
+            Itérateur sur les fragments de réponse non vides
+        """
+        for chunk in chunks:
+            text = self.feed(chunk)
+            if text:
+                yield text
+        text = self.flush()
+        if text:
+            yield text
+
+
+def strip_reasoning(text: str) -> str:
+    """
+    Supprime le raisonnement interne d'une réponse complète.
+
+    Args:
+        text: La réponse du modèle
+
+    Returns:
+        La réponse sans blocs <think> ni préambule de raisonnement
+    """
+    # Modèles dont le gabarit ouvre <think> lui-même: tout ce qui précède une balise fermante orpheline est du raisonnement
+    lower = text.lower()
+    close = lower.find(CLOSE_TAG)
+    if close >= 0 and OPEN_TAG not in lower[:close]:
+        text = text[close + len(CLOSE_TAG):]
+
+    reasoning_filter = ReasoningFilter()
+    filtered = (reasoning_filter.feed(text) + reasoning_filter.flush()).strip()
+    # Réponse entièrement ignorée: mieux vaut la retourner telle quelle qu'une réponse vide
+    return filtered or text.strip()
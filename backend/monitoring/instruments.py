@@ -0,0 +1,75 @@
+from .metrics import Counter, Gauge, Histogram
+
+# Bornes des étapes rapides (formatage, recherche locale): de 100 µs à 1 s
+FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# Latences par étape du pipeline
+HTTP_REQUEST_SECONDS = Histogram(
+    "athly_http_request_duration_seconds", "Durée de traitement des requêtes HTTP",
+    ["method", "route", "status"]
+)
+PIPELINE_STAGE_SECONDS = Histogram(
+    "athly_pipeline_stage_duration_seconds", "Durée des étapes de l'orchestrateur (routes de chat, génération de programmes)",
+    ["stage"]
+)
+KB_EMBEDDING_SECONDS = Histogram(
+    "athly_kb_embedding_duration_seconds", "Durée des calculs d'embeddings de la base de connaissances",
+    ["operation"]
+)
+KB_SEARCH_SECONDS = Histogram(
+    "athly_kb_search_duration_seconds", "Durée des recherches dans la base de connaissances (embedding de la requête inclus)",
+    ["method"]
+)
+LLM_CALL_SECONDS = Histogram(
+    "athly_llm_call_duration_seconds", "Durée des appels aux fournisseurs de LLM",
+    ["provider", "model", "outcome"]
+)
+GRAPH_STEP_SECONDS = Histogram(
+    "athly_graph_step_duration_seconds", "Durée des nœuds du graph d'agent",
+    ["node"]
+)
+TOOL_CALL_SECONDS = Histogram(
+    "athly_tool_call_duration_seconds", "Durée des appels d'outils du graph d'agent",
+    ["tool", "outcome"]
+)
+FORMAT_SECONDS = Histogram(
+    "athly_format_duration_seconds", "Durée du formatage des réponses",
+    ["stage"], buckets=FAST_BUCKETS
+)
+EXPORT_SECONDS = Histogram(
+    "athly_export_duration_seconds", "Durée des exports de documents (attente dans le pool incluse)",
+    ["job", "outcome"]
+)
+
+# Compteurs
+CACHE_REQUESTS = Counter(
+    "athly_cache_requests", "Consultations des caches", ["cache", "result"]
+)
+RETRIES = Counter(
+    "athly_retries", "Nouvelles tentatives (relances, requêtes de couverture, bascules)", ["component", "reason"]
+)
+ERRORS = Counter(
+    "athly_errors", "Erreurs par composant", ["component"]
+)
+LOG_RECORDS_DROPPED = Counter(
+    "athly_log_records_dropped", "Enregistrements de logs abandonnés (échantillonnage DEBUG, file pleine)", ["reason"]
+)
+
+# Jauges
+LLM_IN_FLIGHT = Gauge(
+    "athly_llm_calls_in_flight", "Appels aux fournisseurs de LLM en cours", ["provider"]
+)
+EXPORT_JOBS = Gauge(
+    "athly_export_jobs", "Exports en cours ou en attente dans le pool d'export"
+)
+
+
+def cache_lookup(cache: str, hit: bool) -> None:
+    """
+    Compte une consultation de cache.
+
+    Args:
+        cache: Nom du cache
+        hit: True si la valeur a été trouvée
+    """
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
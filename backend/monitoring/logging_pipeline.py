@@ -0,0 +1,214 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from .instruments import LOG_RECORDS_DROPPED
+from .tracing import current_trace_id
+
+# Attributs standard d'un LogRecord: le reste provient de `extra=` et est exporté tel quel
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "trace_id"}
+
+
+def truncate(text: str, max_chars: int) -> str:
+    """
+    Tronque un texte trop long en indiquant le nombre de caractères retirés.
+
+    Args:
+        text: Le texte
+        max_chars: Longueur maximale conservée (0: pas de limite)
+
+    Returns:
+        Le texte, éventuellement tronqué
+    """
+    if max_chars <= 0 or len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}… [+{len(text) - max_chars} caractères]"
+
+
+class DebugSampler(logging.Filter):
+    """
+    Ne conserve qu'une fraction des enregistrements DEBUG (messages, réponses et programmes complets).
+    La décision est prise par trace: une requête échantillonnée garde tous ses enregistrements DEBUG.
+    """
+
+    def __init__(self, rate: float = 1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1.0:
+            return True
+        trace_id = getattr(record, "trace_id", None) or current_trace_id()
+        if trace_id:
+            keep = int(trace_id[:8], 16) < self.rate * 0x100000000
+        else:
+            keep = random.random() < self.rate
+        if not keep:
+            LOG_RECORDS_DROPPED.labels(reason="sampled").inc()
+        return keep
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Dépose les enregistrements dans une file bornée: le thread de la requête ne fait que
+    fusionner et tronquer le message, le formatage et l'écriture ont lieu dans le thread
+    du QueueListener. Les enregistrements sont abandonnés si la file est pleine.
+    """
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]", max_chars: int = 2000):
+        super().__init__(log_queue)
+        self.max_chars = max_chars
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Les arguments peuvent être modifiés après l'appel: le message est fixé ici
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = truncate(record.getMessage(), self.max_chars)
+        record.args = None
+        record.message = record.msg
+        if not hasattr(record, "trace_id"):
+            record.trace_id = current_trace_id()
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.labels(reason="queue_full").inc()
+
+
+class JsonFormatter(logging.Formatter):
+    """Formate un enregistrement en une ligne JSON (horodatage, niveau, logger, trace, message)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        trace_id = getattr(record, "trace_id", None)
+        if trace_id:
+            entry["trace_id"] = trace_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        elif record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def parse_levels(spec: str) -> Dict[str, int]:
+    """
+    Analyse des niveaux par logger: "athly.orchestrator=DEBUG,httpx=WARNING".
+
+    Args:
+        spec: La spécification
+
+    Returns:
+        Dictionnaire nom du logger -> niveau
+    """
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        name, level = name.strip(), level.strip().upper()
+        if name and isinstance(logging.getLevelName(level), int):
+            levels[name] = logging.getLevelName(level)
+    return levels
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging(
+    level: str = "INFO",
+    levels: Optional[Dict[str, int]] = None,
+    log_file: Optional[str] = "logs/app.log",
+    console: bool = True,
+    debug_sample_rate: float = 1.0,
+    max_chars: int = 2000,
+    queue_size: int = 10000,
+    handlers: Optional[List[logging.Handler]] = None,
+) -> logging.handlers.QueueListener:
+    """
+    Installe le pipeline de logs: file bornée sur le logger racine, formatage et écriture
+    (fichier JSON-lines, console texte) dans un thread dédié.
+
+    Args:
+        level: Niveau du logger racine
+        levels: Niveaux par logger
+        log_file: Fichier JSON-lines (None: pas de fichier)
+        console: Écrire aussi sur la sortie d'erreur, au format texte
+        debug_sample_rate: Proportion des traces dont les enregistrements DEBUG sont conservés
+        max_chars: Longueur maximale des messages
+        queue_size: Capacité de la file
+        handlers: Handlers de sortie à utiliser à la place du fichier et de la console
+
+    Returns:
+        Le QueueListener démarré
+    """
+    global _listener
+    shutdown_logging()
+
+    if handlers is None:
+        handlers = []
+        if log_file:
+            os.makedirs(os.path.dirname(os.path.abspath(log_file)), exist_ok=True)
+            file_handler = logging.FileHandler(log_file, encoding="utf-8")
+            file_handler.setFormatter(JsonFormatter())
+            handlers.append(file_handler)
+        if console:
+            stream_handler = logging.StreamHandler()
+            stream_handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+            handlers.append(stream_handler)
+
+    queue_handler = NonBlockingQueueHandler(queue.Queue(queue_size), max_chars=max_chars)
+    queue_handler.addFilter(DebugSampler(debug_sample_rate))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    for name, logger_level in (levels or {}).items():
+        logging.getLogger(name).setLevel(logger_level)
+
+    _listener = logging.handlers.QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def configure_logging_from_env() -> logging.handlers.QueueListener:
+    """
+    Configure les logs selon LOG_LEVEL, LOG_LEVELS, LOG_FILE, LOG_DEBUG_SAMPLE_RATE et LOG_MAX_CHARS.
+
+    Returns:
+        Le QueueListener démarré
+    """
+    return configure_logging(
+        level=os.getenv("LOG_LEVEL", "INFO"),
+        levels=parse_levels(os.getenv("LOG_LEVELS", "")),
+        log_file=os.getenv("LOG_FILE", "logs/app.log") or None,
+        debug_sample_rate=float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.1")),
+        max_chars=int(os.getenv("LOG_MAX_CHARS", "2000")),
+    )
+
+
+def shutdown_logging() -> None:
+    """Écrit les enregistrements en attente et arrête le thread d'écriture."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
@@ -0,0 +1,321 @@
+import math
+import re
+import threading
+import time
+from contextlib import ContextDecorator
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Format d'exposition texte de Prometheus (version 0.0.4)
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+# Bornes des histogrammes de latence (secondes): de la requête SQLite à l'appel LLM de plusieurs minutes
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+_NAME = re.compile(r"^[a-zA-Z_:][a-zA-Z0-9_:]*$")
+_LABEL = re.compile(r"^[a-zA-Z_][a-zA-Z0-9_]*$")
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class CollectorRegistry:
+    """Ensemble des métriques exposées par /metrics."""
+
+    def __init__(self):
+        self._metrics: Dict[str, "_Metric"] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: "_Metric") -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Métrique déjà enregistrée: {metric.name}")
+            self._metrics[metric.name] = metric
+
+    def unregister(self, metric: "_Metric") -> None:
+        with self._lock:
+            self._metrics.pop(metric.name, None)
+
+    def collect(self) -> List["_Metric"]:
+        with self._lock:
+            return sorted(self._metrics.values(), key=lambda metric: metric.name)
+
+    def get_sample_value(self, name: str, labels: Optional[Dict[str, str]] = None) -> Optional[float]:
+        """
+        Valeur d'un échantillon (ex: "athly_errors_total"), None s'il n'existe pas.
+
+        Args:
+            name: Nom complet de l'échantillon (avec suffixe _total, _bucket, _sum, _count)
+            labels: Labels de l'échantillon
+        """
+        labels = labels or {}
+        for metric in self.collect():
+            for sample_name, sample_labels, value in metric.samples():
+                if sample_name == name and sample_labels == labels:
+                    return value
+        return None
+
+
+REGISTRY = CollectorRegistry()
+
+
+class _Metric:
+    """Métrique avec labels: une valeur (enfant) par combinaison de valeurs de labels."""
+
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional[CollectorRegistry] = REGISTRY):
+        if not _NAME.match(name):
+            raise ValueError(f"Nom de métrique invalide: {name}")
+        for label in labelnames:
+            if not _LABEL.match(label) or label.startswith("__"):
+                raise ValueError(f"Nom de label invalide: {label}")
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def labels(self, *values: str, **labels: str):
+        """
+        Retourne la valeur associée à une combinaison de labels (créée au premier appel).
+
+        Args:
+            *values: Valeurs des labels dans l'ordre de `labelnames`
+            **labels: Valeurs des labels par nom
+        """
+        if labels:
+            if values or set(labels) != set(self.labelnames):
+                raise ValueError(f"Labels attendus pour {self.name}: {self.labelnames}")
+            values = tuple(labels[name] for name in self.labelnames)
+        elif len(values) != len(self.labelnames):
+            raise ValueError(f"Labels attendus pour {self.name}: {self.labelnames}")
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _unlabelled(self):
+        if self.labelnames:
+            raise ValueError(f"La métrique {self.name} a des labels: utiliser labels()")
+        return self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            children = list(self._children.items())
+        for key, child in children:
+            labels = dict(zip(self.labelnames, key))
+            for suffix, extra, value in child.samples():
+                yield self.name + suffix, {**labels, **extra}, value
+
+
+class _Value:
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+
+class _CounterChild(_Value):
+    def inc(self, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise ValueError("Un compteur ne peut que croître")
+        super().inc(amount)
+
+    def samples(self) -> Iterable[Sample]:
+        yield "_total", {}, self._value
+
+
+class _GaugeChild(_Value):
+    def __init__(self):
+        super().__init__()
+        self._function: Optional[Callable[[], float]] = None
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self._value = float(value)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Valeur calculée à chaque collecte (ex: taille d'une file)."""
+        self._function = function
+
+    def track_inprogress(self) -> "_InProgress":
+        """Incrémente la jauge pendant l'exécution d'un bloc (context manager ou décorateur)."""
+        return _InProgress(self)
+
+    def samples(self) -> Iterable[Sample]:
+        yield "", {}, float(self._function()) if self._function is not None else self._value
+
+
+class _HistogramChild:
+    def __init__(self, buckets: Sequence[float]):
+        self._upper_bounds = buckets
+        self._counts = [0] * len(buckets)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._sum += value
+            for index, bound in enumerate(self._upper_bounds):
+                if value <= bound:
+                    self._counts[index] += 1
+                    break
+
+    def time(self) -> "_Timer":
+        """Mesure la durée d'un bloc (context manager ou décorateur)."""
+        return _Timer(self.observe)
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        cumulative = 0
+        for bound, count in zip(self._upper_bounds, counts):
+            cumulative += count
+            yield "_bucket", {"le": _format_value(bound)}, float(cumulative)
+        yield "_count", {}, float(cumulative)
+        yield "_sum", {}, total
+
+
+class _Timer(ContextDecorator):
+    def __init__(self, callback: Callable[[float], None]):
+        self._callback = callback
+        self._start = 0.0
+
+    def _recreate_cm(self) -> "_Timer":
+        # Utilisé comme décorateur: une mesure indépendante par appel (appels concurrents)
+        return _Timer(self._callback)
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._callback(time.perf_counter() - self._start)
+
+
+class _InProgress(ContextDecorator):
+    def __init__(self, gauge: _GaugeChild):
+        self._gauge = gauge
+
+    def __enter__(self) -> "_InProgress":
+        self._gauge.inc()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._gauge.dec()
+
+
+class Counter(_Metric):
+    """Compteur monotone (exposé avec le suffixe _total)."""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional[CollectorRegistry] = REGISTRY):
+        if name.endswith("_total"):
+            name = name[:-len("_total")]
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._unlabelled().inc(amount)
+
+
+class Gauge(_Metric):
+    """Valeur pouvant croître et décroître (appels en cours, taille de file)."""
+
+    type = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._unlabelled().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._unlabelled().dec(amount)
+
+    def set(self, value: float) -> None:
+        self._unlabelled().set(value)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._unlabelled().set_function(function)
+
+    def track_inprogress(self) -> _InProgress:
+        return self._unlabelled().track_inprogress()
+
+
+class Histogram(_Metric):
+    """Distribution de durées (ou de tailles) par intervalles cumulés."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional[CollectorRegistry] = REGISTRY, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        if "le" in labelnames:
+            raise ValueError("Le label 'le' est réservé aux histogrammes")
+        buckets = sorted(float(bound) for bound in buckets)
+        if not buckets or buckets[-1] != math.inf:
+            buckets.append(math.inf)
+        self.buckets = tuple(buckets)
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._unlabelled().observe(value)
+
+    def time(self) -> _Timer:
+        return self._unlabelled().time()
+
+
+def generate_latest(registry: CollectorRegistry = REGISTRY) -> bytes:
+    """
+    Sérialise les métriques au format d'exposition texte de Prometheus.
+
+    Args:
+        registry: Le registre à exposer
+
+    Returns:
+        Le contenu de la réponse /metrics
+    """
+    lines = []
+    for metric in registry.collect():
+        documentation = metric.documentation.replace("\\", "\\\\").replace("\n", "\\n")
+        lines.append(f"# HELP {metric.name} {documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        for name, labels, value in metric.samples():
+            if labels:
+                rendered = ",".join(f'{key}="{_escape_label(label)}"' for key, label in labels.items())
+                lines.append(f"{name}{{{rendered}}} {_format_value(value)}")
+            else:
+                lines.append(f"{name} {_format_value(value)}")
+    return ("\n".join(lines) + "\n").encode("utf-8")
@@ -0,0 +1,385 @@
+import contextvars
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("athly.tracing")
+
+_current_span: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar("athly_span", default=None)
+
+# En-tête W3C Trace Context: version-trace_id-parent_id-flags
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Span:
+    """Opération chronométrée d'une trace (requête), avec ses attributs."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "sampled", "start_ns", "end_ns", "attributes",
+                 "status", "_start_perf")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], sampled: bool,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = STATUS_OK
+        self._start_perf = time.perf_counter_ns()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def record_exception(self, error: BaseException) -> None:
+        self.status = STATUS_ERROR
+        self.attributes["error.type"] = type(error).__name__
+        self.attributes["error.message"] = str(error)[:500]
+
+    def end(self) -> None:
+        # Durée mesurée sur l'horloge monotone, datée sur l'horloge murale
+        self.end_ns = self.start_ns + (time.perf_counter_ns() - self._start_perf)
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        return None if self.end_ns is None else (self.end_ns - self.start_ns) / 1e6
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class JsonLinesExporter:
+    """Écrit les spans terminés dans un fichier JSON-lines (une ligne par span)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans: List[Span]) -> None:
+        lines = "".join(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n" for span in spans)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+    def shutdown(self) -> None:
+        pass
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OtlpHttpExporter:
+    """Envoie les spans à un collecteur OTLP/HTTP au format JSON (POST /v1/traces)."""
+
+    def __init__(self, endpoint: str, service_name: str = "athly-backend", timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout = timeout
+
+    def payload(self, spans: List[Span]) -> Dict[str, Any]:
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{
+                "scope": {"name": "athly"},
+                "spans": [{
+                    "traceId": span.trace_id,
+                    "spanId": span.span_id,
+                    "parentSpanId": span.parent_id or "",
+                    "name": span.name,
+                    "kind": 1,
+                    "startTimeUnixNano": str(span.start_ns),
+                    "endTimeUnixNano": str(span.end_ns),
+                    "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()],
+                    "status": {"code": 2, "message": span.attributes.get("error.message", "")}
+                    if span.status == STATUS_ERROR else {"code": 1},
+                } for span in spans],
+            }],
+        }]}
+
+    def export(self, spans: List[Span]) -> None:
+        import httpx
+
+        response = httpx.post(self.endpoint, json=self.payload(spans), timeout=self.timeout)
+        response.raise_for_status()
+
+    def shutdown(self) -> None:
+        pass
+
+
+class BatchSpanProcessor:
+    """
+    Exporte les spans par lots dans un thread dédié: la fin d'un span ne coûte qu'un ajout
+    dans une file bornée (les spans sont abandonnés si l'exportateur ne suit pas).
+    """
+
+    def __init__(self, exporter, max_queue_size: int = 2048, max_batch_size: int = 256,
+                 schedule_delay: float = 1.0):
+        self.exporter = exporter
+        self.max_batch_size = max_batch_size
+        self.schedule_delay = schedule_delay
+        self.dropped = 0
+        # File de spans, et de marqueurs de contrôle: None (arrêt) ou Event (vidage demandé)
+        self._queue: "queue.Queue[Any]" = queue.Queue(max_queue_size)
+        self._export_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="athly-span-exporter", daemon=True)
+        self._thread.start()
+
+    def on_end(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            # Regrouper les spans terminés pendant `schedule_delay` (au plus max_batch_size)
+            batch: List[Span] = []
+            deadline = time.monotonic() + self.schedule_delay
+            while isinstance(item, Span):
+                batch.append(item)
+                remaining = deadline - time.monotonic()
+                if len(batch) >= self.max_batch_size or remaining <= 0:
+                    item = False
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    item = False
+            if batch:
+                self._export(batch)
+            if item is None:
+                break
+            if isinstance(item, threading.Event):
+                item.set()
+        self._drain()
+
+    def _export(self, batch: List[Span]) -> None:
+        with self._export_lock:
+            try:
+                self.exporter.export(batch)
+            except Exception as e:
+                logger.warning(f"Export de {len(batch)} spans impossible: {str(e)}")
+
+    def _drain(self) -> None:
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, Span):
+                batch.append(item)
+            elif isinstance(item, threading.Event):
+                item.set()
+        if batch:
+            self._export(batch)
+
+    def force_flush(self, timeout: float = 10.0) -> bool:
+        """
+        Exporte les spans terminés jusqu'ici.
+
+        Args:
+            timeout: Délai d'attente maximal (s)
+
+        Returns:
+            True si l'export a eu lieu dans le délai
+        """
+        if not self._thread.is_alive():
+            self._drain()
+            return True
+        done = threading.Event()
+        self._queue.put(done, timeout=timeout)
+        return done.wait(timeout)
+
+    def shutdown(self) -> None:
+        """Exporte les spans restants et arrête le thread."""
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+        self.exporter.shutdown()
+
+
+class Tracer:
+    """
+    Crée les spans d'une requête. Le span courant est porté par une variable de contexte:
+    il suit le code dans les coroutines, `asyncio.to_thread` et les fonctions lancées avec
+    `run_in_context`, sans être passé en argument.
+    """
+
+    def __init__(self, processor: Optional[BatchSpanProcessor] = None, sample_rate: float = 1.0):
+        """
+        Initialise le traceur.
+
+        Args:
+            processor: Processeur d'export (aucun: les spans ne servent qu'à la corrélation)
+            sample_rate: Proportion des traces exportées (décidée à la racine de la trace)
+        """
+        self.processor = processor
+        self.sample_rate = sample_rate
+
+    @contextmanager
+    def span(self, name: str, traceparent: Optional[str] = None, **attributes: Any) -> Iterator[Span]:
+        """
+        Ouvre un span, enfant du span courant.
+
+        Args:
+            name: Nom de l'opération
+            traceparent: En-tête W3C d'une trace amont (span racine uniquement)
+            **attributes: Attributs du span
+
+        Returns:
+            Le span (context manager)
+        """
+        parent = _current_span.get()
+        if parent is not None:
+            span = Span(name, parent.trace_id, parent.span_id, parent.sampled, attributes)
+        else:
+            remote = parse_traceparent(traceparent)
+            if remote is not None:
+                span = Span(name, remote[0], remote[1], remote[2], attributes)
+            else:
+                span = Span(name, _new_id(128), None, random.random() < self.sample_rate, attributes)
+
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+            if span.sampled and self.processor is not None:
+                self.processor.on_end(span)
+
+    def shutdown(self) -> None:
+        if self.processor is not None:
+            self.processor.shutdown()
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """
+    Analyse un en-tête W3C `traceparent`.
+
+    Args:
+        header: La valeur de l'en-tête
+
+    Returns:
+        (trace_id, span_id parent, échantillonné), ou None si l'en-tête est absent ou invalide
+    """
+    match = _TRACEPARENT.match((header or "").strip().lower())
+    if not match or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def configure_tracing(exporter=None, sample_rate: float = 1.0) -> Tracer:
+    """
+    Remplace le traceur du processus.
+
+    Args:
+        exporter: JsonLinesExporter, OtlpHttpExporter, ou None pour ne rien exporter
+        sample_rate: Proportion des traces exportées
+
+    Returns:
+        Le nouveau traceur
+    """
+    global _tracer
+    previous = _tracer
+    _tracer = Tracer(BatchSpanProcessor(exporter) if exporter is not None else None, sample_rate)
+    previous.shutdown()
+    return _tracer
+
+
+def configure_tracing_from_env() -> Tracer:
+    """
+    Configure le traceur selon TRACING_EXPORTER (none, jsonl, otlp), TRACING_FILE,
+    TRACING_OTLP_ENDPOINT et TRACING_SAMPLE_RATE.
+
+    Returns:
+        Le traceur configuré
+    """
+    kind = os.getenv("TRACING_EXPORTER", "none").lower()
+    exporter = None
+    if kind == "jsonl":
+        exporter = JsonLinesExporter(os.getenv("TRACING_FILE", "logs/traces.jsonl"))
+    elif kind == "otlp":
+        exporter = OtlpHttpExporter(os.getenv("TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces"))
+    elif kind != "none":
+        logger.warning(f"Exportateur de traces inconnu: {kind}")
+    return configure_tracing(exporter, float(os.getenv("TRACING_SAMPLE_RATE", "1.0")))
+
+
+def span(name: str, **attributes: Any):
+    """Ouvre un span avec le traceur du processus (voir Tracer.span)."""
+    return _tracer.span(name, **attributes)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_trace_id() -> Optional[str]:
+    """Identifiant de la trace en cours (None hors requête)."""
+    current = _current_span.get()
+    return current.trace_id if current is not None else None
+
+
+def run_in_context(func: Callable, *args: Any, **kwargs: Any) -> Callable[[], Any]:
+    """
+    Prépare l'exécution de `func` dans une copie du contexte courant, pour les threads
+    d'un ThreadPoolExecutor (qui ne propagent pas les variables de contexte).
+
+    Returns:
+        Une fonction sans argument à soumettre à l'exécuteur
+    """
+    context = contextvars.copy_context()
+    return functools.partial(context.run, func, *args, **kwargs)
@@ -1 +1,12 @@
-# Package de tests pour Athly 
\ No newline at end of file
+# Package de tests pour Athly
+import os
+
+import pandas as pd
+
+
+def write_program(directory, filename, introduction, weeks, rows):
+    """Écrit un programme XLSX au format produit par /api/convert-to-excel."""
+    with pd.ExcelWriter(os.path.join(directory, filename), engine="xlsxwriter") as writer:
+        pd.DataFrame({"Introduction": [introduction]}).to_excel(writer, sheet_name="Introduction", index=False)
+        for week in range(1, weeks + 1):
+            pd.DataFrame(rows).to_excel(writer, sheet_name=f"Semaine {week}", index=False)
@@ -0,0 +1,78 @@
+import unittest
+from unittest.mock import MagicMock
+import os
+import sys
+
+# Ajout du chemin du projet au path pour permettre les importations
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.continuation import generate_with_continuation, is_truncated, splice_continuation
+
+
+class TestContinuation(unittest.TestCase):
+    """Tests pour la continuation des générations tronquées."""
+
+    def test_truncation_detection(self):
+        """Test de la détection des générations tronquées."""
+        complete = "**Semaine 1**\n| Exercice | Séries |\n|---|---|\n| Squat | 4x8 |\n"
+        self.assertFalse(is_truncated(complete))
+        self.assertTrue(is_truncated(complete, finish_reason="length"))
+        self.assertTrue(is_truncated(complete + "| Pompes | 3x"))
+        self.assertTrue(is_truncated(complete, expected_weeks=2))
+        self.assertFalse(is_truncated("Semaines 1-4: volume\nSemaines 5-8: force", expected_weeks=8))
+        self.assertTrue(is_truncated('{"weeks": [{"number": 1, "sessions": ['))
+
+    def test_stop_finish_reason_is_final(self):
+        """Test qu'une fin signalée par le fournisseur ne déclenche aucune continuation heuristique."""
+        odd_fences = "```markdown\n**Semaine 1**\n| Squat | 4x8 |\n"
+        self.assertTrue(is_truncated(odd_fences))
+        self.assertFalse(is_truncated(odd_fences, finish_reason="stop"))
+        self.assertFalse(is_truncated("| Note: récupération |\n|", finish_reason="stop"))
+        self.assertFalse(is_truncated("**Semaine 1**", finish_reason="stop", expected_weeks=4))
+
+        llm = MagicMock()
+        llm.invoke = MagicMock(return_value=MagicMock(content=odd_fences, response_metadata={"finish_reason": "stop"}))
+        self.assertEqual(generate_with_continuation(llm, "prompt", expected_weeks=1), odd_fences)
+        self.assertEqual(llm.invoke.call_count, 1)
+
+    def test_splice_restarted_line(self):
+        """Test qu'une ligne incomplète recommencée par le modèle n'est pas dupliquée."""
+        text = "| Squat | 4x8 |\n| Pompes | 3x"
+        spliced = splice_continuation(text, "| Pompes | 3x12 |\n| Gainage | 3x30s |\n")
+        self.assertEqual(spliced, "| Squat | 4x8 |\n| Pompes | 3x12 |\n| Gainage | 3x30s |\n")
+
+    def test_splice_overlap(self):
+        """Test que le chevauchement répété en début de continuation est retiré."""
+        text = "Semaine 1: endurance fondamentale.\n"
+        spliced = splice_continuation(text, "endurance fondamentale.\nSemaine 2: seuil.\n")
+        self.assertEqual(spliced, "Semaine 1: endurance fondamentale.\nSemaine 2: seuil.\n")
+
+    def test_generate_with_continuation(self):
+        """Test que seule la fin du texte est renvoyée au modèle lors de la continuation."""
+        first = MagicMock(content="**Semaine 1**\n| Squat | 4x8 |\n| Pompes | 3x",
+                          response_metadata={"finish_reason": "length"})
+        second = MagicMock(content="| Pompes | 3x12 |\n\n**Semaine 2**\n| Squat | 5x5 |\n",
+                           response_metadata={"finish_reason": "stop"})
+        llm = MagicMock()
+        llm.invoke = MagicMock(side_effect=[first, second])
+
+        result = generate_with_continuation(llm, "PROMPT INITIAL", expected_weeks=2, tail_chars=20)
+
+        self.assertEqual(llm.invoke.call_count, 2)
+        continuation_prompt = llm.invoke.call_args_list[1][0][0]
+        self.assertNotIn("PROMPT INITIAL", continuation_prompt)
+        self.assertIn("| Pompes | 3x", continuation_prompt)
+        self.assertEqual(result.count("| Pompes"), 1)
+        self.assertIn("**Semaine 2**", result)
+
+    def test_stops_when_model_adds_nothing(self):
+        """Test que la continuation s'arrête si le modèle n'ajoute plus de contenu."""
+        llm = MagicMock()
+        llm.invoke = MagicMock(return_value="**Semaine 1**\nFin.")
+        result = generate_with_continuation(llm, "prompt", expected_weeks=4)
+        self.assertEqual(llm.invoke.call_count, 2)
+        self.assertEqual(result, "**Semaine 1**\nFin.")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,193 @@
+import unittest
+import os
+import sys
+import tempfile
+import threading
+import time
+from unittest.mock import Mock, patch
+
+# Ajout du chemin du projet au path pour permettre les importations
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.directory_watcher import DirectoryWatcher
+from models.program_catalog import ProgramCatalog
+from models.program_data import ProgramDataManager
+from tests.test_program_catalog import RUNNING, STRENGTH, write_program
+
+TIMEOUT = 10
+
+
+class Recorder:
+    """Consommateur de test: enregistre les lots de changements reçus."""
+
+    def __init__(self):
+        self.batches = []
+        self.event = threading.Event()
+
+    def __call__(self, changed, removed):
+        self.batches.append((None if changed is None else set(changed), set(removed)))
+        self.event.set()
+
+    def wait(self):
+        if not self.event.wait(TIMEOUT):
+            raise AssertionError("Aucun changement notifié")
+        self.event.clear()
+        return self.batches[-1]
+
+
+def write(path, content="x"):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+class WatcherTests:
+    """Tests communs aux deux modes de surveillance."""
+
+    backend = None
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.watcher = DirectoryWatcher(backend=self.backend, debounce=0.2, poll_interval=0.1)
+        self.recorder = Recorder()
+
+    def tearDown(self):
+        self.watcher.close()
+        self.tmp.cleanup()
+
+    def path(self, *parts):
+        return os.path.join(self.tmp.name, *parts)
+
+    def test_changes_are_debounced(self):
+        """Test qu'une rafale d'écritures est notifiée en un seul lot."""
+        self.watcher.watch(self.tmp.name, self.recorder, suffixes=(".txt",))
+        self.watcher.start()
+        for i in range(5):
+            write(self.path(f"f{i}.txt"), str(i))
+        # Fichiers ignorés: mauvaise extension, cachés, verrous
+        write(self.path("notes.md"))
+        write(self.path(".hidden.txt"))
+
+        changed, removed = self.recorder.wait()
+        self.assertEqual(changed, {self.path(f"f{i}.txt") for i in range(5)})
+        self.assertEqual(removed, set())
+        time.sleep(0.5)
+        self.assertEqual(len(self.recorder.batches), 1)
+
+    def test_removal(self):
+        """Test la notification d'une suppression et d'un renommage."""
+        write(self.path("a.txt"))
+        write(self.path("b.txt"))
+        self.watcher.watch(self.tmp.name, self.recorder, suffixes=(".txt",))
+        self.watcher.start()
+        os.remove(self.path("a.txt"))
+        os.replace(self.path("b.txt"), self.path("c.txt"))
+
+        changed, removed = self.recorder.wait()
+        self.assertEqual(removed, {self.path("a.txt"), self.path("b.txt")})
+        self.assertEqual(changed, {self.path("c.txt")})
+
+    def test_recursive(self):
+        """Test la surveillance des sous-répertoires, y compris ceux créés après le démarrage."""
+        os.makedirs(self.path("sub"))
+        self.watcher.watch(self.tmp.name, self.recorder, suffixes=(".txt",), recursive=True)
+        self.watcher.start()
+        write(self.path("sub", "a.txt"))
+        self.assertEqual(self.recorder.wait()[0], {self.path("sub", "a.txt")})
+
+        os.makedirs(self.path("new"))
+        write(self.path("new", "b.txt"))
+        changed = set()
+        while self.path("new", "b.txt") not in changed:
+            changed |= self.recorder.wait()[0]
+
+    def test_callback_error_does_not_stop_watcher(self):
+        """Test qu'une erreur d'un consommateur n'arrête pas la surveillance."""
+        failing = Mock(side_effect=RuntimeError("boom"))
+        self.watcher.watch(self.tmp.name, failing, suffixes=(".txt",))
+        self.watcher.watch(self.tmp.name, self.recorder, suffixes=(".txt",))
+        self.watcher.start()
+        write(self.path("a.txt"))
+        self.recorder.wait()
+        write(self.path("b.txt"))
+        self.assertEqual(self.recorder.wait()[0], {self.path("b.txt")})
+        self.assertEqual(failing.call_count, 2)
+
+
+class TestPollingWatcher(WatcherTests, unittest.TestCase):
+    """Tests du mode scrutation périodique."""
+
+    backend = "polling"
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "inotify n'est disponible que sous Linux")
+class TestInotifyWatcher(WatcherTests, unittest.TestCase):
+    """Tests du mode inotify."""
+
+    backend = "inotify"
+
+    def test_overflow_requests_resync(self):
+        """Test qu'une perte d'événements demande une resynchronisation complète."""
+        self.watcher.watch(self.tmp.name, self.recorder, suffixes=(".txt",))
+        self.watcher._handle_event(-1, 0x4000, "")
+        self.watcher.start()
+        self.assertEqual(self.recorder.wait(), (None, set()))
+
+    def test_falls_back_to_polling(self):
+        """Test le repli sur la scrutation si inotify refuse la surveillance (limite atteinte)."""
+        with patch.object(self.watcher._inotify, "add_watch", side_effect=OSError(28, "No space left")):
+            self.watcher.watch(self.tmp.name, self.recorder, suffixes=(".txt",))
+        self.watcher.start()
+        write(self.path("a.txt"))
+        self.assertEqual(self.recorder.wait()[0], {self.path("a.txt")})
+
+
+class TestWatchedProgramCatalog(unittest.TestCase):
+    """Tests du catalogue et de la liste des programmes tenus à jour par le watcher."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        write_program(self.tmp.name, "plan_a.xlsx", "Programme course à pied débutant", 1, RUNNING)
+        self.manager = ProgramDataManager(programs_dir=self.tmp.name)
+        self.catalog = ProgramCatalog(self.manager, db_path=":memory:")
+        self.watcher = DirectoryWatcher(debounce=0.1, poll_interval=0.1)
+        self.manager.attach_watcher(self.watcher)
+        self.catalog.attach_watcher(self.watcher)
+        self.watcher.start()
+
+    def tearDown(self):
+        self.watcher.close()
+        self.catalog.close()
+        self.tmp.cleanup()
+
+    def wait_for(self, expected):
+        deadline = time.monotonic() + TIMEOUT
+        while time.monotonic() < deadline:
+            if [entry["filename"] for entry in self.catalog.search()] == expected:
+                return
+            time.sleep(0.05)
+        self.fail(f"Catalogue non mis à jour: {self.catalog.search()}")
+
+    def test_catalog_follows_directory(self):
+        """Test l'indexation en arrière-plan des fichiers ajoutés et supprimés."""
+        self.assertEqual(self.manager.get_available_programs(), ["plan_a.xlsx"])
+        self.assertEqual([entry["filename"] for entry in self.catalog.search()], ["plan_a.xlsx"])
+
+        write_program(self.tmp.name, "plan_b.xlsx", "Programme musculation avancé", 12, STRENGTH)
+        self.wait_for(["plan_a.xlsx", "plan_b.xlsx"])
+        self.assertEqual(self.manager.get_available_programs(), ["plan_a.xlsx", "plan_b.xlsx"])
+        self.assertEqual(self.catalog.search(discipline="musculation")[0]["duration"], 12)
+
+        os.remove(os.path.join(self.tmp.name, "plan_a.xlsx"))
+        self.wait_for(["plan_b.xlsx"])
+        self.assertEqual(self.manager.get_available_programs(), ["plan_b.xlsx"])
+
+    def test_requests_do_not_scan(self):
+        """Test que les recherches d'un catalogue surveillé ne lisent pas le répertoire."""
+        with patch("os.scandir", side_effect=AssertionError("scandir")), \
+                patch("os.listdir", side_effect=AssertionError("listdir")):
+            self.catalog.search()
+            self.manager.get_available_programs()
+
+
+if __name__ == "__main__":
+    unittest.main()
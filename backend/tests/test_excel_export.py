@@ -0,0 +1,57 @@
+import unittest
+import os
+import sys
+import tempfile
+
+import openpyxl
+
+# Ajout du chemin du projet au path pour permettre les importations
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exports.excel import export_program_workbook, write_program_workbook
+
+HEADERS = ["Jour", "Exercice", "Séries/Répétitions"]
+ROWS = [["Lundi", "Squat", "4x8"], ["Jeudi", "Soulevé de terre roumain", "3x10", "Tempo lent"]]
+
+
+class TestExcelExport(unittest.TestCase):
+    """Tests pour l'export Excel des programmes."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "programme.xlsx")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_workbook_content(self):
+        """Test les feuilles, en-têtes et cellules écrites."""
+        write_program_workbook(self.path, "Programme de force", [("Semaine 1", HEADERS, ROWS)] * 2)
+        workbook = openpyxl.load_workbook(self.path)
+        self.assertEqual(workbook.sheetnames, ["Introduction", "Semaine 1", "Semaine 2"])
+        self.assertEqual(workbook["Introduction"]["A2"].value, "Programme de force")
+
+        sheet = workbook["Semaine 2"]
+        self.assertEqual([cell.value for cell in sheet[1]][:3], HEADERS)
+        self.assertEqual(sheet["B3"].value, "Soulevé de terre roumain")
+        self.assertEqual(sheet["D3"].value, "Tempo lent")
+        self.assertTrue(sheet["A1"].font.bold)
+        self.assertEqual(sheet.freeze_panes, "A2")
+
+    def test_column_widths(self):
+        """Test que la largeur des colonnes suit le contenu le plus long."""
+        write_program_workbook(self.path, "", [("Semaine 1", HEADERS, ROWS)])
+        sheet = openpyxl.load_workbook(self.path)["Semaine 1"]
+        self.assertAlmostEqual(sheet.column_dimensions["B"].width, len("Soulevé de terre roumain") + 2, delta=1)
+        self.assertAlmostEqual(sheet.column_dimensions["D"].width, len("Tempo lent") + 2, delta=1)
+
+    def test_export_to_temporary_file(self):
+        """Test l'écriture dans un fichier temporaire pour un programme de 52 semaines."""
+        path = export_program_workbook("Intro", [(f"Semaine {i}", HEADERS, ROWS * 3) for i in range(52)],
+                                       directory=self.tmp.name)
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(len(openpyxl.load_workbook(path, read_only=True).sheetnames), 53)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import Future
+
+import openpyxl
+
+# Ajout du chemin du projet au path pour permettre les importations
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exports.excel import excel_export_job
+from exports.pool import ExportQueueFull, ExportTimeout, ExportWorkerPool, _discard_output
+
+MARKDOWN_PROGRAM = "### Programme\n\n**Semaine 1 - Base**\n\n| Jour | Exercice |\n|----|----|\n| Lundi | Squat |\n"
+
+
+class TestExportWorkerPool(unittest.TestCase):
+    """Tests pour le pool de processus d'export."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pool = ExportWorkerPool(max_workers=1, max_pending=0, timeout=30)
+
+    def tearDown(self):
+        self.pool.shutdown()
+        self.tmp.cleanup()
+
+    def test_excel_export_in_worker(self):
+        """Test l'export Excel d'un programme markdown dans un processus du pool."""
+        path = asyncio.run(self.pool.run(excel_export_job, MARKDOWN_PROGRAM, None, self.tmp.name))
+        sheet = openpyxl.load_workbook(path)["Semaine 1"]
+        self.assertEqual(sheet["B2"].value, "Squat")
+
+    def test_queue_full(self):
+        """Test le refus des exports au-delà de la capacité du pool."""
+        async def scenario():
+            first = asyncio.ensure_future(self.pool.run(time.sleep, 0.5))
+            await asyncio.sleep(0)
+            with self.assertRaises(ExportQueueFull):
+                await self.pool.run(time.sleep, 0)
+            await first
+            # La place est libérée une fois la tâche terminée
+            await self.pool.run(time.sleep, 0)
+        asyncio.run(scenario())
+
+    def test_timeout(self):
+        """Test l'interruption d'un export trop long: son processus est arrêté et sa place libérée."""
+        async def scenario():
+            # Processus démarré avant la tâche bloquée, pour que celle-ci soit bien en cours au délai
+            first_pid = await self.pool.run(os.getpid)
+            with self.assertRaises(ExportTimeout):
+                await self.pool.run(time.sleep, 30, timeout=0.5)
+            # Pool d'un seul processus, sans file d'attente: la place doit être rendue bien avant 30 s
+            deadline = time.monotonic() + 10
+            while True:
+                try:
+                    return first_pid, await self.pool.run(os.getpid)
+                except ExportQueueFull:
+                    self.assertLess(time.monotonic(), deadline)
+                    await asyncio.sleep(0.05)
+        start = time.monotonic()
+        first_pid, next_pid = asyncio.run(scenario())
+        self.assertNotEqual(first_pid, next_pid)
+        self.assertLess(time.monotonic() - start, 15)
+
+    def test_timeout_spares_other_jobs(self):
+        """Test qu'un export bloqué ne fait pas échouer l'export concurrent d'un autre client."""
+        pool = ExportWorkerPool(max_workers=2, max_pending=0, timeout=30)
+
+        async def scenario():
+            # Deux processus démarrés, pour que les deux tâches soient bien en cours au délai
+            await asyncio.gather(pool.run(time.sleep, 0.2), pool.run(time.sleep, 0.2))
+            other = asyncio.ensure_future(pool.run(time.sleep, 1.0))
+            with self.assertRaises(ExportTimeout):
+                await pool.run(time.sleep, 30, timeout=0.5)
+            return await other
+
+        try:
+            with self.assertLogs("athly.exports.pool", level="INFO") as logs:
+                self.assertIsNone(asyncio.run(scenario()))
+        finally:
+            pool.shutdown()
+        self.assertTrue(any("resoumis" in line for line in logs.output))
+
+    def test_discard_orphaned_output(self):
+        """Test la suppression du fichier produit par une tâche abandonnée."""
+        path = os.path.join(self.tmp.name, "abandonne.xlsx")
+        open(path, "w").close()
+        future = Future()
+        future.set_result(path)
+        _discard_output(future)
+        self.assertFalse(os.path.exists(path))
+
+    def test_event_loop_not_blocked(self):
+        """Test que la boucle d'événements reste disponible pendant un export."""
+        async def scenario():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            task = asyncio.ensure_future(ticker())
+            await self.pool.run(time.sleep, 0.5)
+            task.cancel()
+            return ticks
+        self.assertGreater(asyncio.run(scenario()), 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+import time
+
+# Ajout du chemin du projet au path pour permettre les importations
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import AIMessage
+
+from models import llm_cassette
+from models.llm_cassette import CassetteLLM, CassetteMiss, fingerprint
+
+
+class RecordedProvider:
+    """Fournisseur simulé: réponse numérotée, flux de morceaux espacés."""
+
+    model_name = "mistral-test"
+
+    def __init__(self, chunks=("Bonjour", ", ", "athlète"), delay=0.0):
+        self.chunks = chunks
+        self.delay = delay
+        self.calls = 0
+
+    def invoke(self, prompt, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        return AIMessage(
+            content=f"réponse {self.calls}",
+            response_metadata={"finish_reason": "stop"},
+            usage_metadata={"input_tokens": len(prompt), "output_tokens": self.calls,
+                            "total_tokens": len(prompt) + self.calls}
+        )
+
+    def stream(self, prompt, **kwargs):
+        self.calls += 1
+        for chunk in self.chunks:
+            time.sleep(self.delay)
+            yield chunk
+
+
+class TestLLMCassette(unittest.TestCase):
+    """Tests de l'enregistrement et du rejeu des appels LLM."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "cassettes", "llm.jsonl")
+
+    def tearDown(self):
+        llm_cassette._cassettes.clear()
+        shutil.rmtree(self.temp_dir)
+
+    def reload(self, **kwargs):
+        """Nouvelle cassette relue depuis le disque (comme dans un nouveau processus)."""
+        llm_cassette._cassettes.clear()
+        return CassetteLLM(path=self.path, mode="replay", **kwargs)
+
+    def test_record_then_replay(self):
+        """Test l'enregistrement sur disque puis le rejeu sans appel au fournisseur."""
+        provider = RecordedProvider()
+        recorder = CassetteLLM(provider, path=self.path, mode="record")
+        self.assertEqual(recorder.invoke("Qu'est-ce que le fartlek ?"), "réponse 1")
+        generation = recorder.generate(["Qu'est-ce que le fartlek ?"]).generations[0][0]
+        self.assertEqual(generation.text, "réponse 2")
+        self.assertEqual(generation.generation_info["finish_reason"], "stop")
+
+        with open(self.path, encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f]
+        self.assertEqual(len(entries), 2)
+        self.assertEqual(entries[0]["model"], "mistral-test")
+        self.assertEqual(entries[0]["usage"]["completion_tokens"], 1)
+
+        # Rejeu dans l'ordre d'enregistrement, puis en boucle
+        player = self.reload(speed=0)
+        self.assertEqual(player.invoke("Qu'est-ce que le fartlek ?"), "réponse 1")
+        self.assertEqual(player.invoke("Qu'est-ce que le fartlek ?"), "réponse 2")
+        generation = player.generate(["Qu'est-ce que le fartlek ?"]).generations[0][0]
+        self.assertEqual(generation.text, "réponse 1")
+        self.assertEqual(generation.generation_info["usage"]["completion_tokens"], 1)
+        self.assertEqual(provider.calls, 2)
+
+        with self.assertRaises(CassetteMiss):
+            player.invoke("Prompt jamais enregistré")
+
+    def test_auto_mode(self):
+        """Test le mode auto: appel au fournisseur uniquement pour les prompts inconnus."""
+        provider = RecordedProvider()
+        llm = CassetteLLM(provider, path=self.path)
+        self.assertEqual(llm.invoke("Bonjour"), "réponse 1")
+        self.assertEqual(llm.invoke("Bonjour"), "réponse 1")
+        self.assertEqual(llm.invoke("Salut"), "réponse 2")
+        self.assertEqual(provider.calls, 2)
+
+    def test_stream_timing_replay(self):
+        """Test l'enregistrement des morceaux du flux avec leurs instants, rejoués à vitesse accélérée."""
+        recorder = CassetteLLM(RecordedProvider(delay=0.05), path=self.path, mode="record")
+        self.assertEqual("".join(recorder.stream("Bonjour")), "Bonjour, athlète")
+
+        entry = recorder.cassette.next_entry(fingerprint("Bonjour"))
+        offsets = [offset for offset, _ in entry["chunks"]]
+        self.assertTrue(entry["streamed"])
+        self.assertEqual([text for _, text in entry["chunks"]], ["Bonjour", ", ", "athlète"])
+        self.assertGreaterEqual(offsets[-1], 0.14)
+
+        player = self.reload(speed=1.0)
+        start = time.monotonic()
+        self.assertEqual(list(player.stream("Bonjour")), ["Bonjour", ", ", "athlète"])
+        self.assertGreaterEqual(time.monotonic() - start, 0.14)
+
+        fast = self.reload(speed=10.0)
+        start = time.monotonic()
+        self.assertEqual(fast.invoke("Bonjour"), "Bonjour, athlète")
+        self.assertLess(time.monotonic() - start, 0.1)
+
+    def test_fingerprint(self):
+        """Test que l'empreinte ignore les espaces de fin de ligne mais pas les séquences d'arrêt."""
+        self.assertEqual(fingerprint("Bonjour  \nSalut\n"), fingerprint("Bonjour\nSalut"))
+        self.assertNotEqual(fingerprint("Bonjour"), fingerprint("Bonjour", stop=["\n"]))
+        self.assertNotEqual(fingerprint("Bonjour"), fingerprint("bonjour"))
+
+    def test_invalid_configuration(self):
+        """Test les erreurs de configuration."""
+        with self.assertRaises(ValueError):
+            CassetteLLM(path=self.path, mode="record")
+        with self.assertRaises(ValueError):
+            CassetteLLM(RecordedProvider(), path=self.path, mode="rewind")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import unittest
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+# Ajout du chemin du projet au path pour permettre les importations
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.llm_response import finish_reason, token_usage
+from models.llm_router import LLMRouter, OPEN, CLOSED, HALF_OPEN
+
+
+class FakeProvider:
+    """Fournisseur simulé avec latence et erreurs configurables."""
+
+    def __init__(self, text, delay=0.0, fail=False):
+        self.text = text
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    def invoke(self, prompt, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("fournisseur indisponible")
+        return self.text
+
+
+class TestLLMRouter(unittest.TestCase):
+    """Tests pour le routeur multi-fournisseurs."""
+
+    def test_preferred_provider(self):
+        """Test que le fournisseur préféré répond seul lorsqu'il est rapide."""
+        primary, secondary = FakeProvider("mistral"), FakeProvider("qwen")
+        router = LLMRouter([("mistral", primary), ("qwen", secondary)])
+        message = router.invoke("Bonjour")
+        self.assertEqual(message.content, "mistral")
+        self.assertEqual(secondary.calls, 0)
+        self.assertEqual(message.response_metadata["provider"], "mistral")
+
+    def test_finish_reason_per_response(self):
+        """Test que la raison de fin et l'usage suivent chaque réponse, y compris en concurrence."""
+        class MessageProvider:
+            def invoke(self, prompt, **kwargs):
+                time.sleep(0.05 if prompt == "long" else 0.0)
+                return AIMessage(content=prompt, response_metadata={"finish_reason": "length" if prompt == "long" else "stop"},
+                                 usage_metadata={"input_tokens": 3, "output_tokens": 7, "total_tokens": 10})
+
+        router = LLMRouter([("mistral", MessageProvider())])
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            slow = executor.submit(router.invoke, "long")
+            fast = executor.submit(router.invoke, "court")
+            slow_message, fast_message = slow.result(), fast.result()
+        self.assertEqual(finish_reason(slow_message), "length")
+        self.assertEqual(finish_reason(fast_message), "stop")
+        self.assertEqual(token_usage(fast_message), {"prompt_tokens": 3, "completion_tokens": 7})
+
+    def test_chat_provider_receives_messages(self):
+        """Test qu'un modèle de chat reçoit la conversation telle quelle et que sa réponse est conservée."""
+        class ChatProvider(BaseChatModel):
+            received: list = []
+
+            @property
+            def _llm_type(self):
+                return "fake_chat"
+
+            def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+                self.received.append(messages)
+                message = AIMessage(content="", tool_calls=[{"name": "search", "args": {"q": "squat"}, "id": "1"}],
+                                    response_metadata={"finish_reason": "tool_calls"})
+                return ChatResult(generations=[ChatGeneration(message=message)])
+
+        chat = ChatProvider()
+        router = LLMRouter([("mistral", chat)])
+        messages = [SystemMessage(content="Tu es un coach"), HumanMessage(content="Bonjour"), AIMessage(content="Salut")]
+        response = router.invoke(messages)
+        self.assertEqual(chat.received[0], messages)
+        self.assertEqual(response.tool_calls[0]["name"], "search")
+        self.assertEqual(response.response_metadata["finish_reason"], "tool_calls")
+        self.assertEqual(response.response_metadata["provider"], "mistral")
+
+    def test_text_provider_receives_prompt(self):
+        """Test qu'un LLM texte reçoit le prompt seul, ou la conversation mise à plat."""
+        class TextProvider:
+            prompts = []
+
+            def invoke(self, prompt, **kwargs):
+                self.prompts.append(prompt)
+                return "qwen"
+
+        text = TextProvider()
+        router = LLMRouter([("qwen", text)])
+        router.invoke("Bonjour")
+        router.invoke([SystemMessage(content="Tu es un coach"), HumanMessage(content="Bonjour")])
+        self.assertEqual(text.prompts, ["Bonjour", "System: Tu es un coach\nHuman: Bonjour"])
+
+    def test_failover_on_error(self):
+        """Test la bascule immédiate sur le fournisseur suivant en cas d'erreur."""
+        router = LLMRouter([("mistral", FakeProvider("", fail=True)), ("qwen", FakeProvider("qwen"))])
+        self.assertEqual(router.invoke("Bonjour").content, "qwen")
+        self.assertEqual(router.stats()["mistral"]["failures"], 1)
+
+    def test_hedged_request(self):
+        """Test qu'une requête de couverture est envoyée au-delà de la p95 et que la plus rapide gagne."""
+        slow, fast = FakeProvider("lent", delay=0.5), FakeProvider("rapide", delay=0.01)
+        router = LLMRouter([("mistral", slow), ("qwen", fast)], hedge_default_delay=0.05)
+        start = time.monotonic()
+        self.assertEqual(router.invoke("Bonjour").content, "rapide")
+        self.assertLess(time.monotonic() - start, 0.4)
+        self.assertEqual(slow.calls, 1)
+
+    def test_circuit_breaker(self):
+        """Test l'ouverture, puis la réouverture à l'essai, du disjoncteur."""
+        failing, backup = FakeProvider("", fail=True), FakeProvider("qwen")
+        router = LLMRouter([("mistral", failing), ("qwen", backup)], failure_threshold=2, reset_timeout=0.1)
+        for _ in range(3):
+            router.invoke("Bonjour")
+        self.assertEqual(failing.calls, 2)
+        self.assertEqual(router.stats()["mistral"]["state"], OPEN)
+
+        time.sleep(0.15)
+        self.assertEqual(router.stats()["mistral"]["state"], HALF_OPEN)
+        failing.fail = False
+        failing.text = "mistral"
+        self.assertEqual(router.invoke("Bonjour").content, "mistral")
+        self.assertEqual(router.stats()["mistral"]["state"], CLOSED)
+
+    def test_all_providers_failing(self):
+        """Test que l'erreur est propagée lorsque tous les fournisseurs échouent."""
+        router = LLMRouter([("mistral", FakeProvider("", fail=True)), ("qwen", FakeProvider("", fail=True))])
+        with self.assertRaises(RuntimeError):
+            router.invoke("Bonjour")
+
+
+if __name__ == '__main__':
+    unittest.main()
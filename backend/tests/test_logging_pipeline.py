@@ -0,0 +1,135 @@
+import unittest
+import os
+import sys
+import json
+import logging
+import queue
+import threading
+
+# Ajout du chemin du projet au path pour permettre les importations
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitoring.logging_pipeline import (
+    DebugSampler, JsonFormatter, NonBlockingQueueHandler, configure_logging, parse_levels,
+    shutdown_logging, truncate
+)
+from monitoring.tracing import span
+
+
+class MemoryHandler(logging.Handler):
+    """Handler conservant les lignes formatées et le thread d'écriture."""
+
+    def __init__(self):
+        super().__init__()
+        self.setFormatter(JsonFormatter())
+        self.lines = []
+        self.threads = set()
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+        self.threads.add(threading.current_thread().name)
+
+
+class TestLoggingPipeline(unittest.TestCase):
+    """Tests du pipeline de logs asynchrone (file, JSON, troncature, échantillonnage)."""
+
+    def setUp(self):
+        self.root = logging.getLogger()
+        self.saved = (list(self.root.handlers), self.root.level)
+        self.handler = MemoryHandler()
+
+    def tearDown(self):
+        shutdown_logging()
+        for handler in list(self.root.handlers):
+            self.root.removeHandler(handler)
+        for handler in self.saved[0]:
+            self.root.addHandler(handler)
+        self.root.setLevel(self.saved[1])
+        logging.getLogger("athly.test_quiet").setLevel(logging.NOTSET)
+
+    def records(self):
+        shutdown_logging()
+        return [json.loads(line) for line in self.handler.lines]
+
+    def test_json_records_written_off_thread(self):
+        """Test l'écriture des enregistrements JSON dans le thread du listener, avec la trace."""
+        configure_logging(level="INFO", handlers=[self.handler])
+        with span("http.request") as request_span:
+            logging.getLogger("athly.test").info("Programme %s généré", "trail", extra={"weeks": 12})
+
+        records = self.records()
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["message"], "Programme trail généré")
+        self.assertEqual(records[0]["logger"], "athly.test")
+        self.assertEqual(records[0]["level"], "INFO")
+        self.assertEqual(records[0]["weeks"], 12)
+        self.assertEqual(records[0]["trace_id"], request_span.trace_id)
+        self.assertNotIn(threading.current_thread().name, self.handler.threads)
+
+    def test_payload_truncation(self):
+        """Test la troncature des messages trop longs avant leur mise en file."""
+        configure_logging(level="DEBUG", handlers=[self.handler], max_chars=20)
+        logging.getLogger("athly.test").debug("Réponse complète: %s", "x" * 1000)
+
+        message = self.records()[0]["message"]
+        self.assertTrue(message.startswith("Réponse complète: xx"))
+        self.assertIn("[+998 caractères]", message)
+        self.assertEqual(truncate("court", 20), "court")
+        self.assertEqual(truncate("x" * 50, 0), "x" * 50)
+
+    def test_per_logger_levels(self):
+        """Test les niveaux par logger."""
+        levels = parse_levels("athly.test_quiet=WARNING, httpx=error,invalide=BRUYANT")
+        self.assertEqual(levels, {"athly.test_quiet": logging.WARNING, "httpx": logging.ERROR})
+
+        configure_logging(level="DEBUG", levels=levels, handlers=[self.handler])
+        logging.getLogger("athly.test_quiet").info("ignoré")
+        logging.getLogger("athly.test_quiet").warning("conservé")
+        logging.getLogger("athly.test").debug("conservé aussi")
+        self.assertEqual([r["message"] for r in self.records()], ["conservé", "conservé aussi"])
+
+    def test_debug_sampling(self):
+        """Test l'échantillonnage des enregistrements DEBUG par trace, sans effet sur les autres niveaux."""
+        configure_logging(level="DEBUG", handlers=[self.handler], debug_sample_rate=0.0)
+        logger = logging.getLogger("athly.test")
+        logger.debug("abandonné")
+        logger.info("conservé")
+        self.assertEqual([r["message"] for r in self.records()], ["conservé"])
+
+        sampler = DebugSampler(0.5)
+        record = logging.LogRecord("athly.test", logging.DEBUG, __file__, 1, "payload", None, None)
+        record.trace_id = "00000000" + "0" * 24
+        self.assertTrue(sampler.filter(record))
+        record.trace_id = "ffffffff" + "0" * 24
+        self.assertFalse(sampler.filter(record))
+
+    def test_full_queue_drops_records(self):
+        """Test que l'appelant n'est jamais bloqué: la file pleine abandonne les enregistrements."""
+        handler = NonBlockingQueueHandler(queue.Queue(1))
+        logger = logging.getLogger("athly.test_queue")
+        logger.addHandler(handler)
+        logger.propagate = False
+        try:
+            logger.warning("premier")
+            logger.warning("abandonné")
+        finally:
+            logger.removeHandler(handler)
+            logger.propagate = True
+        self.assertEqual(handler.queue.qsize(), 1)
+        self.assertEqual(handler.queue.get_nowait().getMessage(), "premier")
+
+    def test_exception_formatting(self):
+        """Test l'export de la trace d'exception."""
+        configure_logging(level="INFO", handlers=[self.handler])
+        try:
+            raise ValueError("erreur de test")
+        except ValueError:
+            logging.getLogger("athly.test").exception("Échec")
+
+        record = self.records()[0]
+        self.assertEqual(record["message"], "Échec")
+        self.assertIn("ValueError: erreur de test", record["exception"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import os
+import sys
+
+# Ajout du chemin du projet au path pour permettre les importations
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.markdown_normalizer import MarkdownNormalizer, normalize_markdown
+
+
+class TestMarkdownNormalizer(unittest.TestCase):
+    """Tests pour le normaliseur markdown."""
+
+    def test_numbers_and_hyphens_preserved(self):
+        """Test que les décimales, heures et mots composés ne sont pas modifiés."""
+        text = "Courir 2.5 km à 10:30 puis 3 x 1,5 km en mi-temps."
+        self.assertEqual(normalize_markdown(text), text)
+
+    def test_glued_punctuation(self):
+        """Test l'ajout de l'espace manquant entre deux phrases ou deux mots."""
+        self.assertEqual(normalize_markdown("Bien joué.Continue ainsi,bravo"), "Bien joué. Continue ainsi, bravo")
+        self.assertEqual(normalize_markdown("Lancer `app.Main` maintenant"), "Lancer `app.Main` maintenant")
+
+    def test_block_separation(self):
+        """Test les lignes vides autour des titres, listes et tableaux."""
+        text = "Intro ### Semaine 1\nTexte\n-**Repos** actif\n- Footing\n| Jour | Séance |\n|---|---|\n| Lundi | 2.5 km |\nFin"
+        expected = ("Intro\n\n### Semaine 1\n\nTexte\n\n- **Repos** actif\n- Footing\n\n"
+                    "| Jour | Séance |\n|---|---|\n| Lundi | 2.5 km |\n\nFin")
+        self.assertEqual(normalize_markdown(text), expected)
+
+    def test_code_blocks_untouched(self):
+        """Test que les blocs de code sont conservés tels quels."""
+        text = "```python\nx = a.B\n# titre\n\n\n- item\n```"
+        self.assertEqual(normalize_markdown(text), text)
+
+    def test_blank_lines_collapsed(self):
+        """Test que les lignes vides multiples sont réduites à une seule."""
+        self.assertEqual(normalize_markdown("A\n\n\n\nB\n"), "A\n\nB\n")
+
+    def test_streaming_matches_full_text(self):
+        """Test que le résultat ne dépend pas du découpage en fragments."""
+        text = "### Titre\nTexte.Suite\n- a\n| x |\n```\ncode\n```\nfin"
+        expected = normalize_markdown(text)
+        for size in (1, 3, 8):
+            normalizer = MarkdownNormalizer()
+            chunks = [normalizer.feed(text[i:i + size]) for i in range(0, len(text), size)]
+            self.assertEqual("".join(chunks) + normalizer.flush(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
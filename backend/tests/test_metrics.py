@@ -0,0 +1,106 @@
+import unittest
+import os
+import sys
+import threading
+
+# Ajout du chemin du projet au path pour permettre les importations
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitoring import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from models.llm_router import LLMRouter
+from tests.test_llm_router import FakeProvider
+
+
+class TestMetrics(unittest.TestCase):
+    """Tests des métriques et du format d'exposition Prometheus."""
+
+    def setUp(self):
+        self.registry = CollectorRegistry()
+
+    def test_counter_exposition(self):
+        """Test l'exposition d'un compteur avec labels (suffixe _total, échappement)."""
+        counter = Counter("athly_test_requests", "Requêtes\nde test", ["route"], registry=self.registry)
+        counter.labels(route="/api/chat").inc()
+        counter.labels(route='a"b').inc(2)
+
+        text = generate_latest(self.registry).decode("utf-8")
+        self.assertIn("# HELP athly_test_requests Requêtes\\nde test", text)
+        self.assertIn("# TYPE athly_test_requests counter", text)
+        self.assertIn('athly_test_requests_total{route="/api/chat"} 1.0', text)
+        self.assertIn('athly_test_requests_total{route="a\\"b"} 2.0', text)
+        with self.assertRaises(ValueError):
+            counter.labels(route="/api/chat").inc(-1)
+
+    def test_histogram_buckets(self):
+        """Test les intervalles cumulés, la somme et le nombre d'observations."""
+        histogram = Histogram("athly_test_seconds", "Durées", buckets=(0.1, 1.0), registry=self.registry)
+        for value in (0.05, 0.5, 0.5, 3.0):
+            histogram.observe(value)
+
+        sample = self.registry.get_sample_value
+        self.assertEqual(sample("athly_test_seconds_bucket", {"le": "0.1"}), 1)
+        self.assertEqual(sample("athly_test_seconds_bucket", {"le": "1.0"}), 3)
+        self.assertEqual(sample("athly_test_seconds_bucket", {"le": "+Inf"}), 4)
+        self.assertEqual(sample("athly_test_seconds_count"), 4)
+        self.assertAlmostEqual(sample("athly_test_seconds_sum"), 4.05)
+
+    def test_timer_and_gauge(self):
+        """Test la mesure de durée par décorateur et la jauge des appels en cours."""
+        histogram = Histogram("athly_test_step_seconds", "Durées", ["step"], registry=self.registry)
+        gauge = Gauge("athly_test_in_flight", "En cours", registry=self.registry)
+        inside = []
+
+        @histogram.labels(step="work").time()
+        @gauge.track_inprogress()
+        def work():
+            inside.append(self.registry.get_sample_value("athly_test_in_flight"))
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.registry.get_sample_value("athly_test_step_seconds_count", {"step": "work"}), 4)
+        self.assertEqual(self.registry.get_sample_value("athly_test_in_flight"), 0)
+        self.assertTrue(all(value >= 1 for value in inside))
+
+        gauge.set_function(lambda: 7)
+        self.assertEqual(self.registry.get_sample_value("athly_test_in_flight"), 7)
+
+    def test_validation(self):
+        """Test le refus des noms invalides, des doublons et des labels incohérents."""
+        counter = Counter("athly_test_total", "Compteur", ["a"], registry=self.registry)
+        self.assertEqual(counter.name, "athly_test")
+        with self.assertRaises(ValueError):
+            Counter("athly_test", "Doublon", registry=self.registry)
+        with self.assertRaises(ValueError):
+            Counter("athly-test", "Nom invalide", registry=self.registry)
+        with self.assertRaises(ValueError):
+            Histogram("athly_test_hist", "Label réservé", ["le"], registry=self.registry)
+        with self.assertRaises(ValueError):
+            counter.labels(b="x")
+        with self.assertRaises(ValueError):
+            counter.inc()
+
+    def test_llm_router_instrumentation(self):
+        """Test les métriques des appels LLM: durée par fournisseur, erreurs et bascules."""
+        def value(name, **labels):
+            return REGISTRY.get_sample_value(name, labels) or 0.0
+
+        before_ok = value("athly_llm_call_duration_seconds_count", provider="metrics_b", model="metrics_b", outcome="ok")
+        before_error = value("athly_llm_call_duration_seconds_count", provider="metrics_a", model="metrics_a", outcome="error")
+        before_fallback = value("athly_retries_total", component="llm_router", reason="fallback")
+
+        router = LLMRouter([("metrics_a", FakeProvider("", fail=True)), ("metrics_b", FakeProvider("ok"))])
+        self.assertEqual(router.invoke("Bonjour").content, "ok")
+
+        self.assertEqual(value("athly_llm_call_duration_seconds_count", provider="metrics_b", model="metrics_b", outcome="ok"), before_ok + 1)
+        self.assertEqual(value("athly_llm_call_duration_seconds_count", provider="metrics_a", model="metrics_a", outcome="error"), before_error + 1)
+        self.assertEqual(value("athly_retries_total", component="llm_router", reason="fallback"), before_fallback + 1)
+        self.assertEqual(value("athly_llm_calls_in_flight", provider="metrics_a"), 0)
+        self.assertIn(b"athly_llm_call_duration_seconds_bucket", generate_latest())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+import io
+import os
+import re
+import sys
+import zlib
+
+# Ajout du chemin du projet au path pour permettre les importations
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exports.pdf import PdfRenderer, pdf_export_job, wrap_text, write_program_pdf
+from models.program_parser import PARAGRAPH, Block, parse_program
+
+PROGRAM = """### Programme de force
+
+Introduction du programme avec une description détaillée de l'objectif.
+
+**Semaine 1 - Adaptation**
+
+| Jour | Exercice | Séries/Répétitions | Notes |
+|---|:---:|---|---|
+| Lundi | Squat (barre haute) | 4 x 8 | Contrôler la descente |
+| Mercredi | Développé couché | 3 x 10 | Pause d'une seconde |
+
+- Hydratation régulière
+- Sommeil de 8 heures
+"""
+
+
+def _streams(data: bytes):
+    """Décompresse les flux de contenu des pages."""
+    return [zlib.decompress(match.group(1)) for match in re.finditer(rb"stream\n(.*?)\nendstream", data, re.S)]
+
+
+class TestPdfExport(unittest.TestCase):
+    """Tests du rendu PDF des programmes."""
+
+    def render(self, content: str) -> bytes:
+        output = io.BytesIO()
+        write_program_pdf(output, parse_program(content))
+        return output.getvalue()
+
+    def test_document_structure(self):
+        """Test l'en-tête, la table xref (positions exactes) et le texte des pages."""
+        data = self.render(PROGRAM)
+        self.assertTrue(data.startswith(b"%PDF-1.4"))
+        self.assertTrue(data.rstrip().endswith(b"%%EOF"))
+
+        startxref = int(data.rsplit(b"startxref", 1)[1].split()[0])
+        self.assertTrue(data[startxref:].startswith(b"xref"))
+        entries = data[startxref:].split(b"\n")[3:]
+        number = 1
+        for entry in entries:
+            if not entry.endswith(b" n "):
+                break
+            offset = int(entry.split()[0])
+            self.assertTrue(data[offset:].startswith(b"%d 0 obj" % number))
+            number += 1
+
+        text = b"".join(_streams(data))
+        self.assertIn("(Squat \\(barre haute\\))".encode("cp1252"), text)
+        self.assertIn("(Développé couché)".encode("cp1252"), text)
+        self.assertIn(b"(Page 1)", text)
+
+    def test_pagination(self):
+        """Test qu'un long programme est paginé et que l'en-tête du tableau est répété."""
+        rows = "\n".join(f"| Jour {i} | Exercice {i} | 3 x 10 | Notes |" for i in range(200))
+        data = self.render("| Jour | Exercice | Séries | Notes |\n|---|---|---|---|\n" + rows)
+        match = re.search(rb"/Type /Pages /Kids \[[^\]]*\] /Count (\d+)", data)
+        pages = int(match.group(1))
+        self.assertGreater(pages, 1)
+        streams = _streams(data)
+        self.assertEqual(len(streams), pages)
+        for stream in streams:
+            self.assertIn(b"(Exercice)", stream)
+
+    def test_wrap_text(self):
+        """Test le retour à la ligne selon les métriques de la police."""
+        lines = wrap_text("Contrôler la descente et garder le dos droit " * 5, "F1", 10, 150)
+        self.assertGreater(len(lines), 1)
+        self.assertEqual(wrap_text("", "F1", 10, 150), [""])
+        # Mot plus long que la ligne coupé caractère par caractère
+        self.assertGreater(len(wrap_text("x" * 200, "F1", 10, 50)), 1)
+
+    def test_pages_streamed_incrementally(self):
+        """Test que les pages sont émises au fil du rendu, avant la fin du document."""
+        renderer = PdfRenderer()
+        blocks = [Block(PARAGRAPH, "Texte de remplissage " * 40) for _ in range(60)]
+        chunks = renderer.render(iter(blocks))
+        first_pages = [chunk for chunk, _ in zip(chunks, range(5))]
+        self.assertTrue(any(b"/Type /Page " in chunk for chunk in first_pages))
+
+    def test_export_job(self):
+        """Test la tâche d'export du pool (fichier temporaire)."""
+        path = pdf_export_job(PROGRAM)
+        try:
+            with open(path, "rb") as f:
+                self.assertTrue(f.read().startswith(b"%PDF"))
+        finally:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
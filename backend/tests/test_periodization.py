@@ -0,0 +1,84 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import json
+import os
+import sys
+
+import numpy as np
+
+# Ajout du chemin du projet au path pour permettre les importations
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.orchestrator import OrchestratorAgent
+from models.periodization import PeriodizationEngine
+
+
+class TestPeriodizationEngine(unittest.TestCase):
+    """Tests pour le moteur de périodisation."""
+
+    def setUp(self):
+        self.engine = PeriodizationEngine()
+
+    def test_strength_phases_follow_corpus(self):
+        """Test que les phases de musculation suivent les bornes du corpus sur 16 semaines."""
+        curves = self.engine.compute_curves("strength", 16, "avancé")
+        self.assertEqual(curves["phase"].tolist(), [0] * 4 + [1] * 4 + [2] * 4 + [3] * 2 + [4] * 2)
+        # Phase de force: 80-90% 1RM, phase de décharge: 50-60% 1RM
+        self.assertEqual(curves["intensity"][4], 80)
+        self.assertEqual(curves["intensity"][7], 90)
+        self.assertTrue(np.all(curves["intensity"][14:] <= 60))
+
+    def test_running_volume_progression(self):
+        """Test que le volume de course progresse et respecte le temps disponible."""
+        curves = self.engine.compute_curves("running", 12, "débutant", time_per_session=40)
+        minutes = curves["minutes"]
+        self.assertLess(minutes[0], minutes[-1])
+        self.assertTrue(np.all(minutes <= 40))
+        # Semaine allégée toutes les 4 semaines
+        self.assertTrue(curves["deload"][7])
+        self.assertLess(minutes[7], minutes[6])
+
+    def test_build_program(self):
+        """Test que le squelette couvre toutes les semaines et séances."""
+        program = self.engine.build_program(["running", "strength"], 10, "intermédiaire", "10 km", 4, 45)
+        self.assertEqual(len(program.weeks), 10)
+        self.assertTrue(all(len(week.sessions) == 4 for week in program.weeks))
+        focuses = {session.focus.split(" - ")[0] for week in program.weeks for session in week.sessions}
+        self.assertEqual(focuses, {"Course à pied", "Musculation"})
+        self.assertIn("Semaine 10", program.to_markdown())
+
+
+class TestOrchestratorPeriodizedProgram(unittest.TestCase):
+    """Tests pour la génération de programme via le moteur de périodisation."""
+
+    def setUp(self):
+        self.mock_llm = MagicMock()
+        self.agent_patcher = patch('agents.orchestrator.initialize_agent')
+        self.agent_patcher.start()
+        self.orchestrator = OrchestratorAgent(llm=self.mock_llm)
+
+    def tearDown(self):
+        self.agent_patcher.stop()
+
+    def test_fast_mode_skips_llm(self):
+        """Test que le mode rapide n'appelle pas le LLM."""
+        program = self.orchestrator.generate_periodized_program(["bodyweight"], 8, "débutant", "force", enrich=False)
+        self.mock_llm.invoke.assert_not_called()
+        self.assertEqual(len(program.weeks), 8)
+
+    def test_hybrid_mode_adds_notes(self):
+        """Test que le mode hybride ajoute la prose en un seul appel LLM."""
+        self.mock_llm.invoke = MagicMock(return_value=json.dumps({
+            "introduction": "Bienvenue.",
+            "advice": "Progresser doucement.",
+            "technique_notes": {"Pompes": "Gainer le tronc"}
+        }))
+        program = self.orchestrator.generate_periodized_program(["bodyweight"], 8, "débutant", "force")
+        self.mock_llm.invoke.assert_called_once()
+        self.assertIn("Bienvenue.", program.introduction)
+        self.assertEqual(program.advice, "Progresser doucement.")
+        self.assertEqual(program.weeks[0].sessions[0].exercises[0].notes, "Gainer le tronc")
+
+
+if __name__ == '__main__':
+    unittest.main()
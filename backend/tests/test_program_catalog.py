@@ -0,0 +1,117 @@
+import unittest
+import os
+import sys
+import tempfile
+from unittest.mock import patch
+
+# Ajout du chemin du projet au path pour permettre les importations
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.program_catalog import ProgramCatalog
+from models.program_data import ProgramDataManager
+from tests import write_program
+
+
+RUNNING = {"Jour": ["Lundi", "Mercredi", "Vendredi"], "Exercice": ["Footing", "Fractionné", "Footing"]}
+STRENGTH = {"Jour": ["Lundi", "Jeudi"], "Exercice": ["Squat", "Soulevé de terre"]}
+
+
+class TestProgramCatalog(unittest.TestCase):
+    """Tests du catalogue SQLite des programmes."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        # Les noms de fichiers ne décrivent pas le contenu: seul le contenu est indexé
+        write_program(self.tmp.name, "plan_a.xlsx", "Programme course à pied débutant", 1, RUNNING)
+        write_program(self.tmp.name, "plan_b.xlsx", "Programme musculation avancé", 12, STRENGTH)
+        self.manager = ProgramDataManager(programs_dir=self.tmp.name)
+        self.catalog = ProgramCatalog(self.manager, refresh_interval=0)
+
+    def tearDown(self):
+        self.catalog.close()
+        self.tmp.cleanup()
+
+    def filenames(self, **criteria):
+        return [entry["filename"] for entry in self.catalog.search(**criteria)]
+
+    def test_search_by_content(self):
+        """Test la recherche par discipline, niveau et durée exacte."""
+        self.assertEqual(self.filenames(discipline="course"), ["plan_a.xlsx"])
+        self.assertEqual(self.filenames(discipline="musculation", level="avancé"), ["plan_b.xlsx"])
+        # Durée exacte: 1 semaine ne correspond pas à 12
+        self.assertEqual(self.filenames(duration=1), ["plan_a.xlsx"])
+        self.assertEqual(self.filenames(duration=12), ["plan_b.xlsx"])
+        self.assertEqual(self.filenames(), ["plan_a.xlsx", "plan_b.xlsx"])
+
+        entry = self.catalog.search(duration=12)[0]
+        self.assertEqual(entry["frequency"], 2)
+        self.assertEqual(entry["sheet_count"], 13)
+        self.assertEqual(entry["disciplines"], ["strength"])
+
+    def test_search_touches_no_xlsx(self):
+        """Test qu'une recherche sur un catalogue à jour n'ouvre aucun fichier, même après redémarrage."""
+        self.catalog.refresh()
+        other = ProgramCatalog(ProgramDataManager(programs_dir=self.tmp.name), refresh_interval=0)
+        try:
+            with patch.object(ProgramDataManager, "extract_program_data", side_effect=AssertionError("XLSX lu")):
+                self.assertEqual([e["filename"] for e in other.search(level="débutant")], ["plan_a.xlsx"])
+        finally:
+            other.close()
+
+    def test_refresh_on_change(self):
+        """Test la prise en compte des fichiers modifiés, ajoutés et supprimés."""
+        self.catalog.refresh()
+        write_program(self.tmp.name, "plan_a.xlsx", "Programme course à pied débutant", 8, RUNNING)
+        stat = os.stat(os.path.join(self.tmp.name, "plan_a.xlsx"))
+        os.utime(os.path.join(self.tmp.name, "plan_a.xlsx"), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        write_program(self.tmp.name, "plan_c.xlsx", "Programme poids de corps", 4, {"Exercice": ["Pompes"]})
+        os.remove(os.path.join(self.tmp.name, "plan_b.xlsx"))
+
+        self.assertEqual(self.filenames(duration=8), ["plan_a.xlsx"])
+        self.assertEqual(self.filenames(discipline="poids de corps"), ["plan_c.xlsx"])
+        self.assertEqual(self.filenames(discipline="musculation"), [])
+
+    def test_manager_search_uses_catalog(self):
+        """Test que search_program_by_criteria n'utilise plus le nom de fichier."""
+        with patch("models.program_catalog.get_program_catalog", return_value=self.catalog):
+            results = self.manager.search_program_by_criteria(discipline="course", duration=1)
+        self.assertEqual([r["filename"] for r in results], ["plan_a.xlsx"])
+        self.assertIn("weeks", results[0])
+
+    def test_pagination(self):
+        """Test la pagination par curseur, le tri et la projection des champs."""
+        write_program(self.tmp.name, "plan_c.xlsx", "Programme poids de corps", 4, {"Exercice": ["Pompes"]})
+        page = self.catalog.page(sort="duration", order="desc", limit=2, fields=["filename", "duration"])
+        self.assertEqual(page.items, [{"filename": "plan_b.xlsx", "duration": 12}, {"filename": "plan_c.xlsx", "duration": 4}])
+        self.assertIsNotNone(page.next_cursor)
+
+        last = self.catalog.page(sort="duration", order="desc", limit=2, cursor=page.next_cursor, fields=["filename"])
+        self.assertEqual(last.items, [{"filename": "plan_a.xlsx"}])
+        self.assertIsNone(last.next_cursor)
+
+        by_name = self.catalog.page(limit=1)
+        self.assertEqual(set(by_name.items[0]), {"filename", "title", "disciplines", "level", "duration",
+                                                  "frequency", "sheet_count", "modified"})
+        names = [by_name.items[0]["filename"]]
+        cursor = by_name.next_cursor
+        while cursor:
+            page = self.catalog.page(limit=1, cursor=cursor, fields=["filename"])
+            names.extend(item["filename"] for item in page.items)
+            cursor = page.next_cursor
+        self.assertEqual(names, ["plan_a.xlsx", "plan_b.xlsx", "plan_c.xlsx"])
+
+    def test_invalid_page_arguments(self):
+        """Test le refus des curseurs, tris et champs invalides."""
+        cursor = self.catalog.page(limit=1).next_cursor
+        with self.assertRaises(ValueError):
+            self.catalog.page(sort="duration", cursor=cursor)
+        with self.assertRaises(ValueError):
+            self.catalog.page(cursor="pas-un-curseur")
+        with self.assertRaises(ValueError):
+            self.catalog.page(fields=["size"])
+        with self.assertRaises(ValueError):
+            self.catalog.page(sort="taille")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+import os
+import sys
+import tempfile
+from unittest.mock import patch
+
+import pandas as pd
+
+# Ajout du chemin du projet au path pour permettre les importations
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.program_data import ProgramDataManager
+from tests import write_program
+
+ROWS = {
+    "Jour": ["Lundi", "Mercredi", "Vendredi"],
+    "Exercice": ["Footing", "Fractionné", "Footing"],
+    "Durée": [30, 25, 40],
+}
+INTRODUCTION = "Programme course à pied débutant"
+
+
+class TestProgramDataExtraction(unittest.TestCase):
+    """Tests de la lecture des programmes XLSX et de leur cache."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "plan.xlsx")
+        write_program(self.tmp.name, "plan.xlsx", INTRODUCTION, 4, ROWS)
+        self.manager = ProgramDataManager(programs_dir=self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_extract(self):
+        """Test l'extraction de toutes les feuilles en une lecture."""
+        with patch("models.program_data.pd.ExcelFile", wraps=pd.ExcelFile) as excel_file:
+            data = self.manager.extract_program_data("plan.xlsx")
+        self.assertEqual(excel_file.call_count, 1)
+        self.assertEqual(data["title"], "plan")
+        self.assertEqual(data["introduction"], INTRODUCTION)
+        self.assertEqual(list(data["weeks"]), [f"Semaine {week}" for week in range(1, 5)])
+        self.assertEqual(data["weeks"]["Semaine 2"][1], {"Jour": "Mercredi", "Exercice": "Fractionné", "Durée": 25})
+
+    def test_cache_avoids_rereading(self):
+        """Test que le cache (mémoire puis disque) évite de relire le XLSX."""
+        first = self.manager.extract_program_data("plan.xlsx")
+        first["filename"] = "plan.xlsx"
+        with patch("models.program_data.pd.ExcelFile", side_effect=AssertionError("XLSX relu")):
+            self.assertNotIn("filename", self.manager.extract_program_data("plan.xlsx"))
+            # Nouveau gestionnaire (nouveau processus): lecture du cache disque
+            other = ProgramDataManager(programs_dir=self.tmp.name)
+            self.assertEqual(other.extract_program_data("plan.xlsx")["weeks"], first["weeks"])
+        self.assertNotIn(".cache", self.manager.get_available_programs())
+
+    def test_nested_mutation_does_not_corrupt_cache(self):
+        """Test que modifier les semaines d'un résultat ne modifie pas le cache."""
+        first = self.manager.extract_program_data("plan.xlsx")
+        first["weeks"]["Semaine 1"][0]["Exercice"] = "Modifié"
+        first["weeks"]["Semaine 2"].clear()
+        second = self.manager.extract_program_data("plan.xlsx")
+        self.assertEqual(second["weeks"]["Semaine 1"][0]["Exercice"], ROWS["Exercice"][0])
+        self.assertEqual(len(second["weeks"]["Semaine 2"]), len(ROWS["Exercice"]))
+
+    def test_cache_invalidated_on_change(self):
+        """Test qu'un fichier modifié est relu."""
+        self.manager.extract_program_data("plan.xlsx")
+        write_program(self.tmp.name, "plan.xlsx", "Programme modifié", 6, ROWS)
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        data = ProgramDataManager(programs_dir=self.tmp.name).extract_program_data("plan.xlsx")
+        self.assertEqual(len(data["weeks"]), 6)
+        self.assertEqual(self.manager.extract_program_data("plan.xlsx")["introduction"], "Programme modifié")
+
+    def test_corrupted_cache_ignored(self):
+        """Test qu'un cache illisible est ignoré."""
+        self.manager.extract_program_data("plan.xlsx")
+        with open(os.path.join(self.tmp.name, ".cache", "plan.xlsx.pkl"), "wb") as f:
+            f.write(b"corrompu")
+        data = ProgramDataManager(programs_dir=self.tmp.name).extract_program_data("plan.xlsx")
+        self.assertEqual(len(data["weeks"]), 4)
+
+    def test_missing_file(self):
+        """Test qu'un fichier absent donne un dictionnaire vide."""
+        self.assertEqual(self.manager.extract_program_data("absent.xlsx"), {})
+
+
+class TestProgramSummaryCache(unittest.TestCase):
+    """Tests du cache des résumés de programmes."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        for name in ("a.xlsx", "b.xlsx", "c.xlsx"):
+            write_program(self.tmp.name, name, INTRODUCTION, 2, ROWS)
+        self.manager = ProgramDataManager(programs_dir=self.tmp.name, summary_cache_size=2)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_summary_rendered_once(self):
+        """Test que le résumé n'est rendu qu'une fois par version, avec un ETag stable."""
+        with patch.object(ProgramDataManager, "_render_summary", wraps=self.manager._render_summary) as render:
+            first = self.manager.get_program_summary_entry("a.xlsx")
+            second = self.manager.get_program_summary_entry("a.xlsx")
+        self.assertEqual(render.call_count, 1)
+        self.assertIs(first, second)
+        self.assertTrue(first.etag.startswith('"') and first.etag.endswith('"'))
+        self.assertIn("## Semaine 1", first.content)
+        self.assertIn("| Lundi | Footing | 30 |", first.content)
+        self.assertEqual(self.manager.get_program_summary("a.xlsx"), first.content)
+
+    def test_summary_invalidated_and_bounded(self):
+        """Test l'invalidation sur modification et l'éviction LRU."""
+        first = self.manager.get_program_summary_entry("a.xlsx")
+        path = os.path.join(self.tmp.name, "a.xlsx")
+        write_program(self.tmp.name, "a.xlsx", INTRODUCTION, 3, ROWS)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        updated = self.manager.get_program_summary_entry("a.xlsx")
+        self.assertNotEqual(first.etag, updated.etag)
+        self.assertIn("## Semaine 3", updated.content)
+
+        self.manager.get_program_summary_entry("b.xlsx")
+        self.manager.get_program_summary_entry("c.xlsx")
+        self.assertEqual(list(self.manager._summaries), ["b.xlsx", "c.xlsx"])
+        self.assertIsNone(self.manager.get_program_summary_entry("absent.xlsx"))
+
+
+if __name__ == '__main__':
+    unittest.main()
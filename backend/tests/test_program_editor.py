@@ -0,0 +1,101 @@
+import unittest
+from unittest.mock import MagicMock
+import json
+import os
+import sys
+
+# Ajout du chemin du projet au path pour permettre les importations
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.program_editor import ProgramEditorAgent, split_week_sections
+from models.program_schema import TrainingProgram
+
+
+def make_markdown(weeks):
+    parts = ["### Programme Personnalisé\n\nIntroduction.\n\n"]
+    for n in range(1, weeks + 1):
+        parts.append(f"**Semaine {n}**\n\n| Exercice | Séries |\n|---|---|\n| Squat S{n} | 4x8 |\n\n")
+    parts.append("### Conseils de progression\n\nBien récupérer.\n")
+    return "".join(parts)
+
+
+class TestProgramEditorAgent(unittest.TestCase):
+    """Tests pour l'agent d'édition de programmes."""
+
+    def setUp(self):
+        self.mock_llm = MagicMock()
+        self.editor = ProgramEditorAgent(self.mock_llm)
+
+    def test_split_week_sections(self):
+        """Test que le découpage conserve le texte et repère les semaines."""
+        content = make_markdown(3)
+        sections = split_week_sections(content)
+        self.assertEqual("".join(text for _, text in sections), content)
+        self.assertEqual([r for r, _ in sections], [None, (1, 1), (2, 2), (3, 3), None])
+
+    def test_edit_markdown_only_sends_neighbours(self):
+        """Test que seules les semaines ciblées et voisines sont envoyées, et que le reste est conservé."""
+        content = make_markdown(12)
+        self.mock_llm.invoke = MagicMock(return_value=(
+            "**Semaine 7**\n\n| Exercice | Séries |\n|---|---|\n| Fentes | 3x10 |\n\n"
+            "**Semaine 8**\n\n| Exercice | Séries |\n|---|---|\n| Autre | 1x1 |\n"
+        ))
+
+        result = self.editor.edit_markdown(content, "Remplacer le squat par des fentes", 7, 7)
+
+        prompt = self.mock_llm.invoke.call_args[0][0]
+        self.assertIn("Squat S6", prompt)
+        self.assertIn("Squat S7", prompt)
+        self.assertIn("Squat S8", prompt)
+        self.assertNotIn("Squat S2", prompt)
+
+        self.assertIn("| Fentes | 3x10 |", result)
+        self.assertNotIn("Squat S7", result)
+        self.assertNotIn("| Autre | 1x1 |", result)
+        self.assertIn("Squat S8", result)
+        self.assertTrue(result.endswith("Bien récupérer.\n"))
+
+    def test_edit_markdown_missing_weeks(self):
+        """Test qu'une plage absente du programme lève une ValueError."""
+        with self.assertRaises(ValueError):
+            self.editor.edit_markdown(make_markdown(2), "modif", 5, 6)
+
+    def test_edit_structured(self):
+        """Test que seules les semaines ciblées d'un programme structuré sont remplacées."""
+        program = TrainingProgram.model_validate({"weeks": [
+            {"number": n, "sessions": [{"day": "Lundi", "exercises": [{"name": f"Course S{n}"}]}]}
+            for n in range(1, 5)
+        ]})
+        self.mock_llm.invoke = MagicMock(return_value=json.dumps({"weeks": [
+            {"sessions": [{"day": "Mardi", "exercises": [{"name": "Fractionné"}]}]}
+        ]}))
+
+        edited = self.editor.edit_structured(program, "Ajouter du fractionné", 3, 3)
+
+        self.assertEqual([week.number for week in edited.weeks], [1, 2, 3, 4])
+        self.assertEqual(edited.weeks[2].sessions[0].exercises[0].name, "Fractionné")
+        self.assertEqual(edited.weeks[3].sessions[0].exercises[0].name, "Course S4")
+        # Le programme d'origine n'est pas modifié
+        self.assertEqual(program.weeks[2].sessions[0].exercises[0].name, "Course S3")
+
+    def test_edit_structured_ignores_out_of_range_weeks(self):
+        """Test qu'une semaine hors plage est ignorée et qu'une semaine sans numéro prend le numéro libre."""
+        program = TrainingProgram.model_validate({"weeks": [
+            {"number": n, "sessions": [{"day": "Lundi", "exercises": [{"name": f"Course S{n}"}]}]}
+            for n in range(1, 5)
+        ]})
+        self.mock_llm.invoke = MagicMock(return_value=json.dumps({"weeks": [
+            {"number": 9, "sessions": [{"day": "Mardi", "exercises": [{"name": "Hors plage"}]}]},
+            {"sessions": [{"day": "Mardi", "exercises": [{"name": "Sans numéro"}]}]},
+            {"number": 3, "sessions": [{"day": "Mardi", "exercises": [{"name": "Semaine 3"}]}]}
+        ]}))
+
+        edited = self.editor.edit_structured(program, "Ajouter du fractionné", 2, 3)
+
+        self.assertEqual([week.number for week in edited.weeks], [1, 2, 3, 4])
+        names = [week.sessions[0].exercises[0].name for week in edited.weeks]
+        self.assertEqual(names, ["Course S1", "Sans numéro", "Semaine 3", "Course S4"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import os
+import sys
+import tempfile
+import time
+from unittest.mock import MagicMock, patch
+
+# Ajout du chemin du projet au path pour permettre les importations
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.program_data import ProgramDataManager
+from models.program_index import ProgramIndex, get_program_index
+from tests import write_program
+
+
+class TestProgramIndex(unittest.TestCase):
+    """Tests pour l'index de recherche des programmes existants."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        write_program(self.tmp.name, "plan_a.xlsx", "Programme course à pied débutant", 8, {
+            "Jour": ["Lundi", "Mercredi", "Vendredi"], "Exercice": ["Footing", "Fractionné", "Footing"]
+        })
+        write_program(self.tmp.name, "plan_b.xlsx", "Programme musculation avancé", 12, {
+            "Jour": ["Lundi", "Lundi", "Jeudi"], "Exercice": ["Squat", "Développé couché", "Soulevé de terre"]
+        })
+        self.manager = ProgramDataManager(programs_dir=self.tmp.name)
+        self.index = ProgramIndex(self.manager)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_describe_program(self):
+        """Test que les caractéristiques sont déduites du contenu du fichier."""
+        description = self.manager.describe_program("plan_b.xlsx")
+        self.assertEqual(description["disciplines"], ["strength"])
+        self.assertEqual(description["level"], "avancé")
+        self.assertEqual(description["duration"], 12)
+        self.assertEqual(description["frequency"], 2)
+
+    def test_search_ranks_nearest_program(self):
+        """Test que le programme le plus proche des critères arrive en tête."""
+        results = self.index.search(["running"], "débutant", 8)
+        self.assertEqual(results[0]["filename"], "plan_a.xlsx")
+        self.assertAlmostEqual(results[0]["score"], 1.0)
+        self.assertLess(results[1]["score"], 0.5)
+
+        results = self.index.search(["musculation"], "intermédiaire", 10)
+        self.assertEqual(results[0]["filename"], "plan_b.xlsx")
+        self.assertLess(results[0]["score"], 0.95)
+
+    def test_incremental_refresh(self):
+        """Test que seuls les fichiers ajoutés ou supprimés modifient l'index."""
+        self.index.refresh()
+        write_program(self.tmp.name, "plan_c.xlsx", "Programme poids de corps", 10, {"Exercice": ["Pompes"]})
+        os.remove(os.path.join(self.tmp.name, "plan_a.xlsx"))
+        time.sleep(0.01)
+
+        results = self.index.search(["bodyweight"], duration=10, k=5)
+        self.assertEqual({r["filename"] for r in results}, {"plan_b.xlsx", "plan_c.xlsx"})
+        self.assertEqual(results[0]["filename"], "plan_c.xlsx")
+
+
+    def test_orchestrators_share_program_manager(self):
+        """Test que les orchestrateurs créés à chaque requête réutilisent le gestionnaire du processus."""
+        from agents.orchestrator import OrchestratorAgent
+
+        with patch('agents.orchestrator.initialize_agent'):
+            first = OrchestratorAgent(llm=MagicMock(), program_manager=self.manager)
+            second = OrchestratorAgent(llm=MagicMock(), program_manager=self.manager)
+        self.assertIs(first.program_manager, self.manager)
+        self.assertIs(second.program_manager, self.manager)
+        self.assertIs(first.program_index, get_program_index(self.manager))
+        self.assertIs(first.program_index.program_manager, self.manager)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+import os
+import sys
+
+# Ajout du chemin du projet au path pour permettre les importations
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.program_parser import HEADING, LIST, PARAGRAPH, STRONG, TABLE, ProgramParser, parse_program
+
+PROGRAM = """### Programme de force
+
+Introduction du programme.
+
+**Semaine 1 - Adaptation**
+
+*Lundi - Force*
+
+Exercice | Séries
+---|---
+Squat | 4 x 8
+Fente \\| marchée | 3 x 10
+
+*Jeudi - Puissance*
+
+| Exercice | Séries |
+|:---|:---:|
+| Saut vertical | 5 x 3 |
+
+**Semaine 2 - Développement**
+
+| Jour | Exercice | Séries |
+|---|---|---|
+| Mardi | Soulevé de terre | 5 x 5 |
+
+### Conseils de progression
+
+- Dormir 8 heures
+"""
+
+
+class TestProgramParser(unittest.TestCase):
+    """Tests de l'analyseur markdown des programmes."""
+
+    def test_structure(self):
+        """Test le modèle semaines / séances / tableaux."""
+        document = parse_program(PROGRAM)
+        self.assertEqual(document.title, "Programme de force")
+        self.assertEqual(document.introduction, "Introduction du programme.")
+        self.assertEqual([week.number for week in document.weeks], [1, 2])
+
+        week = document.weeks[0]
+        self.assertEqual(week.title, "Semaine 1 - Adaptation")
+        self.assertEqual([day.title for day in week.days], ["Lundi - Force", "Jeudi - Puissance"])
+        # Tableau sans barre initiale, séparateur "---|---", barre échappée dans une cellule
+        table = week.days[0].tables[0]
+        self.assertEqual(table.headers, ["Exercice", "Séries"])
+        self.assertEqual(table.rows, [["Squat", "4 x 8"], ["Fente | marchée", "3 x 10"]])
+        self.assertEqual(document.notes, ["- Dormir 8 heures"])
+
+    def test_week_tables(self):
+        """Test la fusion des séances d'une semaine avec une colonne Jour, et les titres des semaines."""
+        tables = parse_program(PROGRAM).week_tables()
+        self.assertEqual([title for title, _, _ in tables], ["Semaine 1 - Adaptation", "Semaine 2 - Développement"])
+        _, headers, rows = tables[0]
+        self.assertEqual(headers, ["Jour", "Exercice", "Séries"])
+        self.assertEqual(rows[2], ["Jeudi - Puissance", "Saut vertical", "5 x 3"])
+        # Le tableau a déjà une colonne Jour
+        self.assertEqual(tables[1][1], ["Jour", "Exercice", "Séries"])
+
+    def test_incremental_matches_full_parse(self):
+        """Test qu'une analyse par petits fragments donne le même document."""
+        parser = ProgramParser()
+        blocks = []
+        for i in range(0, len(PROGRAM), 7):
+            blocks.extend(parser.feed(PROGRAM[i:i + 7]))
+        blocks.extend(parser.finish())
+        document = parse_program(PROGRAM)
+        self.assertEqual(parser.document, document)
+        self.assertEqual(blocks, document.blocks)
+        self.assertEqual(
+            [block.kind for block in blocks],
+            [HEADING, PARAGRAPH, STRONG, STRONG, TABLE, STRONG, TABLE, STRONG, TABLE, HEADING, LIST]
+        )
+
+    def test_char_by_char_feed(self):
+        """Test qu'un flux caractère par caractère (ligne longue incluse) donne le même document."""
+        text = PROGRAM + "\n" + "x" * 5000 + "\n"
+        parser = ProgramParser()
+        for char in text:
+            parser.feed(char)
+        parser.finish()
+        self.assertEqual(parser.document, parse_program(text))
+
+    def test_blocks_emitted_when_complete(self):
+        """Test qu'un tableau n'est émis qu'une fois terminé."""
+        parser = ProgramParser()
+        self.assertEqual(parser.feed("| A | B |\n|---|---|\n| 1 | 2 |\n"), [])
+        blocks = parser.feed("\nTexte")
+        self.assertEqual([block.kind for block in blocks], [TABLE])
+        self.assertEqual(blocks[0].table.rows, [["1", "2"]])
+        self.assertEqual([block.kind for block in parser.finish()], [PARAGRAPH])
+
+    def test_markdown_round_trip(self):
+        """Test que le rendu markdown est relu à l'identique."""
+        document = parse_program(PROGRAM)
+        again = parse_program(document.to_markdown())
+        self.assertEqual(again.week_tables(), document.week_tables())
+        self.assertIn("| Fente \\| marchée | 3 x 10 |", document.to_markdown())
+
+
+if __name__ == '__main__':
+    unittest.main()
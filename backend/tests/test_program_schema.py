@@ -0,0 +1,91 @@
+import unittest
+import json
+import os
+import sys
+
+# Ajout du chemin du projet au path pour permettre les importations
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.program_schema import TrainingProgram, parse_training_program, repair_json_text
+
+SAMPLE_PROGRAM = {
+    "title": "Programme Personnalisé - Course",
+    "introduction": "Construire l'endurance.",
+    "weeks": [
+        {
+            "number": 2,
+            "theme": "Développement",
+            "sessions": [
+                {"day": "Mardi", "exercises": [{"name": "Fractionné", "sets_reps": "6 x 400m"}]}
+            ]
+        },
+        {
+            "number": 1,
+            "theme": "Introduction",
+            "sessions": [
+                {
+                    "day": "Lundi",
+                    "focus": "Endurance",
+                    "exercises": [
+                        {"name": "Course lente", "sets_reps": "20 min", "intensity": "60-70% FCMax", "rest": None}
+                    ]
+                }
+            ]
+        }
+    ],
+    "advice": ["Augmenter de 10% par semaine", "Dormir suffisamment"]
+}
+
+
+class TestProgramSchema(unittest.TestCase):
+    """Tests pour le schéma de programme structuré."""
+
+    def test_parse_valid_json(self):
+        """Test qu'un JSON valide est validé et que les semaines sont triées."""
+        program = parse_training_program(json.dumps(SAMPLE_PROGRAM))
+        self.assertEqual([week.number for week in program.weeks], [1, 2])
+        self.assertEqual(program.weeks[0].sessions[0].exercises[0].rest, "")
+        self.assertIn("- Dormir suffisamment", program.advice)
+
+    def test_repair_fenced_truncated_json(self):
+        """Test que les blocs de code, virgules finales et réponses tronquées sont réparés."""
+        raw = "Voici le programme:\n```json\n" + json.dumps(SAMPLE_PROGRAM)[:-60] + ",\n"
+        program = parse_training_program(raw)
+        self.assertEqual(program.title, "Programme Personnalisé - Course")
+        self.assertGreaterEqual(len(program.weeks), 1)
+
+        self.assertEqual(json.loads(repair_json_text('{"a": [1, 2,],}')), {"a": [1, 2]})
+
+    def test_normalizes_alternative_keys(self):
+        """Test que les écarts de structure mineurs sont corrigés localement."""
+        raw = json.dumps({"weeks": [{"week": "Semaine 3", "days": [
+            {"jour": "Jeudi", "exercises": ["Gainage", {"exercise": "Squat", "sets": 4, "reps": 8}]}
+        ]}]})
+        program = parse_training_program(raw)
+        week = program.weeks[0]
+        self.assertEqual(week.number, 3)
+        self.assertEqual(week.sessions[0].day, "Jeudi")
+        self.assertEqual(week.sessions[0].exercises[1].sets_reps, "4 x 8")
+
+    def test_invalid_json_raises(self):
+        """Test qu'une réponse sans objet JSON lève une ValueError."""
+        with self.assertRaises(ValueError):
+            parse_training_program("Je ne peux pas générer ce programme.")
+
+    def test_rendering(self):
+        """Test que le markdown et les tableaux sont rendus depuis le même objet."""
+        program = TrainingProgram.model_validate(SAMPLE_PROGRAM)
+        markdown = program.to_markdown()
+        self.assertIn("**Semaine 1 - Introduction**", markdown)
+        self.assertIn("| Course lente | 20 min | 60-70% FCMax |  |  |", markdown)
+
+        tables = program.iter_week_tables()
+        self.assertEqual(len(tables), 2)
+        title, headers, rows = tables[0]
+        self.assertEqual(title, "Semaine 1 - Introduction")
+        self.assertEqual(headers[0], "Jour")
+        self.assertEqual(rows[0][:2], ["Lundi - Endurance", "Course lente"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import unittest
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+# Ajout du chemin du projet au path pour permettre les importations
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.llm_response import finish_reason, stream_chunks
+from models.qwen_model import QwenLLM, _async_clients, close_http_clients, get_async_http_client
+
+
+class FakeInferenceHandler(BaseHTTPRequestHandler):
+    """Serveur d'inférence simulé (API chat completion compatible OpenAI)."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server.requests.append((self.path, self.client_address[1], body))
+        time.sleep(server.delay)
+
+        status = server.statuses.pop(0) if server.statuses else 200
+        if status == 200 and body.get("stream"):
+            events = [{"choices": [{"delta": {"content": token}, "finish_reason": None}]} for token in server.tokens]
+            events[-1]["choices"][0]["finish_reason"] = "stop"
+            payload = "".join(f"data: {json.dumps(event)}\n\n" for event in events).encode() + b"data: [DONE]\n\n"
+        elif status == 200:
+            payload = json.dumps({"choices": [{
+                "message": {"role": "assistant", "content": "Réponse du modèle"},
+                "finish_reason": "length"
+            }]}).encode()
+        else:
+            payload = json.dumps({"error": "erreur simulée"}).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # Le client a abandonné la requête (test du timeout)
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestQwenLLMTransport(unittest.TestCase):
+    """Tests du transport HTTP de QwenLLM contre un serveur d'inférence local."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeInferenceHandler)
+        self.server.requests = []
+        self.server.statuses = []
+        self.server.delay = 0.0
+        self.server.tokens = []
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.llm = QwenLLM(
+            api_key="test",
+            base_url=f"http://127.0.0.1:{self.server.server_address[1]}",
+            retry_base_delay=0.01,
+            timeout=5
+        )
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_completion(self):
+        """Test l'appel, le corps de la requête et la raison de fin."""
+        generation = self.llm.generate(["Bonjour"]).generations[0][0]
+        self.assertEqual(generation.text, "Réponse du modèle")
+        self.assertEqual(generation.generation_info["finish_reason"], "length")
+        path, _, body = self.server.requests[0]
+        self.assertEqual(path, "/Qwen/QwQ-32B/v1/chat/completions")
+        self.assertEqual(body["max_tokens"], 1500)
+
+    def test_connection_reuse(self):
+        """Test que les appels successifs réutilisent la même connexion."""
+        for _ in range(3):
+            self.llm.invoke("Bonjour")
+        self.assertEqual(len({port for _, port, _ in self.server.requests}), 1)
+
+    def test_retry_on_rate_limit(self):
+        """Test les nouvelles tentatives sur 429 et 503."""
+        self.server.statuses = [429, 503]
+        self.assertEqual(self.llm.invoke("Bonjour"), "Réponse du modèle")
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_no_retry_on_client_error(self):
+        """Test qu'une erreur 400 n'est pas retentée."""
+        self.server.statuses = [400]
+        with self.assertRaises(httpx.HTTPStatusError):
+            self.llm.invoke("Bonjour")
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_timeout_honoured(self):
+        """Test que le champ timeout est appliqué à chaque appel."""
+        self.server.delay = 0.5
+        llm = QwenLLM(api_key="test", base_url=self.llm.base_url, timeout=0.1, max_retries=0)
+        with self.assertRaises(httpx.TimeoutException):
+            llm.invoke("Bonjour")
+
+    def test_streaming_filters_reasoning(self):
+        """Test le streaming avec suppression du raisonnement au fil des tokens."""
+        self.server.statuses = [429]
+        self.server.tokens = ["<thi", "nk>Je réfléchis</th", "ink>", "Voici ", "le programme."]
+        chunks = list(stream_chunks(self.llm, "Bonjour"))
+        self.assertEqual("".join(chunk.text for chunk in chunks), "Voici le programme.")
+        self.assertEqual(finish_reason(chunks[-1]), "stop")
+        self.assertTrue(self.server.requests[-1][2]["stream"])
+
+    def test_async_call(self):
+        """Test l'appel asynchrone avec nouvelle tentative."""
+        self.server.statuses = [502]
+        self.assertEqual(asyncio.run(self.llm.ainvoke("Bonjour")), "Réponse du modèle")
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_async_clients_per_loop(self):
+        """Test qu'un client asynchrone n'est partagé qu'au sein de sa boucle, et oublié une fois celle-ci fermée."""
+        async def client_pair():
+            pair = get_async_http_client("http://api", 5), get_async_http_client("http://api", 5)
+            return pair, len(_async_clients)
+
+        (first, again), _ = asyncio.run(client_pair())
+        self.assertIs(first, again)
+        (second, _), loops = asyncio.run(client_pair())
+        self.assertIsNot(first, second)
+        self.assertEqual(loops, 1)
+
+    def test_close_http_clients(self):
+        """Test que l'arrêt ferme les clients de la boucle courante."""
+        async def create_and_close():
+            client = get_async_http_client("http://api", 5)
+            await close_http_clients()
+            return client
+
+        self.assertTrue(asyncio.run(create_and_close()).is_closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+import os
+import sys
+
+# Ajout du chemin du projet au path pour permettre les importations
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.reasoning_filter import ReasoningFilter, strip_reasoning
+
+
+def stream(text, size):
+    """Filtre un texte découpé en fragments de `size` caractères."""
+    reasoning_filter = ReasoningFilter()
+    return "".join(reasoning_filter.filter_stream(text[i:i + size] for i in range(0, len(text), size)))
+
+
+class TestReasoningFilter(unittest.TestCase):
+    """Tests pour le filtre incrémental de raisonnement."""
+
+    def test_think_blocks_removed(self):
+        """Test la suppression des blocs <think>, y compris au milieu de la réponse."""
+        text = "<think>Je réfléchis.</think>\n\nVoici la réponse <THINK>caché</THINK>visible."
+        self.assertEqual(strip_reasoning(text), "Voici la réponse visible.")
+
+    def test_reasoning_preamble_removed(self):
+        """Test la suppression des phrases de raisonnement en tête de réponse uniquement."""
+        text = "Wait, the user wants a plan. Let me think.\nHmm, ok.\n### Programme\n- Maybe plus tard."
+        self.assertEqual(strip_reasoning(text), "### Programme\n- Maybe plus tard.")
+        self.assertEqual(strip_reasoning("So, voici le plan."), "voici le plan.")
+
+    def test_orphan_closing_tag(self):
+        """Test qu'une balise fermante orpheline supprime le raisonnement qui la précède."""
+        self.assertEqual(strip_reasoning("Le modèle réfléchit ici\n</think>\nRéponse"), "Réponse")
+
+    def test_chunking_invariance(self):
+        """Test que le résultat ne dépend pas du découpage en fragments."""
+        text = ("Okay, the user asks. <think>plan</think>Réponse <5 km, pas de <b>balise</b>.\n"
+                "| Lundi | Footing |</think>\n")
+        expected = stream(text, len(text))
+        for size in (1, 2, 3, 7, 16):
+            self.assertEqual(stream(text, size), expected)
+        self.assertEqual(expected, "Réponse <5 km, pas de <b>balise</b>.\n| Lundi | Footing |\n")
+
+    def test_streaming_emits_early(self):
+        """Test que la réponse est émise au fil de l'eau, sans attendre la fin."""
+        reasoning_filter = ReasoningFilter()
+        self.assertEqual(reasoning_filter.feed("<think>long raisonnement"), "")
+        self.assertEqual(reasoning_filter.feed("</think>Voici le programme de course "), "Voici le programme de course ")
+
+
+if __name__ == '__main__':
+    unittest.main()
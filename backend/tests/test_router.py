@@ -0,0 +1,122 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import os
+import sys
+
+import numpy as np
+
+# Ajout du chemin du projet au path pour permettre les importations
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.orchestrator import OrchestratorAgent
+from agents.router import (IntentRouter, RouteMetrics, ROUTE_AGENT_GRAPH, ROUTE_KNOWLEDGE,
+                           ROUTE_PROGRAM, ROUTE_SINGLE_LLM)
+
+
+class KeywordEmbeddings:
+    """Modèle d'embedding simulé: un axe par mot-clé."""
+
+    model_name = "keyword-embeddings-test"
+    AXES = ["qu'est-ce", "programme", "bonjour", "compare"]
+
+    def embed_query(self, text):
+        lowered = text.lower()
+        return [1.0 if axis in lowered else 0.0 for axis in self.AXES] + [0.1]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+EXAMPLES = {
+    ROUTE_KNOWLEDGE: ["Qu'est-ce que le fartlek ?"],
+    ROUTE_SINGLE_LLM: ["Bonjour !"],
+    ROUTE_AGENT_GRAPH: ["Compare la course et la natation"],
+    ROUTE_PROGRAM: ["Crée-moi un programme"],
+}
+
+
+class TestIntentRouter(unittest.TestCase):
+    """Tests pour le routeur d'intention."""
+
+    def test_nearest_centroid(self):
+        """Test que chaque message est envoyé vers la route la plus proche."""
+        router = IntentRouter(KeywordEmbeddings(), examples=EXAMPLES, metrics=RouteMetrics())
+        self.assertEqual(router.route("Qu'est-ce que la VMA ?").route, ROUTE_KNOWLEDGE)
+        self.assertEqual(router.route("Bonjour Athly").route, ROUTE_SINGLE_LLM)
+        self.assertEqual(router.route("Un programme de course svp").route, ROUTE_PROGRAM)
+        # Aucun exemple proche: repli sur le graph d'agent
+        self.assertEqual(router.route("xyz").route, ROUTE_AGENT_GRAPH)
+
+    def test_keyword_fallback(self):
+        """Test le routage par mots-clés sans modèle d'embedding."""
+        router = IntentRouter(metrics=RouteMetrics())
+        self.assertEqual(router.route("Crée-moi un programme de course").route, ROUTE_PROGRAM)
+        self.assertEqual(router.route("Compare la course et le vélo").route, ROUTE_AGENT_GRAPH)
+        self.assertEqual(router.route("Bonjour !").route, ROUTE_SINGLE_LLM)
+
+    def test_metrics_snapshot(self):
+        """Test les statistiques de latence par route."""
+        metrics = RouteMetrics()
+        for value in np.linspace(0.1, 1.0, 10):
+            metrics.record(ROUTE_SINGLE_LLM, value)
+        stats = metrics.snapshot()[ROUTE_SINGLE_LLM]
+        self.assertEqual(stats["count"], 10)
+        self.assertAlmostEqual(stats["mean"], 0.55)
+        self.assertGreater(stats["p95"], stats["p50"])
+
+
+class TestOrchestratorRouting(unittest.TestCase):
+    """Tests pour l'utilisation du routeur dans l'orchestrateur."""
+
+    def setUp(self):
+        self.mock_llm = MagicMock()
+        self.mock_llm.invoke = MagicMock(return_value="Réponse simple")
+        self.mock_expert = MagicMock()
+        self.mock_expert.knowledge_base.embedding_model = None
+        self.agent_patcher = patch('agents.orchestrator.initialize_agent')
+        self.agent_patcher.start()
+        self.orchestrator = OrchestratorAgent(llm=self.mock_llm, sport_expert=self.mock_expert)
+        self.orchestrator.agent_graph = MagicMock()
+        self.orchestrator.agent_graph.process_message = MagicMock(return_value="Réponse du graph")
+        self.orchestrator.has_graph = True
+
+    def tearDown(self):
+        self.agent_patcher.stop()
+
+    def test_simple_message_skips_graph(self):
+        """Test qu'une salutation est traitée en un seul appel LLM."""
+        response = self.orchestrator.process_chat("Bonjour !")
+        self.assertIn("Réponse simple", response)
+        self.mock_llm.invoke.assert_called_once()
+        self.orchestrator.agent_graph.process_message.assert_not_called()
+
+    def test_knowledge_base_answer_without_llm(self):
+        """Test qu'un document très pertinent est retourné sans appel LLM."""
+        document = MagicMock(page_content="Le fartlek alterne les allures.")
+        self.mock_expert.knowledge_base.query_with_scores = MagicMock(return_value=[(document, 0.9)])
+        self.orchestrator.router.route = MagicMock(return_value=MagicMock(route=ROUTE_KNOWLEDGE, score=0.8))
+
+        response = self.orchestrator.process_chat("Qu'est-ce que le fartlek ?")
+        self.assertIn("fartlek alterne", response)
+        self.mock_llm.invoke.assert_not_called()
+
+    def test_program_request_uses_generator(self):
+        """Test qu'une demande de programme est transmise au générateur de programmes."""
+        self.orchestrator._find_program_for_message = MagicMock(return_value=None)
+        self.orchestrator.generate_periodized_program = MagicMock(return_value=MagicMock(to_markdown=lambda: "Programme"))
+
+        response = self.orchestrator.process_chat("Crée-moi un programme de musculation de 10 semaines, 4 séances par semaine")
+        self.assertIn("Programme", response)
+        args, kwargs = self.orchestrator.generate_periodized_program.call_args
+        self.assertEqual(args[:3], (["strength"], 10, "débutant"))
+        self.assertEqual(kwargs["frequency"], 4)
+
+    def test_complex_message_uses_graph(self):
+        """Test qu'une demande complexe passe par le graph d'agent."""
+        response = self.orchestrator.process_chat("Compare la course et la natation pour maigrir")
+        self.assertIn("Réponse du graph", response)
+        self.orchestrator.agent_graph.process_message.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
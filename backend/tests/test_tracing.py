@@ -0,0 +1,177 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Ajout du chemin du projet au path pour permettre les importations
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitoring import tracing
+from monitoring.tracing import (
+    BatchSpanProcessor, JsonLinesExporter, OtlpHttpExporter, Tracer,
+    configure_tracing, current_trace_id, parse_traceparent, run_in_context, span
+)
+from models.llm_router import LLMRouter
+from tests.test_llm_router import FakeProvider
+
+
+class MemoryExporter:
+    """Exportateur conservant les spans en mémoire."""
+
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+    def shutdown(self):
+        pass
+
+
+class TestTracing(unittest.TestCase):
+    """Tests des spans de trace, de leur propagation et de leur export."""
+
+    def setUp(self):
+        self.exporter = MemoryExporter()
+        self.tracer = configure_tracing(self.exporter)
+
+    def tearDown(self):
+        configure_tracing(None)
+
+    def finished(self):
+        self.tracer.processor.force_flush()
+        return {s.name: s for s in self.exporter.spans}
+
+    def test_nested_spans(self):
+        """Test la parenté des spans imbriqués et l'enregistrement des erreurs."""
+        with span("http.request") as root:
+            self.assertEqual(current_trace_id(), root.trace_id)
+            with span("orchestrator.process_chat", message_chars=12):
+                with self.assertRaises(ValueError):
+                    with span("kb.query"):
+                        raise ValueError("index indisponible")
+        self.assertIsNone(current_trace_id())
+
+        spans = self.finished()
+        self.assertIsNone(spans["http.request"].parent_id)
+        self.assertEqual(spans["orchestrator.process_chat"].parent_id, root.span_id)
+        self.assertEqual(spans["kb.query"].parent_id, spans["orchestrator.process_chat"].span_id)
+        self.assertEqual({s.trace_id for s in spans.values()}, {root.trace_id})
+        self.assertEqual(spans["kb.query"].status, tracing.STATUS_ERROR)
+        self.assertEqual(spans["kb.query"].attributes["error.type"], "ValueError")
+        self.assertEqual(spans["orchestrator.process_chat"].attributes["message_chars"], 12)
+        self.assertGreaterEqual(spans["http.request"].duration_ms, spans["kb.query"].duration_ms)
+
+    def test_traceparent(self):
+        """Test la reprise d'une trace amont et le rejet des en-têtes invalides."""
+        header = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+        self.assertEqual(parse_traceparent(header), ("4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7", True))
+        self.assertIsNone(parse_traceparent("00-" + "0" * 32 + "-00f067aa0ba902b7-01"))
+        self.assertIsNone(parse_traceparent("invalide"))
+        self.assertIsNone(parse_traceparent(None))
+
+        with span("http.request", traceparent=header) as root:
+            self.assertEqual(root.trace_id, "4bf92f3577b34da6a3ce929d0e0e4736")
+            self.assertEqual(root.parent_id, "00f067aa0ba902b7")
+
+        # Trace amont non échantillonnée: rien n'est exporté
+        with span("http.request", traceparent=header[:-2] + "00"):
+            with span("llm.invoke"):
+                pass
+        self.assertEqual(len(self.finished()), 1)
+
+    def test_sampling(self):
+        """Test que la décision d'échantillonnage est prise à la racine pour toute la trace."""
+        tracer = Tracer(BatchSpanProcessor(self.exporter), sample_rate=0.0)
+        with tracer.span("http.request") as root:
+            with tracer.span("llm.invoke") as child:
+                self.assertFalse(child.sampled)
+        tracer.shutdown()
+        self.assertIsNotNone(root.trace_id)
+        self.assertEqual(self.exporter.spans, [])
+
+    def test_context_propagation(self):
+        """Test la propagation du span courant dans les threads d'un exécuteur."""
+        def work():
+            with span("tool.search_program") as child:
+                return child
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            with span("graph.run") as root:
+                child = executor.submit(run_in_context(work)).result()
+                orphan = executor.submit(work).result()
+
+        self.assertEqual(child.parent_id, root.span_id)
+        self.assertEqual(child.trace_id, root.trace_id)
+        self.assertIsNone(orphan.parent_id)
+
+    def test_llm_router_spans(self):
+        """Test les spans du routeur LLM: un span par fournisseur appelé, sous le span de routage."""
+        router = LLMRouter([("trace_a", FakeProvider("", fail=True)), ("trace_b", FakeProvider("réponse"))])
+        with span("graph.agent") as root:
+            self.assertEqual(router.invoke("Bonjour").content, "réponse")
+
+        self.tracer.processor.force_flush()
+        calls = [s for s in self.exporter.spans if s.name == "llm.invoke"]
+        route = next(s for s in self.exporter.spans if s.name == "llm.route")
+        self.assertEqual(route.parent_id, root.span_id)
+        self.assertEqual(route.attributes["provider"], "trace_b")
+        self.assertEqual({s.attributes["provider"] for s in calls}, {"trace_a", "trace_b"})
+        self.assertTrue(all(s.parent_id == route.span_id for s in calls))
+        failed = next(s for s in calls if s.attributes["provider"] == "trace_a")
+        succeeded = next(s for s in calls if s.attributes["provider"] == "trace_b")
+        self.assertEqual(failed.status, tracing.STATUS_ERROR)
+        self.assertEqual(succeeded.attributes["prompt_chars"], len("Bonjour"))
+        self.assertEqual(succeeded.attributes["response_chars"], len("réponse"))
+
+
+class TestSpanExport(unittest.TestCase):
+    """Tests des exportateurs JSON-lines et OTLP."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        configure_tracing(None)
+        shutil.rmtree(self.temp_dir)
+
+    def test_jsonl_export(self):
+        """Test l'écriture des spans dans un fichier JSON-lines à l'arrêt du traceur."""
+        path = os.path.join(self.temp_dir, "logs", "traces.jsonl")
+        configure_tracing(JsonLinesExporter(path))
+        with span("http.request", route="/api/chat"):
+            with span("llm.invoke", input_tokens=42):
+                pass
+        configure_tracing(None)
+
+        with open(path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([r["name"] for r in records], ["llm.invoke", "http.request"])
+        self.assertEqual(records[0]["parent_id"], records[1]["span_id"])
+        self.assertEqual(records[0]["attributes"]["input_tokens"], 42)
+        self.assertGreaterEqual(records[1]["end_ns"], records[1]["start_ns"])
+
+    def test_otlp_payload(self):
+        """Test le format OTLP/JSON des spans envoyés au collecteur."""
+        tracer = Tracer()
+        with tracer.span("llm.invoke", provider="qwen", output_tokens=7, cached=False) as s:
+            pass
+        payload = OtlpHttpExporter("http://collector:4318/v1/traces").payload([s])
+
+        resource = payload["resourceSpans"][0]
+        self.assertEqual(resource["resource"]["attributes"][0]["value"], {"stringValue": "athly-backend"})
+        exported = resource["scopeSpans"][0]["spans"][0]
+        self.assertEqual(exported["traceId"], s.trace_id)
+        self.assertEqual(exported["parentSpanId"], "")
+        self.assertEqual(exported["status"], {"code": 1})
+        attributes = {a["key"]: a["value"] for a in exported["attributes"]}
+        self.assertEqual(attributes["provider"], {"stringValue": "qwen"})
+        self.assertEqual(attributes["output_tokens"], {"intValue": "7"})
+        self.assertEqual(attributes["cached"], {"boolValue": False})
+
+
+if __name__ == "__main__":
+    unittest.main()